@@ -0,0 +1,124 @@
+"""
+AdaptiveThreshold - 距離信号の統計に基づく画面遷移閾値
+
+--threshold auto 指定時に使用する。固定のハミング距離の代わりに、直近の
+距離信号のロバスト統計（中央値 + k × MAD）からサンプルごとの閾値をオンラインで
+求める。カルーセルやスピナーのように小さな変化が続く区間では閾値が上がる。
+
+さらにヒステリシス（遷移後の画面が持続するかの確認）で、キーボードの一瞬の
+表示やフラッシュのような短い過渡的スパイクを、安定フレーム探索と OCR の前に除外する。
+"""
+
+from collections import deque
+from typing import List, Tuple
+
+import numpy as np
+
+from phash_engine import hamming_distances
+
+
+# MAD を正規分布の標準偏差に換算する係数
+MAD_SCALE = 1.4826
+
+# 統計が揃うまで（ウォームアップ中）に使う閾値（固定閾値のデフォルトと同じ）
+DEFAULT_INITIAL_THRESHOLD = 25
+
+
+class AdaptiveThreshold:
+    """
+    直近の距離信号から閾値を求めるオンライン推定器
+
+    各サンプルの閾値はそのサンプルより前の距離だけから計算する（因果的）。
+    """
+
+    def __init__(self, window: int = 120, sensitivity: float = 4.0,
+                 floor: float = 16, ceiling: float = 40,
+                 min_samples: int = 10,
+                 initial: float = DEFAULT_INITIAL_THRESHOLD) -> None:
+        """
+        Args:
+            window: 統計に使う直近のサンプル数（0.5秒間隔で120 = 1分）
+            sensitivity: 中央値に加える MAD の倍数
+            floor: 閾値の下限（静止画面の圧縮ノイズを遷移とみなさないため）
+            ceiling: 閾値の上限（変化の多い区間でも実際の画面遷移は検出するため）
+            min_samples: 統計を使い始めるまでのサンプル数
+            initial: ウォームアップ中の閾値
+        """
+        self.history = deque(maxlen=window)
+        self.sensitivity = sensitivity
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.initial = initial
+
+    def current(self) -> float:
+        """現在の履歴から求めた閾値"""
+        if len(self.history) < self.min_samples:
+            return float(self.initial)
+        values = np.asarray(self.history, dtype=np.float64)
+        median = np.median(values)
+        mad = np.median(np.abs(values - median))
+        threshold = median + self.sensitivity * MAD_SCALE * mad
+        return float(np.clip(threshold, self.floor, self.ceiling))
+
+    def update(self, distance: float) -> float:
+        """
+        距離を1つ受け取り、その距離に適用する閾値を返す
+
+        Args:
+            distance: 前サンプルとのハミング距離
+
+        Returns:
+            このサンプルの閾値（distance を履歴に加える前の統計から計算）
+        """
+        threshold = self.current()
+        self.history.append(distance)
+        return threshold
+
+    def thresholds_for(self, distances: np.ndarray) -> np.ndarray:
+        """距離信号全体のサンプルごとの閾値（update() を順に適用した結果）"""
+        return np.array([self.update(d) for d in np.asarray(distances).tolist()],
+                        dtype=np.float64)
+
+
+def suppress_transients(hashes: np.ndarray, candidates: np.ndarray,
+                        thresholds: np.ndarray, persist: int = 2,
+                        release_ratio: float = 0.5) -> Tuple[List[int], List[int]]:
+    """
+    遷移後の画面が持続しない過渡的スパイクを除外（ヒステリシス）
+
+    距離インデックス i の遷移（hashes[i] → hashes[i + 1]）は、遷移後の
+    persist サンプルすべてが遷移前の画面から閾値 × release_ratio より
+    離れている場合だけ確定する。直後に元の画面へ戻るスパイクは除外され、
+    元の画面へ戻る側の遷移もあわせて除外される。
+
+    Args:
+        hashes: サンプルのpHash配列
+        candidates: 閾値を超えた距離インデックスの配列
+        thresholds: 距離インデックスごとの閾値
+        persist: 遷移後に持続を確認するサンプル数
+        release_ratio: 持続判定に使う閾値の割合（検出閾値より低くしてヒステリシスにする）
+
+    Returns:
+        (kept, suppressed): 確定した距離インデックスと除外した距離インデックス
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    kept, suppressed = [], []
+    spike = None  # 直近に除外したスパイク: (距離インデックス, スパイク前のハッシュ)
+
+    for i in np.asarray(candidates).tolist():
+        release = thresholds[i] * release_ratio
+
+        # 除外したスパイクから元の画面へ戻る遷移
+        if spike is not None and i - spike[0] <= persist:
+            if hamming_distances(hashes[i + 1:i + 2], spike[1])[0] <= release:
+                suppressed.append(i)
+                continue
+
+        after = hashes[i + 2:i + 2 + persist]
+        if len(after) == 0 or np.all(hamming_distances(after, hashes[i]) > release):
+            kept.append(i)
+        else:
+            suppressed.append(i)
+            spike = (i, hashes[i])
+    return kept, suppressed
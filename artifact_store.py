@@ -0,0 +1,120 @@
+"""
+ArtifactStore - 抽出からAI記事生成への画像の受け渡し（同じプロセス内）
+
+保存したスクリーンショットを AI記事生成であらためてファイルから読み込み、
+base64 エンコードすると、リクエストの作成までにファイルの読み込みが画像の枚数分かかる。
+
+- 保存時にエンコードした画像のバイト列を、上限バイト数つきのバッファに保持する
+  （上限を超えたら古いものから削除。削除された画像はファイルから読み込む）
+- base64 文字列は画像ごとに1回だけ作成し、リトライ時のリクエストでも再利用する
+- メディアタイプは実際にエンコードした形式（ファイルから読み込む場合は拡張子）から決める
+"""
+
+import base64
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from image_encoder import media_type_for
+
+
+# 保持する画像の合計の上限（Claude API の1リクエストの上限: 3.75MB × 20枚 に余裕を持たせた値）
+DEFAULT_ARTIFACT_BUFFER_MB = 80
+
+
+class ImageArtifact:
+    """エンコード済みの画像（base64 は最初に必要になったときに1回だけ作成）"""
+
+    def __init__(self, data: bytes, media_type: str, source: str = 'memory') -> None:
+        """
+        Args:
+            data: エンコード済みの画像のバイト列
+            media_type: メディアタイプ（'image/png' など）
+            source: 取得元（'memory': 保存時のバッファ、'file': ファイルから読み込み）
+        """
+        self.data = data
+        self.media_type = media_type
+        self.source = source
+        self.encoded: Optional[str] = None
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'ImageArtifact':
+        """画像ファイルを読み込む（メディアタイプは拡張子から決める）"""
+        return cls(Path(path).read_bytes(), media_type_for(path), source='file')
+
+    @property
+    def size(self) -> int:
+        """バイト数"""
+        return len(self.data)
+
+    def base64(self) -> str:
+        """base64 文字列（2回目以降は作成済みの文字列を返す）"""
+        if self.encoded is None:
+            self.encoded = base64.b64encode(self.data).decode('utf-8')
+        return self.encoded
+
+    def image_block(self) -> Dict:
+        """Claude API の画像ブロック"""
+        return {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": self.media_type,
+                "data": self.base64()
+            }
+        }
+
+
+class ArtifactBuffer:
+    """エンコード済みの画像を合計バイト数の上限つきで保持するバッファ（スレッドセーフ）"""
+
+    def __init__(self, max_bytes: int = DEFAULT_ARTIFACT_BUFFER_MB * 1024 * 1024) -> None:
+        """
+        Args:
+            max_bytes: 保持する画像の合計の上限（0の場合は保持しない）
+        """
+        self.max_bytes = max(0, max_bytes)
+        self.artifacts: 'OrderedDict[str, ImageArtifact]' = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(path: Path) -> str:
+        """バッファのキー（絶対パス）"""
+        return str(Path(path).resolve())
+
+    def put(self, path: Path, data: bytes, media_type: str) -> None:
+        """画像を追加し、上限を超えたら古いものから削除"""
+        if len(data) > self.max_bytes:
+            return
+        key = self.key(path)
+        with self.lock:
+            previous = self.artifacts.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self.artifacts[key] = ImageArtifact(data, media_type)
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.artifacts.popitem(last=False)
+                self.total_bytes -= evicted.size
+
+    def get(self, path: Path) -> Optional[ImageArtifact]:
+        """画像を取得（なければ None）"""
+        with self.lock:
+            return self.artifacts.get(self.key(path))
+
+    def load(self, path: Path) -> ImageArtifact:
+        """
+        画像を取得（バッファになければファイルから読み込む）
+
+        Raises:
+            FileNotFoundError: バッファにもファイルにもない場合
+        """
+        artifact = self.get(path)
+        if artifact is not None:
+            return artifact
+        return ImageArtifact.from_file(path)
+
+    def __len__(self) -> int:
+        return len(self.artifacts)
@@ -0,0 +1,184 @@
+"""
+CandidateTable - 候補の数値列を NumPy の構造化配列で保持する列指向テーブル
+
+長いアニメーションの多い録画では候補が数万件になる。候補を List[Dict] のまま
+扱うと、キー文字列を候補ごとに持ち、スコアの計算やソートも1件ずつの
+Python 呼び出しになる。
+
+- frame_idx, timestamp, 遷移の大きさ, 安定性, UI重要度（とその上界）, スコア, pHash を
+  構造化配列の列として保持し、スコア計算・ソート・絞り込み・選択を配列全体で行う
+- 列ごとの有無フラグで、元の dict にキーがなかったこと（未評価の候補の 'score' など）を表す
+- 数値以外の値（ui_elements, detected_texts, text_regions など）は行ごとの dict に保持
+- to_candidates() は from_candidates() に渡した dict と同じ値・型の dict を返す
+  （metadata.json の形式に可逆に戻せる）
+- 行番号で取り出すと、その行だけを dict に戻す（table[row]）。遅延評価の選択は
+  テーブルを候補列として受け取り、評価する候補だけを dict にする
+- 列名で取り出すと列の値の配列を返す（table['timestamp']）。行を dict にしない
+"""
+
+import bisect
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+# 構造化配列に保持する数値列
+NUMERIC_COLUMNS = ('frame_idx', 'timestamp', 'transition_magnitude', 'stability_score',
+                   'ui_importance_score', 'ui_importance_bound', 'score', 'frame_hash')
+
+
+def presence_field(column: str) -> str:
+    """列の有無フラグのフィールド名"""
+    return f'has_{column}'
+
+
+def column_dtype(column: str, values: Sequence) -> np.dtype:
+    """列の型（整数だけの列は int64、pHash は uint64、それ以外は float64）"""
+    if column == 'frame_hash':
+        return np.dtype(np.uint64)
+    if values and all(isinstance(v, (int, np.integer)) and not isinstance(v, bool)
+                      for v in values):
+        return np.dtype(np.int64)
+    return np.dtype(np.float64)
+
+
+class CandidateTable:
+    """候補の列指向テーブル"""
+
+    def __init__(self, records: np.ndarray, details: List[Dict]) -> None:
+        """
+        Args:
+            records: 数値列と有無フラグの構造化配列
+            details: 行ごとの数値以外の値
+        """
+        self.records = records
+        self.details = details
+
+    @classmethod
+    def from_candidates(cls, candidates: Sequence[Dict]) -> 'CandidateTable':
+        """候補の dict のリストからテーブルを作成"""
+        fields = []
+        columns = {}
+        for column in NUMERIC_COLUMNS:
+            values = [c.get(column) for c in candidates]
+            present = [v for v in values if v is not None]
+            fields.append((column, column_dtype(column, present)))
+            fields.append((presence_field(column), np.bool_))
+            columns[column] = values
+
+        records = np.zeros(len(candidates), dtype=fields)
+        for column, values in columns.items():
+            present = np.array([v is not None for v in values], dtype=bool)
+            records[presence_field(column)] = present
+            records[column][present] = [v for v in values if v is not None]
+
+        details = [{key: value for key, value in c.items() if key not in NUMERIC_COLUMNS}
+                   for c in candidates]
+        return cls(records, details)
+
+    def to_candidates(self) -> List[Dict]:
+        """候補の dict のリストに戻す（from_candidates() の入力と同じ値・型）"""
+        columns = {column: self.records[column].tolist() for column in NUMERIC_COLUMNS}
+        presence = {column: self.records[presence_field(column)].tolist()
+                    for column in NUMERIC_COLUMNS}
+
+        candidates = []
+        for row, details in enumerate(self.details):
+            candidate = {column: columns[column][row] for column in NUMERIC_COLUMNS
+                         if presence[column][row]}
+            candidate.update(details)
+            candidates.append(candidate)
+        return candidates
+
+    def candidate(self, row: int) -> Dict:
+        """1行を候補の dict に戻す（to_candidates() の1要素と同じ）"""
+        record = self.records[row]
+        candidate = {column: record[column].item() for column in NUMERIC_COLUMNS
+                     if record[presence_field(column)]}
+        candidate.update(self.details[row])
+        return candidate
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_candidates())
+
+    def __getitem__(self, rows) -> Union[Dict, np.ndarray, 'CandidateTable']:
+        """
+        行番号なら候補の dict、列名なら列の値（column()）、真偽値のマスクまたは
+        行番号の配列なら絞り込んだテーブル（NumPy の構造化配列と同じ使い分け）
+        """
+        if isinstance(rows, (int, np.integer)):
+            return self.candidate(rows)
+        if isinstance(rows, str):
+            return self.column(rows)
+        indices = np.arange(len(self))[rows]
+        return CandidateTable(self.records[indices], [self.details[i] for i in indices])
+
+    def column(self, name: str) -> np.ndarray:
+        """列の値（キーがなかった行は NaN）"""
+        values = self.records[name].astype(np.float64)
+        values[~self.records[presence_field(name)]] = np.nan
+        return values
+
+    def compute_scores(self, score_fn: Callable, ui_column: str = 'ui_importance_score'
+                       ) -> np.ndarray:
+        """
+        全行のスコアをまとめて計算
+
+        Args:
+            score_fn: (遷移の大きさ, 安定性, UI重要度) の配列からスコアの配列を返す関数
+            ui_column: UI重要度に使う列（上界を求める場合は 'ui_importance_bound'）
+        """
+        return score_fn(self.column('transition_magnitude'),
+                        self.column('stability_score'),
+                        self.column(ui_column))
+
+    def upper_bounds(self, score_fn: Callable) -> np.ndarray:
+        """スコアの上界（確定済みの行はスコア、それ以外は UI重要度の上界から計算）"""
+        return np.where(self.records[presence_field('score')], self.column('score'),
+                        self.compute_scores(score_fn, 'ui_importance_bound'))
+
+    def order_by_score(self, scores: Optional[np.ndarray] = None) -> np.ndarray:
+        """スコアの降順（同点は元の順）の行番号"""
+        if scores is None:
+            scores = self.column('score')
+        return np.lexsort((np.arange(len(self)), -scores))
+
+    def select_top(self, target_count: int, min_interval: float,
+                   scores: Optional[np.ndarray] = None,
+                   accept: Optional[Callable[[int], bool]] = None) -> np.ndarray:
+        """
+        スコアの高い順に、選択済みと min_interval 秒以上離れた行を選択
+
+        選択済みのタイムスタンプをソート済みで保持し、近すぎるかどうかは
+        前後の1件ずつとの比較（二分探索）で判定する。
+
+        Args:
+            target_count: 選択する目標枚数
+            min_interval: 選択する行間の最小時間間隔（秒）
+            scores: 選択に使うスコア（Noneの場合は 'score' 列）
+            accept: 時間的に離れた行を選択する直前の判定（False の場合は選ばない）
+
+        Returns:
+            選択した行番号（タイムスタンプ順）
+        """
+        timestamps = self.records['timestamp'].tolist()
+        selected_times: List[float] = []
+        selected_rows = []
+        for row in self.order_by_score(scores).tolist():
+            if len(selected_rows) >= target_count:
+                break
+            timestamp = timestamps[row]
+            position = bisect.bisect_left(selected_times, timestamp)
+            neighbors = selected_times[max(0, position - 1):position + 1]
+            if any(abs(timestamp - t) < min_interval for t in neighbors):
+                continue
+            if accept is not None and not accept(row):
+                continue
+            selected_times.insert(position, timestamp)
+            selected_rows.append(row)
+
+        rows = np.array(selected_rows, dtype=np.int64)
+        return rows[np.argsort(self.records['timestamp'][rows], kind='stable')]
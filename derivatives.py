@@ -0,0 +1,107 @@
+"""
+Derivatives - 保存時に派生画像（縮小版・コンタクトシート）を作成
+
+公開用のサムネイル・レスポンシブ画像を、保存したスクリーンショットを
+あとから読み直して作ると、画像ごとにデコードが1回余分にかかる。
+保存と同じパスで、メモリ上のフレームから派生画像を作る。
+
+- 縮小は解像度ピラミッド: 大きい幅から順に、1つ前（より大きい）の縮小画像から
+  INTER_AREA で縮小する（元のフレームから毎回縮小しない）
+- 元のフレームの幅以上の幅は作らない（拡大しない）
+- コンタクトシートは全スクリーンショットの縮小画像をタイル状に並べた1枚の画像
+  （各スクリーンショットの位置をメタデータに記録し、スプライトとして使える）
+"""
+
+import argparse
+from typing import Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+# コンタクトシートの1枚あたりの幅・列数・余白・背景色
+CONTACT_SHEET_CELL_WIDTH = 320
+CONTACT_SHEET_COLUMNS = 5
+CONTACT_SHEET_PADDING = 8
+CONTACT_SHEET_BACKGROUND = (255, 255, 255)
+
+# 派生画像の出力ディレクトリ（出力ディレクトリからの相対パス）とコンタクトシートのファイル名
+DERIVATIVES_DIRNAME = "derivatives"
+CONTACT_SHEET_BASENAME = "contact_sheet"
+
+
+def parse_widths(value: str) -> List[int]:
+    """'320,640,1280' 形式の幅のリストを解析（重複を除いて昇順）"""
+    try:
+        widths = sorted({int(width) for width in value.split(',') if width.strip()})
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid widths: '{value}' (e.g. 320,640,1280)")
+    if not widths or widths[0] <= 0:
+        raise argparse.ArgumentTypeError(f"invalid widths: '{value}' (positive integers)")
+    return widths
+
+
+def resize_pyramid(frame: np.ndarray, widths: Sequence[int]) -> Dict[int, np.ndarray]:
+    """
+    幅ごとの縮小画像を、大きい幅から順に1つ前の縮小画像から作成
+
+    Args:
+        frame: 元のフレーム
+        widths: 作成する幅（元のフレームの幅以上の幅は作らない）
+
+    Returns:
+        {幅: 縮小画像}
+    """
+    height, width = frame.shape[:2]
+    levels = {}
+    source = frame
+    for target in sorted(set(widths), reverse=True):
+        if target >= width:
+            continue
+        target_height = max(1, round(height * target / width))
+        source = cv2.resize(source, (target, target_height), interpolation=cv2.INTER_AREA)
+        levels[target] = source
+    return levels
+
+
+def derivative_filename(filename: str, width: int) -> str:
+    """派生画像のファイル名（'01_00-15_score87.png' → '01_00-15_score87_w320.png'）"""
+    stem, dot, extension = filename.rpartition('.')
+    if not dot:
+        return f"{filename}_w{width}"
+    return f"{stem}_w{width}.{extension}"
+
+
+def build_contact_sheet(thumbnails: Sequence[np.ndarray],
+                        columns: int = CONTACT_SHEET_COLUMNS,
+                        padding: int = CONTACT_SHEET_PADDING
+                        ) -> Tuple[np.ndarray, List[Tuple[int, int, int, int]]]:
+    """
+    縮小画像をタイル状に並べたコンタクトシートを作成
+
+    Args:
+        thumbnails: 並べる縮小画像（BGR）
+        columns: 列数
+        padding: 画像の間と外周の余白（ピクセル）
+
+    Returns:
+        (コンタクトシート, 各画像の (x, y, 幅, 高さ))
+    """
+    if not thumbnails:
+        raise ValueError("No thumbnails for the contact sheet")
+    columns = max(1, min(columns, len(thumbnails)))
+    rows = -(-len(thumbnails) // columns)
+    cell_width = max(t.shape[1] for t in thumbnails)
+    cell_height = max(t.shape[0] for t in thumbnails)
+
+    sheet = np.empty((padding + rows * (cell_height + padding),
+                      padding + columns * (cell_width + padding), 3), dtype=np.uint8)
+    sheet[:] = CONTACT_SHEET_BACKGROUND
+    cells = []
+    for i, thumbnail in enumerate(thumbnails):
+        x = padding + (i % columns) * (cell_width + padding)
+        y = padding + (i // columns) * (cell_height + padding)
+        height, width = thumbnail.shape[:2]
+        sheet[y:y + height, x:x + width] = thumbnail
+        cells.append((x, y, width, height))
+    return sheet, cells
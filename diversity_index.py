@@ -0,0 +1,164 @@
+"""
+DiversityIndex - 選択済み画面の pHash による見た目の重複の排除
+
+時間間隔（--interval）だけでは、同じ画面に戻った場合（タブの往復・一覧と詳細の
+行き来など）に見た目がほぼ同じスクリーンショットが複数選ばれる。
+選択済みの候補の pHash を BK-tree に登録し、新しい候補と半径 radius 以内
+（ハミング距離）の選択済み候補があれば重複として除外する。
+
+- BK-tree は各ノードの子を「親とのハミング距離」で分ける。三角不等式により、
+  検索する半径に入らない距離の子の部分木はたどらない（全件比較しない）
+- 除外した候補は、重複先の選択済み候補の 'duplicates' に記録する
+  （メタデータに出力し、どの画面がなぜ選ばれなかったかを追跡できるようにする）
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# pHash のビット数（ハミング距離の最大値）
+HASH_BITS = 64
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """64bit ハッシュのハミング距離"""
+    return (hash_a ^ hash_b).bit_count()
+
+
+class BKTree:
+    """ハミング距離の BK-tree（半径内の最近傍検索）"""
+
+    def __init__(self) -> None:
+        # ノード: [ハッシュ, 登録順, 値, {親との距離: 子ノード}]
+        self.root: Optional[list] = None
+        self.size = 0
+        # 検索で距離を計算したノード数（全件比較との比較用）
+        self.comparisons = 0
+
+    def add(self, hash_value: int, item: Any) -> None:
+        """ハッシュと値を登録"""
+        node = [int(hash_value), self.size, item, {}]
+        self.size += 1
+        if self.root is None:
+            self.root = node
+            return
+
+        parent = self.root
+        while True:
+            distance = hamming_distance(node[0], parent[0])
+            child = parent[3].get(distance)
+            if child is None:
+                parent[3][distance] = node
+                return
+            parent = child
+
+    def nearest(self, hash_value: int, radius: int) -> Optional[Tuple[int, Any]]:
+        """
+        半径 radius 以内で最も近い登録済みの値を検索
+
+        Returns:
+            (ハミング距離, 値)（半径内になければ None。同じ距離なら先に登録した値）
+        """
+        hash_value = int(hash_value)
+        best = None  # (距離, 登録順, 値)
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            self.comparisons += 1
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= radius and (best is None or (distance, node[1]) < best[:2]):
+                best = (distance, node[1], node[2])
+
+            # 子の部分木の要素は、検索するハッシュから |distance - 子の距離| 以上離れている
+            limit = radius if best is None else best[0]
+            for child_distance, child in node[3].items():
+                if abs(distance - child_distance) <= limit:
+                    stack.append(child)
+
+        return None if best is None else (best[0], best[2])
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class DiversityFilter:
+    """選択済み候補と見た目が重複する候補を除外するフィルタ"""
+
+    def __init__(self, radius: int) -> None:
+        """
+        Args:
+            radius: 重複とみなす pHash のハミング距離（この値以下なら重複）
+        """
+        self.radius = radius
+        self.tree = BKTree()
+        # 除外した候補の数
+        self.rejected = 0
+
+    def add(self, candidate: Dict) -> None:
+        """選択した候補を登録（'frame_hash' がない候補は重複判定の対象外）"""
+        candidate.setdefault('duplicates', [])
+        if 'frame_hash' in candidate:
+            self.tree.add(candidate['frame_hash'], candidate)
+
+    def find(self, candidate: Dict, radius: Optional[int] = None
+             ) -> Optional[Tuple[int, Dict]]:
+        """
+        候補と重複する選択済み候補を検索
+
+        Returns:
+            (ハミング距離, 選択済み候補)（半径内になければ None）
+        """
+        if 'frame_hash' not in candidate:
+            return None
+        return self.tree.nearest(candidate['frame_hash'],
+                                 self.radius if radius is None else radius)
+
+    def reject(self, candidate: Dict, kept: Dict, distance: int) -> None:
+        """除外した候補を重複先の候補の 'duplicates' に記録"""
+        self.rejected += 1
+        kept.setdefault('duplicates', []).append({
+            'timestamp': candidate['timestamp'],
+            'score': candidate.get('score'),
+            'hamming_distance': distance
+        })
+
+    def accept(self, candidate: Dict) -> bool:
+        """
+        重複がなければ候補を登録して True、重複していれば記録して False を返す
+        （選択の直前に呼ぶ）
+        """
+        duplicate = self.find(candidate)
+        if duplicate is not None:
+            self.reject(candidate, duplicate[1], duplicate[0])
+            return False
+        self.add(candidate)
+        return True
+
+    def record(self, candidate: Dict) -> None:
+        """
+        除外済みの候補を最も近い選択済み候補に記録
+        （重複先の候補が後から除外された場合は、半径外の候補に記録されることがある）
+        """
+        nearest = self.find(candidate, HASH_BITS)
+        if nearest is not None:
+            self.reject(candidate, nearest[1], nearest[0])
+
+
+def duplicate_positions(selected: List[Dict], radius: int) -> List[int]:
+    """
+    選択結果の中で、よりスコアの高い候補と重複する候補の位置を返す
+
+    スコアの高い順（同点はタイムスタンプ順）に登録し、登録済みと
+    半径 radius 以内の候補を重複とする。
+    """
+    tree = BKTree()
+    order = sorted(range(len(selected)),
+                   key=lambda i: (-selected[i]['score'], selected[i]['timestamp']))
+    positions = []
+    for i in order:
+        if 'frame_hash' not in selected[i]:
+            continue
+        if tree.nearest(selected[i]['frame_hash'], radius) is not None:
+            positions.append(i)
+        else:
+            tree.add(selected[i]['frame_hash'], selected[i])
+    return sorted(positions)
@@ -5,23 +5,55 @@ App Screenshot Extractor
 """
 
 import argparse
+import contextlib
+import hashlib
 import json
 import os
+import sqlite3
 import sys
+import tempfile
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import Any, Callable, Iterator, List, Dict, Sequence, Tuple, Optional, Union
 
 import cv2
 import numpy as np
-import imagehash
-from PIL import Image
 from tqdm import tqdm
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
 load_dotenv()
 
+from frame_source import FRAME_SOURCE_BACKENDS, create_frame_source
+from phash_engine import PHashEngine, consecutive_distances
+from parallel_scan import scan_hash_signal_parallel
+from temporal_search import TargetedHasher, bisect_transitions
+from signal_cache import SignalCache
+from adaptive_threshold import AdaptiveThreshold, suppress_transients
+from transition_events import TransitionEventTracker, coalesce_transitions
+from lazy_selection import select_top_lazily
+from interval_selection import select_optimal, select_optimal_lazily
+from diversity_index import DiversityFilter, duplicate_positions
+from candidate_table import CandidateTable
+from ocr_pool import OCRWorkerPool, detect_with_reader
+from incremental_ocr import IncrementalOCR
+from keyword_matcher import KeywordMatcher
+from frame_store import FrameLRU, iter_frames, pack_text_regions, unpack_text_regions
+from derivatives import (CONTACT_SHEET_BASENAME, CONTACT_SHEET_CELL_WIDTH, DERIVATIVES_DIRNAME,
+                         build_contact_sheet, derivative_filename, parse_widths, resize_pyramid)
+from artifact_store import DEFAULT_ARTIFACT_BUFFER_MB, ArtifactBuffer, ImageArtifact
+from token_budget import ImageBudgetOptimizer, estimate_text_tokens, split_budget
+from image_processor import ImageProcessor
+from image_encoder import DEFAULT_IMAGE_FORMAT, IMAGE_FORMATS, ImageEncoder, get_image_format
+from ocr_profiles import (DEFAULT_OCR_PROFILE, OCR_PROFILES, benchmark_profiles, downscale_for_ocr,
+                          format_benchmark_table, get_ocr_profile, scale_ocr_results,
+                          to_pixel_bbox)
+from ocr_cache import (DEFAULT_OCR_CACHE_RADIUS, DEFAULT_OCR_CACHE_SIZE, OCR_CACHE_FILENAME,
+                       OCRCache)
+from tuning import ParameterTuner, format_json, format_table, parse_range, plot_distance_signal
+
 # EasyOCRは初回実行時にモデルをダウンロードするため、遅延インポート
 easyocr_reader = None
 
@@ -72,36 +104,175 @@ IMPORTANT_UI_KEYWORDS = [
     'Profile', 'My Page', 'Favorite', 'Notification', 'Share'
 ]
 
+# 画面遷移検出のサンプリング間隔（秒）
+DEFAULT_SAMPLE_INTERVAL = 0.5
+# 粗密探索（--coarse-to-fine）時の粗いサンプリング間隔（秒）
+COARSE_SAMPLE_INTERVAL = 2.0
+# 1つの遷移イベントにまとめる連続サンプルの間隔の上限（秒、画面アニメーションの長さの目安）
+EVENT_MAX_GAP = 1.0
+
+# OCRワーカー1つあたりの未完了のテキスト領域の検出バッチの上限
+# （ProcessPoolExecutor は開始前のバッチの画像も親プロセスに保持するため、
+# スキャンが検出より速い場合はこれを超えないように古いバッチの完了を待つ）
+MAX_DETECTIONS_PER_OCR_WORKER = 2
+
+# AI記事生成でチャンクごとの草稿を並行して生成するリクエストの最大数
+DEFAULT_AI_CONCURRENCY = 4
+
 TITLE_KEYWORDS = [
     'タイトル', 'ヘッダー', '画面', 'ページ',
     'Title', 'Header', 'Screen', 'Page'
 ]
 
+# UI重要度の加点（ボタン・タイトルのキーワード、テキスト量）
+UI_BUTTON_SCORE = 15
+UI_TITLE_SCORE = 20
+UI_TEXT_COUNT_SCORE = 10
+UI_TEXT_COUNT_THRESHOLD = 5
+
+# 既定のキーワード: {ui_elements の type: (キーワードのリスト, 加点)}
+DEFAULT_KEYWORD_LISTS = {
+    'button': (IMPORTANT_UI_KEYWORDS, UI_BUTTON_SCORE),
+    'title': (TITLE_KEYWORDS, UI_TITLE_SCORE)
+}
+DEFAULT_KEYWORD_MATCHER = KeywordMatcher.from_keyword_lists(DEFAULT_KEYWORD_LISTS)
+
 
 class ScreenshotExtractor:
     """動画からスクリーンショットを抽出するメインクラス"""
 
     def __init__(self, video_path: str, output_dir: str,
-                 transition_threshold: int = 25,
+                 transition_threshold: Union[int, str] = 25,
                  min_time_interval: float = 15.0,
-                 target_count: int = 10):
+                 target_count: int = 10,
+                 frame_backend: str = 'opencv',
+                 single_pass: bool = False,
+                 workers: int = 1,
+                 sample_interval: Optional[float] = None,
+                 coarse_to_fine: bool = False,
+                 signal_cache_dir: Optional[str] = None,
+                 ocr_cache_dir: Optional[str] = None,
+                 ocr_cache_radius: int = DEFAULT_OCR_CACHE_RADIUS,
+                 ocr_cache_size: int = DEFAULT_OCR_CACHE_SIZE,
+                 ocr_workers: int = 1,
+                 ocr_batch_size: Optional[int] = None,
+                 incremental_ocr: bool = False,
+                 ocr_profile: str = DEFAULT_OCR_PROFILE,
+                 keyword_dicts: Optional[List[str]] = None,
+                 frame_cache_size: int = 0,
+                 selection: str = 'greedy',
+                 diversity_radius: Optional[int] = None,
+                 image_format: str = DEFAULT_IMAGE_FORMAT,
+                 image_quality: Optional[int] = None,
+                 encode_workers: int = 0,
+                 derivative_widths: Optional[List[int]] = None,
+                 contact_sheet: bool = False,
+                 artifact_buffer_mb: int = DEFAULT_ARTIFACT_BUFFER_MB):
         """
         Args:
             video_path: 入力動画ファイルパス
             output_dir: 出力ディレクトリ
-            transition_threshold: 画面遷移検出の閾値（ハミング距離）
+            transition_threshold: 画面遷移検出の閾値（ハミング距離、'auto' の場合は
+                距離信号の統計から自動決定し、過渡的なスパイクを除外する）
             min_time_interval: スクリーンショット間の最小時間間隔（秒）
             target_count: 抽出する目標枚数
+            frame_backend: 画面遷移検出のフレーム供給バックエンド（opencv, ffmpeg, pyav）
+            single_pass: 画面遷移検出と安定フレーム検出を1パスで行う（シークしない）
+            workers: 画面遷移検出のワーカープロセス数（0の場合はCPUコア数）
+            sample_interval: 画面遷移検出のサンプリング間隔（秒）
+                （Noneの場合は通常0.5秒、粗密探索時は2秒）
+            coarse_to_fine: 粗いサンプリングで閾値を超えた区間だけを
+                二分探索し、フレーム単位で遷移位置を特定する
+            signal_cache_dir: ハッシュ信号のキャッシュディレクトリ（Noneの場合はキャッシュしない）
+            ocr_cache_dir: OCR結果のキャッシュディレクトリ（Noneの場合はキャッシュしない）
+            ocr_cache_radius: OCRキャッシュで同じ画面とみなす pHash のハミング距離
+            ocr_cache_size: OCRキャッシュに保持する最大エントリ数
+            ocr_workers: OCRのワーカープロセス数（1の場合はメインプロセスで実行、
+                0の場合はCPUコア数）
+            ocr_batch_size: テキスト領域の検出でまとめて推論するフレーム数
+                （Noneの場合はOCRプロファイルの値）
+            incremental_ocr: 前回文字認識した画面から変化した領域だけを文字認識する
+            ocr_profile: OCRプロファイル（fast, balanced, accurate）
+            keyword_dicts: 既定のキーワードに追加するキーワード辞書（JSON）のパス
+            frame_cache_size: 候補のフル解像度フレームをメモリに保持する最大数
+                （0の場合は保持せず、保存時に選択されたフレームだけを読み直す）
+            selection: 上位の選択方法（greedy: スコア順の貪欲法、
+                optimal: スコアの合計が最大になる組み合わせ）
+            diversity_radius: 選択済みと見た目が重複するとみなす pHash のハミング距離
+                （Noneの場合は見た目の重複を除外しない）
+            image_format: スクリーンショットの画像形式（png, webp, jpeg）
+            image_quality: webp・jpeg の品質（0〜100、Noneの場合は形式の既定値）
+            encode_workers: 画像のエンコードのスレッド数（0の場合はCPUコア数）
+            derivative_widths: 保存時に作成する縮小版の幅（Noneの場合は作成しない）
+            contact_sheet: 全スクリーンショットを並べたコンタクトシートを作成する
+            artifact_buffer_mb: AI記事生成へ受け渡すために保持するエンコード済み画像の
+                合計の上限（MB、0の場合は保持せず、AI記事生成でファイルから読み込む）
+
+        Raises:
+            ValueError: キーワード辞書の形式・画像形式が不正な場合
         """
         self.video_path = video_path
         self.output_dir = Path(output_dir)
         self.transition_threshold = transition_threshold
+        self.auto_threshold = transition_threshold == 'auto'
+        # --threshold auto で除外した過渡的スパイクの数（省略できたOCR呼び出しの数）
+        self.suppressed_transients = 0
+        # OCRの文字認識を実行した候補の数
+        self.ocr_recognitions = 0
         self.min_time_interval = min_time_interval
         self.target_count = target_count
+        self.frame_backend = frame_backend
+        self.single_pass = single_pass
+        self.workers = workers
+        self.coarse_to_fine = coarse_to_fine
+        if sample_interval is None:
+            sample_interval = COARSE_SAMPLE_INTERVAL if coarse_to_fine else DEFAULT_SAMPLE_INTERVAL
+        self.sample_interval = sample_interval
+        self.signal_cache = SignalCache(signal_cache_dir) if signal_cache_dir else None
+        self.ocr_cache_dir = ocr_cache_dir
+        self.ocr_cache_radius = ocr_cache_radius
+        self.ocr_cache_size = ocr_cache_size
+        self.ocr_cache = None
+        # OCRキャッシュから結果を取得した候補数と、OCRを実行してキャッシュした候補数
+        self.ocr_cache_hits = 0
+        self.ocr_cache_misses = 0
+        self.ocr_workers = ocr_workers if ocr_workers > 0 else (os.cpu_count() or 1)
+        self.ocr_profile_name = ocr_profile
+        self.ocr_profile = get_ocr_profile(ocr_profile)
+        if ocr_batch_size is None:
+            ocr_batch_size = self.ocr_profile['detect_batch_size']
+        self.ocr_batch_size = max(1, ocr_batch_size)
+        self.ocr_pool = None
+        self.incremental_ocr = IncrementalOCR() if incremental_ocr else None
+        self.keyword_matcher = DEFAULT_KEYWORD_MATCHER
+        if keyword_dicts:
+            self.keyword_matcher = KeywordMatcher.from_keyword_lists(DEFAULT_KEYWORD_LISTS,
+                                                                     keyword_dicts)
+        # 候補のフル解像度フレーム（候補自体はフレームを保持しない）
+        self.frame_cache = FrameLRU(frame_cache_size)
+        # 保存時に動画から読み直したフレーム数
+        self.refetched_frames = 0
+        self.selection = selection
+        self.diversity_radius = diversity_radius
+        # 見た目の重複として除外した候補の数
+        self.diversity_rejected = 0
+        get_image_format(image_format)
+        self.image_format = image_format
+        self.image_quality = image_quality
+        self.encode_workers = encode_workers
+        # 画像のエンコードの実時間（秒）と書き出したバイト数
+        self.encode_seconds = 0.0
+        self.encoded_bytes = 0
+        self.derivative_widths = sorted(set(derivative_widths or []))
+        self.contact_sheet = contact_sheet
+        # AI記事生成へ受け渡すエンコード済みのスクリーンショット
+        self.artifacts = ArtifactBuffer(artifact_buffer_mb * 1024 * 1024)
 
         # 出力ディレクトリの作成
         self.screenshots_dir = self.output_dir / "screenshots"
         self.screenshots_dir.mkdir(parents=True, exist_ok=True)
+        if self.derivative_widths:
+            (self.output_dir / DERIVATIVES_DIRNAME).mkdir(exist_ok=True)
 
         # 動画情報の初期化
         self.cap = None
@@ -115,6 +286,10 @@ class ScreenshotExtractor:
         self.process_width = 1280
         self.process_height = 720
 
+        # pHashエンジン（サンプルフレームをバッチ単位でハッシュ化）
+        self.phash_engine = PHashEngine()
+        self.hash_batch_size = 32
+
     def open_video(self) -> bool:
         """動画ファイルを開き、情報を取得"""
         if not os.path.exists(self.video_path):
@@ -149,58 +324,380 @@ class ScreenshotExtractor:
         """処理用に720pにリサイズ"""
         return cv2.resize(frame, (self.process_width, self.process_height))
 
-    def compute_phash(self, frame: np.ndarray) -> imagehash.ImageHash:
-        """フレームのperceptual hashを計算"""
-        # OpenCV (BGR) -> PIL (RGB)
-        pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        return imagehash.phash(pil_image)
+    def create_frame_source(self):
+        """画面遷移検出用のフレームソースを生成"""
+        return create_frame_source(
+            self.frame_backend,
+            self.video_path,
+            (self.process_width, self.process_height)
+        )
+
+    def sample_step(self) -> int:
+        """サンプリング間隔（フレーム数）"""
+        return max(1, int(self.fps * self.sample_interval))
+
+    def signal_cache_params(self, backend: Optional[str] = None) -> Dict:
+        """ハッシュ信号の内容を決めるパラメータ（キャッシュキーの一部）"""
+        return {
+            'step': self.sample_step(),
+            'process_size': [self.process_width, self.process_height],
+            'backend': backend or self.frame_backend,
+            'total_frames': self.total_frames,
+            'fps': self.fps
+        }
+
+    def compute_hash_signal(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        サンプルフレームのpHash列（ハッシュ信号）を取得
+
+        キャッシュが有効な場合は、同じ動画・サンプリングパラメータの信号を
+        ディスクから読み込む（デコードとハッシュ計算を省略）。
+
+        Returns:
+            (frame_indices, hashes): サンプルしたフレーム番号（int64）と
+            対応するpHash（uint64）の配列
+        """
+        if self.signal_cache is None:
+            return self.scan_hash_signal()
+
+        key = self.signal_cache.make_key(self.video_path, self.signal_cache_params())
+        cached = self.signal_cache.load(key)
+        if cached is not None:
+            frame_indices, _, hashes = cached
+            print(f"  Loaded hash signal from cache ({len(frame_indices)} samples)")
+            return frame_indices, hashes
+
+        frame_indices, hashes = self.scan_hash_signal()
+        if len(frame_indices) > 0:
+            self.signal_cache.save(key, frame_indices, frame_indices / self.fps, hashes)
+        return frame_indices, hashes
+
+    def scan_hash_signal(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        動画をスキャンしてサンプルフレームのpHash列（ハッシュ信号）を計算
+
+        Returns:
+            (frame_indices, hashes): サンプルしたフレーム番号（int64）と
+            対応するpHash（uint64）の配列
+        """
+        # フレームを間引いて処理（毎フレームは不要、0.5秒ごとなど）
+        skip_frames = self.sample_step()
+
+        # 複数プロセスで区間ごとに並列スキャン
+        workers = self.workers if self.workers > 0 else (os.cpu_count() or 1)
+        if workers > 1:
+            return scan_hash_signal_parallel(
+                video_path=self.video_path,
+                backend=self.frame_backend,
+                process_size=(self.process_width, self.process_height),
+                step=skip_frames,
+                total_frames=self.total_frames,
+                workers=workers,
+                batch_size=self.hash_batch_size,
+                fps=self.fps
+            )
+
+        # 間引いたフレームはデコード後のBGR変換・縮小を行わない
+        source = self.create_frame_source()
+        if not source.open():
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64)
+
+        try:
+            with tqdm(total=self.total_frames, desc="Scanning frames") as pbar:
+                def frames_with_progress():
+                    for frame_idx, small_frame in source.iter_frames(step=skip_frames):
+                        pbar.update(min(frame_idx + 1, self.total_frames) - pbar.n)
+                        yield frame_idx, small_frame
+
+                # バッチ単位でまとめてハッシュ化
+                signal = self.phash_engine.hash_stream(frames_with_progress(),
+                                                       self.hash_batch_size)
+                pbar.update(self.total_frames - pbar.n)
+        finally:
+            source.close()
+
+        return signal
+
+    def transitions_from_signal(self, frame_indices: np.ndarray,
+                                hashes: np.ndarray) -> List[Dict]:
+        """
+        ハッシュ信号から画面遷移を抽出
+
+        Args:
+            frame_indices: サンプルしたフレーム番号の配列
+            hashes: 対応するpHashの配列
+
+        連続して閾値を超えたサンプル（画面アニメーション）は1つの遷移イベントにまとめる。
+
+        Returns:
+            画面遷移イベントのリスト: [{'frame_idx', 'timestamp', 'magnitude',
+            'settle_frame_idx', 'settle_timestamp', 'sample_count'}, ...]
+            （frame_idx は最初に閾値を超えたサンプル、magnitude はピークの距離、
+            settle_frame_idx は最後に閾値を超えたサンプル）
+        """
+        # 前サンプルとのハミング距離（XOR + popcount を一括計算）
+        distances = consecutive_distances(hashes)
+        thresholds = self.signal_thresholds(distances)
+
+        def to_events(positions: np.ndarray) -> List[Dict]:
+            return coalesce_transitions(
+                positions=[int(i) for i in positions],
+                frame_indices=[int(frame_indices[i + 1]) for i in positions],
+                magnitudes=[int(distances[i]) for i in positions],
+                fps=self.fps,
+                max_gap=self.event_max_gap()
+            )
+
+        # 閾値を超えたら画面遷移
+        candidates = np.flatnonzero(distances > thresholds)
+        if not self.auto_threshold:
+            return to_events(candidates)
+
+        # 直後に元の画面へ戻る過渡的スパイクは安定フレーム探索・OCRの前に除外
+        kept, suppressed = suppress_transients(hashes, candidates, thresholds)
+        events = to_events(kept)
+        # 省略できた安定フレーム探索は、除外しなかった場合との遷移イベント数の差
+        # （同じイベントにまとまるサンプルを除外しても探索は減らない）
+        self.suppressed_transients = max(0, len(to_events(candidates)) - len(events))
+        if len(thresholds) > 0:
+            print(f"  Adaptive threshold: {thresholds.min():.1f}-{thresholds.max():.1f} "
+                  f"(median {np.median(thresholds):.1f}), "
+                  f"suppressed {len(suppressed)} transient spike samples "
+                  f"({self.suppressed_transients} transition events)")
+        return events
+
+    def event_max_gap(self) -> int:
+        """1つの遷移イベントにまとめるサンプル間隔の上限（フレーム数）"""
+        return int(self.fps * EVENT_MAX_GAP)
+
+    def create_threshold_tracker(self) -> Optional[AdaptiveThreshold]:
+        """--threshold auto 用の閾値推定器（固定閾値の場合は None）"""
+        return AdaptiveThreshold() if self.auto_threshold else None
+
+    def signal_thresholds(self, distances: np.ndarray) -> np.ndarray:
+        """距離信号のサンプルごとの閾値（固定閾値の場合は一定）"""
+        tracker = self.create_threshold_tracker()
+        if tracker is None:
+            return np.full(len(distances), self.transition_threshold, dtype=np.float64)
+        return tracker.thresholds_for(distances)
 
     def detect_scene_transitions(self) -> List[Dict]:
         """画面遷移を検出"""
         print("Step 1: Detecting scene transitions...")
 
-        transitions = []
+        frame_indices, hashes = self.compute_hash_signal()
+        transitions = self.transitions_from_signal(frame_indices, hashes)
+
+        if self.coarse_to_fine:
+            transitions = self.refine_transitions(transitions, frame_indices, hashes)
+
+        print(f"  Found {len(transitions)} scene transitions\n")
+        return transitions
+
+    def refine_transitions(self, transitions: List[Dict], frame_indices: np.ndarray,
+                           hashes: np.ndarray) -> List[Dict]:
+        """
+        粗いサンプリングで検出した遷移をフレーム単位まで絞り込む
+
+        閾値を超えた隣接サンプル区間だけをターゲットデコードで二分探索する。
+
+        Args:
+            transitions: transitions_from_signal() の結果
+            frame_indices: サンプルしたフレーム番号の配列
+            hashes: 対応するpHashの配列
+
+        Returns:
+            フレーム単位の画面遷移イベントのリスト（transitions_from_signal() と同じ形式）
+        """
+        if not transitions:
+            return transitions
+
+        source = self.create_frame_source()
+        if not source.open():
+            return transitions
+
+        positions = {int(idx): i for i, idx in enumerate(frame_indices)}
+        thresholds = self.signal_thresholds(consecutive_distances(hashes))
+        hasher = TargetedHasher(source, self.phash_engine)
+        for frame_idx, hash_value in zip(frame_indices, hashes):
+            hasher.register(frame_idx, hash_value)
+
+        refined = []
+        try:
+            for trans in tqdm(transitions, desc="Refining transitions"):
+                i = positions[trans['frame_idx']]
+                found = bisect_transitions(
+                    hasher,
+                    lo=int(frame_indices[i - 1]), lo_hash=int(hashes[i - 1]),
+                    hi=int(frame_indices[i]), hi_hash=int(hashes[i]),
+                    threshold=thresholds[i - 1],
+                    magnitude=trans['magnitude']
+                )
+                # 区間内で分かれた遷移は単独のイベント、最後の遷移がイベントの開始点になる
+                for frame_idx, magnitude in found[:-1]:
+                    refined.extend(coalesce_transitions([0], [frame_idx], [magnitude], self.fps))
+                frame_idx, magnitude = found[-1]
+                event = dict(trans, frame_idx=frame_idx, timestamp=frame_idx / self.fps)
+                if trans['sample_count'] == 1:
+                    event.update(magnitude=magnitude, settle_frame_idx=frame_idx,
+                                 settle_timestamp=frame_idx / self.fps)
+                else:
+                    event['magnitude'] = max(magnitude, trans['magnitude'])
+                refined.append(event)
+        finally:
+            source.close()
+
+        print(f"  Decoded {len(frame_indices) + hasher.decoded_frames} frames "
+              f"({len(frame_indices)} coarse samples + {hasher.decoded_frames} targeted)")
+        return refined
+
+    def iter_transitions_single_pass(self) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+        """
+        画面遷移検出と安定フレーム検出を1パスで実行（後方シークなし）
+
+        遷移を検出した時点で、その0.5秒後から1.5秒後の探索ウィンドウを登録し、
+        ウィンドウがスキャン位置を通過する間に安定フレームを選ぶ。
+        直近の低解像度フレームはリングバッファに保持し、フル解像度フレームは
+        探索中のウィンドウの現在のベスト候補のみ保持する。ウィンドウを確定した時点で
+        (transition, stable_frame) を返すため、呼び出し側はスキャンと並行して候補を処理し、
+        フル解像度フレームはその間だけ保持すればよい。
+
+        安定フレームにはフル解像度フレームが必要なため、デコードは --frame-backend・
+        --workers にかかわらず cv2.VideoCapture の1回の前方パスで行う。サンプルの
+        ハッシュ信号はスキャンの完了後にキャッシュに保存し、別の --threshold などでの
+        再実行（2パスモード・tune）で再利用する。
+
+        Yields:
+            (transition, stable_frame)（ウィンドウを確定した順。stable_frameはNoneの場合あり）
+        """
+        print("Step 1-2: Detecting scene transitions and stable frames (single pass)...")
+        if self.frame_backend != 'opencv' or self.workers != 1:
+            print("  Note: --single-pass decodes sequentially with OpenCV "
+                  "(--frame-backend and --workers are not used)")
+
+        skip_frames = self.sample_step()
+        window_start_offset = int(self.fps * 0.5)
+        window_end_offset = int(self.fps * 1.5)
+
+        transition_count = 0
+        # サンプルのハッシュ信号（キャッシュに保存する）
+        sample_indices = []
+        sample_hashes = []
+        windows = deque()  # 探索中のウィンドウ（開始フレーム順）
+        recent = deque(maxlen=2)  # 低解像度フレームのリングバッファ: (frame_idx, small_frame)
         prev_hash = None
-        frame_idx = 0
+        # --threshold auto の場合は閾値をオンラインで推定（過渡的スパイクの除外は行わない）
+        tracker = self.create_threshold_tracker()
+        # 連続して閾値を超えたサンプルを1つの遷移イベントにまとめる
+        events = TransitionEventTracker(self.fps, self.event_max_gap())
 
-        # フレームを間引いて処理（毎フレームは不要、0.5秒ごとなど）
-        skip_frames = max(1, int(self.fps * 0.5))
-
-        with tqdm(total=self.total_frames, desc="Scanning frames") as pbar:
-            while True:
-                ret, frame = self.cap.read()
-                if not ret:
-                    break
-
-                # フレームスキップ
-                if frame_idx % skip_frames != 0:
-                    frame_idx += 1
-                    pbar.update(1)
-                    continue
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
 
-                # 処理用にリサイズ
-                small_frame = self.resize_for_processing(frame)
-                current_hash = self.compute_phash(small_frame)
+        completed = True
+        for frame_idx in tqdm(range(self.total_frames), desc="Scanning frames"):
+            if not self.cap.grab():
+                completed = False
+                break
 
-                # 前フレームとの差分を計算
-                if prev_hash is not None:
-                    hamming_distance = current_hash - prev_hash
+            is_sample = frame_idx % skip_frames == 0
+            active = [w for w in windows if w['start'] <= frame_idx < w['end']]
+            if not is_sample and not active:
+                continue
 
-                    # 閾値を超えたら画面遷移
-                    if hamming_distance > self.transition_threshold:
-                        timestamp = frame_idx / self.fps
-                        transitions.append({
-                            'frame_idx': frame_idx,
-                            'timestamp': timestamp,
-                            'magnitude': hamming_distance
-                        })
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                completed = False
+                break
+            small_frame = self.resize_for_processing(frame)
 
+            # 直前フレームとの差分で安定度を評価（直前フレームは必ずリングバッファにある）
+            if active:
+                prev_small = recent[-1][1] if recent and recent[-1][0] == frame_idx - 1 else None
+                stability_score = None
+                for window in active:
+                    if not window['started'] or prev_small is None:
+                        window['started'] = True
+                        continue
+                    if stability_score is None:
+                        stability_score = 100 - np.mean(cv2.absdiff(small_frame, prev_small))
+                    if stability_score > window['best_stability']:
+                        window['best_stability'] = stability_score
+                        window['best'] = {
+                            'frame_idx': frame_idx,
+                            'timestamp': frame_idx / self.fps,
+                            'stability_score': stability_score,
+                            'frame': frame  # 元の解像度を保持（ベスト候補のみ）
+                        }
+
+            recent.append((frame_idx, small_frame))
+
+            # サンプルフレームで画面遷移を判定し、探索ウィンドウを登録
+            if is_sample:
+                current_hash = self.phash_engine.hash_frame(small_frame)
+                sample_indices.append(frame_idx)
+                sample_hashes.append(current_hash)
+                if prev_hash is not None:
+                    hamming_distance = int(consecutive_distances([prev_hash, current_hash])[0])
+                    if tracker is None:
+                        threshold = self.transition_threshold
+                    else:
+                        threshold = tracker.update(hamming_distance)
+                    position = frame_idx // skip_frames
+                    if hamming_distance <= threshold:
+                        events.exit()
+                    elif (events.is_active_at(position, frame_idx) and windows
+                          and windows[-1]['transition'] is events.event):
+                        # アニメーションの続き: イベントを延長し、探索ウィンドウを落ち着き位置から張り直す
+                        events.extend(position, frame_idx, hamming_distance)
+                        self.reset_search_window(windows[-1], frame_idx,
+                                                 window_start_offset, window_end_offset)
+                    else:
+                        events.exit()
+                        events.enter(position, frame_idx, hamming_distance)
+                        window = {'transition': events.event}
+                        self.reset_search_window(window, frame_idx,
+                                                 window_start_offset, window_end_offset)
+                        windows.append(window)
                 prev_hash = current_hash
-                frame_idx += 1
-                pbar.update(1)
 
-        print(f"  Found {len(transitions)} scene transitions\n")
-        return transitions
+            # 通過したウィンドウを確定（ベスト候補のフル解像度フレームは呼び出し側へ渡す）
+            while windows and windows[0]['end'] <= frame_idx + 1:
+                window = windows.popleft()
+                transition_count += 1
+                yield window['transition'], window['best']
+
+        # 動画の終端で残ったウィンドウを確定
+        while windows:
+            window = windows.popleft()
+            transition_count += 1
+            yield window['transition'], window['best']
+
+        if completed and self.signal_cache is not None and sample_indices:
+            frame_indices = np.array(sample_indices, dtype=np.int64)
+            key = self.signal_cache.make_key(self.video_path,
+                                             self.signal_cache_params(backend='opencv'))
+            self.signal_cache.save(key, frame_indices, frame_indices / self.fps,
+                                   np.array(sample_hashes, dtype=np.uint64))
+
+        print(f"  Found {transition_count} scene transitions\n")
+
+    def reset_search_window(self, window: Dict, settle_frame_idx: int,
+                            start_offset: int, end_offset: int) -> None:
+        """1パスモードの安定フレーム探索ウィンドウを落ち着き位置から（再）設定"""
+        window.update({
+            'start': settle_frame_idx + start_offset,
+            'end': min(settle_frame_idx + end_offset, self.total_frames),
+            # ウィンドウが現在フレームから始まる場合は処理済みとして扱う
+            'started': settle_frame_idx + start_offset <= settle_frame_idx,
+            'best': None,
+            'best_stability': -1
+        })
+
+    def iter_stable_frames(self, transitions: List[Dict]):
+        """各遷移の安定フレームをシークして検出（2パスモード）"""
+        for trans in transitions:
+            # アニメーションが落ち着いた位置から探索する
+            yield trans, self.find_stable_frame(trans.get('settle_frame_idx', trans['frame_idx']))
 
     def find_stable_frame(self, start_frame: int) -> Optional[Dict]:
         """画面遷移後の安定フレームを検出"""
@@ -242,56 +739,201 @@ class ScreenshotExtractor:
 
     def analyze_ui_importance(self, frame: np.ndarray) -> Tuple[float, List[Dict], List[str]]:
         """UI重要度を解析（OCRベース）"""
-        reader = get_ocr_reader()
+        regions = self.detect_text_regions(frame)
+        results = self.to_frame_coordinates(self.recognize_text_regions(regions), regions)
+        return self.score_ocr_results(results, self.keyword_matcher)
 
-        # フレームをRGBに変換
+    def detect_text_regions(self, frame: np.ndarray) -> Dict:
+        """
+        OCRの1段目: テキスト領域の検出のみを行う
+
+        reader.readtext() の検出部分と同じ処理。検出した領域の数から
+        UI重要度の上界を計算できる（ui_importance_upper_bound）。
+
+        Returns:
+            {'grey', 'horizontal_list', 'free_list', 'scale'}
+            （領域の座標は OCRプロファイルで縮小した画像上の座標、scale はその縮小率）
+        """
+        return self.submit_text_detection([frame]).result()[0]
+
+    def prepare_ocr_image(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        フレームを検出用の画像とグレースケール画像に変換（readtext() と同じ前処理）
+
+        OCRプロファイルの max_side を超えるフレームは先に縮小する。
+
+        Returns:
+            (検出用の画像, グレースケール画像, 縮小率)
+        """
+        from easyocr.utils import reformat_input
+
+        frame, scale = downscale_for_ocr(frame, self.ocr_profile['max_side'])
+        # フレームをRGBに変換（readtext() に渡していた画像と同じ）
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image, grey = reformat_input(rgb_frame)
+        return image, grey, scale
+
+    def submit_text_detection(self, frames: List[np.ndarray], pack: bool = False) -> Future:
+        """
+        複数フレームのテキスト領域の検出を開始
+
+        OCRワーカープールがある場合は非同期に実行し、ない場合はメインプロセスで
+        実行して完了済みの Future を返す。同じサイズのフレームはまとめて推論する。
+
+        Args:
+            frames: フレーム（BGR）のリスト
+            pack: 検出後にグレースケール画像のテキスト領域を含む範囲だけを PNG に
+                圧縮して保持する（pack_text_regions）
 
-        # OCR実行
-        results = reader.readtext(rgb_frame)
+        Returns:
+            結果が [{'grey', 'horizontal_list', 'free_list', 'scale'}, ...] の Future
+            （pack の場合は 'grey' の代わりに 'grey_png', 'grey_offset', 'grey_shape'）
+        """
+        images, greys, scales = zip(*(self.prepare_ocr_image(frame) for frame in frames))
+        detect_kwargs = {'canvas_size': self.ocr_profile['canvas_size'],
+                         'mag_ratio': self.ocr_profile['mag_ratio']}
+
+        def to_regions(boxes: List[Tuple[List, List]]) -> List[Dict]:
+            regions = [{'grey': grey, 'horizontal_list': horizontal_list,
+                        'free_list': free_list, 'scale': scale}
+                       for grey, scale, (horizontal_list, free_list) in zip(greys, scales, boxes)]
+            return [pack_text_regions(r) for r in regions] if pack else regions
+
+        regions = Future()
+        if self.ocr_pool is None:
+            regions.set_result(to_regions(
+                detect_with_reader(get_ocr_reader(), list(images), detect_kwargs)))
+            return regions
+
+        detection = self.ocr_pool.submit_detect(list(images), detect_kwargs)
+        detection.add_done_callback(
+            lambda done: regions.set_exception(done.exception()) if done.exception()
+            else regions.set_result(to_regions(done.result())))
+        return regions
+
+    def recognize_text_regions(self, regions: Dict) -> List[Tuple]:
+        """
+        OCRの2段目: 検出済みの領域の文字認識
 
-        detected_texts = []
+        Returns:
+            [(bbox, text, confidence), ...]（reader.readtext() と同じ形式、
+            座標は検出した画像上の座標）
+        """
+        return self.recognize_text_regions_batch([regions])[0]
+
+    def recognize_text_regions_batch(self, regions_list: List[Dict]) -> List[List[Tuple]]:
+        """複数候補の文字認識（OCRワーカープールがある場合はワーカーに分配）"""
+        results = [[] for _ in regions_list]
+        jobs = [(i, (regions['grey'], regions['horizontal_list'], regions['free_list']))
+                for i, regions in enumerate(regions_list)
+                if regions['horizontal_list'] or regions['free_list']]
+        if not jobs:
+            return results
+
+        self.ocr_recognitions += len(jobs)
+        if self.ocr_pool is not None:
+            recognized = self.ocr_pool.recognize_many([job for _, job in jobs])
+        else:
+            reader = get_ocr_reader()
+            recognized = [reader.recognize(*job, reformat=False) for _, job in jobs]
+
+        for (i, _), result in zip(jobs, recognized):
+            results[i] = result
+        return results
+
+    @staticmethod
+    def to_frame_coordinates(results: List[Tuple], regions: Dict) -> List[Tuple]:
+        """縮小した画像で文字認識した結果の座標を元のフレームの座標に戻す"""
+        if regions['scale'] == 1.0:
+            return results
+        return scale_ocr_results(results, 1.0 / regions['scale'])
+
+    @staticmethod
+    def score_ocr_results(results: List[Tuple], matcher: Optional[KeywordMatcher] = None
+                          ) -> Tuple[float, List[Dict], List[str]]:
+        """
+        OCR結果からUI重要度を計算
+
+        Args:
+            results: [(bbox, text, confidence), ...]
+            matcher: キーワードの照合器（Noneの場合は既定のキーワード）
+        """
+        matcher = matcher or DEFAULT_KEYWORD_MATCHER
+        # 信頼度が低いものは除外
+        kept = [(bbox, text, confidence) for bbox, text, confidence in results
+                if confidence >= 0.3]
+        detected_texts = [text for _, text, _ in kept]
         ui_elements = []
         importance_score = 0.0
 
-        for bbox, text, confidence in results:
-            if confidence < 0.3:  # 信頼度が低いものは除外
-                continue
-
-            detected_texts.append(text)
-
-            # 重要なキーワードを検出
-            for keyword in IMPORTANT_UI_KEYWORDS:
-                if keyword.lower() in text.lower():
-                    ui_elements.append({
-                        'type': 'button',
-                        'text': text,
-                        'confidence': confidence
-                    })
-                    importance_score += 15
-                    break
-
-            # タイトル・見出しを検出
-            for keyword in TITLE_KEYWORDS:
-                if keyword.lower() in text.lower():
-                    ui_elements.append({
-                        'type': 'title',
-                        'text': text,
-                        'confidence': confidence
-                    })
-                    importance_score += 20
-                    break
+        # ボタン・タイトルなどのキーワードをフレームの全テキストでまとめて照合
+        for (bbox, text, confidence), matches in zip(kept, matcher.match_texts(detected_texts)):
+            for element_type, (_, weight) in matches.items():
+                ui_elements.append({
+                    'type': element_type,
+                    'text': text,
+                    'confidence': confidence,
+                    'bbox': to_pixel_bbox(bbox)
+                })
+                importance_score += weight
 
         # テキスト量が多い（説明画面・機能紹介の可能性）
-        if len(detected_texts) > 5:
-            importance_score += 10
+        if len(detected_texts) > UI_TEXT_COUNT_THRESHOLD:
+            importance_score += UI_TEXT_COUNT_SCORE
 
         return importance_score, ui_elements, detected_texts
 
+    @staticmethod
+    def ui_importance_upper_bound(region_count: int,
+                                  max_text_score: float = UI_BUTTON_SCORE + UI_TITLE_SCORE
+                                  ) -> float:
+        """
+        検出したテキスト領域の数から UI重要度の上界を計算
+
+        認識結果は領域ごとに1つで、1つの結果が得る点数はキーワードの各カテゴリ
+        （ボタン・タイトル）の最大の加点の合計（max_text_score）が最大。
+        """
+        bound = float(region_count * max_text_score)
+        if region_count > UI_TEXT_COUNT_THRESHOLD:
+            bound += UI_TEXT_COUNT_SCORE
+        return bound
+
+    def ocr_scoring_key(self) -> str:
+        """
+        UI重要度の計算方法（キーワード・配点・OCRプロファイル）の識別子
+        （OCRキャッシュの無効化に使用）
+        """
+        payload = json.dumps({
+            'languages': ['ja', 'en'],
+            'ocr_profile': self.ocr_profile,
+            'keywords': self.keyword_matcher.fingerprint(),
+            'scores': [UI_TEXT_COUNT_SCORE, UI_TEXT_COUNT_THRESHOLD]
+        }, ensure_ascii=False)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def open_ocr_cache(self) -> None:
+        """OCRキャッシュを開く（開けない場合はキャッシュなしで続行）"""
+        if self.ocr_cache_dir is None:
+            return
+        try:
+            self.ocr_cache = OCRCache(str(Path(self.ocr_cache_dir) / OCR_CACHE_FILENAME),
+                                      radius=self.ocr_cache_radius,
+                                      max_entries=self.ocr_cache_size,
+                                      scoring_key=self.ocr_scoring_key())
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: OCR cache disabled: {e}")
+            self.ocr_cache = None
+
+    def close_ocr_cache(self) -> None:
+        """OCRキャッシュを閉じる"""
+        if self.ocr_cache is not None:
+            self.ocr_cache.close()
+            self.ocr_cache = None
+
     def compute_final_score(self, transition_magnitude: float,
                            stability_score: float,
                            ui_importance_score: float) -> float:
-        """最終スコアを計算"""
+        """最終スコアを計算（引数が配列の場合は要素ごとに計算）"""
         return (
             transition_magnitude * 2.0 +
             stability_score * 0.5 +
@@ -305,117 +947,435 @@ class ScreenshotExtractor:
         # 動画を開く
         if not self.open_video():
             return []
+        self.open_ocr_cache()
+        if self.ocr_workers > 1:
+            print(f"Starting {self.ocr_workers} OCR workers...")
+            self.ocr_pool = OCRWorkerPool(self.ocr_workers)
 
         try:
             # ステップ1: 画面遷移を検出
-            transitions = self.detect_scene_transitions()
+            if self.single_pass:
+                # 安定フレームもスキャン中に確定（シークなし）。ウィンドウを確定するごとに
+                # ステップ2で処理するため、遷移の数はスキャンが終わるまでわからない
+                stable_frames = self.iter_transitions_single_pass()
+                transition_count = None
+            else:
+                transitions = self.detect_scene_transitions()
+                if len(transitions) == 0:
+                    print("Warning: No scene transitions detected")
+                    return []
+                stable_frames = self.iter_stable_frames(transitions)
+                transition_count = len(transitions)
 
-            if len(transitions) == 0:
-                print("Warning: No scene transitions detected")
-                return []
+                # ステップ2: 各遷移で安定フレームを検出し、スコアの上界を計算
+                print("Step 2: Finding stable frames and scoring...")
 
-            # ステップ2: 各遷移で安定フレームを検出し、スコアリング
-            print("Step 2: Finding stable frames and scoring...")
             candidates = []
-
-            for trans in tqdm(transitions, desc="Processing transitions"):
-                # 動画を巻き戻して遷移位置に移動
-                self.cap.set(cv2.CAP_PROP_POS_FRAMES, trans['frame_idx'])
-
-                # 安定フレームを検出
-                stable_frame = self.find_stable_frame(trans['frame_idx'])
-
+            # テキスト領域の検出待ちの候補と、開始した検出（候補のリスト, Future）
+            pending = []
+            detections = []
+            # 未完了の検出（古い順）
+            in_flight = deque()
+            processed_transitions = 0
+
+            for trans, stable_frame in tqdm(stable_frames, total=transition_count,
+                                            desc="Processing transitions",
+                                            disable=self.single_pass):
+                processed_transitions += 1
                 if stable_frame is None:
                     continue
 
-                # UI重要度を解析
-                ui_score, ui_elements, detected_texts = self.analyze_ui_importance(
-                    stable_frame['frame']
-                )
-
-                # 最終スコアを計算
-                final_score = self.compute_final_score(
-                    trans['magnitude'],
-                    stable_frame['stability_score'],
-                    ui_score
-                )
-
-                candidates.append({
+                # 候補はフル解像度フレームを保持しない（保存時に読み直す）
+                frame = stable_frame.pop('frame')
+                candidate = {
                     'frame_idx': stable_frame['frame_idx'],
                     'timestamp': stable_frame['timestamp'],
-                    'score': final_score,
                     'transition_magnitude': trans['magnitude'],
-                    'stability_score': stable_frame['stability_score'],
-                    'ui_importance_score': ui_score,
-                    'ui_elements': ui_elements,
-                    'detected_texts': detected_texts,
-                    'frame': stable_frame['frame']
-                })
+                    'stability_score': stable_frame['stability_score']
+                }
+                candidates.append(candidate)
+                self.frame_cache.put(candidate['frame_idx'], frame)
+
+                # OCRキャッシュ・重複除去のキーと、保存時の読み直しの照合に使う
+                candidate['frame_hash'] = self.frame_hash(frame)
+
+                # 同じ画面のOCR結果がキャッシュにあれば、スコアを確定してOCRを省略
+                if self.ocr_cache is not None:
+                    cached = self.ocr_cache.get(candidate['frame_hash'])
+                    if cached is not None:
+                        self.ocr_cache_hits += 1
+                        candidates[-1] = self.apply_ui_importance(candidate, cached)
+                        continue
+
+                # OCRはテキスト領域の検出まで（文字認識は選択時に必要な候補だけ）。
+                # 検出はバッチ単位で開始し、ワーカープールがあればスキャンと並行して進める。
+                # フレームは検出が終わるまでの間だけ保持し、未完了のバッチ数には上限を設ける
+                pending.append((candidate, frame))
+                if len(pending) >= self.ocr_batch_size:
+                    self.wait_for_detection_slot(in_flight)
+                    detections.append(self.submit_candidate_detection(pending))
+                    in_flight.append(detections[-1][1])
+                    pending = []
+
+            if processed_transitions == 0:
+                print("Warning: No scene transitions detected")
+                return []
+
+            if pending:
+                detections.append(self.submit_candidate_detection(pending))
+
+            for batch, detection in detections:
+                for candidate, regions in zip(batch, detection.result()):
+                    candidate['text_regions'] = regions
+                    candidate['ui_importance_bound'] = self.ui_importance_upper_bound(
+                        len(regions['horizontal_list']) + len(regions['free_list']),
+                        self.keyword_matcher.max_text_score())
 
-            print(f"  Found {len(candidates)} candidates\n")
+            # 以降の候補は列指向の候補テーブルで保持し、選択は行番号で行う
+            # （評価する候補だけを dict に戻す）。スコアの上界は列でまとめて計算
+            table = CandidateTable.from_candidates(candidates)
+            del candidates, detections
+            upper_bounds = table.upper_bounds(self.compute_final_score).tolist()
 
-            # ステップ3: 時間的重複を排除して上位を選択
+            print(f"  Found {len(table)} candidates\n")
+
+            # ステップ3: 時間的重複を排除して上位を選択（上界の大きい順に文字認識）
             print("Step 3: Selecting top screenshots...")
-            selected = self.select_top_screenshots(candidates)
+            if self.selection == 'optimal':
+                selected = self.select_optimal_candidates(table, upper_bounds,
+                                                          self.score_candidates)
+            else:
+                diversity = self.create_diversity_filter()
+                selected = select_top_lazily(
+                    table, upper_bounds, None, self.target_count, self.min_time_interval,
+                    evaluate_batch=self.score_candidates,
+                    batch_size=self.ocr_pool.workers if self.ocr_pool else 1,
+                    accept=diversity.accept if diversity is not None else None)
+                if diversity is not None:
+                    self.diversity_rejected = diversity.rejected
+            print(f"  OCR recognition ran on {self.ocr_recognitions} of "
+                  f"{len(table)} candidates")
+            if self.diversity_radius is not None:
+                print(f"  Rejected {self.diversity_rejected} near-duplicate screens "
+                      f"(pHash distance <= {self.diversity_radius})")
+            if self.incremental_ocr is not None:
+                total_regions = (self.incremental_ocr.reused_regions +
+                                 self.incremental_ocr.recognized_regions)
+                print(f"  Incremental OCR reused {self.incremental_ocr.reused_regions} of "
+                      f"{total_regions} text regions from previously recognized screens")
 
             # ステップ4: 画像を保存
             print("Step 4: Saving screenshots...")
             metadata = self.save_screenshots(selected)
+            print(f"  Re-read {self.refetched_frames} full-resolution frames from the video "
+                  f"({len(self.frame_cache)} kept in memory)")
 
             elapsed = time.time() - start_time
             print(f"\nCompleted in {elapsed:.1f}s")
             print(f"Saved {len(selected)} screenshots to {self.screenshots_dir}")
+            if self.auto_threshold and not self.single_pass:
+                print(f"Adaptive threshold avoided {self.suppressed_transients} "
+                      f"stable-frame searches and OCR calls (transient spikes)")
+            if self.ocr_cache is not None:
+                print(f"OCR cache: {self.ocr_cache_hits} hits, {self.ocr_cache_misses} misses "
+                      f"({len(self.ocr_cache)} entries in {self.ocr_cache.path})")
 
             return metadata
 
         finally:
+            if self.ocr_pool is not None:
+                self.ocr_pool.close()
+                self.ocr_pool = None
+            self.close_ocr_cache()
             self.close_video()
 
-    def select_top_screenshots(self, candidates: List[Dict]) -> List[Dict]:
-        """時間的重複を排除して上位スクリーンショットを選択"""
-        # スコアでソート
-        sorted_candidates = sorted(candidates, key=lambda x: x['score'], reverse=True)
+    def wait_for_detection_slot(self, in_flight: deque) -> None:
+        """
+        未完了の検出バッチが上限（OCRワーカー数 × MAX_DETECTIONS_PER_OCR_WORKER）未満に
+        なるまで、古いバッチから完了を待つ
 
-        selected = []
+        Args:
+            in_flight: 開始した検出の Future（古い順。完了したものは取り除く）
+        """
+        workers = self.ocr_pool.workers if self.ocr_pool is not None else 1
+        limit = MAX_DETECTIONS_PER_OCR_WORKER * workers
+        while in_flight and (in_flight[0].done() or len(in_flight) >= limit):
+            # 失敗した検出の例外は結果を取り出すときに送出する
+            wait([in_flight.popleft()])
+
+    def submit_candidate_detection(self, pending: List[Tuple[Dict, np.ndarray]]
+                                   ) -> Tuple[List[Dict], Future]:
+        """候補のテキスト領域の検出を開始（グレースケール画像は圧縮して保持）"""
+        return ([candidate for candidate, _ in pending],
+                self.submit_text_detection([frame for _, frame in pending], pack=True))
+
+    def score_candidate(self, candidate: Dict) -> Dict:
+        """候補の文字認識を行い、UI重要度と最終スコアを確定"""
+        return self.score_candidates([candidate])[0]
+
+    def score_candidates(self, candidates: List[Dict]) -> List[Dict]:
+        """複数候補の文字認識をまとめて行い、UI重要度と最終スコアを確定"""
+        scored = list(candidates)
+        to_recognize = []
+
+        for i, candidate in enumerate(candidates):
+            if 'score' in candidate:
+                # OCRキャッシュから確定済み
+                continue
 
-        for candidate in sorted_candidates:
-            # 既に目標枚数に達したら終了
-            if len(selected) >= self.target_count:
-                break
+            if self.ocr_cache is not None:
+                # 同じ実行内で先に解析した同じ画面の結果（上界を超えない場合のみ使う）
+                cached = self.ocr_cache.get(candidate['frame_hash'])
+                if cached is not None and cached[0] <= candidate['ui_importance_bound']:
+                    self.ocr_cache_hits += 1
+                    scored[i] = self.apply_ui_importance(candidate, cached)
+                    continue
 
-            # 既に選択されたフレームと時間的に近すぎないかチェック
-            too_close = False
-            for sel in selected:
-                time_diff = abs(candidate['timestamp'] - sel['timestamp'])
-                if time_diff < self.min_time_interval:
-                    too_close = True
-                    break
+            to_recognize.append(i)
 
-            if not too_close:
-                selected.append(candidate)
+        results = self.recognize_candidate_regions([candidates[i] for i in to_recognize])
+        for i, result in zip(to_recognize, results):
+            ui_importance = self.score_ocr_results(result, self.keyword_matcher)
+            if self.ocr_cache is not None:
+                self.ocr_cache_misses += 1
+                self.ocr_cache.put(candidates[i]['frame_hash'], ui_importance)
+            scored[i] = self.apply_ui_importance(candidates[i], ui_importance)
+        return scored
 
-        # タイムスタンプでソート（時系列順）
-        selected.sort(key=lambda x: x['timestamp'])
+    def recognize_candidate_regions(self, candidates: List[Dict]) -> List[List[Tuple]]:
+        """
+        候補のテキスト領域を文字認識
 
+        インクリメンタルOCRの場合は、前回文字認識した画面から変化していない
+        領域の結果を引き継ぎ、残りの領域だけを文字認識する。
+        """
+        regions_list = [unpack_text_regions(c['text_regions']) for c in candidates]
+        if self.incremental_ocr is None or not candidates:
+            results = self.recognize_text_regions_batch(regions_list)
+        else:
+            # 変化マスクは文字認識に使うグレースケール画像から作る（フレームは保持しない）
+            splits = [self.incremental_ocr.split(regions['grey'], regions)
+                      for regions in regions_list]
+            recognized = self.recognize_text_regions_batch(
+                [to_recognize for to_recognize, _ in splits])
+            results = [self.incremental_ocr.merge(regions, carried, new)
+                       for regions, (_, carried), new in zip(regions_list, splits, recognized)]
+
+            last = regions_list[-1]
+            self.incremental_ocr.update(last['grey'], last, results[-1])
+
+        # 座標は元のフレームの座標で返す
+        return [self.to_frame_coordinates(result, regions)
+                for result, regions in zip(results, regions_list)]
+
+    def apply_ui_importance(self, candidate: Dict,
+                            ui_importance: Tuple[float, List[Dict], List[str]]) -> Dict:
+        """UI重要度の解析結果から最終スコアを計算した候補を返す"""
+        ui_score, ui_elements, detected_texts = ui_importance
+
+        scored = {key: value for key, value in candidate.items()
+                  if key not in ('text_regions', 'ui_importance_bound')}
+        scored.update({
+            'score': self.compute_final_score(
+                candidate['transition_magnitude'],
+                candidate['stability_score'],
+                ui_score
+            ),
+            'ui_importance_score': ui_score,
+            'ui_elements': ui_elements,
+            'detected_texts': detected_texts
+        })
+        return scored
+
+    def create_diversity_filter(self) -> Optional[DiversityFilter]:
+        """見た目の重複を除外するフィルタ（--diversity-radius 未指定の場合は None）"""
+        if self.diversity_radius is None:
+            return None
+        return DiversityFilter(self.diversity_radius)
+
+    def select_optimal_candidates(self, candidates: Sequence[Dict], upper_bounds: List[float],
+                                  evaluate_batch: Callable[[List[Dict]], List[Dict]]
+                                  ) -> List[Dict]:
+        """
+        スコアの合計が最大になる組み合わせを選択（見た目の重複を除外）
+
+        解の中で、よりスコアの高い候補と重複する候補を除外して解き直す。
+        除外した候補は、最終的な選択結果の中で最も近い候補に記録する。
+        """
+        diversity = self.create_diversity_filter()
+        if diversity is None:
+            return select_optimal_lazily(candidates, upper_bounds, evaluate_batch,
+                                         self.target_count, self.min_time_interval)
+
+        rejected = []
+
+        def exclude(solution: List[Dict]) -> List[int]:
+            positions = duplicate_positions(solution, self.diversity_radius)
+            rejected.extend(solution[position] for position in positions)
+            return positions
+
+        selected = select_optimal_lazily(candidates, upper_bounds, evaluate_batch,
+                                         self.target_count, self.min_time_interval,
+                                         exclude=exclude)
+        for shot in selected:
+            diversity.add(shot)
+        for candidate in rejected:
+            diversity.record(candidate)
+        self.diversity_rejected = diversity.rejected
         return selected
 
+    def select_top_screenshots(self, candidates: List[Dict]) -> List[Dict]:
+        """時間的重複・見た目の重複を排除して上位スクリーンショットを選択"""
+        if self.selection == 'optimal':
+            if self.diversity_radius is None:
+                return select_optimal(candidates, self.target_count, self.min_time_interval)
+            return self.select_optimal_candidates(
+                candidates, [c['score'] for c in candidates], list)
+
+        diversity = self.create_diversity_filter()
+
+        # スコア降順のソート・時間間隔の判定は候補テーブルの列で行う
+        table = CandidateTable.from_candidates(candidates)
+        accept = None
+        if diversity is not None:
+            def accept(row: int) -> bool:
+                return diversity.accept(candidates[row])
+
+        rows = table.select_top(self.target_count, self.min_time_interval, accept=accept)
+
+        if diversity is not None:
+            self.diversity_rejected = diversity.rejected
+
+        # タイムスタンプ順（時系列順）
+        return [candidates[row] for row in rows.tolist()]
+
+    def iter_full_frames(self, screenshots: List[Dict]) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        保存するスクリーンショットのフル解像度フレームを、取得できた順に返す
+
+        候補が保持するフレーム・フレームキャッシュにあるものを先に返し、
+        残りはフレーム番号順の1回の前方パスで動画から読み直す。
+        """
+        missing = []
+        for shot in screenshots:
+            frame = shot.get('frame')
+            if frame is None:
+                frame = self.frame_cache.get(shot['frame_idx'])
+            if frame is None:
+                missing.append(shot['frame_idx'])
+            else:
+                yield shot['frame_idx'], frame
+
+        # シークで別のフレームに着いた場合は、候補のpHashとの照合で検出して前方デコードする
+        expected_hashes = {shot['frame_idx']: shot['frame_hash']
+                           for shot in screenshots if 'frame_hash' in shot}
+
+        def verify(frame_idx: int, frame: np.ndarray) -> bool:
+            expected = expected_hashes.get(frame_idx)
+            return expected is None or self.frame_hash(frame) == expected
+
+        for frame_idx, frame in iter_frames(self.cap, missing, verify=verify):
+            self.refetched_frames += 1
+            yield frame_idx, frame
+
+    def frame_hash(self, frame: np.ndarray) -> int:
+        """フル解像度フレームのpHash（画面遷移検出と同じ処理解像度で計算）"""
+        return self.phash_engine.hash_frame(self.resize_for_processing(frame))
+
+    def load_full_frames(self, screenshots: List[Dict]) -> Dict[int, np.ndarray]:
+        """保存するスクリーンショットのフル解像度フレームを取得"""
+        return dict(self.iter_full_frames(screenshots))
+
+    def screenshot_filename(self, idx: int, shot: Dict) -> str:
+        """スクリーンショットのファイル名（拡張子は画像形式に合わせる）"""
+        timestamp_str = self.format_timestamp(shot['timestamp'])
+        score_str = f"{shot['score']:.0f}"
+        extension = IMAGE_FORMATS[self.image_format]['extension']
+        return f"{idx:02d}_{timestamp_str}_score{score_str}{extension}"
+
+    def submit_derivatives(self, encoder: ImageEncoder, frame: np.ndarray, filename: str
+                           ) -> Tuple[List[Tuple[int, int, str, Future]], Optional[np.ndarray]]:
+        """
+        フレームの縮小版のエンコードを開始
+
+        Returns:
+            ([(幅, 高さ, 出力ディレクトリからの相対パス, Future)],
+             コンタクトシート用の縮小画像（作成しない場合は None）)
+        """
+        widths = list(self.derivative_widths)
+        if self.contact_sheet:
+            widths.append(CONTACT_SHEET_CELL_WIDTH)
+        levels = resize_pyramid(frame, widths)
+
+        submitted = []
+        for width in self.derivative_widths:
+            if width not in levels:
+                # 元のフレーム以上の幅は作らない
+                continue
+            image = levels[width]
+            path = f"{DERIVATIVES_DIRNAME}/{derivative_filename(filename, width)}"
+            submitted.append((width, image.shape[0], path,
+                              encoder.submit(image, self.output_dir / path)))
+
+        thumbnail = levels.get(CONTACT_SHEET_CELL_WIDTH, frame) if self.contact_sheet else None
+        return submitted, thumbnail
+
+    def submit_contact_sheet(self, encoder: ImageEncoder, thumbnails: Dict[int, np.ndarray]
+                             ) -> Tuple[str, Future, Dict[int, Tuple[int, int, int, int]]]:
+        """
+        コンタクトシートのエンコードを開始
+
+        Returns:
+            (出力ディレクトリからの相対パス, Future, {スクリーンショットの番号: (x, y, 幅, 高さ)})
+        """
+        indices = sorted(thumbnails)
+        sheet, cells = build_contact_sheet([thumbnails[idx] for idx in indices])
+        path = f"{CONTACT_SHEET_BASENAME}{encoder.extension}"
+        return path, encoder.submit(sheet, self.output_dir / path), dict(zip(indices, cells))
+
     def save_screenshots(self, screenshots: List[Dict]) -> List[Dict]:
-        """スクリーンショットを保存しメタデータを生成"""
-        metadata = []
+        """
+        スクリーンショットを保存しメタデータを生成
 
+        フレームを取得できたものから順にスレッドプールでエンコードを開始し、
+        動画からの読み直しとエンコードを並行して行う。縮小版・コンタクトシートも
+        同じフレームから作成し、同じスレッドプールでエンコードする。
+        """
+        metadata = []
+        # フレーム番号ごとの保存するスクリーンショットの番号
+        pending: Dict[int, List[int]] = {}
         for idx, shot in enumerate(screenshots, 1):
-            # ファイル名を生成
-            timestamp_str = self.format_timestamp(shot['timestamp'])
-            score_str = f"{shot['score']:.0f}"
-            filename = f"{idx:02d}_{timestamp_str}_score{score_str}.png"
-            filepath = self.screenshots_dir / filename
+            pending.setdefault(shot['frame_idx'], []).append(idx)
+
+        encoder = ImageEncoder(self.image_format, self.image_quality, self.encode_workers,
+                               artifacts=self.artifacts)
+        encodings = {}
+        derivatives = {}
+        thumbnails = {}
+        sheet = None
+        try:
+            for frame_idx, frame in self.iter_full_frames(screenshots):
+                for idx in pending.pop(frame_idx, []):
+                    filename = self.screenshot_filename(idx, screenshots[idx - 1])
+                    encodings[idx] = (filename,
+                                      encoder.submit(frame, self.screenshots_dir / filename,
+                                                     keep=True))
+                    if self.derivative_widths or self.contact_sheet:
+                        derivatives[idx], thumbnails[idx] = self.submit_derivatives(
+                            encoder, frame, filename)
+            if self.contact_sheet and thumbnails:
+                sheet = self.submit_contact_sheet(encoder, thumbnails)
+        finally:
+            encoder.close()
 
-            # PNG形式で保存（高品質、圧縮レベル1）
-            cv2.imwrite(str(filepath), shot['frame'],
-                       [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        for idx, shot in enumerate(screenshots, 1):
+            if idx not in encodings:
+                print(f"  Warning: Cannot read frame {shot['frame_idx']}, skipped")
+                continue
+            filename, encoding = encodings[idx]
 
             # メタデータを記録
-            metadata.append({
+            entry = {
                 'index': idx,
                 'filename': filename,
                 'timestamp': shot['timestamp'],
@@ -424,8 +1384,31 @@ class ScreenshotExtractor:
                 'stability_score': shot['stability_score'],
                 'ui_importance_score': shot['ui_importance_score'],
                 'ui_elements': shot['ui_elements'],
-                'detected_texts': shot['detected_texts']
-            })
+                'detected_texts': shot['detected_texts'],
+                'image_format': self.image_format,
+                'file_size': encoding.result()
+            }
+            if 'duplicates' in shot:
+                # 見た目が重複するため選ばなかった候補
+                entry['duplicates'] = shot['duplicates']
+            if self.derivative_widths:
+                entry['derivatives'] = [
+                    {'width': width, 'height': height, 'path': path,
+                     'file_size': derivative.result()}
+                    for width, height, path, derivative in derivatives[idx]
+                ]
+            if sheet is not None:
+                path, sheet_encoding, cells = sheet
+                x, y, width, height = cells[idx]
+                entry['contact_sheet'] = {'path': path, 'x': x, 'y': y, 'width': width,
+                                          'height': height, 'file_size': sheet_encoding.result()}
+            metadata.append(entry)
+
+        self.encode_seconds = encoder.wall_time
+        self.encoded_bytes = encoder.bytes_written
+        print(f"  Encoded {encoder.images_written} {self.image_format} images in "
+              f"{self.encode_seconds:.2f}s with {encoder.workers} threads "
+              f"({self.encoded_bytes / (1024 * 1024):.2f} MB written)")
 
         # メタデータをJSONに保存
         metadata_path = self.output_dir / "metadata.json"
@@ -1145,6 +2128,51 @@ class QualityValidator:
         return broken_links
 
 
+# チャンクに分けた記事生成のデフォルトテンプレート（prompts/ にファイルがない場合）
+CHUNKED_ARTICLE_TEMPLATES = {
+    "section_draft.txt": """あなたは{app_name}の魅力を伝える技術ライターです。
+
+長い操作動画の記事を{total_chunks}個のパートに分けて下書きしています。
+これはパート{chunk_index}/{total_chunks}です。以下の{total_screenshots}枚のスクリーンショット画像を分析してください。
+
+## スクリーンショットファイル名
+画像は順番に以下のファイル名で保存されています（音声解説がある場合はファイル名の後に記載）：
+{screenshot_filenames}
+
+## タスク
+1. 各画像のUI要素と機能を分析する
+2. 音声解説がある場合は、開発者の意図やアプリの価値提案を抽出する
+3. このパートで紹介する機能を、画像の順番に沿ってセクションにまとめる
+
+## 出力形式
+- H1タイトル・導入・まとめは書かず、H2セクションだけをMarkdown形式で出力してください（記事全体は最後に統合します）
+- 各スクリーンショットに対してコンテキストに沿った説明文を書いてください
+- 画像リンクは `![説明](screenshots/ファイル名.png)` 形式で記述してください
+**重要**: 画像のファイル名は必ず上記の「スクリーンショットファイル名」リストから正確に使用してください。
+""",
+    "article_reduce.txt": """あなたは{app_name}の魅力を伝える技術ライターです。
+
+長い操作動画の記事を{total_chunks}個のパートに分けて下書きしました。
+以下の下書きを統合し、1本の読みやすい記事に仕上げてください。
+
+## 下書き
+{drafts}
+
+## タスク
+1. H1タイトル（アプリ名を含む）と導入、まとめを追加する
+2. パート間の重複を整理し、見出しの粒度・文体・用語を統一する
+3. パートのつなぎ目に自然な流れを作る
+
+## 制約
+- 下書きに含まれる画像リンク（全{total_screenshots}枚）は、ファイル名を変えずにすべて残してください
+- 画像の順番は変えないでください
+
+## 出力形式
+Markdown形式で、記事本文だけを出力してください。
+"""
+}
+
+
 class PromptTemplateManager:
     """
     プロンプトテンプレートを管理し、str.format()で変数置換を行う
@@ -1166,6 +2194,8 @@ class PromptTemplateManager:
             template_name: テンプレートファイル名
                 - "article_with_audio.txt": 音声文字起こしがある場合
                 - "article_without_audio.txt": 音声文字起こしがない場合
+                - "section_draft.txt": チャンクごとのセクションの草稿（map）
+                - "article_reduce.txt": 草稿の統合（reduce）
 
         Returns:
             テンプレート文字列（プレーンテキスト、{変数名}形式）
@@ -1184,6 +2214,8 @@ class PromptTemplateManager:
 
         # ファイルが存在しないか読み込みエラーの場合はデフォルトを使用
         print(f"INFO: デフォルトテンプレートを使用します (template={template_name})")
+        if template_name in CHUNKED_ARTICLE_TEMPLATES:
+            return CHUNKED_ARTICLE_TEMPLATES[template_name]
         with_audio = "with_audio" in template_name
         return self.get_default_template(with_audio=with_audio)
 
@@ -1260,23 +2292,60 @@ Markdown形式で出力してください。画像リンクは `![説明](screen
 """
 
 
+def split_into_chunks(items: List[Dict], max_size: int) -> List[List[Dict]]:
+    """
+    順番を保ったまま max_size 以下のチャンクに均等に分割
+
+    例: 41件を最大20件に分割すると [14, 14, 13] 件（[20, 20, 1] 件にはしない）
+    """
+    if not items:
+        return []
+    count = -(-len(items) // max_size)
+    size, extra = divmod(len(items), count)
+    chunks = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
 class AIContentGenerator:
     """
     マルチモーダルAI（Claude API）を使用して高品質なアプリ紹介記事を生成するクラス
     Task 4.1: Claude API呼び出し機能の実装
     """
 
+    # 草稿を統合するリクエストの最大出力トークン数
+    MAX_REDUCE_TOKENS = 16000
+
     def __init__(self,
                  output_dir: str,
                  api_key: Optional[str] = None,
                  model: str = "claude-sonnet-4-5-20250929",
-                 max_tokens: int = 4000) -> None:
+                 max_tokens: int = 4000,
+                 token_budget: Optional[int] = None,
+                 byte_budget: Optional[int] = None,
+                 client: Optional[Any] = None,
+                 max_images_per_request: int = ImageProcessor.MAX_IMAGE_COUNT,
+                 concurrency: int = DEFAULT_AI_CONCURRENCY) -> None:
         """
         Args:
             output_dir: 出力ディレクトリパス
             api_key: Claude APIキー（Noneの場合は環境変数から取得）
             model: 使用するClaudeモデル名（デフォルト: claude-sonnet-4-5-20250929）
             max_tokens: 最大出力トークン数
+            token_budget: リクエスト全体の入力トークンの予算（画像を縮小して合わせる。
+                Noneの場合は制限しない）。チャンクに分けて生成する場合は、画像の枚数に比例して
+                草稿のリクエストに分配する（画像を含まない統合のリクエストは含めない）
+            byte_budget: リクエスト全体の画像のバイト数の予算（Noneの場合は制限しない）。
+                チャンクに分けて生成する場合は token_budget と同じく分配する
+            client: messages.create を持つAPIクライアント（テスト用。指定した場合は
+                APIキーを必要としない）
+            max_images_per_request: 1リクエストで送る画像の上限（超える場合はチャンクに分けて
+                セクションの草稿を生成し、最後に統合する）
+            concurrency: チャンクごとの草稿を並行して生成するリクエストの最大数
 
         Raises:
             ValueError: APIキーが未設定の場合
@@ -1284,9 +2353,18 @@ class AIContentGenerator:
         self.output_dir = Path(output_dir)
         self.model = model
         self.max_tokens = max_tokens
+        self.token_budget = token_budget
+        self.byte_budget = byte_budget
+        self.max_images_per_request = max(1, min(max_images_per_request,
+                                                 ImageProcessor.MAX_IMAGE_COUNT))
+        self.concurrency = max(1, concurrency)
+        # 送信前に画像の縮小倍率と形式を予算に合わせて決める
+        self.image_optimizer = ImageBudgetOptimizer(token_budget, byte_budget)
+        # 画像ブロックの検証（形式・3.75MB・8000px）と base64 のキャッシュ
+        self.image_processor = ImageProcessor()
 
         # APIキーの取得と検証
-        if api_key:
+        if api_key or client is not None:
             # 明示的に渡されたAPIキーを使用
             self.api_key = api_key
         else:
@@ -1302,7 +2380,8 @@ class AIContentGenerator:
         try:
             import anthropic
             self.anthropic = anthropic
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            self.client = client if client is not None else anthropic.Anthropic(
+                api_key=self.api_key)
         except ImportError:
             raise ImportError(
                 "anthropic package is not installed. "
@@ -1377,7 +2456,8 @@ class AIContentGenerator:
     def generate_article(self,
                         synchronized_data: List[Dict],
                         app_name: str = "アプリ",
-                        output_format: str = "markdown") -> Dict[str, any]:
+                        output_format: str = "markdown",
+                        artifacts: Optional[ArtifactBuffer] = None) -> Dict[str, any]:
         """
         スクリーンショット・メタデータ・音声文字起こしから高品質記事を生成
         Task 7: AIContentGeneratorクラスの統合実装
@@ -1387,6 +2467,8 @@ class AIContentGenerator:
                 [{"screenshot": {...}, "transcript": {...}, "matched": bool}, ...]
             app_name: アプリ名（プロンプトテンプレート変数）
             output_format: 出力形式（"markdown" or "html"）
+            artifacts: 保存時にエンコードした画像のバッファ（バッファにある画像は
+                ファイルから読み込まない。Noneの場合はすべてファイルから読み込む）
 
         Returns:
             {
@@ -1397,7 +2479,11 @@ class AIContentGenerator:
                     "generated_at": str,
                     "total_screenshots": int,
                     "transcript_available": bool,
-                    "quality_score": float
+                    "quality_score": float,
+                    "images": [{"filename": str, "media_type": str, "size": int,
+                                "source": str, "width": int, "height": int, "scale": float,
+                                "predicted_tokens": int, "optimized": bool}, ...],
+                    "api_usage": {"input_tokens": int, "predicted_input_tokens": int, ...}
                 }
             }
 
@@ -1405,9 +2491,6 @@ class AIContentGenerator:
             ValueError: 入力データが不正な場合
             anthropic.APIError: API呼び出し失敗（リトライ後）
         """
-        from datetime import datetime
-        import base64
-
         # 入力データ検証
         if not synchronized_data:
             raise ValueError("synchronized_data is empty")
@@ -1428,25 +2511,10 @@ class AIContentGenerator:
         if not screenshot_paths:
             raise ValueError("No valid screenshot paths found in synchronized_data")
 
-        # 画像をbase64エンコード
-        content_blocks = []
-        for img_path in screenshot_paths:
-            if not img_path.exists():
-                print(f"WARN: 画像ファイルが見つかりません: {img_path}")
-                continue
-
-            # 画像を読み込んでbase64エンコード
-            with open(img_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-
-            content_blocks.append({
-                "type": "image",
-                "source": {
-                    "type": "base64",
-                    "media_type": "image/png",
-                    "data": image_data
-                }
-            })
+        if len(screenshot_paths) > self.max_images_per_request:
+            # 1リクエストの画像の上限を超える場合はチャンクに分けて生成
+            return self.generate_article_chunked(synchronized_data, app_name, output_format,
+                                                 artifacts)
 
         # プロンプトテンプレートを選択・レンダリング
         prompt_manager = PromptTemplateManager()
@@ -1466,13 +2534,137 @@ class AIContentGenerator:
             "screenshot_filenames": screenshot_filenames
         })
 
+        # Claude APIリクエスト作成
+        request_data, images, predicted_input_tokens, image_bytes = self.build_image_request(
+            screenshot_paths, prompt_text, artifacts)
+
+        # API呼び出し（リトライあり）
+        print(f"INFO: Claude APIに記事生成をリクエスト中... (model={self.model}, screenshots={len(screenshot_paths)})")
+        if predicted_input_tokens is not None:
+            print(f"INFO: 予測入力トークン数: {predicted_input_tokens}")
+        response = self.call_api_with_retry(request_data)
+
+        # 記事テキストを抽出
+        article_content = response.content[0].text
+
+        # 品質検証
+        validator = QualityValidator()
+        quality_result = validator.validate_quality(article_content, screenshot_paths)
+
+        # API使用統計の計算
+        input_tokens = response.usage.input_tokens
+        output_tokens = response.usage.output_tokens
+
+        # メタデータ構築
+        metadata = {
+            "model": self.model,
+            "prompt_version": "1.0.0",
+            "generated_at": self.utc_timestamp(),
+            "total_screenshots": len(screenshot_paths),
+            "transcript_available": transcript_available,
+            "quality_valid": quality_result["valid"],
+            "quality_warnings": quality_result["warnings"],
+            "quality_metrics": quality_result["metrics"],
+            "images": images,
+            "api_usage": {
+                "input_tokens": input_tokens,
+                "predicted_input_tokens": predicted_input_tokens,
+                "output_tokens": output_tokens,
+                "total_cost_usd": self.estimate_cost_usd(input_tokens, output_tokens)
+            }
+        }
+        if self.token_budget is not None or self.byte_budget is not None:
+            metadata["budget"] = {
+                "token_budget": self.token_budget,
+                "byte_budget": self.byte_budget,
+                "image_bytes": image_bytes
+            }
+
+        return {
+            "content": article_content,
+            "metadata": metadata
+        }
+
+    @staticmethod
+    def utc_timestamp() -> str:
+        """現在時刻（UTC）の ISO 8601 形式の文字列（例: 2025-10-18T12:34:56.789012Z）"""
+        from datetime import datetime, timezone
+
+        return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+    @staticmethod
+    def estimate_cost_usd(input_tokens: int, output_tokens: int) -> float:
+        """APIコストの概算（Input $3/MTok, Output $15/MTok、2025年現在の概算）"""
+        return round((input_tokens * 3 + output_tokens * 15) / 1_000_000, 6)
+
+    def build_image_request(self, screenshot_paths: List[Path], prompt_text: str,
+                            artifacts: Optional[ArtifactBuffer] = None,
+                            optimizer: Optional[ImageBudgetOptimizer] = None
+                            ) -> Tuple[Dict, List[Dict], Optional[int], int]:
+        """
+        画像とプロンプトからAPIリクエストを作成
+
+        Args:
+            screenshot_paths: 送信するスクリーンショットのパス
+            prompt_text: テキストプロンプト
+            artifacts: 保存時にエンコードした画像のバッファ
+            optimizer: このリクエストの予算を持つ ImageBudgetOptimizer
+                （Noneの場合はリクエスト全体の予算の self.image_optimizer）
+
+        Returns:
+            (リクエスト, 送信する画像の情報, 予測入力トークン数（予測できない場合は None）,
+             送信する画像の合計バイト数)
+
+        Raises:
+            ValueError: 画像が API の制限を超える・未対応の形式の場合
+        """
+        # 画像を取得（保存時にエンコードした画像はバッファから取得）
+        image_paths = []
+        image_artifacts = []
+        for img_path in screenshot_paths:
+            artifact = artifacts.get(img_path) if artifacts is not None else None
+            if artifact is None:
+                if not img_path.exists():
+                    print(f"WARN: 画像ファイルが見つかりません: {img_path}")
+                    continue
+                artifact = ImageArtifact.from_file(img_path)
+            image_paths.append(img_path)
+            image_artifacts.append(artifact)
+
+        # 予算に合わせて画像を縮小・再エンコードし、入力トークン数を予測
+        if optimizer is None:
+            optimizer = self.image_optimizer
+        text_tokens = estimate_text_tokens(prompt_text)
+        if optimizer.token_budget is not None or optimizer.byte_budget is not None:
+            image_artifacts, plans = optimizer.optimize(image_artifacts, text_tokens)
+        else:
+            # 予算がなくても、APIの1画像の制限を超える画像だけは縮小する
+            original_sizes = [artifact.size for artifact in image_artifacts]
+            image_artifacts, plans = optimizer.enforce_limits(image_artifacts)
+            for img_path, size, plan in zip(image_paths, original_sizes, plans):
+                if plan["optimized"]:
+                    print(f"WARN: 画像がAPIの制限（3.75MB・8000px）を超えるため縮小しました: "
+                          f"{img_path.name}（{size / (1024 * 1024):.2f}MB → "
+                          f"{plan['size'] / (1024 * 1024):.2f}MB）")
+        predicted_input_tokens = None
+        if all(plan["predicted_tokens"] is not None for plan in plans):
+            predicted_input_tokens = text_tokens + sum(plan["predicted_tokens"] for plan in plans)
+
+        # 画像ブロックは ImageProcessor で形式をヘッダーから判定し、API の制限を検証して作成
+        # （base64 は内容のダイジェストでキャッシュし、リトライ時も同じリクエストを再利用する）
+        content_blocks = [self.image_processor.prepare_image_block(artifact.data, img_path.name)
+                          for img_path, artifact in zip(image_paths, image_artifacts)]
+        images = [
+            {"filename": img_path.name, "source": artifact.source, **plan}
+            for img_path, artifact, plan in zip(image_paths, image_artifacts, plans)
+        ]
+
         # テキストプロンプトブロックを追加
         content_blocks.append({
             "type": "text",
             "text": prompt_text
         })
 
-        # Claude APIリクエスト作成
         request_data = {
             "model": self.model,
             "max_tokens": self.max_tokens,
@@ -1483,40 +2675,204 @@ class AIContentGenerator:
                 }
             ]
         }
+        image_bytes = sum(artifact.size for artifact in image_artifacts)
+        # 最小の長辺まで縮小しても予算に収まらない場合は超えたまま送る
+        if (optimizer.token_budget is not None and predicted_input_tokens is not None
+                and predicted_input_tokens > optimizer.token_budget):
+            print(f"WARN: 予測入力トークン数がトークン予算を超えています: "
+                  f"{predicted_input_tokens:,} > {optimizer.token_budget:,}")
+        if optimizer.byte_budget is not None and image_bytes > optimizer.byte_budget:
+            print(f"WARN: 画像の合計バイト数がバイト予算を超えています: "
+                  f"{image_bytes:,} > {optimizer.byte_budget:,}")
+        return request_data, images, predicted_input_tokens, image_bytes
+
+    def generate_section_draft(self, chunk: List[Dict], chunk_index: int, total_chunks: int,
+                               app_name: str, artifacts: Optional[ArtifactBuffer] = None,
+                               optimizer: Optional[ImageBudgetOptimizer] = None
+                               ) -> Dict[str, any]:
+        """
+        チャンクのスクリーンショットからセクションの草稿を生成（map）
 
-        # API呼び出し（リトライあり）
-        print(f"INFO: Claude APIに記事生成をリクエスト中... (model={self.model}, screenshots={len(screenshot_paths)})")
+        Args:
+            chunk: チャンクのタイムスタンプ同期済みデータ
+            chunk_index: チャンクの番号（1から）
+            total_chunks: チャンクの数
+            app_name: アプリ名
+            artifacts: 保存時にエンコードした画像のバッファ
+            optimizer: このチャンクに分配した予算を持つ ImageBudgetOptimizer
+
+        Returns:
+            {"index", "content", "screenshots", "images", "image_bytes",
+             "input_tokens", "predicted_input_tokens", "output_tokens"}
+        """
+        screenshot_paths = [Path(item["screenshot"]["file_path"]) for item in chunk]
+        lines = []
+        for path, item in zip(screenshot_paths, chunk):
+            transcript_info = item.get("transcript")
+            if transcript_info and transcript_info.get("text"):
+                lines.append(f"- {path.name}: {transcript_info['text']}")
+            else:
+                lines.append(f"- {path.name}")
+
+        prompt_manager = PromptTemplateManager()
+        prompt_text = prompt_manager.render(prompt_manager.load_template("section_draft.txt"), {
+            "app_name": app_name,
+            "chunk_index": chunk_index,
+            "total_chunks": total_chunks,
+            "total_screenshots": len(screenshot_paths),
+            "screenshot_filenames": "\n".join(lines)
+        })
+        request_data, images, predicted_input_tokens, image_bytes = self.build_image_request(
+            screenshot_paths, prompt_text, artifacts, optimizer)
+
+        print(f"INFO: セクション草稿 {chunk_index}/{total_chunks} をリクエスト中... "
+              f"(screenshots={len(screenshot_paths)})")
         response = self.call_api_with_retry(request_data)
+        return {
+            "index": chunk_index,
+            "content": response.content[0].text,
+            "screenshots": [path.name for path in screenshot_paths],
+            "images": images,
+            "image_bytes": image_bytes,
+            "input_tokens": response.usage.input_tokens,
+            "predicted_input_tokens": predicted_input_tokens,
+            "output_tokens": response.usage.output_tokens
+        }
 
-        # 記事テキストを抽出
+    def generate_article_chunked(self,
+                                 synchronized_data: List[Dict],
+                                 app_name: str = "アプリ",
+                                 output_format: str = "markdown",
+                                 artifacts: Optional[ArtifactBuffer] = None) -> Dict[str, any]:
+        """
+        1リクエストの画像の上限を超えるスクリーンショットから記事を生成（map-reduce）
+
+        スクリーンショットを上限以下のチャンクに分け、チャンクごとのセクションの草稿を
+        最大 concurrency 件ずつ並行して生成し（map）、最後に画像を含まないテキストだけの
+        リクエストで草稿を1本の記事に統合する（reduce）。実時間は チャンク数 / concurrency
+        回分のリクエストと統合の1回分になる。トークン・バイトの予算は草稿のリクエスト全体の
+        予算として、画像の枚数に比例してチャンクに分配する。
+
+        Returns:
+            generate_article と同じ形式（metadata に "generation_mode": "map_reduce",
+            "chunks", "timing" を追加）
+
+        Raises:
+            ValueError: 入力データが不正な場合
+            anthropic.APIError: API呼び出し失敗（リトライ後）
+        """
+        items = [item for item in synchronized_data
+                 if item.get("screenshot") and "file_path" in item["screenshot"]]
+        if not items:
+            raise ValueError("No valid screenshot paths found in synchronized_data")
+        transcript_available = any(
+            item.get("transcript") and item["transcript"].get("text")
+            for item in synchronized_data
+        )
+        screenshot_paths = [Path(item["screenshot"]["file_path"]) for item in items]
+        chunks = split_into_chunks(items, self.max_images_per_request)
+        # 予算はリクエスト全体の予算として、画像の枚数に比例してチャンクに分配する
+        counts = [len(chunk) for chunk in chunks]
+        optimizers = [ImageBudgetOptimizer(token_budget, byte_budget)
+                      for token_budget, byte_budget in zip(
+                          split_budget(self.token_budget, counts),
+                          split_budget(self.byte_budget, counts))]
+        workers = max(1, min(self.concurrency, len(chunks)))
+        print(f"INFO: {len(items)}枚のスクリーンショットを{len(chunks)}チャンクに分割し、"
+              f"最大{workers}並列でセクション草稿を生成します")
+
+        # map: チャンクごとのセクションの草稿を並行して生成
+        map_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self.generate_section_draft, chunk, i, len(chunks), app_name,
+                                artifacts, optimizer)
+                for i, (chunk, optimizer) in enumerate(zip(chunks, optimizers), 1)
+            ]
+            try:
+                drafts = [future.result() for future in futures]
+            except Exception:
+                # 1つでも失敗したら未開始のチャンクは実行しない
+                for future in futures:
+                    future.cancel()
+                raise
+        map_seconds = time.perf_counter() - map_started
+
+        # reduce: 草稿を統合するテキストだけのリクエスト
+        reduce_started = time.perf_counter()
+        prompt_manager = PromptTemplateManager()
+        prompt_text = prompt_manager.render(prompt_manager.load_template("article_reduce.txt"), {
+            "app_name": app_name,
+            "total_chunks": len(drafts),
+            "total_screenshots": len(screenshot_paths),
+            "drafts": "\n\n---\n\n".join(
+                f"（パート{draft['index']}）\n\n{draft['content']}" for draft in drafts)
+        })
+        request_data = {
+            "model": self.model,
+            "max_tokens": min(self.max_tokens * len(drafts), self.MAX_REDUCE_TOKENS),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [{"type": "text", "text": prompt_text}]
+                }
+            ]
+        }
+        print(f"INFO: {len(drafts)}件の草稿を統合中... (model={self.model})")
+        response = self.call_api_with_retry(request_data)
         article_content = response.content[0].text
+        reduce_seconds = time.perf_counter() - reduce_started
 
-        # 品質検証
+        # 品質検証（統合した記事）
         validator = QualityValidator()
         quality_result = validator.validate_quality(article_content, screenshot_paths)
 
-        # API使用統計の計算
-        input_tokens = response.usage.input_tokens
-        output_tokens = response.usage.output_tokens
-        # コスト計算: Input $3/MTok, Output $15/MTok (2025年現在の概算)
-        total_cost_usd = (input_tokens * 3 + output_tokens * 15) / 1_000_000
+        # API使用統計（すべてのリクエストの合計）
+        input_tokens = sum(d["input_tokens"] for d in drafts) + response.usage.input_tokens
+        output_tokens = sum(d["output_tokens"] for d in drafts) + response.usage.output_tokens
+        predicted_input_tokens = None
+        if all(d["predicted_input_tokens"] is not None for d in drafts):
+            predicted_input_tokens = (sum(d["predicted_input_tokens"] for d in drafts) +
+                                      estimate_text_tokens(prompt_text))
 
-        # メタデータ構築
         metadata = {
             "model": self.model,
             "prompt_version": "1.0.0",
-            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "generated_at": self.utc_timestamp(),
             "total_screenshots": len(screenshot_paths),
             "transcript_available": transcript_available,
             "quality_valid": quality_result["valid"],
             "quality_warnings": quality_result["warnings"],
             "quality_metrics": quality_result["metrics"],
+            "images": [image for draft in drafts for image in draft["images"]],
+            "generation_mode": "map_reduce",
+            "chunks": [
+                {key: draft[key] for key in ("index", "screenshots", "input_tokens",
+                                             "predicted_input_tokens", "output_tokens")}
+                for draft in drafts
+            ],
+            "timing": {
+                "concurrency": workers,
+                "map_seconds": round(map_seconds, 3),
+                "reduce_seconds": round(reduce_seconds, 3)
+            },
             "api_usage": {
                 "input_tokens": input_tokens,
+                "predicted_input_tokens": predicted_input_tokens,
                 "output_tokens": output_tokens,
-                "total_cost_usd": round(total_cost_usd, 6)
+                "total_cost_usd": self.estimate_cost_usd(input_tokens, output_tokens)
             }
         }
+        if self.token_budget is not None or self.byte_budget is not None:
+            # 予算は草稿のリクエスト（画像を含むリクエスト）全体に対する予算
+            metadata["budget"] = {
+                "token_budget": self.token_budget,
+                "byte_budget": self.byte_budget,
+                "image_bytes": sum(draft["image_bytes"] for draft in drafts),
+                "chunks": [{"token_budget": optimizer.token_budget,
+                            "byte_budget": optimizer.byte_budget}
+                           for optimizer in optimizers]
+            }
 
         return {
             "content": article_content,
@@ -1548,6 +2904,16 @@ class AIContentGenerator:
         return article_path
 
 
+def parse_threshold(value: str) -> Union[int, str]:
+    """--threshold の値を解析（整数または 'auto'）"""
+    if value == 'auto':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid threshold: '{value}' (integer or 'auto')")
+
+
 def create_argument_parser() -> argparse.ArgumentParser:
     """引数パーサーを作成（テスト可能にするため分離）"""
     parser = argparse.ArgumentParser(
@@ -1560,6 +2926,8 @@ def create_argument_parser() -> argparse.ArgumentParser:
   %(prog)s -i app_demo.mp4 -o ~/Documents/screenshots
   %(prog)s -i app_demo.mp4 --audio demo.mp3 --markdown
   %(prog)s -i app_demo.mp4 --audio demo.mp3 --markdown --model-size small
+  %(prog)s tune -i app_demo.mp4 --thresholds 10:40:5 --intervals 5,10,15
+  %(prog)s ocr-bench --images output/screenshots
         """
     )
 
@@ -1570,10 +2938,99 @@ def create_argument_parser() -> argparse.ArgumentParser:
                        help='出力ディレクトリ（デフォルト: ./output）')
     parser.add_argument('-c', '--count', type=int, default=10,
                        help='抽出する画像の枚数（デフォルト: 10）')
-    parser.add_argument('-t', '--threshold', type=int, default=25,
-                       help='画面遷移検出の閾値（デフォルト: 25）')
+    parser.add_argument('-t', '--threshold', type=parse_threshold, default=25,
+                       help='画面遷移検出の閾値（デフォルト: 25）\n'
+                            'auto: 距離信号の統計（中央値+MAD）から自動決定し、\n'
+                            '直後に元の画面へ戻る過渡的スパイクを除外する')
     parser.add_argument('--interval', type=float, default=15.0,
                        help='最小時間間隔（秒）（デフォルト: 15）')
+    parser.add_argument('--frame-backend', type=str, default='opencv',
+                       choices=FRAME_SOURCE_BACKENDS,
+                       help='画面遷移検出のフレーム供給バックエンド（デフォルト: opencv）\n'
+                            '  - opencv: 間引くフレームはgrab()のみで読み飛ばす\n'
+                            '  - ffmpeg: ffmpegが縮小済みグレースケールをパイプ出力\n'
+                            '    （pHashがopencvと数ビット異なるため、閾値はtuneで同じバックエンドで調整）\n'
+                            '  - pyav: PyAVでデコード（pip install av が必要、pHashはopencvと同一）')
+    parser.add_argument('--single-pass', action='store_true',
+                       help='画面遷移と安定フレームを1パスで検出（遷移ごとのシークを行わない）\n'
+                            'OpenCVで1回だけ前方にデコードする（--frame-backend / --workers は無効）')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='画面遷移検出のワーカープロセス数（デフォルト: 1、0でCPUコア数）\n'
+                            '動画をキーフレーム境界で分割して並列にスキャンする\n'
+                            '（--single-pass 指定時は無効）')
+    parser.add_argument('--sample-interval', type=float, default=None,
+                       help='画面遷移検出のサンプリング間隔（秒）\n'
+                            '（デフォルト: 0.5、--coarse-to-fine 指定時は2）')
+    parser.add_argument('--coarse-to-fine', action='store_true',
+                       help='粗いサンプリングで閾値を超えた区間だけを二分探索し、\n'
+                            'フレーム単位で遷移位置を特定する（--single-pass 指定時は無効）')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                       help='ハッシュ信号・OCR結果のキャッシュディレクトリ（デフォルト: 出力ディレクトリ/.cache）\n'
+                            '同じ動画を別の --threshold / --interval / --count で再実行する際に\n'
+                            'デコードとハッシュ計算を省略する')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='ハッシュ信号・OCR結果のキャッシュを使用しない')
+    parser.add_argument('--ocr-cache-radius', type=int, default=DEFAULT_OCR_CACHE_RADIUS,
+                       help=f'OCRキャッシュで同じ画面とみなすpHashのハミング距離\n'
+                            f'（デフォルト: {DEFAULT_OCR_CACHE_RADIUS}、0で完全一致のみ）\n'
+                            f'OCR結果は --cache-dir に保存され、同じ画面への再訪問・再実行・\n'
+                            f'同じアプリの別動画でOCRを省略する')
+    parser.add_argument('--ocr-cache-size', type=int, default=DEFAULT_OCR_CACHE_SIZE,
+                       help=f'OCRキャッシュの最大エントリ数（デフォルト: {DEFAULT_OCR_CACHE_SIZE}、'
+                            f'超えた分は古いものから削除）')
+    parser.add_argument('--ocr-workers', type=int, default=1,
+                       help='OCRのワーカープロセス数（デフォルト: 1でメインプロセス、0でCPUコア数）\n'
+                            '各ワーカーがEasyOCRのモデルを1回だけ読み込み、torchのスレッド数を\n'
+                            '「CPUコア数 / ワーカー数」に固定する（ワーカーごとに約1GBのメモリが必要）')
+    parser.add_argument('--ocr-batch-size', type=int, default=None,
+                       help='テキスト領域の検出でまとめて推論するフレーム数'
+                            '（デフォルト: OCRプロファイルの値）')
+    parser.add_argument('--ocr-profile', type=str, default=DEFAULT_OCR_PROFILE,
+                       choices=list(OCR_PROFILES),
+                       help=f'OCRの速度・精度プロファイル（デフォルト: {DEFAULT_OCR_PROFILE}）\n'
+                            f'  - fast: 長辺960pxに縮小して検出・認識\n'
+                            f'  - balanced: 長辺1280pxに縮小して検出・認識\n'
+                            f'  - accurate: 元の解像度で検出・認識\n'
+                            f'ui_elements の bbox は元のフレームの座標で保存する\n'
+                            f'（ocr-bench サブコマンドで再現率と速度を比較できる）')
+    parser.add_argument('--selection', type=str, default='greedy', choices=['greedy', 'optimal'],
+                       help='上位の選択方法（デフォルト: greedy）\n'
+                            '  - greedy: スコアの高い順に、選択済みと --interval 以上離れた候補を選ぶ\n'
+                            '  - optimal: 選択した画像のスコアの合計が最大になる組み合わせを選ぶ\n'
+                            '    （重みつき区間スケジューリングの動的計画法）')
+    parser.add_argument('--diversity-radius', type=int, default=None,
+                       help='選択済みの画像と pHash のハミング距離がこの値以下の候補を\n'
+                            '見た目の重複として選ばない（デフォルト: 無効、目安: 6〜10）\n'
+                            '除外した候補は metadata.json の duplicates に記録する')
+    parser.add_argument('--image-format', type=str, default=DEFAULT_IMAGE_FORMAT,
+                       choices=list(IMAGE_FORMATS),
+                       help=f'スクリーンショットの画像形式（デフォルト: {DEFAULT_IMAGE_FORMAT}）\n'
+                            f'  - png: 可逆（圧縮レベル1）\n'
+                            f'  - webp / jpeg: 非可逆、ファイルサイズが小さい（--image-quality で品質を指定）')
+    parser.add_argument('--image-quality', type=int, default=None,
+                       help='webp・jpeg の品質（0〜100、デフォルト: 90。png では使わない）')
+    parser.add_argument('--encode-workers', type=int, default=0,
+                       help='画像のエンコードのスレッド数（デフォルト: 0でCPUコア数）')
+    parser.add_argument('--derivative-widths', type=parse_widths, default=None,
+                       help='保存時に作成する縮小版の幅（カンマ区切り、例: 320,640,1280）\n'
+                            f'{DERIVATIVES_DIRNAME}/ に保存し、パスとサイズを metadata.json に記録する')
+    parser.add_argument('--contact-sheet', action='store_true',
+                       help='全スクリーンショットを並べたコンタクトシート（スプライト）を作成し、\n'
+                            '各画像の位置を metadata.json に記録する')
+    parser.add_argument('--artifact-buffer-mb', type=int, default=DEFAULT_ARTIFACT_BUFFER_MB,
+                       help='AI記事生成へ受け渡すためにメモリに保持するエンコード済み画像の'
+                            f'合計の上限（MB、デフォルト: {DEFAULT_ARTIFACT_BUFFER_MB}）\n'
+                            '0の場合は保持せず、AI記事生成で画像ファイルを読み込む')
+    parser.add_argument('--frame-cache-size', type=int, default=0,
+                       help='候補のフル解像度フレームをメモリに保持する最大数（デフォルト: 0）\n'
+                            '0の場合は保持せず、保存時に選択されたフレームだけを動画から読み直す')
+    parser.add_argument('--keyword-dict', type=str, action='append', default=None,
+                       help='UI重要度のキーワード辞書（JSON、複数指定可）\n'
+                            '{"button": {"カートに入れる": 25}, "title": ["商品詳細"]} の形式で\n'
+                            '既定のキーワードに追加・重みを上書きする（リストは既定の加点）')
+    parser.add_argument('--incremental-ocr', action='store_true',
+                       help='前回文字認識した画面から変化した領域だけを文字認識し、\n'
+                            '変化のない領域（タブバー・ヘッダーなど）の結果を引き継ぐ')
 
     # 新規オプション（Task 4.1）
     parser.add_argument('--audio', type=str, default=None,
@@ -1602,10 +3059,227 @@ def create_argument_parser() -> argparse.ArgumentParser:
                        default='markdown',
                        choices=['markdown', 'html'],
                        help='AI記事の出力形式（デフォルト: markdown）')
+    parser.add_argument('--ai-token-budget', type=int, default=None,
+                       help='AI記事生成のリクエスト全体の入力トークンの予算（任意）\n'
+                            '予算に収まるように画像ごとの縮小倍率を決める')
+    parser.add_argument('--ai-byte-budget-mb', type=float, default=None,
+                       help='AI記事生成のリクエストで送る画像の合計バイト数の予算（MB、任意）\n'
+                            'PNGで収まらない画像は高品質のWebPにし、さらに縮小する')
+    parser.add_argument('--ai-concurrency', type=int, default=DEFAULT_AI_CONCURRENCY,
+                       help='スクリーンショットが20枚を超える場合に、チャンクごとの草稿を並行して\n'
+                            f'生成するリクエストの最大数（デフォルト: {DEFAULT_AI_CONCURRENCY}）')
 
     return parser
 
 
+def create_tune_argument_parser() -> argparse.ArgumentParser:
+    """tune サブコマンドの引数パーサーを作成"""
+    parser = argparse.ArgumentParser(
+        prog='extract_screenshots.py tune',
+        description='ハッシュ信号から --threshold / --interval の組み合わせを一括評価',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  %(prog)s -i app_demo.mp4
+  %(prog)s -i app_demo.mp4 --thresholds 10:40:2 --intervals 5,10,15 --format json
+  %(prog)s -i app_demo.mp4 --plot distance.png
+        """
+    )
+
+    parser.add_argument('-i', '--input', required=True,
+                       help='入力動画ファイルパス（必須）')
+    parser.add_argument('-o', '--output', default='./output',
+                       help='出力ディレクトリ（キャッシュの既定位置、デフォルト: ./output）')
+    parser.add_argument('-c', '--count', type=int, default=10,
+                       help='抽出する画像の枚数（デフォルト: 10）')
+    parser.add_argument('--thresholds', type=str, default='10:40:5',
+                       help='評価する閾値（カンマ区切り、または start:stop:step、デフォルト: 10:40:5）')
+    parser.add_argument('--intervals', type=str, default='15',
+                       help='評価する最小時間間隔（秒、カンマ区切り、または start:stop:step、デフォルト: 15）')
+    parser.add_argument('--format', type=str, default='table', choices=['table', 'json'],
+                       help='結果の出力形式（デフォルト: table）')
+    parser.add_argument('--plot', type=str, default=None,
+                       help='距離信号のグラフを保存するPNGファイルパス（matplotlib が必要）')
+    parser.add_argument('--frame-backend', type=str, default='opencv',
+                       choices=FRAME_SOURCE_BACKENDS,
+                       help='画面遷移検出のフレーム供給バックエンド（デフォルト: opencv）')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='画面遷移検出のワーカープロセス数（デフォルト: 1、0でCPUコア数）')
+    parser.add_argument('--sample-interval', type=float, default=None,
+                       help='画面遷移検出のサンプリング間隔（秒）（デフォルト: 0.5）')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                       help='ハッシュ信号のキャッシュディレクトリ（デフォルト: 出力ディレクトリ/.cache）')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='ハッシュ信号のキャッシュを使用しない')
+
+    return parser
+
+
+def run_tune(args: argparse.Namespace) -> int:
+    """
+    tune サブコマンドを実行
+
+    ハッシュ信号を1回だけ取得（キャッシュがあれば再デコードしない）し、
+    閾値 × 間隔のグリッドを評価して結果を出力する。
+
+    Args:
+        args: create_tune_argument_parser() で解析した引数
+
+    Returns:
+        終了コード
+    """
+    try:
+        thresholds = parse_range(args.thresholds, int)
+        intervals = parse_range(args.intervals, float)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if not thresholds or not intervals:
+        print("Error: --thresholds and --intervals must not be empty")
+        return 1
+
+    signal_cache_dir = None
+    if not args.no_cache:
+        signal_cache_dir = args.cache_dir or str(Path(args.output) / ".cache")
+
+    extractor = ScreenshotExtractor(
+        video_path=args.input,
+        output_dir=args.output,
+        target_count=args.count,
+        frame_backend=args.frame_backend,
+        workers=args.workers,
+        sample_interval=args.sample_interval,
+        signal_cache_dir=signal_cache_dir
+    )
+
+    # JSON出力時は進捗メッセージを標準エラーに回し、標準出力をJSONだけにする
+    status_output = sys.stderr if args.format == 'json' else sys.stdout
+    with contextlib.redirect_stdout(status_output):
+        if not extractor.open_video():
+            return 1
+        try:
+            frame_indices, hashes = extractor.compute_hash_signal()
+        finally:
+            extractor.close_video()
+
+    start_time = time.time()
+    tuner = ParameterTuner(frame_indices, hashes, extractor.fps,
+                           extractor.total_frames, target_count=args.count,
+                           max_gap=extractor.event_max_gap())
+    results = tuner.sweep(thresholds, intervals)
+    elapsed = time.time() - start_time
+
+    if args.format == 'json':
+        print(format_json(results))
+    else:
+        print(format_table(results))
+        print(f"\nEvaluated {len(results)} combinations in {elapsed * 1000:.1f} ms "
+              f"(scores use transition magnitude only; no OCR)")
+
+    if args.plot:
+        if plot_distance_signal(tuner, thresholds, args.plot) is None:
+            return 1
+        if args.format != 'json':
+            print(f"Saved distance plot: {args.plot}")
+
+    return 0
+
+
+def create_ocr_bench_argument_parser() -> argparse.ArgumentParser:
+    """ocr-bench サブコマンドの引数パーサーを作成"""
+    parser = argparse.ArgumentParser(
+        prog='extract_screenshots.py ocr-bench',
+        description='参照画像セットでOCRプロファイルのキーワード再現率と1フレームあたりの秒数を比較',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  %(prog)s --images output/screenshots
+  %(prog)s --images reference/ --labels reference/labels.json --format json
+
+--labels は {"画像ファイル名": ["キーワード", ...]} 形式のJSON。
+省略した場合は accurate プロファイルで検出したUIキーワードを正解とする。
+        """
+    )
+
+    parser.add_argument('--images', required=True,
+                       help='参照画像のディレクトリ（必須、png/jpg/webp）')
+    parser.add_argument('--labels', type=str, default=None,
+                       help='画像ごとの正解キーワードのJSONファイル')
+    parser.add_argument('--profiles', type=str, default=','.join(OCR_PROFILES),
+                       help=f'比較するプロファイル（カンマ区切り、デフォルト: {",".join(OCR_PROFILES)}）')
+    parser.add_argument('--format', type=str, default='table', choices=['table', 'json'],
+                       help='結果の出力形式（デフォルト: table）')
+
+    return parser
+
+
+def run_ocr_bench(args: argparse.Namespace) -> int:
+    """
+    ocr-bench サブコマンドを実行
+
+    Args:
+        args: create_ocr_bench_argument_parser() で解析した引数
+
+    Returns:
+        終了コード
+    """
+    profile_names = [name.strip() for name in args.profiles.split(',') if name.strip()]
+    unknown = [name for name in profile_names if name not in OCR_PROFILES]
+    if unknown or not profile_names:
+        print(f"Error: unknown OCR profiles: {', '.join(unknown) or '(empty)'} "
+              f"(choose from {', '.join(OCR_PROFILES)})")
+        return 1
+
+    names, frames = [], []
+    for path in sorted(Path(args.images).glob('*')):
+        if path.suffix.lower() not in ('.png', '.jpg', '.jpeg', '.webp'):
+            continue
+        frame = cv2.imread(str(path))
+        if frame is not None:
+            names.append(path.name)
+            frames.append(frame)
+    if not frames:
+        print(f"Error: no images found in {args.images}")
+        return 1
+
+    references = None
+    if args.labels:
+        try:
+            with open(args.labels, 'r', encoding='utf-8') as f:
+                labels = json.load(f)
+        except OSError as e:
+            print(f"Error: Cannot read labels file: {args.labels} ({e.strerror})")
+            return 1
+        except ValueError as e:
+            print(f"Error: Invalid JSON in labels file: {args.labels} ({e})")
+            return 1
+        if not isinstance(labels, dict) or not all(
+                isinstance(keywords, list) and all(isinstance(k, str) for k in keywords)
+                for keywords in labels.values()):
+            print(f"Error: labels file must map image names to keyword lists: {args.labels}")
+            return 1
+        references = [set(labels.get(name, [])) for name in names]
+
+    # JSON出力時は進捗メッセージを標準エラーに回し、標準出力をJSONだけにする
+    status_output = sys.stderr if args.format == 'json' else sys.stdout
+    with tempfile.TemporaryDirectory() as work_dir, contextlib.redirect_stdout(status_output):
+        def create_analyzer(profile: str):
+            extractor = ScreenshotExtractor('', work_dir, ocr_profile=profile)
+            return lambda frame: extractor.analyze_ui_importance(frame)[2]
+
+        rows = benchmark_profiles(frames, create_analyzer, profile_names,
+                                  IMPORTANT_UI_KEYWORDS + TITLE_KEYWORDS, references)
+
+    if args.format == 'json':
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        print(format_benchmark_table(rows))
+        reference = 'labels' if references is not None else f'{DEFAULT_OCR_PROFILE} profile'
+        print(f"\nBenchmarked {len(frames)} images (keyword recall against {reference})")
+
+    return 0
+
+
 def run_integration_flow(video_path: str,
                          output_dir: str,
                          audio_path: Optional[str],
@@ -1615,9 +3289,35 @@ def run_integration_flow(video_path: str,
                          ai_model: str,  # NEW (Task 8)
                          output_format: str,  # NEW (Task 8)
                          model_size: str,
-                         threshold: int,
+                         threshold: Union[int, str],
                          interval: float,
-                         count: int) -> None:
+                         count: int,
+                         frame_backend: str = 'opencv',
+                         single_pass: bool = False,
+                         workers: int = 1,
+                         sample_interval: Optional[float] = None,
+                         coarse_to_fine: bool = False,
+                         cache_dir: Optional[str] = None,
+                         no_cache: bool = False,
+                         ocr_cache_radius: int = DEFAULT_OCR_CACHE_RADIUS,
+                         ocr_cache_size: int = DEFAULT_OCR_CACHE_SIZE,
+                         ocr_workers: int = 1,
+                         ocr_batch_size: Optional[int] = None,
+                         incremental_ocr: bool = False,
+                         ocr_profile: str = DEFAULT_OCR_PROFILE,
+                         keyword_dicts: Optional[List[str]] = None,
+                         frame_cache_size: int = 0,
+                         selection: str = 'greedy',
+                         diversity_radius: Optional[int] = None,
+                         image_format: str = DEFAULT_IMAGE_FORMAT,
+                         image_quality: Optional[int] = None,
+                         encode_workers: int = 0,
+                         derivative_widths: Optional[List[int]] = None,
+                         contact_sheet: bool = False,
+                         artifact_buffer_mb: int = DEFAULT_ARTIFACT_BUFFER_MB,
+                         ai_token_budget: Optional[int] = None,
+                         ai_byte_budget_mb: Optional[float] = None,
+                         ai_concurrency: int = DEFAULT_AI_CONCURRENCY) -> None:
     """
     統合処理フローを実行（Task 4.2, Task 8）
 
@@ -1631,17 +3331,72 @@ def run_integration_flow(video_path: str,
         ai_model: Claude APIモデル名（NEW - Task 8）
         output_format: 出力形式（NEW - Task 8）
         model_size: Whisperモデルサイズ
-        threshold: 画面遷移検出の閾値
+        threshold: 画面遷移検出の閾値（'auto' の場合は自動決定）
         interval: 最小時間間隔
         count: 抽出する画像の枚数
+        frame_backend: 画面遷移検出のフレーム供給バックエンド
+        single_pass: 画面遷移と安定フレームを1パスで検出するフラグ
+        workers: 画面遷移検出のワーカープロセス数
+        sample_interval: 画面遷移検出のサンプリング間隔（秒、Noneの場合は既定値）
+        coarse_to_fine: 粗密2段階で画面遷移を探索するフラグ
+        cache_dir: ハッシュ信号・OCR結果のキャッシュディレクトリ（Noneの場合は出力ディレクトリ/.cache）
+        no_cache: ハッシュ信号・OCR結果のキャッシュを無効にするフラグ
+        ocr_cache_radius: OCRキャッシュで同じ画面とみなす pHash のハミング距離
+        ocr_cache_size: OCRキャッシュの最大エントリ数
+        ocr_workers: OCRのワーカープロセス数
+        ocr_batch_size: テキスト領域の検出でまとめて推論するフレーム数
+        incremental_ocr: 変化した領域だけを文字認識するフラグ
+        ocr_profile: OCRの速度・精度プロファイル
+        keyword_dicts: 追加するUI重要度のキーワード辞書（JSON）のパス
+        frame_cache_size: 候補のフル解像度フレームをメモリに保持する最大数
+        selection: 上位の選択方法（greedy, optimal）
+        diversity_radius: 見た目の重複とみなす pHash のハミング距離（Noneの場合は無効）
+        image_format: スクリーンショットの画像形式（png, webp, jpeg）
+        image_quality: webp・jpeg の品質（Noneの場合は形式の既定値）
+        encode_workers: 画像のエンコードのスレッド数（0の場合はCPUコア数）
+        derivative_widths: 保存時に作成する縮小版の幅（Noneの場合は作成しない）
+        contact_sheet: コンタクトシートを作成するフラグ
+        artifact_buffer_mb: AI記事生成へ受け渡すエンコード済み画像の合計の上限（MB。
+            AI記事生成を行わない場合は保持しない）
+        ai_token_budget: AI記事生成の入力トークンの予算（Noneの場合は制限しない）
+        ai_byte_budget_mb: AI記事生成で送る画像の合計バイト数の予算（MB、Noneの場合は制限しない）
+        ai_concurrency: AI記事生成でチャンクごとの草稿を並行して生成するリクエストの最大数
     """
+    signal_cache_dir = None
+    if not no_cache:
+        signal_cache_dir = cache_dir or str(Path(output_dir) / ".cache")
+
     # 既存のスクリーンショット抽出処理
     extractor = ScreenshotExtractor(
         video_path=video_path,
         output_dir=output_dir,
         transition_threshold=threshold,
         min_time_interval=interval,
-        target_count=count
+        target_count=count,
+        frame_backend=frame_backend,
+        single_pass=single_pass,
+        workers=workers,
+        sample_interval=sample_interval,
+        coarse_to_fine=coarse_to_fine,
+        signal_cache_dir=signal_cache_dir,
+        ocr_cache_dir=signal_cache_dir,
+        ocr_cache_radius=ocr_cache_radius,
+        ocr_cache_size=ocr_cache_size,
+        ocr_workers=ocr_workers,
+        ocr_batch_size=ocr_batch_size,
+        incremental_ocr=incremental_ocr,
+        ocr_profile=ocr_profile,
+        keyword_dicts=keyword_dicts,
+        frame_cache_size=frame_cache_size,
+        selection=selection,
+        diversity_radius=diversity_radius,
+        image_format=image_format,
+        image_quality=image_quality,
+        encode_workers=encode_workers,
+        derivative_widths=derivative_widths,
+        contact_sheet=contact_sheet,
+        # 受け渡し先の AI記事生成がない場合はエンコード済みの画像をメモリに保持しない
+        artifact_buffer_mb=artifact_buffer_mb if ai_article else 0
     )
 
     metadata = extractor.extract_screenshots()
@@ -1758,14 +3513,19 @@ def run_integration_flow(video_path: str,
             ai_generator = AIContentGenerator(
                 output_dir=output_dir,
                 model=ai_model,
-                max_tokens=4000
+                max_tokens=4000,
+                token_budget=ai_token_budget,
+                byte_budget=(int(ai_byte_budget_mb * 1024 * 1024)
+                             if ai_byte_budget_mb is not None else None),
+                concurrency=ai_concurrency
             )
 
             # 記事生成
             result = ai_generator.generate_article(
                 synchronized_data=synchronized,
                 app_name=final_app_name,
-                output_format=output_format
+                output_format=output_format,
+                artifacts=extractor.artifacts
             )
 
             # 記事とメタデータの保存（Task 9）
@@ -1791,8 +3551,33 @@ def run_integration_flow(video_path: str,
 
 def main():
     """メイン関数"""
+    # tune サブコマンド（既存の -i ... 形式の引数と両立させるため先頭の語で判定）
+    if sys.argv[1:2] == ['tune']:
+        args = create_tune_argument_parser().parse_args(sys.argv[2:])
+        sys.exit(run_tune(args))
+    if sys.argv[1:2] == ['ocr-bench']:
+        args = create_ocr_bench_argument_parser().parse_args(sys.argv[2:])
+        sys.exit(run_ocr_bench(args))
+
     parser = create_argument_parser()
     args = parser.parse_args()
+    if args.keyword_dict:
+        try:
+            KeywordMatcher.from_keyword_lists(DEFAULT_KEYWORD_LISTS, args.keyword_dict)
+        except (OSError, ValueError) as e:
+            parser.error(f"--keyword-dict: {e}")
+    if args.diversity_radius is not None and not 0 <= args.diversity_radius <= 64:
+        parser.error("--diversity-radius must be between 0 and 64")
+    if args.image_quality is not None and not 0 <= args.image_quality <= 100:
+        parser.error("--image-quality must be between 0 and 100")
+    if args.artifact_buffer_mb < 0:
+        parser.error("--artifact-buffer-mb must be 0 or more")
+    if args.ai_token_budget is not None and args.ai_token_budget <= 0:
+        parser.error("--ai-token-budget must be positive")
+    if args.ai_byte_budget_mb is not None and args.ai_byte_budget_mb <= 0:
+        parser.error("--ai-byte-budget-mb must be positive")
+    if args.ai_concurrency < 1:
+        parser.error("--ai-concurrency must be 1 or more")
 
     # バナー表示
     print("=" * 60)
@@ -1814,7 +3599,33 @@ def main():
         model_size=args.model_size,
         threshold=args.threshold,
         interval=args.interval,
-        count=args.count
+        count=args.count,
+        frame_backend=args.frame_backend,
+        single_pass=args.single_pass,
+        workers=args.workers,
+        sample_interval=args.sample_interval,
+        coarse_to_fine=args.coarse_to_fine,
+        cache_dir=args.cache_dir,
+        no_cache=args.no_cache,
+        ocr_cache_radius=args.ocr_cache_radius,
+        ocr_cache_size=args.ocr_cache_size,
+        ocr_workers=args.ocr_workers,
+        ocr_batch_size=args.ocr_batch_size,
+        incremental_ocr=args.incremental_ocr,
+        ocr_profile=args.ocr_profile,
+        keyword_dicts=args.keyword_dict,
+        frame_cache_size=args.frame_cache_size,
+        selection=args.selection,
+        diversity_radius=args.diversity_radius,
+        image_format=args.image_format,
+        image_quality=args.image_quality,
+        encode_workers=args.encode_workers,
+        derivative_widths=args.derivative_widths,
+        contact_sheet=args.contact_sheet,
+        artifact_buffer_mb=args.artifact_buffer_mb,
+        ai_token_budget=args.ai_token_budget,
+        ai_byte_budget_mb=args.ai_byte_budget_mb,
+        ai_concurrency=args.ai_concurrency
     )
 
     print("\nSuccess!")
@@ -0,0 +1,97 @@
+"""
+テスト用のフィクスチャ（テスト動画の作成と EasyOCR Reader の代替）
+
+テスト動画はすべて create_test_video() で作成する。画面は乱数のブロックパターンで、
+timeline で画面の表示順とフレーム数を、render でフレームごとの描き変え
+（アニメーション・ワイプ・フレーム番号の描画など）を指定する。
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from unittest.mock import MagicMock
+
+import cv2
+import numpy as np
+
+
+# フレームの描き変え: render(frame, offset, previous) -> frame
+#   frame: 現在の画面のコピー, offset: 画面を表示してからのフレーム数,
+#   previous: 直前に表示していた画面（最初の画面では None）
+FrameRenderer = Callable[[np.ndarray, int, Optional[np.ndarray]], np.ndarray]
+
+
+def random_screen(rng: np.random.Generator, size: Tuple[int, int]) -> np.ndarray:
+    """6x8 の乱数のブロックパターンを拡大した画面"""
+    blocks = rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)
+    return cv2.resize(blocks, size, interpolation=cv2.INTER_NEAREST)
+
+
+def create_test_video(path: Path, screens: int = 3, seconds_per_screen: int = 3,
+                      fps: int = 10, size: tuple = (320, 240), seed: int = 3,
+                      timeline: Optional[Sequence[Tuple[Hashable, int]]] = None,
+                      render: Optional[FrameRenderer] = None) -> Path:
+    """
+    画面ごとに異なるブロックパターンを持つテスト動画（MJPG）を作成
+
+    Args:
+        path: 出力ファイルパス（.avi）
+        screens: 画面数（timeline を指定しない場合、各画面を seconds_per_screen 秒ずつ表示）
+        seconds_per_screen: 1画面あたりの秒数
+        fps: フレームレート
+        size: 解像度 (width, height)
+        seed: ブロックパターンの乱数のシード
+        timeline: [(画面のキー, フレーム数), ...]（同じキーは同じ画面。画面はキーの
+            初出順に作成する）
+        render: フレームごとの描き変え（Noneの場合は画面をそのまま書き出す）
+
+    Returns:
+        作成した動画ファイルのパス
+    """
+    if timeline is None:
+        timeline = [(index, seconds_per_screen * fps) for index in range(screens)]
+
+    rng = np.random.default_rng(seed)
+    images: Dict[Hashable, np.ndarray] = {}
+    previous = None
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for key, frames in timeline:
+        if key not in images:
+            images[key] = random_screen(rng, size)
+        screen = images[key]
+        for offset in range(frames):
+            frame = screen if render is None else render(screen.copy(), offset, previous)
+            writer.write(frame)
+        previous = screen
+    writer.release()
+    return path
+
+
+class FakeReader:
+    """
+    EasyOCR Reader の代替
+
+    平均輝度が rich_mean の画面では6個、それ以外の画面では1個の
+    テキスト領域を検出し、どの領域も 'Home' と認識する。
+    """
+
+    def __init__(self, rich_mean: int, text: str = 'Home'):
+        self.rich_mean = rich_mean
+        self.text = text
+        self.detected_images = 0
+        self.detect = MagicMock(side_effect=self._detect)
+        self.recognize = MagicMock(side_effect=self._recognize)
+
+    def _detect(self, img, reformat=True, **kwargs):
+        # 4次元配列はバッチ（readtext_batched と同じく画像ごとの結果を返す）
+        images = img if img.ndim == 4 else [img]
+        self.detected_images += len(images)
+        horizontal_lists = []
+        for image in images:
+            count = 6 if round(float(np.mean(image))) == self.rich_mean else 1
+            horizontal_lists.append([[0, 40, i * 20, i * 20 + 20] for i in range(count)])
+        return horizontal_lists, [[] for _ in images]
+
+    def _recognize(self, grey, horizontal_list, free_list, reformat=True, **kwargs
+                   ) -> List[Tuple]:
+        return [([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]], self.text, 0.9)
+                for x_min, x_max, y_min, y_max in horizontal_list]
@@ -0,0 +1,506 @@
+"""
+FrameSource - 動画フレーム供給レイヤー
+
+画面遷移検出で使用するフレームを、間引き（サンプリング）込みで供給する。
+バックエンドごとに「捨てるフレーム」のコストを最小化する:
+
+- opencv: 間引くフレームは grab() のみ（BGR変換を行わない）
+- ffmpeg: ローカルの ffmpeg サブプロセスがサンプリング・縮小済みの
+          rawvideo（gray / bgr24）をパイプで出力する（変換・縮小は ffmpeg が行うため、
+          pHash は opencv / pyav とビット単位では一致しない）
+- pyav:   PyAV（任意依存）でデコードし、サンプル対象フレームのみ変換・縮小する
+
+すべてのバックエンドは処理用解像度（デフォルト 1280x720）のフレームを
+(frame_idx, frame) のタプルで返す。
+"""
+
+import shutil
+import subprocess
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# 利用可能なバックエンド名
+FRAME_SOURCE_BACKENDS = ['opencv', 'ffmpeg', 'pyav']
+
+# この距離以内の前方移動はシークせず grab() で読み進める（フレーム単位で正確）
+SEEK_GRAB_LIMIT = 64
+
+# ffmpeg バックエンドのターゲットデコードで1プロセスから読み込むフレーム数
+FFMPEG_READ_BLOCK = 32
+
+
+class FrameSource:
+    """
+    フレーム供給の基底クラス
+
+    サブクラスは open() / close() / iter_frames() / read_frame() を実装する。
+    """
+
+    def __init__(self, video_path: str,
+                 process_size: Tuple[int, int] = (1280, 720)) -> None:
+        """
+        Args:
+            video_path: 入力動画ファイルパス
+            process_size: 出力フレームの解像度 (width, height)
+        """
+        self.video_path = video_path
+        self.process_width, self.process_height = process_size
+
+        # 動画情報（open()で設定）
+        self.fps = None
+        self.total_frames = None
+        self.width = None
+        self.height = None
+
+    def open(self) -> bool:
+        """動画を開き、動画情報を取得（成功時True）"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """リソースを解放"""
+        pass
+
+    def iter_frames(self, step: int = 1, start: int = 0,
+                    end: Optional[int] = None,
+                    keyframe: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        start から step フレームごとに処理用解像度のフレームを返す
+
+        Args:
+            step: サンプリング間隔（フレーム数）
+            start: 開始フレーム番号
+            end: 終了フレーム番号（このフレームは含まない、Noneなら最後まで）
+            keyframe: start 以前の直近キーフレーム番号（既知の場合のシーク先ヒント）
+
+        Yields:
+            (frame_idx, frame): フレーム番号と処理用解像度のフレーム
+        """
+        raise NotImplementedError
+
+    def read_frame(self, frame_idx: int) -> Optional[np.ndarray]:
+        """
+        指定フレームを1枚だけデコード（ターゲットデコード）
+
+        Args:
+            frame_idx: フレーム番号
+
+        Returns:
+            処理用解像度のフレーム、または None（読み込み失敗時）
+        """
+        raise NotImplementedError
+
+    def resolve_end(self, end: Optional[int]) -> int:
+        """終了フレーム番号を動画の総フレーム数で丸める"""
+        if end is None or end > self.total_frames:
+            return self.total_frames
+        return end
+
+    def __enter__(self):
+        if not self.open():
+            raise IOError(f"Cannot open video: {self.video_path}")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class OpenCVFrameSource(FrameSource):
+    """
+    cv2.VideoCapture バックエンド
+
+    間引くフレームは grab() のみで読み飛ばし、サンプル対象フレームだけ
+    retrieve()（BGR変換）と縮小を行う。
+    """
+
+    def __init__(self, video_path: str,
+                 process_size: Tuple[int, int] = (1280, 720)) -> None:
+        super().__init__(video_path, process_size)
+        self.cap = None
+        self.position = 0  # 次に grab() されるフレーム番号
+
+    def open(self) -> bool:
+        """動画を開き、動画情報を取得"""
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            print(f"Error: Cannot open video: {self.video_path}")
+            return False
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.position = 0
+        return True
+
+    def close(self) -> None:
+        """動画ファイルを閉じる"""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def seek(self, frame_idx: int, keyframe: Optional[int] = None) -> None:
+        """
+        指定フレームへ移動（前方の短い距離は grab() で読み進める）
+
+        Args:
+            frame_idx: 移動先のフレーム番号
+            keyframe: frame_idx 以前の直近キーフレーム番号（指定時はキーフレームへ
+                      シークしてから grab() で読み進める）
+        """
+        gap = frame_idx - self.position
+        if gap == 0:
+            return
+        if 0 < gap <= SEEK_GRAB_LIMIT:
+            self.grab_until(frame_idx)
+            return
+        if keyframe is not None and keyframe <= frame_idx:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            self.position = keyframe
+            self.grab_until(frame_idx)
+            return
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        self.position = frame_idx
+
+    def grab_until(self, frame_idx: int) -> None:
+        """指定フレームの直前まで grab() で読み進める"""
+        while self.position < frame_idx:
+            if not self.cap.grab():
+                break
+            self.position += 1
+
+    def iter_frames(self, step: int = 1, start: int = 0,
+                    end: Optional[int] = None,
+                    keyframe: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """grab() で間引きながらフレームを返す"""
+        step = max(1, step)
+        end = self.resolve_end(end)
+        self.seek(start, keyframe)
+
+        frame_idx = start
+        while frame_idx < end:
+            if not self.cap.grab():
+                break
+            self.position = frame_idx + 1
+
+            if (frame_idx - start) % step == 0:
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    break
+                yield frame_idx, self.resize(frame)
+
+            frame_idx += 1
+
+    def read_frame(self, frame_idx: int) -> Optional[np.ndarray]:
+        """指定フレームをデコードして返す"""
+        self.seek(frame_idx)
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.position = frame_idx + 1
+        return self.resize(frame)
+
+    def resize(self, frame: np.ndarray) -> np.ndarray:
+        """処理用解像度に縮小"""
+        return cv2.resize(frame, (self.process_width, self.process_height))
+
+
+class FFmpegFrameSource(FrameSource):
+    """
+    ffmpeg サブプロセスバックエンド
+
+    ffmpeg 側で select フィルタによるサンプリングと縮小を行い、
+    rawvideo をパイプ経由で受け取る。Python 側ではフル解像度のフレームを扱わない。
+
+    グレースケール変換（Y プレーン）と縮小（bilinear）を ffmpeg が行うため、
+    フレームの画素値は opencv / pyav バックエンドとビット単位では一致せず、
+    pHash も数ビット異なることがある。--threshold は opencv バックエンドで
+    調整した値を基準にしているため、ffmpeg バックエンドで閾値を調整する場合は
+    tune サブコマンドも同じバックエンドで実行する（ハッシュ信号のキャッシュは
+    バックエンドごとに別のキーで保存される）。
+
+    ターゲットデコード（read_frame）は、要求したフレームの前後 FFMPEG_READ_BLOCK
+    フレームを1つのプロセスでまとめて読み込み、同じブロック内の読み込みには
+    プロセスを起動しない（二分探索は同じ粗い区間内を読むため）。
+    """
+
+    # 出力ピクセルフォーマットとチャンネル数
+    PIXEL_FORMATS = {'gray': 1, 'bgr24': 3}
+
+    def __init__(self, video_path: str,
+                 process_size: Tuple[int, int] = (1280, 720),
+                 pixel_format: str = 'gray',
+                 ffmpeg_path: Optional[str] = None) -> None:
+        """
+        Args:
+            video_path: 入力動画ファイルパス
+            process_size: 出力フレームの解像度 (width, height)
+            pixel_format: 出力ピクセルフォーマット（gray / bgr24）
+            ffmpeg_path: ffmpeg 実行ファイルのパス（Noneの場合はPATHから検索）
+
+        Raises:
+            ValueError: サポートされていないピクセルフォーマットの場合
+        """
+        super().__init__(video_path, process_size)
+        if pixel_format not in self.PIXEL_FORMATS:
+            raise ValueError(
+                f"Unsupported pixel format: {pixel_format} "
+                f"(supported: {', '.join(self.PIXEL_FORMATS)})"
+            )
+        self.pixel_format = pixel_format
+        self.ffmpeg_path = ffmpeg_path or shutil.which('ffmpeg')
+        self.process = None
+        # read_frame() で読み込んだブロック（開始フレーム番号とフレーム）
+        self.block_start = None
+        self.block_frames = []
+        # 起動した ffmpeg プロセスの数
+        self.processes_started = 0
+
+    def open(self) -> bool:
+        """ffmpeg の存在を確認し、動画情報を取得"""
+        if self.ffmpeg_path is None:
+            print("Error: ffmpeg is not installed or not found in PATH.")
+            print("Please install ffmpeg:")
+            print("  macOS: brew install ffmpeg")
+            print("  Ubuntu/Debian: sudo apt install ffmpeg")
+            return False
+
+        # 動画情報はコンテナのメタデータから取得（デコードは行わない）
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            print(f"Error: Cannot open video: {self.video_path}")
+            return False
+        try:
+            self.fps = cap.get(cv2.CAP_PROP_FPS)
+            self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        finally:
+            cap.release()
+        return True
+
+    def close(self) -> None:
+        """実行中の ffmpeg プロセスを終了"""
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+
+    def build_command(self, step: int, start: int, count: Optional[int]) -> list:
+        """
+        ffmpeg コマンドラインを構築
+
+        Args:
+            step: サンプリング間隔（フレーム数）
+            start: 開始フレーム番号
+            count: 出力フレーム数の上限（Noneなら最後まで）
+
+        Returns:
+            subprocess に渡す引数リスト
+        """
+        command = [self.ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-nostdin']
+        if start > 0:
+            # 入力側シーク（キーフレームへ移動後、正確な位置までデコード）
+            command += ['-ss', f"{start / self.fps:.6f}"]
+        command += ['-i', self.video_path, '-an', '-sn']
+
+        filters = []
+        if step > 1:
+            filters.append(f"select=not(mod(n\\,{step}))")
+        filters.append(f"scale={self.process_width}:{self.process_height}:flags=bilinear")
+        command += ['-vf', ','.join(filters), '-fps_mode', 'passthrough']
+
+        if count is not None:
+            command += ['-frames:v', str(count)]
+        command += ['-f', 'rawvideo', '-pix_fmt', self.pixel_format, 'pipe:1']
+        return command
+
+    def iter_frames(self, step: int = 1, start: int = 0,
+                    end: Optional[int] = None,
+                    keyframe: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """ffmpeg の rawvideo 出力を読み取ってフレームを返す（シークは ffmpeg が行う）"""
+        step = max(1, step)
+        end = self.resolve_end(end)
+        if start >= end:
+            return
+        count = (end - start + step - 1) // step
+
+        channels = self.PIXEL_FORMATS[self.pixel_format]
+        frame_bytes = self.process_width * self.process_height * channels
+        if channels == 1:
+            shape = (self.process_height, self.process_width)
+        else:
+            shape = (self.process_height, self.process_width, channels)
+
+        self.close()
+        self.processes_started += 1
+        self.process = subprocess.Popen(
+            self.build_command(step, start, count),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=frame_bytes
+        )
+
+        try:
+            for i in range(count):
+                data = self.process.stdout.read(frame_bytes)
+                if len(data) < frame_bytes:
+                    break
+                frame = np.frombuffer(data, dtype=np.uint8).reshape(shape)
+                yield start + i * step, frame
+        finally:
+            self.close()
+
+    def read_frame(self, frame_idx: int) -> Optional[np.ndarray]:
+        """指定フレームを返す（読み込み済みのブロックになければ前後のブロックを読み込む）"""
+        if self.block_start is None or not (
+                0 <= frame_idx - self.block_start < len(self.block_frames)):
+            self.block_start = max(0, frame_idx - FFMPEG_READ_BLOCK // 2)
+            self.block_frames = [frame for _, frame in self.iter_frames(
+                step=1, start=self.block_start, end=self.block_start + FFMPEG_READ_BLOCK)]
+        offset = frame_idx - self.block_start
+        if not 0 <= offset < len(self.block_frames):
+            return None
+        return self.block_frames[offset]
+
+
+class PyAVFrameSource(FrameSource):
+    """
+    PyAV バックエンド（任意依存）
+
+    すべてのフレームをデコードするが、サンプル対象フレームのみBGR変換と縮小を行う
+    （縮小は opencv バックエンドと同じ cv2.resize）。開始位置以前の直近キーフレームへ
+    シークしてからデコードし、フレーム番号は pts から数える（ターゲットデコード・
+    区間ごとの並列スキャンのデコード量は GOP 長程度）。
+    """
+
+    def __init__(self, video_path: str,
+                 process_size: Tuple[int, int] = (1280, 720)) -> None:
+        """
+        Raises:
+            ImportError: PyAV がインストールされていない場合
+        """
+        super().__init__(video_path, process_size)
+        try:
+            import av
+            self.av = av
+        except ImportError:
+            raise ImportError(
+                "av package is not installed. "
+                "Please install it with: pip install av"
+            )
+        self.container = None
+        self.stream = None
+        # デコードしたフレーム数と、直前にデコードしたフレームの番号
+        self.decoded_frames = 0
+        self.last_index = -1
+
+    def open(self) -> bool:
+        """動画を開き、動画情報を取得"""
+        try:
+            self.container = self.av.open(self.video_path)
+        except Exception as e:
+            print(f"Error: Cannot open video: {self.video_path} ({e})")
+            return False
+
+        if not self.container.streams.video:
+            print(f"Error: No video stream found: {self.video_path}")
+            self.close()
+            return False
+
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = 'AUTO'
+        self.fps = float(self.stream.average_rate or self.stream.guessed_rate or 0)
+        self.width = self.stream.codec_context.width
+        self.height = self.stream.codec_context.height
+
+        self.total_frames = self.stream.frames
+        if not self.total_frames and self.stream.duration and self.stream.time_base:
+            duration = float(self.stream.duration * self.stream.time_base)
+            self.total_frames = int(round(duration * self.fps))
+        return True
+
+    def close(self) -> None:
+        """コンテナを閉じる"""
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+            self.stream = None
+
+    def iter_frames(self, step: int = 1, start: int = 0,
+                    end: Optional[int] = None,
+                    keyframe: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """start 以前のキーフレームへシークし、pts から数えたフレーム番号で返す"""
+        step = max(1, step)
+        end = self.resolve_end(end)
+        if start >= end:
+            return
+
+        self.seek(keyframe if keyframe is not None and keyframe <= start else start)
+        for frame in self.container.decode(self.stream):
+            self.decoded_frames += 1
+            frame_idx = self.frame_index(frame)
+            if frame_idx >= end:
+                break
+            if frame_idx < start or (frame_idx - start) % step != 0:
+                continue
+            # BGR変換後に opencv バックエンドと同じ cv2.resize で縮小（pHash がビット単位で一致）
+            yield frame_idx, cv2.resize(frame.to_ndarray(format='bgr24'),
+                                        (self.process_width, self.process_height))
+
+    def seek(self, frame_idx: int) -> None:
+        """frame_idx 以前の直近キーフレームへシーク（デコードはそこから始まる）"""
+        start_pts = self.stream.start_time or 0
+        offset = int(frame_idx / self.fps / self.stream.time_base) if self.fps else 0
+        self.container.seek(start_pts + offset,
+                            stream=self.stream, backward=True, any_frame=False)
+
+    def frame_index(self, frame) -> int:
+        """フレームの pts からフレーム番号を求める（pts がない場合は直前の番号 + 1）"""
+        if frame.pts is None:
+            self.last_index += 1
+        else:
+            start_pts = self.stream.start_time or 0
+            self.last_index = int(round(float((frame.pts - start_pts) * self.stream.time_base)
+                                        * self.fps))
+        return self.last_index
+
+    def read_frame(self, frame_idx: int) -> Optional[np.ndarray]:
+        """直近キーフレームから指定フレームまでデコードして返す"""
+        for _, frame in self.iter_frames(step=1, start=frame_idx, end=frame_idx + 1):
+            return frame
+        return None
+
+
+def create_frame_source(backend: str, video_path: str,
+                        process_size: Tuple[int, int] = (1280, 720)) -> FrameSource:
+    """
+    バックエンド名からフレームソースを生成
+
+    Args:
+        backend: バックエンド名（opencv, ffmpeg, pyav）
+        video_path: 入力動画ファイルパス
+        process_size: 出力フレームの解像度 (width, height)
+
+    Returns:
+        FrameSource インスタンス（未オープン）
+
+    Raises:
+        ValueError: 不明なバックエンド名の場合
+        ImportError: pyav バックエンドで PyAV が未インストールの場合
+    """
+    if backend == 'opencv':
+        return OpenCVFrameSource(video_path, process_size)
+    if backend == 'ffmpeg':
+        return FFmpegFrameSource(video_path, process_size)
+    if backend == 'pyav':
+        return PyAVFrameSource(video_path, process_size)
+    raise ValueError(
+        f"Unknown frame backend: {backend} "
+        f"(supported: {', '.join(FRAME_SOURCE_BACKENDS)})"
+    )
@@ -0,0 +1,187 @@
+"""
+FrameStore - 候補フレームのメモリ使用量を抑えるための補助
+
+候補ごとにフル解像度の BGR フレーム（4K で約25MB）を選択完了まで保持すると、
+遷移が数百あればメモリが数GBになる。候補には次のものだけを残す。
+
+- フレーム番号・タイムスタンプ・スコア
+- 文字認識に使うグレースケール画像のうち、テキスト領域を含む範囲だけ
+  （PNG で可逆圧縮。画面録画は圧縮が効く）
+
+フル解像度のフレームは保存時に、選択された target_count 枚だけを
+フレーム番号順の1回の前方パスで読み直す（fetch_frames / iter_frames）。
+CAP_PROP_POS_FRAMES でのシークは長いGOPのH.264で別のフレームに着くことがあるため、
+シークで読んだフレームは候補のpHashと照合し、異なる場合は先頭からの前方デコードに切り替える。
+読み直しを減らしたい場合は、直近のフレームを FrameLRU に保持できる。
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from frame_source import SEEK_GRAB_LIMIT
+
+
+# グレースケール画像をテキスト領域の外接矩形から切り出すときの余白（ピクセル）。
+# インクリメンタルOCRの変化マスク（幅160ピクセル）の1〜2セル分
+GREY_CROP_MARGIN = 16
+
+# シークで読んだフレームの照合: verify(frame_idx, frame) -> 候補と同じフレームか
+FrameVerifier = Callable[[int, np.ndarray], bool]
+
+
+def text_bounds(regions: Dict, shape: Tuple[int, int],
+                margin: int = GREY_CROP_MARGIN) -> Tuple[int, int, int, int]:
+    """
+    検出したテキスト領域すべてを含む矩形 (x0, y0, x1, y1)（画像の範囲に収める）
+
+    テキスト領域がない場合は空の矩形を返す。
+    """
+    xs, ys = [], []
+    for x_min, x_max, y_min, y_max in regions['horizontal_list']:
+        xs += [x_min, x_max]
+        ys += [y_min, y_max]
+    for box in regions['free_list']:
+        points = np.asarray(box)
+        xs += [points[:, 0].min(), points[:, 0].max()]
+        ys += [points[:, 1].min(), points[:, 1].max()]
+    if not xs:
+        return 0, 0, 0, 0
+    height, width = shape
+    x0 = min(max(0, int(np.floor(min(xs))) - margin), width)
+    y0 = min(max(0, int(np.floor(min(ys))) - margin), height)
+    x1 = max(x0, min(width, int(np.ceil(max(xs))) + margin))
+    y1 = max(y0, min(height, int(np.ceil(max(ys))) + margin))
+    return x0, y0, x1, y1
+
+
+def pack_text_regions(regions: Dict) -> Dict:
+    """
+    検出結果のグレースケール画像を、テキスト領域を含む範囲だけ PNG（可逆）に圧縮した
+    検出結果を返す
+
+    文字認識が参照するのはテキスト領域の画素だけなので、範囲外は保持しない
+    （unpack_text_regions() で0に戻す）。
+    """
+    if 'grey' not in regions:
+        return regions
+    grey = regions['grey']
+    x0, y0, x1, y1 = text_bounds(regions, grey.shape[:2])
+    encoded = b''
+    if x1 > x0 and y1 > y0:
+        ok, png = cv2.imencode('.png', grey[y0:y1, x0:x1], [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        if not ok:
+            return regions
+        encoded = png.tobytes()
+    packed = {key: value for key, value in regions.items() if key != 'grey'}
+    packed.update({'grey_png': encoded, 'grey_offset': (x0, y0), 'grey_shape': grey.shape})
+    return packed
+
+
+def unpack_text_regions(regions: Dict) -> Dict:
+    """pack_text_regions() した検出結果を元の形式（'grey' を含む）に戻す"""
+    if 'grey_png' not in regions:
+        return regions
+    unpacked = {key: value for key, value in regions.items()
+                if key not in ('grey_png', 'grey_offset', 'grey_shape')}
+    grey = np.zeros(regions['grey_shape'], dtype=np.uint8)
+    if regions['grey_png']:
+        crop = cv2.imdecode(np.frombuffer(regions['grey_png'], dtype=np.uint8),
+                            cv2.IMREAD_UNCHANGED)
+        x0, y0 = regions['grey_offset']
+        grey[y0:y0 + crop.shape[0], x0:x0 + crop.shape[1]] = crop
+    unpacked['grey'] = grey
+    return unpacked
+
+
+def iter_frames(cap: cv2.VideoCapture, frame_indices: Iterable[int],
+                grab_limit: int = SEEK_GRAB_LIMIT,
+                verify: Optional[FrameVerifier] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    指定したフレームをフレーム番号順の1回の前方パスで読み込み、読み込んだ順に返す
+
+    次のフレームまでの距離が grab_limit 以下なら grab() で読み進め、
+    それより離れている場合だけシークする。シークは長いGOPのH.264で別のフレームに
+    着くことがあるため、verify を指定した場合はシーク後に読んだフレームを照合し、
+    一致しなければ先頭から前方にデコードし直す（以降のフレームもシークしない）。
+
+    Args:
+        cap: 開いている cv2.VideoCapture
+        frame_indices: 読み込むフレーム番号
+        grab_limit: シークせずに grab() で読み進める最大フレーム数
+        verify: シークで読んだフレームの照合 verify(frame_idx, frame) -> bool
+
+    Yields:
+        (フレーム番号, フル解像度の BGR フレーム)（読み込めなかったフレームは返さない）
+    """
+    position = None  # 次に読み込まれるフレーム番号
+    for frame_idx in sorted(set(frame_indices)):
+        gap = frame_idx - position if position is not None else -1
+        seeked = not 0 <= gap <= grab_limit
+        if seeked:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+            position = frame_idx
+        while position < frame_idx and cap.grab():
+            position += 1
+
+        ret, frame = cap.read() if position == frame_idx else (False, None)
+        if ret and seeked and verify is not None and frame_idx > 0 and \
+                not verify(frame_idx, frame):
+            # シーク位置が不正確: 先頭から前方にデコードする（先頭へのシークは正確）
+            grab_limit = float('inf')
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            position = 0
+            while position < frame_idx and cap.grab():
+                position += 1
+            ret, frame = cap.read() if position == frame_idx else (False, None)
+        if not ret:
+            # 読み込み位置が不明になったため、次のフレームはシークする
+            position = None
+            continue
+        position = frame_idx + 1
+        yield frame_idx, frame
+
+
+def fetch_frames(cap: cv2.VideoCapture, frame_indices: Iterable[int],
+                 grab_limit: int = SEEK_GRAB_LIMIT,
+                 verify: Optional[FrameVerifier] = None) -> Dict[int, np.ndarray]:
+    """
+    指定したフレームをフレーム番号順の1回の前方パスで読み込む
+
+    Returns:
+        {フレーム番号: フル解像度の BGR フレーム}（読み込めなかったフレームは含まない）
+    """
+    return dict(iter_frames(cap, frame_indices, grab_limit, verify))
+
+
+class FrameLRU:
+    """フル解像度フレームの件数上限つき LRU キャッシュ"""
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Args:
+            capacity: 保持する最大フレーム数（0の場合は保持しない）
+        """
+        self.capacity = max(0, capacity)
+        self.frames: 'OrderedDict[int, np.ndarray]' = OrderedDict()
+
+    def put(self, frame_idx: int, frame: np.ndarray) -> None:
+        """フレームを追加し、上限を超えたら最も古く使われたフレームを削除"""
+        if self.capacity == 0:
+            return
+        self.frames[frame_idx] = frame
+        self.frames.move_to_end(frame_idx)
+        while len(self.frames) > self.capacity:
+            self.frames.popitem(last=False)
+
+    def get(self, frame_idx: int) -> Optional[np.ndarray]:
+        """フレームを取得（なければ None）"""
+        frame = self.frames.get(frame_idx)
+        if frame is not None:
+            self.frames.move_to_end(frame_idx)
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.frames)
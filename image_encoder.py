@@ -0,0 +1,169 @@
+"""
+ImageEncoder - スクリーンショットの並列エンコードと保存
+
+cv2.imwrite で1枚ずつ PNG（圧縮レベル1）を書き出すと、ファイルが大きく、
+エンコードの間は他の処理が止まる。OpenCV のエンコードは GIL を解放するため、
+スレッドプールで並列にエンコードし、選択が確定したフレームから順に
+（動画からの読み直しと並行して）エンコードを開始する。
+
+- 形式は png / webp / jpeg（webp・jpeg は品質 0〜100 を指定できる）
+- ファイル名の拡張子・メタデータには実際の形式とエンコード後のサイズを記録する
+- エンコードの実時間（最初の投入から最後の完了まで）と書き出したバイト数を集計する
+- artifacts を渡すと、指定した画像のバイト列を AI記事生成へ受け渡すために保持する
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+
+# 形式ごとの拡張子・メディアタイプ・既定の品質
+IMAGE_FORMATS = {
+    'png': {'extension': '.png', 'media_type': 'image/png', 'quality': None},
+    'webp': {'extension': '.webp', 'media_type': 'image/webp', 'quality': 90},
+    'jpeg': {'extension': '.jpg', 'media_type': 'image/jpeg', 'quality': 90},
+}
+
+DEFAULT_IMAGE_FORMAT = 'png'
+
+# PNG の圧縮レベル（従来と同じ。高速・可逆）
+PNG_COMPRESSION = 1
+
+# 拡張子からメディアタイプへの対応
+MEDIA_TYPES = {
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+}
+
+
+def get_image_format(name: str) -> Dict:
+    """
+    形式の設定を取得
+
+    Raises:
+        ValueError: 未知の形式の場合
+    """
+    if name not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format: {name} "
+                         f"(available: {', '.join(IMAGE_FORMATS)})")
+    return IMAGE_FORMATS[name]
+
+
+def media_type_for(path: Path) -> str:
+    """ファイルの拡張子からメディアタイプを返す（不明な場合は image/png）"""
+    return MEDIA_TYPES.get(Path(path).suffix.lower(), 'image/png')
+
+
+def encode_params(image_format: str, quality: Optional[int] = None) -> List[int]:
+    """cv2.imencode のパラメータ（quality が None の場合は形式の既定値）"""
+    if quality is None:
+        quality = get_image_format(image_format)['quality']
+    if image_format == 'webp':
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    if image_format == 'jpeg':
+        return [cv2.IMWRITE_JPEG_QUALITY, quality]
+    return [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION]
+
+
+def encode_image(frame: np.ndarray, image_format: str = DEFAULT_IMAGE_FORMAT,
+                 quality: Optional[int] = None) -> bytes:
+    """
+    フレームを指定した形式にエンコード
+
+    Raises:
+        ValueError: エンコードに失敗した場合
+    """
+    ok, encoded = cv2.imencode(get_image_format(image_format)['extension'], frame,
+                               encode_params(image_format, quality))
+    if not ok:
+        raise ValueError(f"Failed to encode image as {image_format}")
+    return encoded.tobytes()
+
+
+class ImageEncoder:
+    """スクリーンショットをスレッドプールでエンコードして保存"""
+
+    def __init__(self, image_format: str = DEFAULT_IMAGE_FORMAT,
+                 quality: Optional[int] = None, workers: int = 0,
+                 artifacts: Optional[Any] = None) -> None:
+        """
+        Args:
+            image_format: 画像形式（png, webp, jpeg）
+            quality: webp・jpeg の品質（0〜100、Noneの場合は形式の既定値。png では使わない）
+            workers: エンコードのスレッド数（0の場合はCPUコア数）
+            artifacts: エンコード済みのバイト列を保持する ArtifactBuffer（Noneの場合は保持しない）
+
+        Raises:
+            ValueError: 未知の形式の場合
+        """
+        self.image_format = image_format
+        self.settings = get_image_format(image_format)
+        self.quality = quality
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.artifacts = artifacts
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        # 書き出したバイト数・枚数と、最初の投入から最後の完了までの時間
+        self.bytes_written = 0
+        self.images_written = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    @property
+    def extension(self) -> str:
+        """ファイルの拡張子（'.png' など）"""
+        return self.settings['extension']
+
+    @property
+    def media_type(self) -> str:
+        """メディアタイプ（'image/png' など）"""
+        return self.settings['media_type']
+
+    def write(self, frame: np.ndarray, path: Path, keep: bool = False) -> int:
+        """
+        フレームをエンコードしてファイルに書き出し、書き出したバイト数を返す
+
+        Args:
+            keep: エンコード済みのバイト列を artifacts に保持するか
+        """
+        data = encode_image(frame, self.image_format, self.quality)
+        Path(path).write_bytes(data)
+        if keep and self.artifacts is not None:
+            self.artifacts.put(path, data, self.media_type)
+        return len(data)
+
+    def submit(self, frame: np.ndarray, path: Path, keep: bool = False) -> Future:
+        """エンコードと書き出しを開始（結果は書き出したバイト数）"""
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        future = self.executor.submit(self.write, frame, path, keep)
+        future.add_done_callback(self.record)
+        return future
+
+    def record(self, future: Future) -> None:
+        """完了したエンコードを集計（ワーカースレッドから呼ばれる）"""
+        with self.lock:
+            if future.exception() is None:
+                self.bytes_written += future.result()
+                self.images_written += 1
+            self.finished_at = time.perf_counter()
+
+    @property
+    def wall_time(self) -> float:
+        """エンコードの実時間（秒）"""
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    def close(self) -> None:
+        """実行中のエンコードの完了を待ってスレッドプールを終了"""
+        self.executor.shutdown(wait=True)
@@ -4,13 +4,112 @@ ImageProcessor - 画像データ準備とbase64エンコード機能
 スクリーンショット画像ファイルを読み込み、base64形式にエンコードして
 Claude API仕様に準拠したリクエスト形式に変換する。
 画像サイズ制限（3.75MB、8000px）および最大20枚までの画像制限を検証する。
+
+- 各ファイルは1回だけ読み込み、形式と寸法はヘッダーから判定する（画像全体をデコードしない）
+- base64 は元のバイト列をそのままエンコードする（再エンコードで画質・サイズを変えない）
+- 結果は内容のダイジェスト（SHA-256）をキーにキャッシュし、再生成・リトライで再利用する
+  （キャッシュはスレッドセーフ。チャンクごとの草稿を並行して作成する場合も共有できる）
 """
 
-from typing import List, Dict
-from pathlib import Path
-from PIL import Image
 import base64
-from io import BytesIO
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+# ヘッダーから判定した形式ごとのメディアタイプ
+FORMAT_MEDIA_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "GIF": "image/gif",
+    "WEBP": "image/webp"
+}
+
+# 寸法を持つ JPEG のマーカー（SOF0〜SOF15。DHT・JPG・DAC を除く）
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# キャッシュする画像の最大数
+DEFAULT_CACHE_SIZE = 64
+
+
+def sniff_png(data: bytes) -> Tuple[int, int]:
+    """PNG の IHDR チャンクから (幅, 高さ) を取得"""
+    if len(data) < 24 or data[12:16] != b'IHDR':
+        raise ValueError("PNG header is truncated")
+    return struct.unpack('>II', data[16:24])
+
+
+def sniff_gif(data: bytes) -> Tuple[int, int]:
+    """GIF の論理画面記述子から (幅, 高さ) を取得"""
+    if len(data) < 10:
+        raise ValueError("GIF header is truncated")
+    return struct.unpack('<HH', data[6:10])
+
+
+def sniff_webp(data: bytes) -> Tuple[int, int]:
+    """WebP の最初のチャンク（VP8 / VP8L / VP8X）から (幅, 高さ) を取得"""
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30:
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(data) >= 30:
+        return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    raise ValueError("WebP header is truncated or unsupported")
+
+
+def sniff_jpeg(data: bytes) -> Tuple[int, int]:
+    """JPEG のセグメントを SOF マーカーまでたどって (幅, 高さ) を取得"""
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            raise ValueError("JPEG marker is corrupted")
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # 詰め物の 0xFF
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # 長さを持たないマーカー
+            i += 2
+            continue
+        length = struct.unpack('>H', data[i + 2:i + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            if i + 9 > len(data):
+                break
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    raise ValueError("JPEG header has no frame dimensions")
+
+
+def sniff_image(data: bytes) -> Tuple[str, int, int]:
+    """
+    画像のヘッダーから形式と寸法を判定（画像全体はデコードしない）
+
+    Returns:
+        (形式（PNG, JPEG, GIF, WEBP）, 幅, 高さ)
+
+    Raises:
+        ValueError: 対応していない形式・ヘッダーが壊れている場合
+    """
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        img_format, sniff = "PNG", sniff_png
+    elif data.startswith(b'\xff\xd8'):
+        img_format, sniff = "JPEG", sniff_jpeg
+    elif data[:6] in (b'GIF87a', b'GIF89a'):
+        img_format, sniff = "GIF", sniff_gif
+    elif data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        img_format, sniff = "WEBP", sniff_webp
+    else:
+        raise ValueError("Unsupported image format (PNG, JPEG, GIF, WebP only)")
+    width, height = sniff(data)
+    return img_format, width, height
 
 
 class ImageProcessor:
@@ -28,9 +127,17 @@ class ImageProcessor:
     MAX_FILE_SIZE_MB = 3.75
     MAX_DIMENSION_PX = 8000
 
-    def __init__(self) -> None:
-        """ImageProcessorの初期化"""
-        pass
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        """
+        Args:
+            cache_size: 内容のダイジェストをキーにキャッシュする画像の最大数
+        """
+        self.cache_size = cache_size
+        # {ダイジェスト: (メディアタイプ, 幅, 高さ, base64文字列)}
+        self.cache: 'OrderedDict[str, Tuple[str, int, int, str]]' = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.lock = threading.Lock()
 
     def prepare_images_base64(self, screenshot_paths: List[Path]) -> List[Dict]:
         """
@@ -54,7 +161,7 @@ class ImageProcessor:
 
         Raises:
             FileNotFoundError: 画像ファイルが存在しない場合
-            ValueError: 画像が制限超過（3.75MB, 8000px, 20枚）の場合
+            ValueError: 画像が制限超過（3.75MB, 8000px, 20枚）・未対応の形式の場合
         """
         # 空のリストの場合はそのまま返す
         if not screenshot_paths:
@@ -66,74 +173,116 @@ class ImageProcessor:
                 f"画像枚数が制限を超えています。最大{self.MAX_IMAGE_COUNT}枚まで処理できますが、{len(screenshot_paths)}枚が指定されました。"
             )
 
-        result = []
-        for image_path in screenshot_paths:
-            # ファイル存在チェック
-            if not image_path.exists():
-                raise FileNotFoundError(
-                    f"画像ファイルが見つかりません: {image_path}"
-                )
-
-            # 画像サイズ検証（ファイルサイズと寸法）
-            self.validate_image_size(image_path)
-
-            # 画像を読み込み、base64エンコード
-            with Image.open(image_path) as img:
-                # 画像をバッファに保存
-                buffer = BytesIO()
-                # 元の形式を保持して保存
-                img_format = img.format if img.format else "PNG"
-                img.save(buffer, format=img_format)
-                buffer.seek(0)
-
-                # base64エンコード
-                base64_data = base64.b64encode(buffer.read()).decode('utf-8')
-
-                # メディアタイプを取得
-                media_type = self.get_media_type(image_path)
-
-                # Claude API形式のオブジェクトを作成
-                image_block = {
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": media_type,
-                        "data": base64_data
-                    }
-                }
+        return [self.prepare_image_block(self.read_image(image_path), image_path.name)
+                for image_path in screenshot_paths]
 
-                result.append(image_block)
+    @staticmethod
+    def read_image(image_path: Path) -> bytes:
+        """
+        画像ファイルを読み込む（1ファイルにつき1回だけ開く）
 
-        return result
+        Raises:
+            FileNotFoundError: 画像ファイルが存在しない場合
+        """
+        try:
+            return Path(image_path).read_bytes()
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"画像ファイルが見つかりません: {image_path}"
+            )
 
-    def validate_image_size(self, image_path: Path) -> None:
+    def prepare_image_block(self, data: bytes, name: str) -> Dict:
         """
-        画像のファイルサイズと寸法を検証
+        画像のバイト列を検証し、Claude API形式に変換（同じ内容の画像はキャッシュから返す）
 
         Args:
-            image_path: 検証対象の画像ファイルパス
+            data: 画像ファイルのバイト列
+            name: エラーメッセージに使う画像の名前
 
         Raises:
-            ValueError: 画像が制限超過（3.75MB, 8000px）の場合
+            ValueError: 画像が制限超過（3.75MB, 8000px）・未対応の形式の場合
+        """
+        self.check_file_size(len(data), name)
+
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            cached = self.cache.get(digest)
+            if cached is not None:
+                self.cache_hits += 1
+                self.cache.move_to_end(digest)
+            else:
+                self.cache_misses += 1
+        if cached is not None:
+            media_type, width, height, base64_data = cached
+            self.check_dimensions(width, height, name)
+        else:
+            # エンコードはロックの外で行う（同じ画像を同時に処理した場合は両方がエンコードする）
+            try:
+                img_format, width, height = sniff_image(data)
+            except ValueError as e:
+                raise ValueError(f"画像形式を判定できません。{name}: {e}")
+            self.check_dimensions(width, height, name)
+            media_type = FORMAT_MEDIA_TYPES[img_format]
+            # 元のバイト列をそのままエンコード（再エンコードしない）
+            base64_data = base64.b64encode(data).decode('utf-8')
+            if self.cache_size > 0:
+                with self.lock:
+                    self.cache[digest] = (media_type, width, height, base64_data)
+                    while len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+
+        return {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": media_type,
+                "data": base64_data
+            }
+        }
+
+    def check_file_size(self, size: int, name: str) -> None:
+        """
+        ファイルサイズを検証
+
+        Raises:
+            ValueError: 3.75MBを超える場合
         """
-        # ファイルサイズチェック
-        file_size_mb = image_path.stat().st_size / (1024 * 1024)
+        file_size_mb = size / (1024 * 1024)
         if file_size_mb > self.MAX_FILE_SIZE_MB:
             raise ValueError(
-                f"画像ファイルサイズが制限を超えています。{image_path.name}: {file_size_mb:.2f}MB（最大{self.MAX_FILE_SIZE_MB}MB）"
+                f"画像ファイルサイズが制限を超えています。{name}: {file_size_mb:.2f}MB（最大{self.MAX_FILE_SIZE_MB}MB）"
+            )
+
+    def check_dimensions(self, width: int, height: int, name: str) -> None:
+        """
+        画像寸法を検証
+
+        Raises:
+            ValueError: 幅または高さが8000pxを超える場合
+        """
+        if width > self.MAX_DIMENSION_PX or height > self.MAX_DIMENSION_PX:
+            raise ValueError(
+                f"画像寸法が制限を超えています。{name}: {width}x{height}px（最大{self.MAX_DIMENSION_PX}px）"
             )
 
-        # 画像寸法チェック
-        with Image.open(image_path) as img:
-            width, height = img.size
-            if width > self.MAX_DIMENSION_PX or height > self.MAX_DIMENSION_PX:
-                raise ValueError(
-                    f"画像寸法が制限を超えています。{image_path.name}: {width}x{height}px（最大{self.MAX_DIMENSION_PX}px）"
-                )
+    def validate_image_size(self, image_path: Path) -> None:
+        """
+        画像のファイルサイズと寸法を検証
+
+        Args:
+            image_path: 検証対象の画像ファイルパス
+
+        Raises:
+            ValueError: 画像が制限超過（3.75MB, 8000px）の場合
+        """
+        data = self.read_image(image_path)
+        self.check_file_size(len(data), image_path.name)
+        _, width, height = sniff_image(data)
+        self.check_dimensions(width, height, image_path.name)
 
     def get_media_type(self, image_path: Path) -> str:
         """
-        画像ファイルのメディアタイプを取得
+        画像ファイルのメディアタイプを取得（ファイルのヘッダーから判定）
 
         Args:
             image_path: 画像ファイルパス
@@ -141,16 +290,8 @@ class ImageProcessor:
         Returns:
             メディアタイプ文字列（例: "image/png", "image/jpeg"）
         """
-        with Image.open(image_path) as img:
-            img_format = img.format
-
-            # 形式に応じてメディアタイプを返す
-            format_mapping = {
-                "PNG": "image/png",
-                "JPEG": "image/jpeg",
-                "JPG": "image/jpeg",
-                "GIF": "image/gif",
-                "WEBP": "image/webp"
-            }
-
-            return format_mapping.get(img_format, "image/png")
+        try:
+            img_format, _, _ = sniff_image(self.read_image(image_path))
+        except ValueError:
+            return "image/png"
+        return FORMAT_MEDIA_TYPES[img_format]
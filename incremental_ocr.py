@@ -0,0 +1,216 @@
+"""
+IncrementalOCR - 前回解析した画面からの差分だけを文字認識する
+
+連続して解析する画面は、タブバー・ヘッダー・ナビゲーションボタンなど
+レイアウトの大部分を共有していることが多い。低解像度のグレースケール画像で
+前回文字認識したフレームとの変化マスクを作り、
+
+- 変化のない位置にあり、前回と同じ座標で検出されたテキスト領域は前回の認識結果を引き継ぐ
+- 変化した位置にある領域と、前回にない領域だけを文字認識する
+
+結果は reader.recognize() と同じ形式の [(bbox, text, confidence), ...]（領域順）になる。
+reader.recognize() は幅や高さが0になる領域の結果を返さず、GPUでは結果を縦位置で
+並べ替えるため、結果と領域の対応は順番ではなく bbox の座標で取る（match_results）。
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# 変化マスクを計算する低解像度画像の幅（ピクセル）
+CHANGE_MASK_WIDTH = 160
+
+# 変化とみなすグレースケールの差（圧縮ノイズを除くため）
+CHANGE_THRESHOLD = 12
+
+
+def downscale_gray(frame: np.ndarray, width: int = CHANGE_MASK_WIDTH) -> np.ndarray:
+    """変化マスク用の低解像度グレースケール画像"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    height = max(1, round(gray.shape[0] * width / gray.shape[1]))
+    return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def compute_change_mask(previous: np.ndarray, current: np.ndarray,
+                        threshold: int = CHANGE_THRESHOLD) -> np.ndarray:
+    """
+    2つの低解像度画像の変化マスク
+
+    縮小による境界のずれを吸収するため、変化したセルを1セル分膨張させる。
+
+    Returns:
+        変化したセルが True のブール配列
+    """
+    changed = (cv2.absdiff(previous, current) > threshold).astype(np.uint8)
+    return cv2.dilate(changed, np.ones((3, 3), dtype=np.uint8)).astype(bool)
+
+
+def region_bounds(kind: str, box) -> Tuple[int, int, int, int]:
+    """テキスト領域の外接矩形 (x_min, x_max, y_min, y_max)"""
+    if kind == 'horizontal':
+        x_min, x_max, y_min, y_max = box
+        return int(x_min), int(x_max), int(y_min), int(y_max)
+    points = np.asarray(box)
+    return (int(points[:, 0].min()), int(points[:, 0].max()),
+            int(points[:, 1].min()), int(points[:, 1].max()))
+
+
+def region_key(kind: str, box) -> Tuple:
+    """テキスト領域を前回の検出結果と照合するためのキー"""
+    return (kind,) + tuple(int(v) for v in np.asarray(box).ravel())
+
+
+def region_changed(mask: np.ndarray, bounds: Tuple[int, int, int, int],
+                   frame_shape: Tuple[int, int]) -> bool:
+    """テキスト領域の外接矩形に変化したセルがあるか"""
+    scale_x = mask.shape[1] / frame_shape[1]
+    scale_y = mask.shape[0] / frame_shape[0]
+    x_min, x_max, y_min, y_max = bounds
+    x0 = min(max(0, int(x_min * scale_x)), mask.shape[1] - 1)
+    x1 = min(max(x0 + 1, int(np.ceil(x_max * scale_x))), mask.shape[1])
+    y0 = min(max(0, int(y_min * scale_y)), mask.shape[0] - 1)
+    y1 = min(max(y0 + 1, int(np.ceil(y_max * scale_y))), mask.shape[0])
+    return bool(mask[y0:y1, x0:x1].any())
+
+
+def clipped_bounds(kind: str, box, shape: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """画像の範囲に収めたテキスト領域の外接矩形 (x_min, x_max, y_min, y_max)"""
+    x_min, x_max, y_min, y_max = region_bounds(kind, box)
+    return max(0, x_min), min(x_max, shape[1]), max(0, y_min), min(y_max, shape[0])
+
+
+def is_recognizable(kind: str, box, shape: Tuple[int, int]) -> bool:
+    """文字認識できる領域か（画像の範囲に収めた幅・高さが0の領域は結果が返らない）"""
+    x_min, x_max, y_min, y_max = clipped_bounds(kind, box, shape)
+    return x_max > x_min and y_max > y_min
+
+
+def result_bbox_key(kind: str, box, shape: Tuple[int, int]) -> Tuple:
+    """
+    reader.recognize() がテキスト領域の結果に付ける bbox のキー
+
+    horizontal の領域は画像の範囲に収めた4頂点、free の領域は検出した4頂点のまま。
+    """
+    if kind == 'horizontal':
+        x_min, x_max, y_min, y_max = clipped_bounds(kind, box, shape)
+        box = [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+    return bbox_key(box)
+
+
+def bbox_key(bbox) -> Tuple:
+    """bbox の座標のタプル"""
+    return tuple(float(v) for v in np.asarray(bbox, dtype=np.float64).ravel())
+
+
+def match_results(regions: Dict, results: List[Tuple]) -> List[Optional[Tuple]]:
+    """
+    reader.recognize() の結果を bbox の座標でテキスト領域に対応付ける
+
+    Returns:
+        領域順の認識結果（結果のない領域は None）
+    """
+    shape = regions['grey'].shape[:2]
+    by_bbox: Dict[Tuple, List[Tuple]] = {}
+    for result in results:
+        by_bbox.setdefault(bbox_key(result[0]), []).append(result)
+
+    matched = []
+    for kind, box in iter_regions(regions):
+        same_bbox = by_bbox.get(result_bbox_key(kind, box, shape))
+        matched.append(same_bbox.pop(0) if same_bbox else None)
+    return matched
+
+
+def iter_regions(regions: Dict):
+    """検出済みの領域を horizontal → free の順（領域順）で列挙"""
+    for box in regions['horizontal_list']:
+        yield 'horizontal', box
+    for box in regions['free_list']:
+        yield 'free', box
+
+
+class IncrementalOCR:
+    """前回文字認識した画面を参照し、変化した領域だけを文字認識の対象にする"""
+
+    def __init__(self, threshold: int = CHANGE_THRESHOLD) -> None:
+        """
+        Args:
+            threshold: 変化とみなすグレースケールの差
+        """
+        self.threshold = threshold
+        # 前回文字認識した画面: {'small', 'shape', 'results': {領域キー: 認識結果}}
+        self.reference: Optional[Dict] = None
+        self.reused_regions = 0
+        self.recognized_regions = 0
+
+    def split(self, frame: np.ndarray,
+              regions: Dict) -> Tuple[Dict, List[Optional[Tuple]]]:
+        """
+        検出済みの領域を、引き継ぐ領域と文字認識する領域に分ける
+
+        Args:
+            frame: 候補のフレーム（BGR またはグレースケール）
+            regions: {'grey', 'horizontal_list', 'free_list'}（座標は grey 上の座標）
+
+        Returns:
+            (to_recognize, carried): 文字認識する領域（regions と同じ形式）と、
+            領域順の引き継いだ認識結果（文字認識する領域は None）
+        """
+        reference = self.reference
+        # 領域の座標は検出した画像（OCRプロファイルで縮小した場合は縮小後）の座標
+        shape = regions['grey'].shape[:2]
+        mask = None
+        if reference is not None and reference['shape'] == shape:
+            mask = compute_change_mask(reference['small'], downscale_gray(frame), self.threshold)
+
+        to_recognize = {'grey': regions['grey'], 'horizontal_list': [], 'free_list': []}
+        carried = []
+        for kind, box in iter_regions(regions):
+            previous = None
+            if mask is not None:
+                previous = reference['results'].get(region_key(kind, box))
+                if previous is not None and region_changed(mask, region_bounds(kind, box),
+                                                           shape):
+                    previous = None
+
+            carried.append(previous)
+            # 幅・高さが0の領域は reader.recognize() も結果を返さないため認識しない
+            if previous is None and is_recognizable(kind, box, shape):
+                to_recognize[f'{kind}_list'].append(box)
+
+        self.reused_regions += sum(result is not None for result in carried)
+        self.recognized_regions += (len(to_recognize['horizontal_list']) +
+                                    len(to_recognize['free_list']))
+        return to_recognize, carried
+
+    @staticmethod
+    def merge(regions: Dict, carried: List[Optional[Tuple]],
+              recognized: List[Tuple]) -> List[Tuple]:
+        """
+        引き継いだ結果と新しく認識した結果を領域順に統合
+
+        Args:
+            regions: split() に渡した検出済みの領域
+            carried: split() が返した領域順の引き継いだ認識結果
+            recognized: split() が返した文字認識する領域の reader.recognize() の結果
+                （順番・件数は問わない）
+
+        Returns:
+            領域順の認識結果（結果のない領域は含めない）
+        """
+        merged = [previous if previous is not None else result
+                  for previous, result in zip(carried, match_results(regions, recognized))]
+        return [result for result in merged if result is not None]
+
+    def update(self, frame: np.ndarray, regions: Dict, results: List[Tuple]) -> None:
+        """文字認識した画面を次回の参照にする（results は reader.recognize() と同じ形式）"""
+        self.reference = {
+            'small': downscale_gray(frame),
+            'shape': regions['grey'].shape[:2],
+            'results': {region_key(kind, box): result
+                        for (kind, box), result in zip(iter_regions(regions),
+                                                       match_results(regions, results))
+                        if result is not None}
+        }
@@ -0,0 +1,135 @@
+"""
+IntervalSelection - 時間間隔制約つきの最適な上位選択（重みつき区間スケジューリング）
+
+select_top_screenshots（貪欲法）はスコアの高い順に、選択済みと min_interval 秒以上
+離れた候補を取る。高スコアの候補を1つ取ったために、その前後にある2つの
+少し低いスコアの候補を取れなくなる場合があり、スコアの合計が最大とは限らない。
+
+ここでは「選択数 target_count 以下、選択する候補間の間隔がすべて min_interval 以上で、
+スコアの合計を最大化」を厳密に解く。
+
+- 候補をタイムスタンプ順に並べ、各候補の直前に選べる候補の数を二分探索
+  （np.searchsorted）で求める
+- dp[c][i] = 先頭 i 個の候補から c 個以下を選んだときの最大合計
+  dp[c][i] = max(dp[c][i-1], dp[c-1][pred[i-1]] + score[i-1])
+  は「選ぶ場合の値」の累積最大なので、1段（c）ごとに NumPy でまとめて計算できる
+- 計算量は O(target_count × n)
+
+スコアの一部（UI重要度）の計算に OCR が必要なため、select_optimal_lazily は
+未評価の候補の上界で最適解を求め、解に含まれる未評価の候補だけを評価して
+解き直す（解がすべて評価済みになった時点で、上界 ≥ 実際のスコアより最適）。
+候補に CandidateTable を渡した場合はタイムスタンプを列から読み、評価する候補だけを
+dict に戻す。
+exclude を指定した場合は、評価済みの解から除外する候補を選ばせ、除外した候補を
+選べないようにして解き直す（見た目が重複する候補の除外などに使う）。
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from candidate_table import CandidateTable
+
+
+def optimal_interval_indices(timestamps: Sequence[float], scores: Sequence[float],
+                             target_count: int, min_interval: float) -> List[int]:
+    """
+    間隔制約のもとでスコアの合計が最大になる候補を選ぶ
+
+    Args:
+        timestamps: 候補のタイムスタンプ（秒）
+        scores: 候補のスコア
+        target_count: 選択する最大数
+        min_interval: 選択する候補間の最小時間間隔（秒）
+
+    Returns:
+        選択した候補のインデックス（タイムスタンプ順）
+    """
+    n = len(timestamps)
+    if n == 0 or target_count <= 0:
+        return []
+
+    order = np.argsort(np.asarray(timestamps, dtype=np.float64), kind='stable')
+    times = np.asarray(timestamps, dtype=np.float64)[order]
+    weights = np.asarray(scores, dtype=np.float64)[order]
+    # pred[i]: 候補 i（タイムスタンプ順）より前にあり、min_interval 以上離れた候補の数
+    # （全候補の bisect_right をまとめて計算。min_interval が0の場合も候補 i 自身は含めない）
+    pred = np.minimum(np.searchsorted(times, times - min_interval, side='right'),
+                      np.arange(n))
+
+    layers = min(target_count, n)
+    dp = np.zeros((layers + 1, n + 1), dtype=np.float64)
+    for c in range(1, layers + 1):
+        take = dp[c - 1][pred] + weights
+        dp[c, 1:] = take
+        dp[c] = np.maximum.accumulate(dp[c])
+
+    # 復元: 選ばなくても同じ値になる候補は選ばない
+    selected = []
+    c, i = layers, n
+    while c > 0 and i > 0:
+        if dp[c][i] == dp[c][i - 1]:
+            i -= 1
+            continue
+        selected.append(int(order[i - 1]))
+        i = int(pred[i - 1])
+        c -= 1
+    return selected[::-1]
+
+
+def select_optimal(candidates: Sequence[Dict], target_count: int,
+                   min_interval: float) -> List[Dict]:
+    """
+    評価済みの候補からスコアの合計が最大になる組み合わせを選択
+
+    Returns:
+        選択された候補のリスト（タイムスタンプ順）
+    """
+    indices = optimal_interval_indices([c['timestamp'] for c in candidates],
+                                       [c['score'] for c in candidates],
+                                       target_count, min_interval)
+    return [candidates[i] for i in indices]
+
+
+def select_optimal_lazily(candidates: Sequence[Dict], upper_bounds: Sequence[float],
+                          evaluate_batch: Callable[[List[Dict]], List[Dict]],
+                          target_count: int, min_interval: float,
+                          exclude: Optional[Callable[[List[Dict]], List[int]]] = None
+                          ) -> List[Dict]:
+    """
+    上界を使って必要な候補だけを評価し、スコアの合計が最大になる組み合わせを選択
+
+    Args:
+        candidates: 候補のリスト（'timestamp' を含む）または CandidateTable
+        upper_bounds: 各候補のスコアの上界（評価後のスコア以上であること）
+        evaluate_batch: 複数の候補を評価して 'score' を含む候補を返す関数
+        target_count: 選択する最大数
+        min_interval: 選択する候補間の最小時間間隔（秒）
+        exclude: 評価済みの解（タイムスタンプ順）から除外する候補の位置を返す関数
+
+    Returns:
+        選択された（評価済みの）候補のリスト（タイムスタンプ順）
+    """
+    if isinstance(candidates, CandidateTable):
+        # 列をそのまま読む（全行を dict に戻さない）
+        timestamps = candidates['timestamp']
+    else:
+        timestamps = [c['timestamp'] for c in candidates]
+    values = [float(bound) for bound in upper_bounds]
+    evaluated: Dict[int, Dict] = {}
+
+    while True:
+        indices = optimal_interval_indices(timestamps, values, target_count, min_interval)
+        pending = [i for i in indices if i not in evaluated]
+        if not pending:
+            selected = [evaluated[i] for i in indices]
+            excluded = exclude(selected) if exclude is not None else []
+            if not excluded:
+                return selected
+            for position in excluded:
+                values[indices[position]] = -np.inf
+            continue
+
+        for i, candidate in zip(pending, evaluate_batch([candidates[i] for i in pending])):
+            evaluated[i] = candidate
+            values[i] = candidate['score']
@@ -0,0 +1,186 @@
+"""
+KeywordMatcher - UI重要度のキーワード照合（Aho–Corasick 法）
+
+OCRで認識したテキストごとにキーワードのリストを順に調べると、
+テキスト数 × キーワード数の部分文字列検索になり、キーワード辞書が
+数千語になると遅くなる。全キーワードから Aho–Corasick オートマトンを
+1回だけ構築し、フレームのテキストをまとめて1回の走査で照合する。
+
+- キーワードとテキストは NFKC 正規化 + casefold で比較する
+  （全角・半角の英数字やカタカナ、大文字小文字の違いを吸収）
+- キーワードはカテゴリ（button, title など、ui_elements の type）ごとに重みを持つ
+- 1つのテキストがカテゴリ内の複数のキーワードを含む場合は、重みが最大のキーワード
+  （同じ重みなら辞書で先のキーワード）を採用する
+- 外部のキーワード辞書（JSON）で既定のキーワードに追加・重みを上書きできる
+
+辞書の形式:
+    {"button": {"カートに入れる": 25, "購入": 15}, "title": ["商品詳細", "レビュー"]}
+    （リストの場合はカテゴリの既定の重み）
+"""
+
+import hashlib
+import json
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+
+# 照合結果: (キーワード, 重み)
+KeywordMatch = Tuple[str, float]
+
+
+def normalize_text(text: str) -> str:
+    """照合用の正規化（NFKC + casefold）"""
+    return unicodedata.normalize('NFKC', text).casefold()
+
+
+def load_keyword_dictionary(path: str,
+                            default_weights: Optional[Mapping[str, float]] = None
+                            ) -> Dict[str, Dict[str, float]]:
+    """
+    外部のキーワード辞書（JSON）を読み込む
+
+    Args:
+        path: 辞書ファイルのパス
+        default_weights: リスト形式のカテゴリに使う重み（カテゴリ名 → 重み）
+
+    Returns:
+        {カテゴリ: {キーワード: 重み}}
+
+    Raises:
+        ValueError: 辞書の形式が不正な場合
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"Keyword dictionary must be a JSON object: {path}")
+
+    default_weights = default_weights or {}
+    dictionary = {}
+    for category, keywords in data.items():
+        if isinstance(keywords, list):
+            if category not in default_weights:
+                raise ValueError(f"Keyword list for '{category}' needs weights: {path}")
+            keywords = {keyword: default_weights[category] for keyword in keywords}
+        if not isinstance(keywords, dict):
+            raise ValueError(f"Keywords for '{category}' must be a list or an object: {path}")
+        dictionary[category] = {str(keyword): float(weight) for keyword, weight in keywords.items()}
+    return dictionary
+
+
+class KeywordMatcher:
+    """カテゴリ・重みつきキーワードの Aho–Corasick オートマトン"""
+
+    def __init__(self, dictionaries: Iterable[Mapping[str, Union[Mapping[str, float],
+                                                                  Sequence[str]]]]) -> None:
+        """
+        Args:
+            dictionaries: {カテゴリ: {キーワード: 重み}} のリスト（後の辞書が同じキーワードの
+                重みを上書きする）
+        """
+        merged: Dict[str, Dict[str, float]] = {}
+        for dictionary in dictionaries:
+            for category, keywords in dictionary.items():
+                merged.setdefault(category, {}).update(keywords)
+
+        self.categories = list(merged)
+        # (カテゴリ, 元のキーワード, 重み) を辞書順に並べたもの。エントリ番号で同点を解決する
+        self.entries: List[Tuple[str, str, float]] = [
+            (category, keyword, weight)
+            for category, keywords in merged.items()
+            for keyword, weight in keywords.items()
+            if normalize_text(keyword)
+        ]
+        # 1つのテキストが得る重みの合計の最大値（カテゴリごとの最大の重みの合計）
+        self._max_text_score = float(sum(
+            max([0.0] + [weight for category, _, weight in self.entries if category == c])
+            for c in self.categories))
+        self._build()
+
+    def _build(self) -> None:
+        """トライと失敗リンクを構築"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[List[int]] = [[]]
+        for entry_id, (_, keyword, _) in enumerate(self.entries):
+            state = 0
+            for char in normalize_text(keyword):
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(entry_id)
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = (self._output[next_state] +
+                                            self._output[self._fail[next_state]])
+
+    @classmethod
+    def from_keyword_lists(cls, keyword_lists: Mapping[str, Tuple[Sequence[str], float]],
+                           dictionary_paths: Sequence[str] = ()) -> 'KeywordMatcher':
+        """
+        既定のキーワードリストと外部のキーワード辞書から構築
+
+        Args:
+            keyword_lists: {カテゴリ: (キーワードのリスト, 重み)}
+            dictionary_paths: 追加するキーワード辞書（JSON）のパス
+        """
+        default_weights = {category: weight for category, (_, weight) in keyword_lists.items()}
+        dictionaries = [{category: {keyword: weight for keyword in keywords}
+                         for category, (keywords, weight) in keyword_lists.items()}]
+        dictionaries += [load_keyword_dictionary(path, default_weights)
+                         for path in dictionary_paths]
+        return cls(dictionaries)
+
+    def match(self, text: str) -> Dict[str, KeywordMatch]:
+        """1つのテキストのカテゴリごとの照合結果"""
+        return self.match_texts([text])[0]
+
+    def match_texts(self, texts: Sequence[str]) -> List[Dict[str, KeywordMatch]]:
+        """
+        複数のテキストをまとめて照合
+
+        Returns:
+            テキストごとの {カテゴリ: (キーワード, 重み)}（一致しないカテゴリは含まない）
+        """
+        goto, fail, output, entries = self._goto, self._fail, self._output, self.entries
+        results = []
+        for text in texts:
+            best: Dict[str, int] = {}
+            state = 0
+            for char in normalize_text(text):
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                for entry_id in output[state]:
+                    category, _, weight = entries[entry_id]
+                    current = best.get(category)
+                    if (current is None or weight > entries[current][2] or
+                            (weight == entries[current][2] and entry_id < current)):
+                        best[category] = entry_id
+            results.append({category: (entries[best[category]][1], entries[best[category]][2])
+                            for category in self.categories if category in best})
+        return results
+
+    def max_text_score(self) -> float:
+        """1つのテキストが得る重みの合計の最大値（UI重要度の上界の計算に使用）"""
+        return self._max_text_score
+
+    def fingerprint(self) -> str:
+        """キーワード・重みの識別子（OCRキャッシュの無効化に使用）"""
+        payload = json.dumps(self.entries, ensure_ascii=False)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,89 @@
+"""
+LazySelection - 上界を使った遅延評価つき上位選択（分枝限定法）
+
+select_top_screenshots はスコア降順に、選択済みと min_interval 秒以上離れた候補を
+target_count 枚まで選ぶ。スコアの一部（UI重要度）の計算に OCR が必要なため、
+全候補を評価してから選ぶと、選ばれない候補にも OCR を実行することになる。
+
+ここでは各候補のスコアの上界（OCR なしで計算できる項と UI 重要度の上界）から
+ヒープを作り、上界の大きい順に必要な候補だけを評価する。
+
+- ヒープの先頭が評価済み: そのスコアは残りすべての候補のスコア以上なので確定
+- ヒープの先頭が未評価: 評価して正確なスコアで入れ直す
+- 選択済みと時間的に近すぎる未評価の候補は評価せずに除外
+- target_count 枚に達したら残りは評価しない
+- accept を指定した場合は、確定した候補を選択する直前に判定し、False なら選ばない
+  （見た目が選択済みと重複する候補の除外などに使う）
+- batch_size > 1 の場合は、ヒープの先頭に続く未評価の候補をまとめて評価する
+  （並列に評価できる場合に使う。評価が先行するだけで選択結果は変わらない）
+
+同点は元の候補順で比較するため、選択結果は全候補を評価して安定ソートした
+場合と一致する。
+"""
+
+import heapq
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+def select_top_lazily(candidates: Sequence[Dict], upper_bounds: Sequence[float],
+                      evaluate: Optional[Callable[[Dict], Dict]], target_count: int,
+                      min_interval: float,
+                      evaluate_batch: Optional[Callable[[List[Dict]], List[Dict]]] = None,
+                      batch_size: int = 1,
+                      accept: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """
+    上界の大きい順に候補を遅延評価し、時間的重複を排除して上位を選択
+
+    Args:
+        candidates: 候補のリスト（'timestamp' を含む）
+        upper_bounds: 各候補のスコアの上界（評価後のスコア以上であること）
+        evaluate: 候補を評価して 'score' を含む候補を返す関数
+        target_count: 選択する目標枚数
+        min_interval: 選択する候補間の最小時間間隔（秒）
+        evaluate_batch: 複数の候補をまとめて評価する関数（Noneの場合は evaluate を順に適用）
+        batch_size: まとめて評価する未評価の候補の最大数
+        accept: 確定した候補を選択する直前の判定（False の場合は選ばない）
+
+    Returns:
+        選択された（評価済みの）候補のリスト（タイムスタンプ順）
+    """
+    if evaluate_batch is None:
+        def evaluate_batch(batch: List[Dict]) -> List[Dict]:
+            return [evaluate(candidate) for candidate in batch]
+
+    # (-スコア, 元の順番, 評価済みか)
+    heap = [(-bound, index, False) for index, bound in enumerate(upper_bounds)]
+    heapq.heapify(heap)
+    evaluated: Dict[int, Dict] = {}
+    selected = []
+
+    def too_close(candidate: Dict) -> bool:
+        return any(abs(candidate['timestamp'] - sel['timestamp']) < min_interval
+                   for sel in selected)
+
+    while heap and len(selected) < target_count:
+        _, index, exact = heapq.heappop(heap)
+
+        if exact:
+            candidate = evaluated[index]
+            if not too_close(candidate) and (accept is None or accept(candidate)):
+                selected.append(candidate)
+            continue
+
+        # 選択済みと近すぎる候補は、スコアに関係なく選ばれない
+        if too_close(candidates[index]):
+            continue
+
+        batch = [index]
+        while heap and len(batch) < batch_size and not heap[0][2]:
+            _, index, _ = heapq.heappop(heap)
+            if not too_close(candidates[index]):
+                batch.append(index)
+
+        for index, candidate in zip(batch, evaluate_batch([candidates[i] for i in batch])):
+            evaluated[index] = candidate
+            heapq.heappush(heap, (-candidate['score'], index, True))
+
+    # タイムスタンプでソート（時系列順）
+    selected.sort(key=lambda x: x['timestamp'])
+    return selected
@@ -0,0 +1,172 @@
+"""
+OCRCache - pHashをキーにしたOCR結果のディスクキャッシュ
+
+アプリ紹介動画では同じ画面（ホーム、設定、一覧など）に何度も戻ってくる。
+安定フレームの pHash をキーに UI重要度の解析結果
+（importance_score, ui_elements, detected_texts）を SQLite に保存し、
+同じ動画内の再訪問・同じ動画の再実行・同じアプリの別動画で OCR を省略する。
+
+- ハミング距離が radius 以内の pHash を同じ画面とみなす（近傍検索はメモリ上の
+  ハッシュ配列に対する XOR + popcount）
+- エントリ数が max_entries を超えたら最後に使われた時刻の古いものから削除（LRU）
+- UI重要度のキーワード・配点が変わった場合はキャッシュ全体を破棄
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from phash_engine import hamming_distances
+
+
+# キャッシュのフォーマットバージョン（互換性のない変更時に上げる）
+OCR_CACHE_VERSION = 2
+
+# キャッシュファイル名
+OCR_CACHE_FILENAME = "ocr_cache.sqlite3"
+
+# 同じ画面とみなす pHash のハミング距離（圧縮ノイズや時計表示の変化を許容）
+DEFAULT_OCR_CACHE_RADIUS = 3
+
+# キャッシュに保持する最大エントリ数
+DEFAULT_OCR_CACHE_SIZE = 10000
+
+# UI重要度の解析結果: (importance_score, ui_elements, detected_texts)
+OCRResult = Tuple[float, List[Dict], List[str]]
+
+
+def to_signed64(hash_value: int) -> int:
+    """uint64 の pHash を SQLite の INTEGER（符号付き64ビット）に変換"""
+    hash_value = int(hash_value)
+    return hash_value - (1 << 64) if hash_value >= (1 << 63) else hash_value
+
+
+def to_unsigned64(value: int) -> int:
+    """SQLite の INTEGER を uint64 の pHash に戻す"""
+    return value + (1 << 64) if value < 0 else value
+
+
+class OCRCache:
+    """pHash → UI重要度の解析結果の SQLite キャッシュ（近傍検索・LRU削除つき）"""
+
+    def __init__(self, path: str, radius: int = DEFAULT_OCR_CACHE_RADIUS,
+                 max_entries: int = DEFAULT_OCR_CACHE_SIZE,
+                 scoring_key: str = '') -> None:
+        """
+        Args:
+            path: SQLite ファイルパス
+            radius: 同じ画面とみなす pHash のハミング距離の上限
+            max_entries: 保持する最大エントリ数
+            scoring_key: UI重要度の計算方法の識別子（異なる場合はキャッシュを破棄）
+        """
+        self.path = Path(path)
+        self.radius = radius
+        self.max_entries = max_entries
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results ("
+            "phash INTEGER PRIMARY KEY, importance_score REAL, "
+            "ui_elements TEXT, detected_texts TEXT, last_used INTEGER)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_used ON ocr_results (last_used)")
+
+        stored = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        expected = {'version': str(OCR_CACHE_VERSION), 'scoring_key': scoring_key}
+        if stored != expected:
+            self.conn.execute("DELETE FROM ocr_results")
+            self.conn.execute("DELETE FROM meta")
+            self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                  expected.items())
+        self.conn.commit()
+
+        self.clock = self.conn.execute(
+            "SELECT COALESCE(MAX(last_used), 0) FROM ocr_results").fetchone()[0]
+        self.load_hashes()
+
+    def load_hashes(self) -> None:
+        """近傍検索用にキャッシュ済みの pHash をメモリに読み込む"""
+        rows = self.conn.execute("SELECT phash FROM ocr_results").fetchall()
+        self.hashes = np.array([to_unsigned64(row[0]) for row in rows], dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def tick(self) -> int:
+        """LRU 用の論理時刻を進める"""
+        self.clock += 1
+        return self.clock
+
+    def nearest(self, hash_value: int) -> Optional[int]:
+        """ハミング距離が radius 以内で最も近いキャッシュ済みの pHash"""
+        if len(self.hashes) == 0:
+            return None
+        distances = hamming_distances(self.hashes, [int(hash_value)])
+        best = int(np.argmin(distances))
+        if distances[best] > self.radius:
+            return None
+        return int(self.hashes[best])
+
+    def get(self, hash_value: int) -> Optional[OCRResult]:
+        """
+        pHash に近い画面の解析結果を取得
+
+        Args:
+            hash_value: 安定フレームの pHash
+
+        Returns:
+            (importance_score, ui_elements, detected_texts)、見つからない場合は None
+        """
+        nearest = self.nearest(hash_value)
+        if nearest is None:
+            return None
+
+        key = to_signed64(nearest)
+        row = self.conn.execute(
+            "SELECT importance_score, ui_elements, detected_texts FROM ocr_results "
+            "WHERE phash = ?", (key,)).fetchone()
+        self.conn.execute("UPDATE ocr_results SET last_used = ? WHERE phash = ?",
+                          (self.tick(), key))
+        self.conn.commit()
+        return row[0], json.loads(row[1]), json.loads(row[2])
+
+    def put(self, hash_value: int, result: OCRResult) -> None:
+        """
+        解析結果を保存し、上限を超えた古いエントリを削除
+
+        Args:
+            hash_value: 安定フレームの pHash
+            result: (importance_score, ui_elements, detected_texts)
+        """
+        importance_score, ui_elements, detected_texts = result
+        self.conn.execute(
+            "INSERT OR REPLACE INTO ocr_results "
+            "(phash, importance_score, ui_elements, detected_texts, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (to_signed64(hash_value), float(importance_score),
+             json.dumps(ui_elements, ensure_ascii=False, default=float),
+             json.dumps(detected_texts, ensure_ascii=False), self.tick()))
+
+        count = self.conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM ocr_results WHERE phash IN ("
+                "SELECT phash FROM ocr_results ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,))
+            self.conn.commit()
+            self.load_hashes()
+            return
+
+        self.conn.commit()
+        if not np.any(self.hashes == np.uint64(hash_value)):
+            self.hashes = np.append(self.hashes, np.uint64(hash_value))
+
+    def close(self) -> None:
+        """データベース接続を閉じる"""
+        self.conn.close()
@@ -0,0 +1,119 @@
+"""
+OCRWorkerPool - ウォーム状態のEasyOCRリーダーを持つワーカープロセスプール
+
+EasyOCR の推論はメインプロセスの1フレームずつの呼び出しでは CPU の一部しか
+使わない。ワーカープロセスごとに Reader を1回だけ初期化し（モデルの読み込みは
+起動時のみ）、torch のスレッド数を「CPUコア数 / ワーカー数」に固定して
+コアを分け合う。
+
+- テキスト領域の検出は複数フレームをまとめて行う（同じサイズのフレームは
+  readtext_batched と同じく4次元配列で1回の推論）
+- 検出はスキャン（安定フレームの探索）と並行して非同期に実行し、
+  文字認識は複数の候補をワーカーに分配する
+- 検出の推論パラメータ（canvas_size, mag_ratio）は OCRプロファイル（ocr_profiles.py）から渡す
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# OCRの対象言語
+OCR_LANGUAGES = ['ja', 'en']
+
+# ワーカープロセス内の Reader
+_worker_reader = None
+
+
+def create_reader():
+    """EasyOCR Reader を作成（CPUモード）"""
+    import easyocr
+    return easyocr.Reader(OCR_LANGUAGES, gpu=False, verbose=False)
+
+
+def init_ocr_worker(reader_factory: Callable, torch_threads: int) -> None:
+    """ワーカープロセスの初期化: torch のスレッド数を固定し、Reader を読み込む"""
+    global _worker_reader
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    _worker_reader = reader_factory()
+
+
+def detect_with_reader(reader, images: Sequence[np.ndarray],
+                       detect_kwargs: Optional[Dict] = None) -> List[Tuple[List, List]]:
+    """
+    複数画像のテキスト領域を検出
+
+    すべて同じサイズの場合は4次元配列としてまとめて推論する
+    （reader.readtext_batched の検出部分と同じ）。
+
+    Args:
+        reader: EasyOCR Reader
+        images: reformat_input 済みの画像のリスト
+        detect_kwargs: reader.detect() に渡す推論パラメータ（canvas_size, mag_ratio など）
+
+    Returns:
+        [(horizontal_list, free_list), ...]（画像ごと）
+    """
+    detect_kwargs = detect_kwargs or {}
+    if len(images) > 1 and all(image.shape == images[0].shape for image in images):
+        horizontal_lists, free_lists = reader.detect(np.stack(images), reformat=False,
+                                                      **detect_kwargs)
+        return list(zip(horizontal_lists, free_lists))
+
+    results = []
+    for image in images:
+        horizontal_list, free_list = reader.detect(image, reformat=False, **detect_kwargs)
+        results.append((horizontal_list[0], free_list[0]))
+    return results
+
+
+def detect_images(images: List[np.ndarray],
+                  detect_kwargs: Optional[Dict] = None) -> List[Tuple[List, List]]:
+    """ワーカープロセスでテキスト領域を検出"""
+    return detect_with_reader(_worker_reader, images, detect_kwargs)
+
+
+def recognize_regions(job: Tuple[np.ndarray, List, List]) -> List[Tuple]:
+    """ワーカープロセスで検出済みの領域を文字認識"""
+    grey, horizontal_list, free_list = job
+    return _worker_reader.recognize(grey, horizontal_list, free_list, reformat=False)
+
+
+class OCRWorkerPool:
+    """ウォーム状態の Reader を持つ OCR ワーカープロセスプール"""
+
+    def __init__(self, workers: int, torch_threads: Optional[int] = None,
+                 reader_factory: Callable = create_reader) -> None:
+        """
+        Args:
+            workers: ワーカープロセス数
+            torch_threads: ワーカーごとの torch スレッド数（Noneの場合は CPUコア数 / workers）
+            reader_factory: Reader を作成するモジュールレベルの関数（spawn で渡すため）
+        """
+        self.workers = workers
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // workers)
+        # fork後のtorch/OpenCVスレッドプールのデッドロックを避けるため spawn を使用
+        context = multiprocessing.get_context('spawn')
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                            initializer=init_ocr_worker,
+                                            initargs=(reader_factory, self.torch_threads))
+
+    def submit_detect(self, images: List[np.ndarray],
+                      detect_kwargs: Optional[Dict] = None) -> Future:
+        """テキスト領域の検出を非同期に実行（結果は [(horizontal_list, free_list), ...]）"""
+        return self.executor.submit(detect_images, images, detect_kwargs)
+
+    def recognize_many(self, jobs: List[Tuple[np.ndarray, List, List]]) -> List[List[Tuple]]:
+        """複数の (grey, horizontal_list, free_list) をワーカーに分配して文字認識"""
+        return list(self.executor.map(recognize_regions, jobs))
+
+    def close(self) -> None:
+        """ワーカープロセスを終了"""
+        self.executor.shutdown()
@@ -0,0 +1,193 @@
+"""
+OCRProfiles - OCRの速度・精度プロファイルとベンチマーク
+
+4K や 1179x2556 のスマートフォン画面録画では、UIボタンの文字を読むのに必要な
+画素数に比べて検出器の入力が大きすぎる。プロファイルごとに
+
+- max_side: OCR前にフレームの長辺をこの画素数まで縮小（None の場合は縮小しない）
+- canvas_size / mag_ratio: EasyOCR の検出器の入力サイズ
+- detect_batch_size: テキスト領域の検出でまとめて推論するフレーム数
+
+を切り替える。縮小した画像で検出した座標は元のフレームの座標に戻す。
+文字認識のバッチサイズは切り替えない（EasyOCR の reader.recognize() は CPU では
+batch_size にかかわらず領域を1つずつ推論し、Reader は CPU で作成するため）。
+
+ベンチマーク（ocr-bench サブコマンド）は参照画像セットに対して、プロファイルごとの
+キーワード再現率（参照で見つかったUIキーワードのうち検出できた割合）と
+1フレームあたりの秒数を計測する。
+"""
+
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import cv2
+import numpy as np
+
+from keyword_matcher import normalize_text
+
+
+OCR_PROFILES = {
+    'fast': {
+        'max_side': 960,
+        'canvas_size': 960,
+        'mag_ratio': 1.0,
+        'detect_batch_size': 8
+    },
+    'balanced': {
+        'max_side': 1280,
+        'canvas_size': 1280,
+        'mag_ratio': 1.0,
+        'detect_batch_size': 4
+    },
+    # 元の解像度のまま readtext() の既定値で解析する（従来と同じ結果）
+    'accurate': {
+        'max_side': None,
+        'canvas_size': 2560,
+        'mag_ratio': 1.0,
+        'detect_batch_size': 4
+    }
+}
+
+DEFAULT_OCR_PROFILE = 'accurate'
+
+
+def get_ocr_profile(name: str) -> Dict:
+    """
+    プロファイル名から設定を取得
+
+    Raises:
+        ValueError: 未知のプロファイル名の場合
+    """
+    if name not in OCR_PROFILES:
+        raise ValueError(f"Unknown OCR profile: {name} "
+                         f"(choose from {', '.join(OCR_PROFILES)})")
+    return OCR_PROFILES[name]
+
+
+def downscale_for_ocr(frame: np.ndarray, max_side: Optional[int]) -> Tuple[np.ndarray, float]:
+    """
+    フレームの長辺が max_side 以下になるように縮小
+
+    Returns:
+        (縮小したフレーム, 縮小率)。縮小しない場合は元のフレームと 1.0
+    """
+    height, width = frame.shape[:2]
+    if max_side is None or max(height, width) <= max_side:
+        return frame, 1.0
+    scale = max_side / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA), scale
+
+
+def scale_ocr_results(results: Sequence[Tuple], factor: float) -> List[Tuple]:
+    """OCR結果 [(bbox, text, confidence), ...] の座標を factor 倍する"""
+    return [([[x * factor, y * factor] for x, y in bbox], text, confidence)
+            for bbox, text, confidence in results]
+
+
+def to_pixel_bbox(bbox: Sequence[Sequence[float]]) -> List[List[int]]:
+    """bbox の頂点を整数の画素座標に丸める（metadata.json に保存するため Python の int）"""
+    return [[int(round(float(x))), int(round(float(y)))] for x, y in bbox]
+
+
+def matched_keywords(texts: Iterable[str], keywords: Iterable[str]) -> Set[str]:
+    """テキストに含まれるキーワード（UI重要度と同じ正規化での部分一致）"""
+    normalized = [normalize_text(text) for text in texts]
+    return {keyword for keyword in keywords
+            if any(normalize_text(keyword) in text for text in normalized)}
+
+
+def keyword_recall(references: Sequence[Set[str]], found: Sequence[Set[str]]) -> float:
+    """
+    参照のキーワードのうち見つかった割合（全フレームの合計）
+
+    参照にキーワードが1つもない場合は 1.0
+    """
+    total = sum(len(reference) for reference in references)
+    if total == 0:
+        return 1.0
+    hits = sum(len(reference & result) for reference, result in zip(references, found))
+    return hits / total
+
+
+def benchmark_profiles(frames: Sequence[np.ndarray],
+                       create_analyzer: Callable[[str], Callable[[np.ndarray], List[str]]],
+                       profile_names: Sequence[str], keywords: Iterable[str],
+                       references: Optional[Sequence[Set[str]]] = None,
+                       reference_profile: str = DEFAULT_OCR_PROFILE) -> List[Dict]:
+    """
+    プロファイルごとのキーワード再現率と1フレームあたりの秒数を計測
+
+    Args:
+        frames: 参照画像セット（BGR）
+        create_analyzer: プロファイル名から「フレーム → 検出テキストのリスト」の関数を作る関数
+        profile_names: 計測するプロファイル名
+        keywords: 参照に使うキーワード（references がない場合）
+        references: フレームごとの正解キーワード（Noneの場合は reference_profile の結果を正解とし、
+            reference_profile も計測する）
+        reference_profile: references がない場合に正解とするプロファイル
+
+    Returns:
+        プロファイルごとの {'profile', 'max_side', 'canvas_size', 'mag_ratio',
+        'keyword_recall', 'seconds_per_frame', 'speedup'}
+        （speedup は最も遅いプロファイルに対する速度比）
+    """
+    names = list(profile_names)
+    if references is None and reference_profile not in names:
+        names.append(reference_profile)
+    # 正解を先に確定するため、参照プロファイルから計測する
+    if references is None:
+        names.sort(key=lambda name: name != reference_profile)
+
+    keywords = list(keywords)
+    measured = {}
+    for name in names:
+        profile = get_ocr_profile(name)
+        analyze = create_analyzer(name)
+        if frames:
+            # モデルの読み込み・初回推論の準備は計測しない
+            analyze(frames[0])
+
+        start = time.perf_counter()
+        texts = [analyze(frame) for frame in frames]
+        elapsed = time.perf_counter() - start
+
+        if references is None and name == reference_profile:
+            references = [matched_keywords(frame_texts, keywords) for frame_texts in texts]
+        measured[name] = {
+            'profile': name,
+            'max_side': profile['max_side'],
+            'canvas_size': profile['canvas_size'],
+            'mag_ratio': profile['mag_ratio'],
+            'seconds_per_frame': elapsed / len(frames) if frames else 0.0,
+            'texts': texts
+        }
+
+    rows = []
+    for name in OCR_PROFILES:
+        if name not in measured:
+            continue
+        row = measured[name]
+        found = [matched_keywords(frame_texts, reference)
+                 for frame_texts, reference in zip(row.pop('texts'), references)]
+        row['keyword_recall'] = keyword_recall(references, found)
+        rows.append(row)
+
+    slowest = max((row['seconds_per_frame'] for row in rows), default=0.0)
+    for row in rows:
+        row['speedup'] = slowest / row['seconds_per_frame'] if row['seconds_per_frame'] else 1.0
+    return rows
+
+
+def format_benchmark_table(rows: List[Dict]) -> str:
+    """ベンチマーク結果をテキストの表に整形"""
+    lines = [f"{'profile':<10}  {'max_side':>8}  {'canvas':>6}  {'recall':>6}  "
+             f"{'sec/frame':>9}  {'speedup':>7}"]
+    for row in rows:
+        max_side = row['max_side'] if row['max_side'] is not None else '-'
+        lines.append(
+            f"{row['profile']:<10}  {max_side:>8}  {row['canvas_size']:>6}  "
+            f"{row['keyword_recall']:>6.3f}  {row['seconds_per_frame']:>9.3f}  "
+            f"{row['speedup']:>6.2f}x"
+        )
+    return '\n'.join(lines)
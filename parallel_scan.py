@@ -0,0 +1,249 @@
+"""
+ParallelScan - 1本の動画を複数プロセスで分割スキャン
+
+動画をキーフレーム境界に揃えたフレーム区間に分割し、区間ごとに
+ワーカープロセスが独立したキャプチャハンドルでサンプルフレームをハッシュ化する。
+
+各区間の開始位置はサンプリング間隔（step）の倍数に揃えるため、
+サンプルされるフレームは逐次スキャンと完全に一致する。区間の結果を順番に
+連結すると、区間境界の距離は「前区間の最後のハッシュ」と「次区間の最初の
+ハッシュ」の比較になり、遷移リストは逐次スキャンと同一になる。
+"""
+
+import bisect
+import multiprocessing
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from tqdm import tqdm
+
+from frame_source import create_frame_source
+from phash_engine import PHashEngine
+
+
+def find_keyframes(video_path: str, fps: float) -> Optional[List[int]]:
+    """
+    動画のキーフレーム位置（フレーム番号）を取得
+
+    ffprobe があればパケット情報（デコード不要）から、なければ PyAV の
+    デマックス結果から取得する。どちらも使えない場合は None を返す。
+
+    Args:
+        video_path: 入力動画ファイルパス
+        fps: 動画のフレームレート
+
+    Returns:
+        昇順のキーフレーム番号リスト、または None
+    """
+    times = None
+
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe:
+        try:
+            output = subprocess.run(
+                [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path],
+                capture_output=True, text=True, check=True
+            ).stdout
+            times = []
+            for line in output.splitlines():
+                fields = line.strip().split(',')
+                if len(fields) >= 2 and 'K' in fields[1] and fields[0] not in ('', 'N/A'):
+                    times.append(float(fields[0]))
+        except (subprocess.CalledProcessError, OSError, ValueError):
+            times = None
+
+    if times is None:
+        try:
+            import av
+            with av.open(video_path) as container:
+                stream = container.streams.video[0]
+                times = [
+                    float(packet.pts * packet.time_base)
+                    for packet in container.demux(stream)
+                    if packet.is_keyframe and packet.pts is not None
+                ]
+        except Exception:
+            times = None
+
+    if not times:
+        return None
+
+    first = min(times)
+    return sorted({int(round((t - first) * fps)) for t in times})
+
+
+def plan_chunks(total_frames: int, step: int, workers: int,
+                keyframes: Optional[List[int]] = None) -> List[Tuple[int, int, Optional[int]]]:
+    """
+    スキャン区間を計画
+
+    均等分割の境界を最寄りのキーフレームに寄せ、さらにサンプリング間隔の倍数に
+    切り上げる（サンプルされるフレームを逐次スキャンと一致させるため）。
+
+    Args:
+        total_frames: 動画の総フレーム数
+        step: サンプリング間隔（フレーム数）
+        workers: 区間数の目安（ワーカー数）
+        keyframes: 昇順のキーフレーム番号リスト（Noneの場合は均等分割のみ）
+
+    Returns:
+        [(start, end, keyframe), ...]: 区間の開始・終了フレーム番号と、
+        開始位置以前の直近キーフレーム番号（不明な場合None）
+    """
+    step = max(1, step)
+    boundaries = [0]
+
+    for i in range(1, workers):
+        target = total_frames * i // workers
+        if keyframes:
+            # 均等分割位置に最も近いキーフレーム
+            pos = bisect.bisect_left(keyframes, target)
+            nearby = keyframes[max(0, pos - 1):pos + 1]
+            target = min(nearby, key=lambda k: abs(k - target))
+
+        # サンプリング間隔の倍数に切り上げ
+        boundary = -(-target // step) * step
+        if boundaries[-1] < boundary < total_frames:
+            boundaries.append(boundary)
+
+    boundaries.append(total_frames)
+
+    chunks = []
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        keyframe = None
+        if keyframes:
+            pos = bisect.bisect_right(keyframes, start)
+            if pos > 0:
+                keyframe = keyframes[pos - 1]
+        chunks.append((start, end, keyframe))
+    return chunks
+
+
+def scan_chunk(task: Dict) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    1区間をスキャンしてハッシュ信号を返す（ワーカープロセスで実行）
+
+    Args:
+        task: {'index', 'video_path', 'backend', 'process_size',
+               'step', 'start', 'end', 'keyframe', 'batch_size'}
+
+    Returns:
+        (index, frame_indices, hashes)
+
+    Raises:
+        IOError: 動画を開けない場合
+    """
+    # プロセス間で並列化するため、OpenCV 内部のスレッドは使わない
+    cv2.setNumThreads(1)
+
+    source = create_frame_source(task['backend'], task['video_path'], task['process_size'])
+    if not source.open():
+        raise IOError(f"Cannot open video: {task['video_path']}")
+
+    try:
+        frames = source.iter_frames(
+            step=task['step'],
+            start=task['start'],
+            end=task['end'],
+            keyframe=task['keyframe']
+        )
+        frame_indices, hashes = PHashEngine().hash_stream(frames, task['batch_size'])
+    finally:
+        source.close()
+
+    return task['index'], frame_indices, hashes
+
+
+def stitch_chunks(results: List[Tuple[int, np.ndarray, np.ndarray]],
+                  step: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    区間ごとのハッシュ信号を1本に連結
+
+    区間順に並べて連結するため、境界の距離は前区間の最後のハッシュと
+    次区間の最初のハッシュの比較になる。サンプル位置に欠落がある場合は警告する。
+
+    Args:
+        results: scan_chunk() の戻り値リスト（順不同）
+        step: サンプリング間隔（フレーム数）
+
+    Returns:
+        (frame_indices, hashes)
+    """
+    results = sorted(results, key=lambda r: r[0])
+
+    for (_, prev_indices, _), (index, indices, _) in zip(results[:-1], results[1:]):
+        if len(prev_indices) and len(indices) and indices[0] != prev_indices[-1] + step:
+            print(f"Warning: Sample gap at chunk {index} boundary "
+                  f"(frame {prev_indices[-1]} -> {indices[0]})")
+
+    frame_indices = [r[1] for r in results if len(r[1])]
+    hashes = [r[2] for r in results if len(r[2])]
+    if not frame_indices:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64)
+    return np.concatenate(frame_indices), np.concatenate(hashes)
+
+
+def scan_hash_signal_parallel(video_path: str, backend: str,
+                              process_size: Tuple[int, int], step: int,
+                              total_frames: int, workers: int,
+                              batch_size: int = 32,
+                              fps: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    動画を区間に分割し、複数プロセスでハッシュ信号を計算
+
+    Args:
+        video_path: 入力動画ファイルパス
+        backend: フレーム供給バックエンド名
+        process_size: 処理用解像度 (width, height)
+        step: サンプリング間隔（フレーム数）
+        total_frames: 動画の総フレーム数
+        workers: ワーカープロセス数
+        batch_size: ハッシュ計算のバッチサイズ
+        fps: フレームレート（キーフレーム位置の算出に使用、Noneの場合は動画から取得）
+
+    Returns:
+        (frame_indices, hashes): 逐次スキャンと同一のハッシュ信号
+    """
+    if fps is None:
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        cap.release()
+
+    keyframes = find_keyframes(video_path, fps) if fps else None
+    chunks = plan_chunks(total_frames, step, workers, keyframes)
+
+    tasks = [
+        {
+            'index': i,
+            'video_path': video_path,
+            'backend': backend,
+            'process_size': process_size,
+            'step': step,
+            'start': start,
+            'end': end,
+            'keyframe': keyframe,
+            'batch_size': batch_size
+        }
+        for i, (start, end, keyframe) in enumerate(chunks)
+    ]
+
+    print(f"  Scanning {len(tasks)} chunks with {workers} workers"
+          f" ({'keyframe-aligned' if keyframes else 'sample-aligned'})")
+
+    results = []
+    # fork後のOpenCVスレッドプールのデッドロックを避けるため spawn を使用
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as executor:
+        futures = {executor.submit(scan_chunk, task): task for task in tasks}
+        with tqdm(total=total_frames, desc="Scanning frames") as pbar:
+            for future in as_completed(futures):
+                results.append(future.result())
+                task = futures[future]
+                pbar.update(task['end'] - task['start'])
+
+    return stitch_chunks(results, step)
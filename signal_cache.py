@@ -0,0 +1,154 @@
+"""
+SignalCache - ハッシュ信号のディスクキャッシュ
+
+サンプルフレームのpHash列とタイムスタンプを .npy（構造化配列）として保存し、
+--threshold / --interval / --count を変えた再実行では動画のデコードと
+ハッシュ計算を省略する。読み込みはメモリマップで行う。
+
+キャッシュキーは動画の簡易フィンガープリント（ファイルサイズ・更新時刻・
+数か所のブロックのダイジェスト）とサンプリングパラメータから作る。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+# キャッシュファイルのフォーマットバージョン（互換性のない変更時に上げる）
+CACHE_VERSION = 2
+
+# ハッシュ信号の構造化配列の型
+SIGNAL_DTYPE = np.dtype([
+    ('frame_idx', '<i8'),
+    ('timestamp', '<f8'),
+    ('hash', '<u8'),
+])
+
+# フィンガープリントで読むブロックのサイズと数
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+FINGERPRINT_BLOCKS = 8
+
+
+def video_fingerprint(video_path: str) -> Dict:
+    """
+    動画ファイルの簡易フィンガープリントを計算
+
+    ファイル全体は読まず、先頭・末尾を含む等間隔のブロックだけをハッシュ化する。
+
+    Args:
+        video_path: 動画ファイルパス
+
+    Returns:
+        {'size', 'mtime_ns', 'digest'}
+    """
+    stat = os.stat(video_path)
+    size = stat.st_size
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(video_path, 'rb') as f:
+        last = max(0, size - FINGERPRINT_BLOCK_SIZE)
+        offsets = sorted({last * i // (FINGERPRINT_BLOCKS - 1) for i in range(FINGERPRINT_BLOCKS)})
+        for offset in offsets:
+            f.seek(offset)
+            digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+
+    return {
+        'size': size,
+        'mtime_ns': stat.st_mtime_ns,
+        'digest': digest.hexdigest()
+    }
+
+
+class SignalCache:
+    """ハッシュ信号（frame_idx, timestamp, hash）のディスクキャッシュ"""
+
+    def __init__(self, cache_dir: str) -> None:
+        """
+        Args:
+            cache_dir: キャッシュディレクトリ（出力ディレクトリ内または共有ディレクトリ）
+        """
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def make_key(video_path: str, params: Dict) -> str:
+        """
+        キャッシュキーを生成
+
+        Args:
+            video_path: 動画ファイルパス
+            params: サンプリングパラメータ（step, process_size, backend など）
+
+        Returns:
+            キャッシュキー（16進文字列）
+        """
+        payload = json.dumps({
+            'version': CACHE_VERSION,
+            'video': video_fingerprint(video_path),
+            'params': params
+        }, sort_keys=True)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        """キーに対応するキャッシュファイルのパス"""
+        return self.cache_dir / f"signal_{key}.npy"
+
+    def load(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        キャッシュからハッシュ信号を読み込む（メモリマップ）
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            (frame_indices, timestamps, hashes)、キャッシュがない・壊れている場合は None
+        """
+        path = self.path_for(key)
+        if not path.exists():
+            return None
+        try:
+            signal = np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring corrupt signal cache {path.name}: {e}")
+            return None
+        if signal.dtype != SIGNAL_DTYPE:
+            return None
+        return signal['frame_idx'], signal['timestamp'], signal['hash']
+
+    def save(self, key: str, frame_indices: np.ndarray, timestamps: np.ndarray,
+             hashes: np.ndarray) -> Optional[Path]:
+        """
+        ハッシュ信号をキャッシュに保存（一時ファイル経由でアトミックに置き換え）
+
+        Args:
+            key: キャッシュキー
+            frame_indices: サンプルしたフレーム番号の配列
+            timestamps: 対応するタイムスタンプ（秒）の配列
+            hashes: 対応するpHashの配列
+
+        Returns:
+            保存したファイルのパス、保存に失敗した場合は None
+        """
+        signal = np.zeros(len(frame_indices), dtype=SIGNAL_DTYPE)
+        signal['frame_idx'] = frame_indices
+        signal['timestamp'] = timestamps
+        signal['hash'] = hashes
+
+        path = self.path_for(key)
+        tmp_path = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.npy.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, signal)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Failed to write signal cache: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        return path
@@ -0,0 +1,108 @@
+"""
+TemporalSearch - 粗密2段階の画面遷移探索
+
+粗い間隔（例: 2秒ごと）でサンプルしたハッシュ信号のうち、隣接サンプルの
+ハミング距離が閾値を超えた区間だけを二分探索し、ターゲットデコードで
+フレーム単位の遷移位置を特定する。
+
+静止画面が大半を占めるアプリ操作動画では、デコードするフレーム数を
+大きく削減しつつ、遷移位置（frame_idx）の精度はフレーム単位になる。
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from frame_source import FrameSource
+from phash_engine import PHashEngine, hamming_distances
+
+
+class TargetedHasher:
+    """
+    指定フレームをターゲットデコードして pHash を返す（メモ化付き）
+
+    粗いサンプルのハッシュは事前に登録しておくことで再デコードを避ける。
+    """
+
+    def __init__(self, source: FrameSource, engine: PHashEngine) -> None:
+        """
+        Args:
+            source: オープン済みのフレームソース
+            engine: pHashエンジン
+        """
+        self.source = source
+        self.engine = engine
+        self.hashes: Dict[int, Optional[int]] = {}
+        self.decoded_frames = 0
+
+    def register(self, frame_idx: int, hash_value: int) -> None:
+        """計算済みのハッシュを登録"""
+        self.hashes[int(frame_idx)] = int(hash_value)
+
+    def __call__(self, frame_idx: int) -> Optional[int]:
+        """指定フレームの pHash（読み込み失敗時は None）"""
+        if frame_idx not in self.hashes:
+            frame = self.source.read_frame(frame_idx)
+            self.decoded_frames += 1
+            self.hashes[frame_idx] = None if frame is None else self.engine.hash_frame(frame)
+        return self.hashes[frame_idx]
+
+
+def hash_distance(hash_a: int, hash_b: int) -> int:
+    """2つの pHash のハミング距離"""
+    return int(hamming_distances([hash_a], [hash_b])[0])
+
+
+def bisect_transitions(hash_at: Callable[[int], Optional[int]],
+                       lo: int, lo_hash: int, hi: int, hi_hash: int,
+                       threshold: int,
+                       magnitude: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    区間 (lo, hi] 内の画面遷移をフレーム単位まで二分探索
+
+    中点のハッシュで区間を二分し、閾値を超える側をそれぞれ再帰的に探索する
+    （1つの粗い区間に複数の遷移があっても検出できる）。アニメーションで変化が
+    分散し、どちらの半分も閾値を超えない場合は距離の大きい側へ進む。
+
+    Args:
+        hash_at: フレーム番号から pHash を返す関数（失敗時は None）
+        lo: 遷移前のフレーム番号
+        lo_hash: lo の pHash
+        hi: 遷移後のフレーム番号
+        hi_hash: hi の pHash
+        threshold: 画面遷移検出の閾値（ハミング距離）
+        magnitude: 遷移の大きさ（Noneの場合は lo と hi の距離）
+
+    Returns:
+        [(frame_idx, magnitude), ...]: 遷移後の最初のフレーム番号と、
+        閾値を超えた最小の区間のハミング距離（frame_idx 昇順）
+    """
+    distance = hash_distance(lo_hash, hi_hash)
+    if magnitude is None or distance > threshold:
+        magnitude = distance
+
+    if hi - lo <= 1:
+        return [(hi, magnitude)]
+
+    mid = (lo + hi) // 2
+    mid_hash = hash_at(mid)
+    if mid_hash is None:
+        # デコードできない場合はこれ以上絞り込まない
+        return [(hi, magnitude)]
+
+    left_distance = hash_distance(lo_hash, mid_hash)
+    right_distance = hash_distance(mid_hash, hi_hash)
+
+    results = []
+    if left_distance > threshold:
+        results += bisect_transitions(hash_at, lo, lo_hash, mid, mid_hash, threshold)
+    if right_distance > threshold:
+        results += bisect_transitions(hash_at, mid, mid_hash, hi, hi_hash, threshold)
+
+    if not results:
+        # 変化が両側に分散している場合は、変化の大きい側に遷移点があるとみなす
+        if left_distance >= right_distance:
+            results = bisect_transitions(hash_at, lo, lo_hash, mid, mid_hash,
+                                         threshold, magnitude)
+        else:
+            results = bisect_transitions(hash_at, mid, mid_hash, hi, hi_hash,
+                                         threshold, magnitude)
+    return results
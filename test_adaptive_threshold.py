@@ -0,0 +1,135 @@
+"""
+AdaptiveThreshold のユニットテスト
+
+テスト対象:
+- 中央値 + MAD によるオンライン閾値推定（ウォームアップ・下限・上限）
+- ヒステリシスによる過渡的スパイクの除外
+- --threshold auto の ScreenshotExtractor への統合
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from adaptive_threshold import AdaptiveThreshold, suppress_transients
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import create_test_video
+
+SCREEN_A = 0
+SCREEN_B = 2 ** 64 - 1
+SCREEN_C = 0xFFFFFFFF
+
+
+class TestAdaptiveThreshold(unittest.TestCase):
+    """AdaptiveThreshold のテストケース"""
+
+    def test_warmup_uses_initial_threshold(self):
+        """統計が揃うまでは初期閾値を使う"""
+        tracker = AdaptiveThreshold(min_samples=5, initial=25)
+
+        self.assertEqual([tracker.update(0) for _ in range(5)], [25.0] * 5)
+
+    def test_static_signal_uses_floor(self):
+        """静止画面が続く場合は下限まで下がる"""
+        tracker = AdaptiveThreshold(floor=16)
+        thresholds = tracker.thresholds_for(np.array([0, 1, 2, 0, 1] * 10))
+
+        self.assertEqual(thresholds[-1], 16.0)
+
+    def test_busy_signal_raises_threshold(self):
+        """変化の多い区間では閾値が上がる（上限で頭打ち）"""
+        rng = np.random.default_rng(0)
+        busy = AdaptiveThreshold(ceiling=40).thresholds_for(rng.integers(10, 25, 50))
+        noisy = AdaptiveThreshold(ceiling=40).thresholds_for(rng.integers(0, 64, 50))
+
+        self.assertGreater(busy[-1], 16.0)
+        self.assertEqual(noisy[-1], 40.0)
+
+    def test_thresholds_are_causal(self):
+        """各サンプルの閾値はそれ以前の距離だけで決まる"""
+        distances = np.random.default_rng(1).integers(0, 30, 40)
+
+        full = AdaptiveThreshold().thresholds_for(distances)
+        prefix = AdaptiveThreshold().thresholds_for(distances[:25])
+
+        np.testing.assert_array_equal(full[:25], prefix)
+
+
+class TestSuppressTransients(unittest.TestCase):
+    """suppress_transients のテストケース"""
+
+    def test_persistent_change_is_kept(self):
+        """遷移後の画面が持続すれば確定する"""
+        hashes = np.array([SCREEN_A, SCREEN_A, SCREEN_B, SCREEN_B, SCREEN_B], dtype=np.uint64)
+
+        kept, suppressed = suppress_transients(hashes, [1], np.full(4, 25.0))
+
+        self.assertEqual((kept, suppressed), ([1], []))
+
+    def test_spike_and_return_are_suppressed(self):
+        """元の画面へすぐ戻るスパイクは、戻る側の遷移も含めて除外する"""
+        hashes = np.array([SCREEN_A, SCREEN_A, SCREEN_B, SCREEN_A, SCREEN_A, SCREEN_C, SCREEN_C],
+                          dtype=np.uint64)
+
+        kept, suppressed = suppress_transients(hashes, [1, 2, 4], np.full(6, 25.0))
+
+        self.assertEqual(kept, [4])
+        self.assertEqual(suppressed, [1, 2])
+
+    def test_change_at_end_is_kept(self):
+        """動画の終端で持続を確認できない遷移は確定する"""
+        hashes = np.array([SCREEN_A, SCREEN_B], dtype=np.uint64)
+
+        kept, _ = suppress_transients(hashes, [0], np.full(1, 25.0))
+
+        self.assertEqual(kept, [0])
+
+
+class TestAutoThreshold(unittest.TestCase):
+    """--threshold auto のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        # 画面: A(0-29) → B(30-34、0.5秒だけのフラッシュ) → A(35-59) → C(60-89)
+        self.video_path = create_test_video(Path(self.test_dir) / "flash.avi",
+                                            timeline=[(0, 30), (1, 5), (0, 25), (2, 30)])
+        self.output_dir = Path(self.test_dir) / "output"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _create_extractor(self, **kwargs) -> ScreenshotExtractor:
+        extractor = ScreenshotExtractor(str(self.video_path), str(self.output_dir), **kwargs)
+        self.assertTrue(extractor.open_video())
+        self.addCleanup(extractor.close_video)
+        return extractor
+
+    def test_auto_threshold_suppresses_flash(self):
+        """固定閾値ではフラッシュも遷移になるが、auto では実際の遷移だけが残る"""
+        fixed = self._create_extractor().detect_scene_transitions()
+        self.assertEqual([t['frame_idx'] for t in fixed], [30, 60])
+        self.assertEqual(fixed[0]['sample_count'], 2)
+
+        extractor = self._create_extractor(transition_threshold='auto')
+        transitions = extractor.detect_scene_transitions()
+
+        self.assertEqual([t['frame_idx'] for t in transitions], [60])
+        # フラッシュの2サンプルは1つの遷移イベントなので、省略できた探索は1回
+        self.assertEqual(extractor.suppressed_transients, 1)
+
+    def test_threshold_option_accepts_auto(self):
+        """--threshold は整数または auto を受け付ける"""
+        parser = create_argument_parser()
+
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4']).threshold, 25)
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4', '-t', '20']).threshold, 20)
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4', '-t', 'auto']).threshold, 'auto')
+        with self.assertRaises(SystemExit):
+            parser.parse_args(['-i', 'video.mp4', '-t', 'high'])
+
+
+if __name__ == '__main__':
+    unittest.main()
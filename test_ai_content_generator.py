@@ -994,7 +994,7 @@ class TestAIContentGeneratorMetadata(unittest.TestCase):
         self.mock_anthropic_class.return_value = mock_client
 
         from extract_screenshots import AIContentGenerator
-        from datetime import datetime
+        from datetime import datetime, timezone
 
         generator = AIContentGenerator(
             output_dir=str(self.output_dir),
@@ -1002,12 +1002,12 @@ class TestAIContentGeneratorMetadata(unittest.TestCase):
         )
 
         # 現在時刻を取得
-        before = datetime.utcnow()
+        before = datetime.now(timezone.utc)
 
         content = "# テスト"
         metadata = {
             "model": "claude-3-5-sonnet-20241022",
-            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "generated_at": generator.utc_timestamp(),
         }
 
         generator.save_article(content, metadata)
@@ -1021,6 +1021,10 @@ class TestAIContentGeneratorMetadata(unittest.TestCase):
         self.assertIn("generated_at", saved_metadata)
         # 簡易的なISO 8601フォーマット検証（YYYY-MM-DDTHH:MM:SS）
         self.assertRegex(saved_metadata['generated_at'], r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
+        # UTC の時刻を "Z" つきで記録する
+        self.assertTrue(saved_metadata['generated_at'].endswith('Z'))
+        generated_at = datetime.fromisoformat(saved_metadata['generated_at'][:-1] + '+00:00')
+        self.assertLessEqual(before, generated_at)
 
     def test_metadata_includes_api_usage_statistics(self):
         """
@@ -0,0 +1,213 @@
+"""
+ArtifactStore のユニットテスト
+
+テスト対象:
+- base64 文字列を1回だけ作成すること
+- 合計バイト数の上限による古い画像の削除と、ファイルからの読み込みへのフォールバック
+- ImageEncoder の keep（エンコード済みのバイト列の保持）
+- AIContentGenerator.generate_article のバッファからの画像取得（リトライ時の再利用・形式の記録）
+- ScreenshotExtractor の --artifact-buffer-mb
+"""
+
+import base64
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, Mock, patch
+
+import cv2
+import numpy as np
+
+import artifact_store
+import extract_screenshots
+from artifact_store import ArtifactBuffer, ImageArtifact
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import FakeReader, create_test_video
+from image_encoder import ImageEncoder, encode_image
+
+
+class TestImageArtifact(unittest.TestCase):
+    """ImageArtifact のテストケース"""
+
+    def test_base64_is_encoded_once(self):
+        """base64 文字列は最初の1回だけ作成し、以降は同じ文字列を返す"""
+        artifact = ImageArtifact(b'\x89PNG-data', 'image/png')
+        with patch.object(artifact_store.base64, 'b64encode',
+                          wraps=base64.b64encode) as b64encode:
+            first = artifact.image_block()
+            second = artifact.image_block()
+        self.assertEqual(b64encode.call_count, 1)
+        self.assertIs(first['source']['data'], second['source']['data'])
+        self.assertEqual(base64.b64decode(first['source']['data']), b'\x89PNG-data')
+        self.assertEqual(first['source']['media_type'], 'image/png')
+
+
+class TestArtifactBuffer(unittest.TestCase):
+    """ArtifactBuffer のテストケース"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_evicts_oldest_over_limit(self):
+        """合計が上限を超えたら古いものから削除する"""
+        buffer = ArtifactBuffer(max_bytes=10)
+        for name in ('a', 'b', 'c'):
+            buffer.put(self.test_dir / name, b'x' * 4, 'image/webp')
+
+        self.assertIsNone(buffer.get(self.test_dir / 'a'))
+        self.assertEqual(buffer.get(self.test_dir / 'c').media_type, 'image/webp')
+        self.assertEqual((len(buffer), buffer.total_bytes), (2, 8))
+
+    def test_disabled_and_oversized(self):
+        """上限0のバッファ・上限より大きい画像は保持しない"""
+        buffer = ArtifactBuffer(max_bytes=0)
+        buffer.put(self.test_dir / 'a', b'x', 'image/png')
+        self.assertEqual(len(buffer), 0)
+        buffer = ArtifactBuffer(max_bytes=3)
+        buffer.put(self.test_dir / 'a', b'xxxx', 'image/png')
+        self.assertEqual(len(buffer), 0)
+
+    def test_load_falls_back_to_file(self):
+        """バッファにない画像はファイルから読み込み、拡張子からメディアタイプを決める"""
+        path = self.test_dir / 'shot.jpg'
+        path.write_bytes(b'jpeg-data')
+        artifact = ArtifactBuffer(max_bytes=0).load(path)
+        self.assertEqual((artifact.data, artifact.media_type, artifact.source),
+                         (b'jpeg-data', 'image/jpeg', 'file'))
+
+    def test_encoder_keeps_only_requested_images(self):
+        """ImageEncoder は keep=True の画像だけ、書き出した内容と同じバイト列を保持する"""
+        image = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+        buffer = ArtifactBuffer()
+        encoder = ImageEncoder('webp', quality=80, workers=2, artifacts=buffer)
+        encoder.submit(image, self.test_dir / 'kept.webp', keep=True)
+        encoder.submit(image, self.test_dir / 'thumb.webp')
+        encoder.close()
+
+        kept = buffer.get(self.test_dir / 'kept.webp')
+        self.assertEqual(kept.data, (self.test_dir / 'kept.webp').read_bytes())
+        self.assertEqual(kept.data, encode_image(image, 'webp', 80))
+        self.assertEqual(kept.media_type, 'image/webp')
+        self.assertIsNone(buffer.get(self.test_dir / 'thumb.webp'))
+
+
+class TestGenerateArticleWithArtifacts(unittest.TestCase):
+    """AIContentGenerator.generate_article のバッファからの画像取得のテストケース"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.screenshots_dir = self.test_dir / "screenshots"
+        self.screenshots_dir.mkdir()
+        self.RateLimitError = type('RateLimitError', (Exception,), {})
+        self.anthropic = MagicMock()
+        self.anthropic.RateLimitError = self.RateLimitError
+        self.modules = patch.dict(sys.modules, {'anthropic': self.anthropic})
+        self.modules.start()
+
+    def tearDown(self):
+        self.modules.stop()
+        shutil.rmtree(self.test_dir)
+
+    def _generator(self, create: Mock):
+        self.anthropic.Anthropic.return_value.messages.create = create
+        return extract_screenshots.AIContentGenerator(output_dir=str(self.test_dir),
+                                                      api_key="test-key")
+
+    def test_reuses_buffered_images_across_retries(self):
+        """バッファの画像はファイルから読み込まず、リトライ時も base64 を作り直さない"""
+        image = np.full((60, 40, 3), 200, dtype=np.uint8)
+        buffer = ArtifactBuffer()
+        synchronized = []
+        for i in range(3):
+            path = self.screenshots_dir / f"{i + 1:02d}_00-0{i}_score80.webp"
+            data = encode_image(np.roll(image, i, axis=0), 'webp')
+            path.write_bytes(data)
+            buffer.put(path, data, 'image/webp')
+            synchronized.append({"screenshot": {"file_path": str(path)}, "transcript": None})
+        # バッファにないスクリーンショットはファイルから読み込む
+        fallback = self.screenshots_dir / "04_00-09_score70.png"
+        fallback.write_bytes(encode_image(image, 'png'))
+        synchronized.append({"screenshot": {"file_path": str(fallback)}, "transcript": None})
+
+        response = Mock()
+        response.content = [Mock(text="# 記事\n\n" + "説明です。" * 200)]
+        response.usage = Mock(input_tokens=1000, output_tokens=500)
+        create = Mock(side_effect=[self.RateLimitError("Rate limit exceeded"), response])
+        generator = self._generator(create)
+
+        with patch.object(artifact_store.base64, 'b64encode',
+                          wraps=base64.b64encode) as b64encode, \
+                patch.object(extract_screenshots.time, 'sleep'):
+            result = generator.generate_article(synchronized, app_name="テスト",
+                                                artifacts=buffer)
+
+        self.assertEqual(create.call_count, 2)
+        # 一様な画像を縦にずらした3枚の WebP は同じ内容なので、base64 は内容ごとに1回
+        self.assertEqual(b64encode.call_count, 2)
+        first, second = (call.kwargs['messages'][0]['content'] for call in create.call_args_list)
+        for block_first, block_second in zip(first[:4], second[:4]):
+            self.assertIs(block_first['source']['data'], block_second['source']['data'])
+        self.assertEqual([b['source']['media_type'] for b in first[:4]],
+                         ['image/webp'] * 3 + ['image/png'])
+
+        images = result["metadata"]["images"]
+        self.assertEqual([i['source'] for i in images], ['memory'] * 3 + ['file'])
+        self.assertEqual([i['media_type'] for i in images], ['image/webp'] * 3 + ['image/png'])
+        self.assertEqual(images[3]['size'], fallback.stat().st_size)
+
+
+class TestExtractWithArtifactBuffer(unittest.TestCase):
+    """ScreenshotExtractor の --artifact-buffer-mb のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi", screens=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _extract(self, name: str, **kwargs):
+        output_dir = Path(self.test_dir) / name
+        extractor = ScreenshotExtractor(str(self.video_path), str(output_dir),
+                                        transition_threshold=10, min_time_interval=0.5,
+                                        target_count=3, image_format='jpeg',
+                                        derivative_widths=[160], **kwargs)
+        with patch.object(extract_screenshots, 'get_ocr_reader',
+                          return_value=FakeReader(rich_mean=-1)):
+            return extractor, extractor.extract_screenshots(), output_dir
+
+    def test_keeps_saved_screenshots(self):
+        """保存したスクリーンショット（派生画像を除く）のバイト列を保持する"""
+        extractor, metadata, output_dir = self._extract("kept")
+        self.assertTrue(metadata)
+        self.assertEqual(len(extractor.artifacts), len(metadata))
+        for m in metadata:
+            path = output_dir / "screenshots" / m['filename']
+            artifact = extractor.artifacts.get(path)
+            self.assertEqual(artifact.data, path.read_bytes())
+            self.assertEqual(artifact.media_type, 'image/jpeg')
+            self.assertIsNotNone(cv2.imdecode(np.frombuffer(artifact.data, np.uint8),
+                                              cv2.IMREAD_COLOR))
+
+    def test_disabled(self):
+        """--artifact-buffer-mb 0 では保持しない"""
+        extractor, metadata, _ = self._extract("disabled", artifact_buffer_mb=0)
+        self.assertTrue(metadata)
+        self.assertEqual(len(extractor.artifacts), 0)
+
+    def test_cli_option(self):
+        """--artifact-buffer-mb の解析"""
+        parser = create_argument_parser()
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertEqual(args.artifact_buffer_mb, artifact_store.DEFAULT_ARTIFACT_BUFFER_MB)
+        args = parser.parse_args(['-i', 'video.mp4', '--artifact-buffer-mb', '0'])
+        self.assertEqual(args.artifact_buffer_mb, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+CandidateTable のユニットテスト
+
+テスト対象:
+- 候補の dict との可逆な変換（値・型・キーの有無、metadata.json の JSON 表現、行番号での取り出し）
+- 列単位のスコア計算・上界・絞り込み
+- スコア順の選択（従来の dict のリストによる選択との一致）
+"""
+
+import json
+import random
+import unittest
+
+import numpy as np
+
+from candidate_table import CandidateTable
+from extract_screenshots import ScreenshotExtractor
+
+
+def compute_final_score(transition_magnitude, stability_score, ui_importance_score):
+    """ScreenshotExtractor.compute_final_score と同じ式"""
+    return ScreenshotExtractor.compute_final_score(None, transition_magnitude, stability_score,
+                                                   ui_importance_score)
+
+
+def naive_select(candidates, target_count, min_interval):
+    """従来の dict のリストによる選択（比較用）"""
+    selected = []
+    for candidate in sorted(candidates, key=lambda x: x['score'], reverse=True):
+        if len(selected) >= target_count:
+            break
+        if all(abs(candidate['timestamp'] - s['timestamp']) >= min_interval for s in selected):
+            selected.append(candidate)
+    selected.sort(key=lambda x: x['timestamp'])
+    return selected
+
+
+def make_candidates(count: int, seed: int):
+    """評価済み・未評価が混在する合成候補"""
+    rng = random.Random(seed)
+    candidates = []
+    for i in range(count):
+        candidate = {
+            'frame_idx': i * 15,
+            'timestamp': round(i * 0.5 + rng.random() * 0.1, 3),
+            'transition_magnitude': rng.randint(10, 60),
+            'stability_score': rng.uniform(0, 100),
+            'frame_hash': rng.getrandbits(64),
+        }
+        if rng.random() < 0.5:
+            ui_score = float(rng.choice([0, 15, 35, 45]))
+            candidate.update({
+                'ui_importance_score': ui_score,
+                'score': compute_final_score(candidate['transition_magnitude'],
+                                             candidate['stability_score'], ui_score),
+                'ui_elements': [{'type': 'button', 'text': 'ホーム', 'confidence': 0.9,
+                                 'bbox': [[0, 0], [10, 0], [10, 5], [0, 5]]}],
+                'detected_texts': ['ホーム'],
+            })
+        else:
+            candidate['ui_importance_bound'] = float(rng.choice([35, 70, 115]))
+        candidates.append(candidate)
+    return candidates
+
+
+class TestCandidateTableConversion(unittest.TestCase):
+    """候補の dict との変換のテストケース"""
+
+    def test_round_trip_is_lossless(self):
+        """to_candidates() は元の dict と同じ値・型・キーを返す"""
+        candidates = make_candidates(200, seed=1)
+        restored = CandidateTable.from_candidates(candidates).to_candidates()
+
+        self.assertEqual(restored, candidates)
+        for original, copy in zip(candidates, restored):
+            self.assertEqual(set(copy), set(original))
+            for key, value in original.items():
+                self.assertIs(type(copy[key]), type(value), key)
+        self.assertEqual(json.dumps(restored, sort_keys=True, ensure_ascii=False),
+                         json.dumps(candidates, sort_keys=True, ensure_ascii=False))
+
+    def test_metadata_round_trip(self):
+        """metadata.json の項目も同じ JSON に戻る"""
+        metadata = [{'index': 1, 'filename': '01_00-15_score87.png', 'timestamp': 15.3,
+                     'score': 87.5, 'transition_magnitude': 35, 'stability_score': 95.2,
+                     'ui_importance_score': 30.0, 'ui_elements': [], 'detected_texts': ['ホーム']}]
+        restored = CandidateTable.from_candidates(metadata).to_candidates()
+        self.assertEqual(json.dumps(restored, sort_keys=True), json.dumps(metadata, sort_keys=True))
+
+    def test_row_access(self):
+        """行番号で取り出した dict・反復した dict は to_candidates() と同じ値・型"""
+        candidates = make_candidates(50, seed=3)
+        table = CandidateTable.from_candidates(candidates)
+
+        for row in (0, 17, np.int64(49)):
+            self.assertEqual(table[row], candidates[row])
+            for key, value in candidates[row].items():
+                self.assertIs(type(table[row][key]), type(value), key)
+        self.assertEqual(list(table), candidates)
+        with self.assertRaises(IndexError):
+            table[50]
+
+        # 列名なら列の値の配列
+        np.testing.assert_array_equal(table['timestamp'], [c['timestamp'] for c in candidates])
+
+    def test_empty(self):
+        """空のテーブル"""
+        table = CandidateTable.from_candidates([])
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.to_candidates(), [])
+        self.assertEqual(len(table.select_top(3, 15.0)), 0)
+
+
+class TestCandidateTableColumns(unittest.TestCase):
+    """列単位の計算のテストケース"""
+
+    def setUp(self):
+        self.candidates = make_candidates(300, seed=2)
+        self.table = CandidateTable.from_candidates(self.candidates)
+
+    def test_upper_bounds_match_per_candidate_scoring(self):
+        """上界は候補ごとに compute_final_score を呼んだ場合と同じ"""
+        expected = [c['score'] if 'score' in c else compute_final_score(
+            c['transition_magnitude'], c['stability_score'], c['ui_importance_bound'])
+            for c in self.candidates]
+        np.testing.assert_allclose(self.table.upper_bounds(compute_final_score), expected)
+
+    def test_filtering(self):
+        """真偽値のマスクで絞り込んだテーブルは対応する候補だけを持つ"""
+        evaluated = self.table[self.table.records['has_score']]
+        self.assertEqual(evaluated.to_candidates(),
+                         [c for c in self.candidates if 'score' in c])
+        self.assertFalse(np.isnan(evaluated.column('score')).any())
+
+
+class TestCandidateTableSelection(unittest.TestCase):
+    """select_top のテストケース"""
+
+    def test_matches_naive_selection(self):
+        """従来の dict のリストによる選択と同じ候補を選ぶ（同点・間隔0を含む）"""
+        rng = random.Random(3)
+        for _ in range(100):
+            candidates = [{'timestamp': float(rng.randint(0, 60)),
+                           'score': float(rng.randint(0, 10))}
+                          for _ in range(rng.randint(0, 40))]
+            target_count = rng.randint(1, 8)
+            interval = rng.choice([0.0, 3.0, 15.0])
+
+            table = CandidateTable.from_candidates(candidates)
+            rows = table.select_top(target_count, interval)
+            expected = naive_select(candidates, target_count, interval)
+            self.assertEqual([candidates[row] for row in rows.tolist()], expected)
+            self.assertEqual([id(candidates[row]) for row in rows.tolist()],
+                             [id(c) for c in expected])
+
+    def test_accept(self):
+        """accept が False の行は選ばず、次の候補を選ぶ"""
+        candidates = [{'timestamp': 0.0, 'score': 3.0}, {'timestamp': 20.0, 'score': 2.0},
+                      {'timestamp': 40.0, 'score': 1.0}]
+        rows = CandidateTable.from_candidates(candidates).select_top(
+            2, 15.0, accept=lambda row: row != 0)
+        self.assertEqual(rows.tolist(), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+"""
+チャンクに分けたAI記事生成（map-reduce）のユニットテスト
+
+テスト対象:
+- 画像の上限以下のチャンクへの均等な分割
+- チャンクごとの草稿の並行生成（並行数の上限と実時間）
+- テキストだけの統合リクエストと、統合した記事の品質検証
+- トークン・バイトの予算のチャンクへの分配
+- 並行する草稿のリクエストでの画像ブロックのキャッシュの共有
+- 失敗したチャンクのエラーの伝播
+- --ai-concurrency の解析
+"""
+
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+
+import extract_screenshots
+from extract_screenshots import split_into_chunks
+from image_encoder import encode_image
+from image_processor import ImageProcessor
+from test_token_budget import phone_screenshot
+
+
+# 草稿の生成にかかる時間（スタブのクライアント）
+DRAFT_LATENCY = 0.2
+
+
+class StubClient:
+    """草稿・統合のリクエストに応答し、同時に実行中のリクエスト数を記録するクライアント"""
+
+    def __init__(self, fail_chunk: int = None):
+        self.messages = self
+        self.fail_chunk = fail_chunk
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def create(self, **request):
+        with self.lock:
+            self.requests.append(request)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            content = request["messages"][0]["content"]
+            prompt = content[-1]["text"]
+            if any(block["type"] == "image" for block in content):
+                time.sleep(DRAFT_LATENCY)
+                match = re.search(r"パート(\d+)/", prompt)
+                part = int(match.group(1)) if match else 1
+                if part == self.fail_chunk:
+                    raise RuntimeError(f"chunk {part} failed")
+                names = re.findall(r"^- (\S+\.png)", prompt, flags=re.MULTILINE)
+                text = f"## パート{part}の機能\n\n" + "\n\n".join(
+                    f"この画面では便利な操作ができます。\n\n![画面](screenshots/{name})"
+                    for name in names)
+            else:
+                drafts = prompt.split("## 下書き", 1)[1].split("## タスク", 1)[0]
+                text = f"# テストアプリの紹介\n\n導入です。\n\n{drafts}\n\n## まとめ\n\n終わりです。"
+            response = Mock()
+            response.content = [Mock(text=text)]
+            response.usage = Mock(input_tokens=len(prompt), output_tokens=len(text))
+            return response
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class TestSplitIntoChunks(unittest.TestCase):
+    """split_into_chunks のテストケース"""
+
+    def test_balanced_chunks(self):
+        """順番を保ったまま上限以下のチャンクに均等に分割する"""
+        items = list(range(41))
+        chunks = split_into_chunks(items, 20)
+        self.assertEqual([len(c) for c in chunks], [14, 14, 13])
+        self.assertEqual([i for c in chunks for i in c], items)
+        self.assertEqual([len(c) for c in split_into_chunks(list(range(60)), 20)], [20, 20, 20])
+        self.assertEqual(split_into_chunks(list(range(5)), 20), [list(range(5))])
+        self.assertEqual(split_into_chunks([], 20), [])
+
+
+class TestGenerateArticleChunked(unittest.TestCase):
+    """AIContentGenerator のチャンクに分けた記事生成のテストケース"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        screenshots_dir = self.test_dir / "screenshots"
+        screenshots_dir.mkdir()
+        self.synchronized = []
+        for i in range(12):
+            path = screenshots_dir / f"{i + 1:02d}_00-{i:02d}_score80.png"
+            path.write_bytes(encode_image(np.full((64, 32, 3), i * 20, dtype=np.uint8), 'png'))
+            transcript = {"text": f"{i + 1}番目の画面の説明です。"} if i % 2 == 0 else None
+            self.synchronized.append({"screenshot": {"file_path": str(path)},
+                                      "transcript": transcript})
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _generator(self, client: StubClient, concurrency: int):
+        return extract_screenshots.AIContentGenerator(output_dir=str(self.test_dir),
+                                                      client=client, max_images_per_request=2,
+                                                      concurrency=concurrency)
+
+    def test_map_reduce(self):
+        """草稿を並行数の上限まで並行して生成し、テキストだけのリクエストで統合する"""
+        client = StubClient()
+        result = self._generator(client, concurrency=3).generate_article(
+            self.synchronized, app_name="テストアプリ")
+
+        draft_requests = client.requests[:-1]
+        reduce_request = client.requests[-1]
+        self.assertEqual(len(draft_requests), 6)
+        for request in draft_requests:
+            images = [b for b in request["messages"][0]["content"] if b["type"] == "image"]
+            self.assertEqual(len(images), 2)
+        self.assertEqual([b["type"] for b in reduce_request["messages"][0]["content"]], ["text"])
+        prompts = "".join(r["messages"][0]["content"][-1]["text"] for r in draft_requests)
+        self.assertIn("- 01_00-00_score80.png: 1番目の画面の説明です。", prompts)
+
+        # 実時間は チャンク数 / 並行数 回分（6チャンク・3並行なら2回分）
+        self.assertEqual(client.peak, 3)
+        metadata = result["metadata"]
+        self.assertEqual(metadata["timing"]["concurrency"], 3)
+        self.assertLess(metadata["timing"]["map_seconds"], DRAFT_LATENCY * 4.5)
+
+        # 統合した記事の品質検証
+        self.assertTrue(metadata["quality_valid"], metadata["quality_warnings"])
+        self.assertEqual(metadata["quality_metrics"]["image_count"], 12)
+        self.assertEqual(metadata["quality_metrics"]["h1_count"], 1)
+        self.assertEqual(metadata["generation_mode"], "map_reduce")
+        self.assertEqual(metadata["total_screenshots"], 12)
+        self.assertTrue(metadata["transcript_available"])
+        self.assertEqual([c["screenshots"] for c in metadata["chunks"]][0],
+                         ["01_00-00_score80.png", "02_00-01_score80.png"])
+        self.assertEqual(len(metadata["images"]), 12)
+        self.assertEqual(metadata["api_usage"]["input_tokens"],
+                         sum(len(r["messages"][0]["content"][-1]["text"])
+                             for r in client.requests))
+
+    def test_sequential_with_concurrency_one(self):
+        """並行数1では草稿を1件ずつ生成する"""
+        client = StubClient()
+        self._generator(client, concurrency=1).generate_article(self.synchronized[:6])
+        self.assertEqual(client.peak, 1)
+        self.assertEqual(len(client.requests), 4)
+
+    def test_single_request_within_limit(self):
+        """上限以下の枚数では従来どおり1回のリクエストで生成する"""
+        client = StubClient()
+        generator = extract_screenshots.AIContentGenerator(output_dir=str(self.test_dir),
+                                                           client=client)
+        result = generator.generate_article(self.synchronized)
+        self.assertEqual(len(client.requests), 1)
+        self.assertNotIn("generation_mode", result["metadata"])
+
+    def test_budget_is_split_across_chunks(self):
+        """予算は草稿のリクエスト全体の予算として、画像の枚数に比例してチャンクに分配する"""
+        for i, item in enumerate(self.synchronized):
+            Path(item["screenshot"]["file_path"]).write_bytes(
+                encode_image(phone_screenshot(i, size=(400, 800)), 'png'))
+        client = StubClient()
+        generator = extract_screenshots.AIContentGenerator(
+            output_dir=str(self.test_dir), client=client, max_images_per_request=5,
+            token_budget=3000, byte_budget=600 * 1024)
+        metadata = generator.generate_article(self.synchronized)["metadata"]
+
+        budget = metadata["budget"]
+        self.assertEqual([c["token_budget"] for c in budget["chunks"]], [1000, 1000, 1000])
+        self.assertEqual(sum(c["byte_budget"] for c in budget["chunks"]), 600 * 1024)
+        self.assertLessEqual(sum(c["predicted_input_tokens"] for c in metadata["chunks"]), 3000)
+        self.assertEqual(budget["image_bytes"], sum(i["size"] for i in metadata["images"]))
+        self.assertLessEqual(budget["image_bytes"], 600 * 1024)
+
+    def test_concurrent_chunks_share_image_cache(self):
+        """
+        並行する草稿のリクエストが同じ画像を含み、キャッシュの上限より画像が多くても
+        画像ブロックのキャッシュを安全に共有する
+        """
+        synchronized = self.synchronized * 4
+        client = StubClient()
+        generator = self._generator(client, concurrency=4)
+        generator.image_processor = ImageProcessor(cache_size=3)
+        metadata = generator.generate_article(synchronized)["metadata"]
+
+        processor = generator.image_processor
+        self.assertEqual(len(metadata["images"]), len(synchronized))
+        self.assertEqual(processor.cache_hits + processor.cache_misses, len(synchronized))
+        self.assertLessEqual(len(processor.cache), 3)
+        sent = [b["source"]["data"] for r in client.requests[:-1]
+                for b in r["messages"][0]["content"] if b["type"] == "image"]
+        self.assertEqual(sorted(Counter(sent).values()), [4] * 12)
+
+    def test_failed_chunk_propagates(self):
+        """草稿の生成に失敗したチャンクがあればエラーにし、統合は行わない"""
+        client = StubClient(fail_chunk=2)
+        with self.assertRaises(RuntimeError):
+            self._generator(client, concurrency=2).generate_article(self.synchronized)
+        for request in client.requests:
+            self.assertTrue(any(b["type"] == "image" for b in request["messages"][0]["content"]))
+
+    def test_cli_option(self):
+        """--ai-concurrency の解析"""
+        parser = extract_screenshots.create_argument_parser()
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertEqual(args.ai_concurrency, extract_screenshots.DEFAULT_AI_CONCURRENCY)
+        args = parser.parse_args(['-i', 'video.mp4', '--ai-concurrency', '8'])
+        self.assertEqual(args.ai_concurrency, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -454,6 +454,8 @@ class TestBackwardCompatibility(unittest.TestCase):
         # 検証: ScreenshotExtractorのみが呼ばれる
         mock_extractor.assert_called_once()
         mock_extractor_instance.extract_screenshots.assert_called_once()
+        # AI記事生成がない場合はエンコード済みの画像をメモリに保持しない
+        self.assertEqual(mock_extractor.call_args[1]['artifact_buffer_mb'], 0)
 
     def test_metadata_json_format_unchanged(self):
         """metadata.jsonフォーマットが変更されていないことを確認"""
@@ -531,6 +533,10 @@ class TestModelUpgradeEndToEnd(unittest.TestCase):
         mock_ai_gen.assert_called_once()
         call_kwargs = mock_ai_gen.call_args[1]
         self.assertEqual(call_kwargs['model'], 'claude-sonnet-4-5-20250929')
+        # AI記事生成へ受け渡すエンコード済みの画像を保持する
+        from artifact_store import DEFAULT_ARTIFACT_BUFFER_MB
+        self.assertEqual(mock_extractor.call_args[1]['artifact_buffer_mb'],
+                         DEFAULT_ARTIFACT_BUFFER_MB)
 
     @patch('extract_screenshots.AIContentGenerator')
     @patch('extract_screenshots.ScreenshotExtractor')
@@ -0,0 +1,141 @@
+"""
+Derivatives のユニットテスト
+
+テスト対象:
+- 幅のリストの解析
+- 解像度ピラミッド（1つ前の縮小画像からの縮小、拡大しないこと）
+- コンタクトシートの配置
+- ScreenshotExtractor の --derivative-widths / --contact-sheet（ファイルとメタデータ）
+"""
+
+import argparse
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+import extract_screenshots
+from derivatives import (build_contact_sheet, derivative_filename, parse_widths,
+                         resize_pyramid)
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import FakeReader, create_test_video
+
+
+class TestParseWidths(unittest.TestCase):
+    """parse_widths のテストケース"""
+
+    def test_parse(self):
+        """重複を除いて昇順に並べる"""
+        self.assertEqual(parse_widths('1280,320, 640,320'), [320, 640, 1280])
+
+    def test_invalid(self):
+        """整数でない・0以下の幅は ArgumentTypeError"""
+        for value in ('abc', '0,320', ''):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_widths(value)
+
+
+class TestResizePyramid(unittest.TestCase):
+    """resize_pyramid のテストケース"""
+
+    def test_each_level_is_made_from_the_previous_one(self):
+        """小さい幅は1つ前（大きい幅）の縮小画像から作る"""
+        frame = np.random.default_rng(0).integers(0, 256, (1440, 2560, 3), dtype=np.uint8)
+        levels = resize_pyramid(frame, [320, 1280, 640])
+
+        self.assertEqual({w: img.shape[:2] for w, img in levels.items()},
+                         {1280: (720, 1280), 640: (360, 640), 320: (180, 320)})
+        expected = cv2.resize(levels[640], (320, 180), interpolation=cv2.INTER_AREA)
+        np.testing.assert_array_equal(levels[320], expected)
+
+    def test_does_not_upscale(self):
+        """元のフレームの幅以上の幅は作らない"""
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        self.assertEqual(list(resize_pyramid(frame, [160, 320, 640])), [160])
+
+    def test_filename(self):
+        """派生画像のファイル名は幅の接尾辞つき"""
+        self.assertEqual(derivative_filename('01_00-15_score87.webp', 320),
+                         '01_00-15_score87_w320.webp')
+
+
+class TestContactSheet(unittest.TestCase):
+    """build_contact_sheet のテストケース"""
+
+    def test_layout(self):
+        """列数ごとに折り返して並べ、各画像の位置を返す"""
+        thumbnails = [np.full((60, 40, 3), i * 40, dtype=np.uint8) for i in range(5)]
+        sheet, cells = build_contact_sheet(thumbnails, columns=2, padding=4)
+
+        self.assertEqual(sheet.shape, (4 + 3 * 64, 4 + 2 * 44, 3))
+        self.assertEqual(cells[0], (4, 4, 40, 60))
+        self.assertEqual(cells[3], (48, 68, 40, 60))
+        for thumbnail, (x, y, width, height) in zip(thumbnails, cells):
+            np.testing.assert_array_equal(sheet[y:y + height, x:x + width], thumbnail)
+
+    def test_empty(self):
+        """縮小画像がない場合は ValueError"""
+        with self.assertRaises(ValueError):
+            build_contact_sheet([])
+
+
+class TestExtractWithDerivatives(unittest.TestCase):
+    """ScreenshotExtractor の --derivative-widths / --contact-sheet のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi", screens=4,
+                                            size=(640, 480))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_derivatives_and_contact_sheet_in_metadata(self):
+        """派生画像とコンタクトシートのパス・サイズ・位置を metadata.json に記録する"""
+        output_dir = Path(self.test_dir) / "output"
+        extractor = ScreenshotExtractor(str(self.video_path), str(output_dir),
+                                        transition_threshold=10, min_time_interval=0.5,
+                                        target_count=3, image_format='webp',
+                                        derivative_widths=[160, 320, 1280], contact_sheet=True)
+        with patch.object(extract_screenshots, 'get_ocr_reader',
+                          return_value=FakeReader(rich_mean=-1)):
+            metadata = extractor.extract_screenshots()
+
+        self.assertTrue(metadata)
+        sheet_path = output_dir / metadata[0]['contact_sheet']['path']
+        sheet = cv2.imread(str(sheet_path))
+        self.assertIsNotNone(sheet)
+        for m in metadata:
+            # 元のフレーム（640px）以上の 1280px は作らない
+            self.assertEqual([d['width'] for d in m['derivatives']], [160, 320])
+            for derivative in m['derivatives']:
+                path = output_dir / derivative['path']
+                self.assertTrue(path.name.endswith(f"_w{derivative['width']}.webp"))
+                self.assertEqual(derivative['file_size'], path.stat().st_size)
+                image = cv2.imread(str(path))
+                self.assertEqual(image.shape[:2], (derivative['height'], derivative['width']))
+
+            cell = m['contact_sheet']
+            self.assertEqual(cell['file_size'], sheet_path.stat().st_size)
+            self.assertEqual((cell['width'], cell['height']), (320, 240))
+            self.assertLessEqual(cell['x'] + cell['width'], sheet.shape[1])
+            self.assertLessEqual(cell['y'] + cell['height'], sheet.shape[0])
+
+    def test_cli_options(self):
+        """--derivative-widths / --contact-sheet の解析"""
+        parser = create_argument_parser()
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertIsNone(args.derivative_widths)
+        self.assertFalse(args.contact_sheet)
+        args = parser.parse_args(['-i', 'video.mp4', '--derivative-widths', '320,640,1280',
+                                  '--contact-sheet'])
+        self.assertEqual(args.derivative_widths, [320, 640, 1280])
+        self.assertTrue(args.contact_sheet)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+"""
+DiversityIndex のユニットテスト
+
+テスト対象:
+- BK-tree の半径内の最近傍検索（全件比較との一致、比較回数の削減）
+- 重複の除外と除外した候補の記録（DiversityFilter）
+- 貪欲法・最適化の選択での重複の除外
+- ScreenshotExtractor の --diversity-radius（同じ画面に戻る動画）
+"""
+
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import extract_screenshots
+from diversity_index import BKTree, DiversityFilter, duplicate_positions, hamming_distance
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import FakeReader, create_test_video
+from interval_selection import select_optimal_lazily
+from lazy_selection import select_top_lazily
+
+
+def near_hash(rng: random.Random, base: int, flips: int) -> int:
+    """base から flips ビットを反転したハッシュ"""
+    for bit in rng.sample(range(64), flips):
+        base ^= 1 << bit
+    return base
+
+
+class TestBKTree(unittest.TestCase):
+    """BKTree のテストケース"""
+
+    def test_matches_linear_scan(self):
+        """半径内の最近傍（同じ距離なら先に登録した値）が全件比較と一致する"""
+        rng = random.Random(1)
+        centers = [rng.getrandbits(64) for _ in range(20)]
+        hashes = [near_hash(rng, rng.choice(centers), rng.randint(0, 12)) for _ in range(300)]
+        tree = BKTree()
+        for i, hash_value in enumerate(hashes):
+            tree.add(hash_value, i)
+
+        for _ in range(200):
+            query = near_hash(rng, rng.choice(centers), rng.randint(0, 12))
+            radius = rng.choice([0, 4, 8, 16])
+            within = [(hamming_distance(query, h), i) for i, h in enumerate(hashes)
+                      if hamming_distance(query, h) <= radius]
+            self.assertEqual(tree.nearest(query, radius), min(within) if within else None)
+        self.assertEqual(len(tree), 300)
+
+    def test_small_radius_prunes(self):
+        """小さい半径の検索は全件とは比較しない"""
+        rng = random.Random(2)
+        tree = BKTree()
+        for i in range(2000):
+            tree.add(rng.getrandbits(64), i)
+
+        tree.comparisons = 0
+        for _ in range(100):
+            tree.nearest(rng.getrandbits(64), 4)
+        self.assertLess(tree.comparisons / 100, len(tree) / 4)
+
+    def test_empty(self):
+        """空の木の検索は None"""
+        self.assertIsNone(BKTree().nearest(0, 64))
+
+
+class TestDiversityFilter(unittest.TestCase):
+    """DiversityFilter のテストケース"""
+
+    def test_rejects_and_records_duplicates(self):
+        """半径内の候補を除外し、重複先の候補に記録する"""
+        diversity = DiversityFilter(4)
+        kept = {'timestamp': 1.0, 'score': 90.0, 'frame_hash': 0b1111}
+        duplicate = {'timestamp': 30.0, 'score': 80.0, 'frame_hash': 0b0111}
+        distinct = {'timestamp': 60.0, 'score': 70.0, 'frame_hash': (1 << 64) - 1}
+
+        self.assertTrue(diversity.accept(kept))
+        self.assertFalse(diversity.accept(duplicate))
+        self.assertTrue(diversity.accept(distinct))
+
+        self.assertEqual(kept['duplicates'],
+                         [{'timestamp': 30.0, 'score': 80.0, 'hamming_distance': 1}])
+        self.assertEqual(distinct['duplicates'], [])
+        self.assertEqual(diversity.rejected, 1)
+
+    def test_candidates_without_hash_are_accepted(self):
+        """'frame_hash' がない候補は重複判定しない"""
+        diversity = DiversityFilter(64)
+        self.assertTrue(diversity.accept({'timestamp': 0.0}))
+        self.assertTrue(diversity.accept({'timestamp': 1.0}))
+
+    def test_duplicate_positions_keep_higher_score(self):
+        """解の中ではスコアの高い候補を残す"""
+        selected = [{'timestamp': 0.0, 'score': 50.0, 'frame_hash': 0},
+                    {'timestamp': 20.0, 'score': 90.0, 'frame_hash': 1},
+                    {'timestamp': 40.0, 'score': 70.0,
+                     'frame_hash': 1 << 40 | 1 << 50 | 1 << 60}]
+        self.assertEqual(duplicate_positions(selected, 3), [0])
+
+
+class TestDiverseSelection(unittest.TestCase):
+    """選択処理での重複の除外のテストケース"""
+
+    def setUp(self):
+        # A(0s), B(20s), A'(40s), C(60s)。A と A' は見た目が重複する
+        self.candidates = [
+            {'timestamp': 0.0, 'exact': 90.0, 'frame_hash': 0},
+            {'timestamp': 20.0, 'exact': 50.0, 'frame_hash': (1 << 64) - 1},
+            {'timestamp': 40.0, 'exact': 85.0, 'frame_hash': 0b11},
+            {'timestamp': 60.0, 'exact': 40.0, 'frame_hash': 0xFFFF0000},
+        ]
+        self.bounds = [c['exact'] + 10 for c in self.candidates]
+
+    @staticmethod
+    def evaluate_batch(batch):
+        return [dict(c, score=c['exact']) for c in batch]
+
+    def test_greedy_accept(self):
+        """貪欲法は重複を飛ばして次の候補を選ぶ"""
+        diversity = DiversityFilter(4)
+        selected = select_top_lazily(self.candidates, self.bounds, None, 3, 15.0,
+                                     evaluate_batch=self.evaluate_batch,
+                                     accept=diversity.accept)
+        self.assertEqual([c['timestamp'] for c in selected], [0.0, 20.0, 60.0])
+        self.assertEqual(selected[0]['duplicates'][0]['timestamp'], 40.0)
+
+    def test_optimal_exclude(self):
+        """最適化は重複する候補を除外して解き直す"""
+        def exclude(solution):
+            return duplicate_positions(solution, 4)
+
+        selected = select_optimal_lazily(self.candidates, self.bounds, self.evaluate_batch,
+                                         3, 15.0, exclude=exclude)
+        self.assertEqual([c['timestamp'] for c in selected], [0.0, 20.0, 60.0])
+
+    def test_extractor_select_top_screenshots(self):
+        """select_top_screenshots は greedy・optimal とも重複を除外して記録する"""
+        candidates = [dict(c, score=c['exact']) for c in self.candidates]
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        for selection in ('greedy', 'optimal'):
+            with self.subTest(selection=selection):
+                extractor = ScreenshotExtractor('', output_dir, target_count=3,
+                                                selection=selection, diversity_radius=4)
+                selected = extractor.select_top_screenshots([dict(c) for c in candidates])
+                self.assertEqual([c['timestamp'] for c in selected], [0.0, 20.0, 60.0])
+                self.assertEqual([d['timestamp'] for d in selected[0]['duplicates']], [40.0])
+                self.assertEqual(extractor.diversity_rejected, 1)
+
+
+class TestExtractWithDiversity(unittest.TestCase):
+    """ScreenshotExtractor の --diversity-radius のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        # 同じ画面に何度か戻る（A → B → A → B → A → B、各3秒）
+        self.video_path = create_test_video(Path(self.test_dir) / "revisit.avi", seed=5,
+                                            timeline=[(name, 30) for name in "ABABAB"])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _extract(self, name: str, **kwargs):
+        extractor = ScreenshotExtractor(str(self.video_path), str(Path(self.test_dir) / name),
+                                        transition_threshold=10, min_time_interval=1.0,
+                                        target_count=6, **kwargs)
+        with patch.object(extract_screenshots, 'get_ocr_reader',
+                          return_value=FakeReader(rich_mean=-1)):
+            return extractor.extract_screenshots()
+
+    def test_revisited_screens_are_selected_once(self):
+        """同じ画面に戻った候補は1枚だけ選ばれ、残りは duplicates に記録される"""
+        baseline = self._extract("baseline")
+        for selection in ('greedy', 'optimal'):
+            with self.subTest(selection=selection):
+                metadata = self._extract(selection, selection=selection, diversity_radius=6)
+
+                self.assertLess(len(metadata), len(baseline))
+                self.assertLessEqual(len(metadata), 2)
+                recorded = sum(len(m['duplicates']) for m in metadata)
+                self.assertEqual(len(metadata) + recorded, len(baseline))
+                for m in metadata:
+                    for duplicate in m['duplicates']:
+                        self.assertLessEqual(duplicate['hamming_distance'], 6)
+
+    def test_metadata_unchanged_without_option(self):
+        """--diversity-radius を指定しない場合は duplicates を出力しない"""
+        for m in self._extract("default"):
+            self.assertNotIn('duplicates', m)
+
+    def test_cli_option(self):
+        """--diversity-radius の解析"""
+        parser = create_argument_parser()
+        self.assertIsNone(parser.parse_args(['-i', 'video.mp4']).diversity_radius)
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4', '--diversity-radius', '8'])
+                         .diversity_radius, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
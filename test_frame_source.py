@@ -0,0 +1,243 @@
+"""
+FrameSource のユニットテスト
+
+テスト対象:
+- OpenCV バックエンドの grab() による間引きとターゲットデコード
+- ffmpeg バックエンドのコマンド構築と rawvideo パイプの読み取り
+- PyAV バックエンド（インストールされている場合のみ）
+- バックエンド生成関数
+"""
+
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from fixtures import create_test_video
+from frame_source import (
+    FFmpegFrameSource,
+    OpenCVFrameSource,
+    PyAVFrameSource,
+    create_frame_source,
+)
+
+try:
+    import av  # noqa: F401
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
+
+class TestOpenCVFrameSource(unittest.TestCase):
+    """OpenCVFrameSource のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_open_reads_video_info(self):
+        """open()で動画情報を取得できる"""
+        source = OpenCVFrameSource(str(self.video_path), (160, 120))
+        self.assertTrue(source.open())
+        try:
+            self.assertEqual(source.fps, 10)
+            self.assertEqual(source.total_frames, 90)
+            self.assertEqual((source.width, source.height), (320, 240))
+        finally:
+            source.close()
+
+    def test_open_missing_file_returns_false(self):
+        """存在しない動画はFalseを返す"""
+        source = OpenCVFrameSource(str(Path(self.test_dir) / "missing.avi"))
+        self.assertFalse(source.open())
+
+    def test_iter_frames_yields_sampled_indices_at_process_size(self):
+        """stepごとのフレームが処理用解像度で返される"""
+        with OpenCVFrameSource(str(self.video_path), (160, 120)) as source:
+            frames = list(source.iter_frames(step=5))
+
+        self.assertEqual([idx for idx, _ in frames], list(range(0, 90, 5)))
+        for _, frame in frames:
+            self.assertEqual(frame.shape, (120, 160, 3))
+
+    def test_iter_frames_retrieves_only_sampled_frames(self):
+        """間引いたフレームはretrieve()されない（grab()のみ）"""
+        with OpenCVFrameSource(str(self.video_path), (160, 120)) as source:
+            original_retrieve = source.cap.retrieve
+            source.cap = MagicMock(wraps=source.cap)
+            source.cap.retrieve.side_effect = original_retrieve
+
+            frames = list(source.iter_frames(step=10))
+
+            self.assertEqual(len(frames), 9)
+            self.assertEqual(source.cap.grab.call_count, 90)
+            self.assertEqual(source.cap.retrieve.call_count, 9)
+
+    def test_iter_frames_respects_start_and_end(self):
+        """start/endで範囲を指定できる"""
+        with OpenCVFrameSource(str(self.video_path), (160, 120)) as source:
+            indices = [idx for idx, _ in source.iter_frames(step=5, start=30, end=60)]
+
+        self.assertEqual(indices, [30, 35, 40, 45, 50, 55])
+
+    def test_read_frame_matches_sequential_decode(self):
+        """read_frame()は逐次デコードと同じフレームを返す"""
+        with OpenCVFrameSource(str(self.video_path), (160, 120)) as source:
+            sequential = dict(source.iter_frames(step=1))
+            frame = source.read_frame(45)
+
+        np.testing.assert_array_equal(frame, sequential[45])
+
+
+class TestFFmpegFrameSource(unittest.TestCase):
+    """FFmpegFrameSource のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_unsupported_pixel_format_raises(self):
+        """未対応のピクセルフォーマットはValueError"""
+        with self.assertRaises(ValueError):
+            FFmpegFrameSource(str(self.video_path), pixel_format='yuv420p')
+
+    def test_open_without_ffmpeg_returns_false(self):
+        """ffmpegが見つからない場合はFalseを返す"""
+        with patch('frame_source.shutil.which', return_value=None):
+            source = FFmpegFrameSource(str(self.video_path))
+        self.assertFalse(source.open())
+
+    def test_build_command_samples_and_scales_in_ffmpeg(self):
+        """サンプリングと縮小をffmpegのフィルタで行う"""
+        source = FFmpegFrameSource(str(self.video_path), (160, 120), ffmpeg_path='ffmpeg')
+        source.open()
+        command = source.build_command(step=5, start=30, count=6)
+
+        self.assertIn('-ss', command)
+        self.assertEqual(command[command.index('-ss') + 1], '3.000000')
+        vf = command[command.index('-vf') + 1]
+        self.assertIn('select=not(mod(n\\,5))', vf)
+        self.assertIn('scale=160:120', vf)
+        self.assertEqual(command[command.index('-pix_fmt') + 1], 'gray')
+        self.assertEqual(command[command.index('-frames:v') + 1], '6')
+
+    @patch('frame_source.subprocess.Popen')
+    def test_iter_frames_reads_rawvideo_pipe(self, mock_popen):
+        """rawvideoパイプからフレームを切り出す"""
+        frames = [np.full((120, 160), value, dtype=np.uint8) for value in (10, 20, 30)]
+        process = MagicMock()
+        process.stdout = io.BytesIO(b''.join(f.tobytes() for f in frames))
+        process.poll.return_value = 0
+        mock_popen.return_value = process
+
+        source = FFmpegFrameSource(str(self.video_path), (160, 120), ffmpeg_path='ffmpeg')
+        source.open()
+        result = list(source.iter_frames(step=30))
+
+        self.assertEqual([idx for idx, _ in result], [0, 30, 60])
+        self.assertEqual(result[1][1].shape, (120, 160))
+        self.assertEqual(int(result[2][1][0, 0]), 30)
+
+    @patch('frame_source.subprocess.Popen')
+    def test_read_frame_reuses_block(self, mock_popen):
+        """ターゲットデコードは前後のブロックを1プロセスで読み込み、ブロック内では再起動しない"""
+        def start_process(command, **kwargs):
+            start = round(float(command[command.index('-ss') + 1]) * 10) if '-ss' in command else 0
+            count = int(command[command.index('-frames:v') + 1])
+            process = MagicMock()
+            process.stdout = io.BytesIO(b''.join(
+                np.full((120, 160), start + i, dtype=np.uint8).tobytes() for i in range(count)))
+            process.poll.return_value = 0
+            return process
+        mock_popen.side_effect = start_process
+
+        source = FFmpegFrameSource(str(self.video_path), (160, 120), ffmpeg_path='ffmpeg')
+        source.open()
+        values = [int(source.read_frame(idx)[0, 0]) for idx in (45, 38, 52, 33)]
+
+        self.assertEqual(values, [45, 38, 52, 33])
+        self.assertEqual(source.processes_started, 1)
+        self.assertEqual(int(source.read_frame(80)[0, 0]), 80)
+        self.assertEqual(source.processes_started, 2)
+        self.assertIsNone(source.read_frame(95))
+
+    @unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg is not installed")
+    def test_iter_frames_with_real_ffmpeg(self):
+        """実際のffmpegでサンプリング済みフレームを取得できる"""
+        with FFmpegFrameSource(str(self.video_path), (160, 120)) as source:
+            indices = [idx for idx, _ in source.iter_frames(step=5)]
+
+        self.assertEqual(indices, list(range(0, 90, 5)))
+
+
+@unittest.skipUnless(PYAV_AVAILABLE, "PyAV is not installed")
+class TestPyAVFrameSource(unittest.TestCase):
+    """PyAVFrameSource のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_iter_frames_yields_sampled_indices(self):
+        """stepごとのフレームがBGR・処理用解像度で返される"""
+        with PyAVFrameSource(str(self.video_path), (160, 120)) as source:
+            frames = list(source.iter_frames(step=5))
+
+        self.assertEqual([idx for idx, _ in frames], list(range(0, 90, 5)))
+        self.assertEqual(frames[0][1].shape, (120, 160, 3))
+
+    def test_frames_match_opencv_backend(self):
+        """縮小は opencv バックエンドと同じで、フレームはビット単位で一致する"""
+        with OpenCVFrameSource(str(self.video_path), (160, 120)) as source:
+            expected = dict(source.iter_frames(step=10))
+        with PyAVFrameSource(str(self.video_path), (160, 120)) as source:
+            frames = dict(source.iter_frames(step=10))
+
+        self.assertEqual(frames.keys(), expected.keys())
+        for frame_idx, frame in frames.items():
+            np.testing.assert_array_equal(frame, expected[frame_idx])
+
+    def test_read_frame_seeks_to_keyframe(self):
+        """ターゲットデコード・途中からの読み込みは先頭からデコードしない"""
+        with PyAVFrameSource(str(self.video_path), (160, 120)) as source:
+            sequential = dict(source.iter_frames(step=1))
+            source.decoded_frames = 0
+            frame = source.read_frame(75)
+            self.assertLess(source.decoded_frames, 75)
+            np.testing.assert_array_equal(frame, sequential[75])
+
+            source.decoded_frames = 0
+            indices = [idx for idx, _ in source.iter_frames(step=5, start=60, end=80)]
+            self.assertEqual(indices, [60, 65, 70, 75])
+            self.assertLess(source.decoded_frames, 60)
+
+
+class TestCreateFrameSource(unittest.TestCase):
+    """create_frame_source のテストケース"""
+
+    def test_creates_backend_by_name(self):
+        """バックエンド名に対応するクラスを返す"""
+        self.assertIsInstance(create_frame_source('opencv', 'video.mp4'), OpenCVFrameSource)
+        self.assertIsInstance(create_frame_source('ffmpeg', 'video.mp4'), FFmpegFrameSource)
+
+    def test_unknown_backend_raises(self):
+        """不明なバックエンド名はValueError"""
+        with self.assertRaises(ValueError):
+            create_frame_source('gstreamer', 'video.mp4')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+"""
+FrameStore のユニットテスト
+
+テスト対象:
+- テキスト領域を含む範囲のグレースケール画像の可逆圧縮（pack/unpack_text_regions）
+- 選択フレームの前方パスでの読み直し（fetch_frames、不正確なシークの照合と前方デコード）
+- フル解像度フレームの LRU
+- ScreenshotExtractor の候補がフレームを保持しないこと、保存画像が従来と同じこと
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+import extract_screenshots
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import FakeReader, create_test_video
+from frame_store import (GREY_CROP_MARGIN, FrameLRU, fetch_frames, pack_text_regions,
+                         text_bounds, unpack_text_regions)
+from lazy_selection import select_top_lazily
+
+
+def draw_frame_number(frame: np.ndarray, offset: int, previous) -> np.ndarray:
+    """フレームごとに内容が異なる（フレーム番号を描画した）フレーム"""
+    frame[:] = (offset * 2) % 256
+    cv2.putText(frame, str(offset), (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
+    return frame
+
+
+class TestPackTextRegions(unittest.TestCase):
+    """pack_text_regions / unpack_text_regions のテストケース"""
+
+    def test_round_trip_keeps_text_regions(self):
+        """テキスト領域を含む範囲だけを圧縮し、その範囲は元と同じ画素値に戻る"""
+        grey = cv2.resize(np.random.default_rng(0).integers(0, 256, (12, 16), dtype=np.uint8),
+                          (640, 480), interpolation=cv2.INTER_NEAREST)
+        regions = {'grey': grey, 'horizontal_list': [[100, 200, 40, 60]],
+                   'free_list': [[[300, 100], [340, 100], [340, 120], [300, 120]]],
+                   'scale': 1.0}
+
+        packed = pack_text_regions(regions)
+        self.assertNotIn('grey', packed)
+        self.assertEqual(packed['grey_offset'], (100 - GREY_CROP_MARGIN, 40 - GREY_CROP_MARGIN))
+        full_png = cv2.imencode('.png', grey, [cv2.IMWRITE_PNG_COMPRESSION, 1])[1]
+        self.assertLess(len(packed['grey_png']), len(full_png) // 4)
+
+        unpacked = unpack_text_regions(packed)
+        self.assertEqual(unpacked['grey'].shape, grey.shape)
+        x0, y0, x1, y1 = text_bounds(regions, grey.shape)
+        np.testing.assert_array_equal(unpacked['grey'][y0:y1, x0:x1], grey[y0:y1, x0:x1])
+        self.assertEqual(int(unpacked['grey'][400:, :].max()), 0)
+        self.assertEqual(unpacked['horizontal_list'], regions['horizontal_list'])
+        self.assertIs(unpack_text_regions(regions), regions)
+
+    def test_no_regions_keeps_no_pixels(self):
+        """テキスト領域がなければ画素を保持しない"""
+        grey = np.full((48, 64), 200, dtype=np.uint8)
+        packed = pack_text_regions({'grey': grey, 'horizontal_list': [], 'free_list': []})
+
+        self.assertEqual(packed['grey_png'], b'')
+        np.testing.assert_array_equal(unpack_text_regions(packed)['grey'], np.zeros_like(grey))
+
+
+class ImpreciseSeekCapture:
+    """CAP_PROP_POS_FRAMES でのシークが offset フレーム先に着く VideoCapture（長いGOPの再現）"""
+
+    def __init__(self, cap: cv2.VideoCapture, offset: int) -> None:
+        self.cap = cap
+        self.offset = offset
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop == cv2.CAP_PROP_POS_FRAMES and value > 0:
+            value += self.offset
+        return self.cap.set(prop, value)
+
+    def grab(self) -> bool:
+        return self.cap.grab()
+
+    def read(self):
+        return self.cap.read()
+
+
+class TestFetchFrames(unittest.TestCase):
+    """fetch_frames のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "counter.avi",
+                                            size=(160, 120), timeline=[(0, 120)],
+                                            render=draw_frame_number)
+        cap = cv2.VideoCapture(str(self.video_path))
+        self.expected = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            self.expected.append(frame)
+        cap.release()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_matches_sequential_decode(self):
+        """順不同・重複・離れたフレーム番号でも逐次デコードと同じフレームを返す"""
+        indices = [90, 3, 5, 5, 4, 70, 119, 30]
+        cap = cv2.VideoCapture(str(self.video_path))
+        try:
+            frames = fetch_frames(cap, indices, grab_limit=8)
+        finally:
+            cap.release()
+
+        self.assertEqual(sorted(frames), sorted(set(indices)))
+        for frame_idx, frame in frames.items():
+            np.testing.assert_array_equal(frame, self.expected[frame_idx])
+
+    def test_verify_falls_back_to_forward_decode(self):
+        """シークで別のフレームに着いた場合は照合で検出し、前方デコードで正しいフレームを返す"""
+        indices = [5, 60, 100]
+
+        def verify(frame_idx, frame):
+            return np.array_equal(frame, self.expected[frame_idx])
+
+        cap = cv2.VideoCapture(str(self.video_path))
+        try:
+            unverified = fetch_frames(ImpreciseSeekCapture(cap, 3), indices, grab_limit=8)
+            frames = fetch_frames(ImpreciseSeekCapture(cap, 3), indices, grab_limit=8,
+                                  verify=verify)
+        finally:
+            cap.release()
+
+        self.assertFalse(verify(60, unverified[60]))
+        self.assertEqual(sorted(frames), indices)
+        for frame_idx, frame in frames.items():
+            np.testing.assert_array_equal(frame, self.expected[frame_idx])
+
+    def test_out_of_range_frames_are_skipped(self):
+        """動画の終端より後のフレームは結果に含めない"""
+        cap = cv2.VideoCapture(str(self.video_path))
+        try:
+            frames = fetch_frames(cap, [10, 500])
+        finally:
+            cap.release()
+        self.assertEqual(list(frames), [10])
+
+
+class TestFrameLRU(unittest.TestCase):
+    """FrameLRU のテストケース"""
+
+    def test_evicts_least_recently_used(self):
+        """上限を超えると最も古く使われたフレームを削除する"""
+        lru = FrameLRU(2)
+        lru.put(1, np.zeros(1))
+        lru.put(2, np.zeros(1))
+        self.assertIsNotNone(lru.get(1))
+        lru.put(3, np.zeros(1))
+
+        self.assertIsNone(lru.get(2))
+        self.assertIsNotNone(lru.get(1))
+        self.assertEqual(len(lru), 2)
+
+    def test_zero_capacity_keeps_nothing(self):
+        """上限0では何も保持しない"""
+        lru = FrameLRU(0)
+        lru.put(1, np.zeros(1))
+        self.assertEqual(len(lru), 0)
+
+
+class TestBoundedCandidates(unittest.TestCase):
+    """ScreenshotExtractor の候補のメモリ使用量のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi", screens=5)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _extract(self, name: str, **kwargs):
+        extractor = ScreenshotExtractor(str(self.video_path), str(Path(self.test_dir) / name),
+                                        transition_threshold=10, min_time_interval=0.5,
+                                        target_count=3, **kwargs)
+        selection = patch.object(extract_screenshots, 'select_top_lazily',
+                                 wraps=select_top_lazily)
+        with patch.object(extract_screenshots, 'get_ocr_reader',
+                          return_value=FakeReader(rich_mean=-1)), selection as selector:
+            metadata = extractor.extract_screenshots()
+        return extractor, selector.call_args[0][0], metadata
+
+    def test_candidates_do_not_hold_frames(self):
+        """候補はフル解像度フレームを保持せず、保存時に選択フレームだけを読み直す"""
+        extractor, candidates, metadata = self._extract("lazy")
+
+        self.assertTrue(candidates)
+        for candidate in candidates:
+            self.assertNotIn('frame', candidate)
+            self.assertIn('frame_hash', candidate)
+            if 'text_regions' in candidate:
+                self.assertIn('grey_png', candidate['text_regions'])
+        self.assertEqual(extractor.refetched_frames, len(metadata))
+
+    def test_saved_images_match_in_memory_frames(self):
+        """読み直したフレームで保存した画像は、メモリに保持したフレームの画像と同じ"""
+        cached, _, expected = self._extract("cached", frame_cache_size=100)
+        _, _, metadata = self._extract("lazy")
+
+        self.assertEqual(cached.refetched_frames, 0)
+        self.assertEqual([m['timestamp'] for m in metadata], [m['timestamp'] for m in expected])
+        for saved, reference in zip(metadata, expected):
+            image = cv2.imread(str(Path(self.test_dir) / "lazy" / "screenshots" / saved['filename']))
+            expected_image = cv2.imread(
+                str(Path(self.test_dir) / "cached" / "screenshots" / reference['filename']))
+            np.testing.assert_array_equal(image, expected_image)
+
+    def test_cli_option(self):
+        """--frame-cache-size の解析"""
+        parser = create_argument_parser()
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4']).frame_cache_size, 0)
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4', '--frame-cache-size', '8'])
+                         .frame_cache_size, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
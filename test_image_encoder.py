@@ -0,0 +1,157 @@
+"""
+ImageEncoder のユニットテスト
+
+テスト対象:
+- 形式ごとのエンコード（png は可逆、webp・jpeg は品質の指定）
+- 拡張子からのメディアタイプ
+- スレッドプールでの書き出しと、書き出したバイト数・実時間の集計
+- ScreenshotExtractor の --image-format（ファイル名・メタデータ）
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+import extract_screenshots
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import FakeReader, create_test_video
+from image_encoder import ImageEncoder, encode_image, get_image_format, media_type_for
+
+
+def screen_image() -> np.ndarray:
+    """写真（グラデーションとノイズ）と文字のある画面録画らしい画像"""
+    rng = np.random.default_rng(0)
+    photo = cv2.resize(rng.integers(0, 256, (24, 16, 3), dtype=np.uint8), (360, 640),
+                       interpolation=cv2.INTER_CUBIC)
+    image = np.clip(photo + rng.normal(0, 6, photo.shape), 0, 255).astype(np.uint8)
+    cv2.putText(image, "Settings", (20, 300), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
+    return image
+
+
+class TestEncodeImage(unittest.TestCase):
+    """encode_image のテストケース"""
+
+    def test_png_is_lossless(self):
+        """png は元と同じ画素値に戻る"""
+        image = screen_image()
+        decoded = cv2.imdecode(np.frombuffer(encode_image(image, 'png'), np.uint8),
+                               cv2.IMREAD_COLOR)
+        np.testing.assert_array_equal(decoded, image)
+
+    def test_lossy_formats_are_smaller(self):
+        """webp・jpeg は png より小さく、品質を下げるとさらに小さい"""
+        image = screen_image()
+        png_size = len(encode_image(image, 'png'))
+        for image_format in ('webp', 'jpeg'):
+            with self.subTest(image_format=image_format):
+                high = encode_image(image, image_format, 95)
+                low = encode_image(image, image_format, 30)
+                self.assertLess(len(high), png_size)
+                self.assertLess(len(low), len(high))
+                decoded = cv2.imdecode(np.frombuffer(high, np.uint8), cv2.IMREAD_COLOR)
+                self.assertEqual(decoded.shape, image.shape)
+
+    def test_unknown_format(self):
+        """未知の形式は ValueError"""
+        with self.assertRaises(ValueError):
+            get_image_format('bmp')
+
+    def test_media_type(self):
+        """拡張子からメディアタイプを返す"""
+        self.assertEqual(media_type_for(Path('a.webp')), 'image/webp')
+        self.assertEqual(media_type_for(Path('a.JPG')), 'image/jpeg')
+        self.assertEqual(media_type_for(Path('a.png')), 'image/png')
+
+
+class TestImageEncoder(unittest.TestCase):
+    """ImageEncoder のテストケース"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_parallel_writes_match_serial_encoding(self):
+        """並列に書き出したファイルは逐次エンコードと同じ内容で、バイト数を集計する"""
+        images = [np.roll(screen_image(), shift * 7, axis=1) for shift in range(6)]
+        encoder = ImageEncoder('webp', quality=80, workers=3)
+        futures = [encoder.submit(image, self.test_dir / f"{i}.webp")
+                   for i, image in enumerate(images)]
+        encoder.close()
+
+        for i, (image, future) in enumerate(zip(images, futures)):
+            data = (self.test_dir / f"{i}.webp").read_bytes()
+            self.assertEqual(data, encode_image(image, 'webp', 80))
+            self.assertEqual(future.result(), len(data))
+        self.assertEqual(encoder.images_written, 6)
+        self.assertEqual(encoder.bytes_written, sum(f.result() for f in futures))
+        self.assertGreater(encoder.wall_time, 0.0)
+        self.assertEqual(encoder.media_type, 'image/webp')
+
+
+class TestExtractWithImageFormat(unittest.TestCase):
+    """ScreenshotExtractor の --image-format のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi", screens=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _extract(self, name: str, **kwargs):
+        output_dir = Path(self.test_dir) / name
+        extractor = ScreenshotExtractor(str(self.video_path), str(output_dir),
+                                        transition_threshold=10, min_time_interval=0.5,
+                                        target_count=3, **kwargs)
+        with patch.object(extract_screenshots, 'get_ocr_reader',
+                          return_value=FakeReader(rich_mean=-1)):
+            return extractor, extractor.extract_screenshots(), output_dir
+
+    def test_metadata_records_format_and_size(self):
+        """ファイル名の拡張子・metadata.json に実際の形式とサイズを記録する"""
+        extractor, metadata, output_dir = self._extract("webp", image_format='webp',
+                                                        image_quality=70, encode_workers=2)
+        self.assertTrue(metadata)
+        for m in metadata:
+            path = output_dir / "screenshots" / m['filename']
+            self.assertEqual(path.suffix, '.webp')
+            self.assertEqual(m['image_format'], 'webp')
+            self.assertEqual(m['file_size'], path.stat().st_size)
+        self.assertEqual(extractor.encoded_bytes, sum(m['file_size'] for m in metadata))
+        saved = json.loads((output_dir / "metadata.json").read_text(encoding='utf-8'))
+        self.assertEqual(saved, metadata)
+
+    def test_default_png(self):
+        """既定は従来と同じ png で保存し、形式とサイズを記録する"""
+        _, metadata, output_dir = self._extract("png")
+        for m in metadata:
+            path = output_dir / "screenshots" / m['filename']
+            self.assertEqual(path.suffix, '.png')
+            self.assertEqual(m['image_format'], 'png')
+            self.assertEqual(m['file_size'], path.stat().st_size)
+            self.assertIsNotNone(cv2.imread(str(path)))
+
+    def test_cli_options(self):
+        """--image-format / --image-quality / --encode-workers の解析"""
+        parser = create_argument_parser()
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertEqual((args.image_format, args.image_quality, args.encode_workers),
+                         ('png', None, 0))
+        args = parser.parse_args(['-i', 'video.mp4', '--image-format', 'jpeg',
+                                  '--image-quality', '85', '--encode-workers', '4'])
+        self.assertEqual((args.image_format, args.image_quality, args.encode_workers),
+                         ('jpeg', 85, 4))
+        with self.assertRaises(SystemExit):
+            parser.parse_args(['-i', 'video.mp4', '--image-format', 'bmp'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,17 +7,23 @@ ImageProcessor クラスのユニットテスト
 - Claude API仕様に準拠したリクエスト形式への変換
 - 画像サイズ制限（3.75MB、8000px）の検証
 - 最大20枚までの画像制限の検証
+- ヘッダーからの形式・寸法の判定（PNG, JPEG, GIF, WebP）
+- 元のバイト列のエンコードと、1ファイル1回の読み込み
+- 内容のダイジェストをキーにしたキャッシュ
 """
 
 import unittest
 import tempfile
 import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PIL import Image
 import base64
 from io import BytesIO
+from unittest.mock import patch
 import numpy as np
-from image_processor import ImageProcessor
+from image_processor import ImageProcessor, sniff_image
 
 
 class TestImageProcessor(unittest.TestCase):
@@ -250,5 +256,116 @@ class TestImageProcessor(unittest.TestCase):
         self.assertEqual(media_type, "image/jpeg")
 
 
+
+class TestSniffImage(unittest.TestCase):
+    """sniff_image のテストケース"""
+
+    def _encode(self, format: str, mode: str = "RGB", size: tuple = (321, 123), **params) -> bytes:
+        buffer = BytesIO()
+        Image.new(mode, size, color=(10, 200, 30, 128)[:len(mode)]).save(buffer, format=format,
+                                                                          **params)
+        return buffer.getvalue()
+
+    def test_formats_and_dimensions(self):
+        """各形式のヘッダーから形式と寸法を判定する"""
+        cases = {
+            "png": (self._encode("PNG"), "PNG"),
+            "jpeg": (self._encode("JPEG"), "JPEG"),
+            "progressive jpeg": (self._encode("JPEG", progressive=True), "JPEG"),
+            "gif": (self._encode("GIF"), "GIF"),
+            "webp lossy": (self._encode("WEBP"), "WEBP"),
+            "webp lossless": (self._encode("WEBP", lossless=True), "WEBP"),
+            "webp alpha": (self._encode("WEBP", mode="RGBA"), "WEBP"),
+        }
+        for name, (data, img_format) in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(sniff_image(data), (img_format, 321, 123))
+
+    def test_unsupported(self):
+        """未対応の形式・壊れたヘッダーは ValueError"""
+        for data in (self._encode("BMP"), b'\x89PNG\r\n\x1a\n', b''):
+            with self.assertRaises(ValueError):
+                sniff_image(data)
+
+
+class TestImageProcessorSinglePass(unittest.TestCase):
+    """ImageProcessor の1回の読み込み・キャッシュのテストケース"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _save(self, filename: str, format: str, seed: int = 0) -> Path:
+        rng = np.random.default_rng(seed)
+        path = self.test_dir / filename
+        Image.fromarray(rng.integers(0, 256, (90, 160, 3), dtype=np.uint8)).save(path, format)
+        return path
+
+    def test_original_bytes_are_encoded(self):
+        """非可逆形式も再エンコードせず、元のバイト列をそのまま base64 にする"""
+        paths = [self._save("a.jpg", "JPEG"), self._save("b.webp", "WEBP")]
+        result = ImageProcessor().prepare_images_base64(paths)
+        for path, block in zip(paths, result):
+            self.assertEqual(base64.b64decode(block["source"]["data"]), path.read_bytes())
+        self.assertEqual([b["source"]["media_type"] for b in result],
+                         ["image/jpeg", "image/webp"])
+
+    def test_each_file_is_read_once_without_decoding(self):
+        """各ファイルを1回だけ読み込み、PIL で画像を開かない"""
+        paths = [self._save(f"{i}.png", "PNG", seed=i) for i in range(3)]
+        with patch.object(Path, 'read_bytes', autospec=True,
+                          side_effect=Path.read_bytes) as read_bytes, \
+                patch.object(Image, 'open', side_effect=AssertionError("decoded")):
+            result = ImageProcessor().prepare_images_base64(paths)
+        self.assertEqual(len(result), 3)
+        self.assertEqual(read_bytes.call_count, 3)
+
+    def test_cache_by_content_digest(self):
+        """同じ内容の画像は（ファイル名が違っても）キャッシュした base64 を再利用する"""
+        first = self._save("first.png", "PNG")
+        copy = self.test_dir / "copy.png"
+        copy.write_bytes(first.read_bytes())
+        processor = ImageProcessor()
+
+        result = processor.prepare_images_base64([first, copy])
+        self.assertIs(result[0]["source"]["data"], result[1]["source"]["data"])
+        self.assertEqual((processor.cache_misses, processor.cache_hits), (1, 1))
+
+        # 再生成（リトライ）では base64 を作り直さない
+        with patch('image_processor.base64.b64encode') as b64encode:
+            again = processor.prepare_images_base64([first])
+        b64encode.assert_not_called()
+        self.assertEqual(again[0], result[0])
+
+    def test_cache_is_thread_safe(self):
+        """複数のスレッドがキャッシュの上限より多い画像を処理しても、共有したキャッシュが壊れない"""
+        images = []
+        for i in range(3):
+            buffer = BytesIO()
+            Image.new("RGB", (8, 8), (i * 80, 0, 0)).save(buffer, "PNG")
+            images.append(buffer.getvalue())
+        processor = ImageProcessor(cache_size=2)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+        calls = [(images[i % len(images)], f"shared_{i}.png") for i in range(20000)]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            blocks = list(executor.map(lambda call: processor.prepare_image_block(*call), calls))
+
+        self.assertEqual(len(blocks), len(calls))
+        self.assertEqual(processor.cache_hits + processor.cache_misses, len(calls))
+        self.assertLessEqual(len(processor.cache), 2)
+
+    def test_unsupported_format(self):
+        """未対応の形式は ValueError"""
+        path = self._save("image.bmp", "BMP")
+        with self.assertRaises(ValueError) as context:
+            ImageProcessor().prepare_images_base64([path])
+        self.assertIn("image.bmp", str(context.exception))
+
+
 if __name__ == '__main__':
     unittest.main()
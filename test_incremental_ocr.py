@@ -0,0 +1,221 @@
+"""
+IncrementalOCR のユニットテスト
+
+テスト対象:
+- 低解像度の変化マスク
+- 変化のない領域の認識結果の引き継ぎと、変化した領域・新しい領域の文字認識
+- 認識結果と領域の座標での対応付け（結果の順番・幅0の領域・結果のない領域）
+- ScreenshotExtractor の --incremental-ocr（全領域を認識した場合と同じ metadata）
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+
+import extract_screenshots
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import create_test_video
+from incremental_ocr import IncrementalOCR, compute_change_mask, downscale_gray
+
+
+HEADER_BOX = [10, 310, 8, 30]
+BODY_BOX = [0, 320, 120, 200]
+
+
+def draw_header(frame: np.ndarray, offset: int, previous) -> np.ndarray:
+    """共通のヘッダー（上端40px）を描画したフレーム（本文は画面ごとに異なる）"""
+    frame[:40] = (200, 120, 40)
+    return frame
+
+
+class RegionReader:
+    """
+    EasyOCR Reader の代替
+
+    ヘッダーと本文の2領域を検出し、各領域の平均輝度を文字列として認識する。
+    """
+
+    def __init__(self):
+        self.recognized_boxes = 0
+        self.detect = MagicMock(side_effect=self._detect)
+        self.recognize = MagicMock(side_effect=self._recognize)
+
+    def _detect(self, img, reformat=True, **kwargs):
+        images = img if img.ndim == 4 else [img]
+        return [[HEADER_BOX, BODY_BOX] for _ in images], [[] for _ in images]
+
+    def _recognize(self, grey, horizontal_list, free_list, reformat=True, **kwargs):
+        self.recognized_boxes += len(horizontal_list)
+        results = []
+        for x_min, x_max, y_min, y_max in horizontal_list:
+            text = 'ホーム' if y_max <= 40 else str(int(grey[y_min:y_max, x_min:x_max].mean()))
+            bbox = [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+            results.append((bbox, text, 0.9))
+        return results
+
+
+class TestChangeMask(unittest.TestCase):
+    """compute_change_mask のテストケース"""
+
+    def test_mask_localizes_change(self):
+        """変化した位置だけがマスクされる"""
+        before = np.zeros((240, 320, 3), dtype=np.uint8)
+        after = before.copy()
+        after[160:200, 100:200] = 255
+
+        mask = compute_change_mask(downscale_gray(before), downscale_gray(after))
+
+        self.assertEqual(mask.shape, (120, 160))
+        self.assertTrue(mask[90, 75])
+        self.assertFalse(mask[:60].any())
+
+    def test_noise_below_threshold_is_ignored(self):
+        """閾値以下の差（圧縮ノイズ）は変化とみなさない"""
+        before = np.full((240, 320, 3), 100, dtype=np.uint8)
+        after = before + 5
+        self.assertFalse(compute_change_mask(downscale_gray(before), downscale_gray(after)).any())
+
+
+class TestIncrementalOCR(unittest.TestCase):
+    """IncrementalOCR のテストケース"""
+
+    def _regions(self, frame, horizontal_list):
+        return {'grey': cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY),
+                'horizontal_list': horizontal_list, 'free_list': []}
+
+    def test_first_screen_recognizes_everything(self):
+        """参照画面がない場合はすべての領域を文字認識する"""
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        incremental = IncrementalOCR()
+        to_recognize, carried = incremental.split(frame, self._regions(frame, [HEADER_BOX]))
+
+        self.assertEqual(to_recognize['horizontal_list'], [HEADER_BOX])
+        self.assertEqual(carried, [None])
+
+    def test_unchanged_regions_are_carried_over(self):
+        """変化のない同じ座標の領域は前回の結果を引き継ぎ、変化した領域と新しい領域は認識する"""
+        before = np.zeros((240, 320, 3), dtype=np.uint8)
+        after = before.copy()
+        after[120:200] = 255
+        new_box = [0, 100, 60, 90]
+
+        incremental = IncrementalOCR()
+        header_result = ([[10, 8], [310, 8], [310, 30], [10, 30]], 'ホーム', 0.9)
+        body_result = ([[0, 120], [320, 120], [320, 200], [0, 200]], 'old', 0.9)
+        incremental.update(before, self._regions(before, [HEADER_BOX, BODY_BOX]),
+                           [header_result, body_result])
+
+        to_recognize, carried = incremental.split(
+            after, self._regions(after, [HEADER_BOX, new_box, BODY_BOX]))
+
+        self.assertEqual(to_recognize['horizontal_list'], [new_box, BODY_BOX])
+        self.assertEqual(carried, [header_result, None, None])
+        self.assertEqual(incremental.reused_regions, 1)
+        self.assertEqual(incremental.recognized_regions, 2)
+
+        new_result = ([[0, 60], [100, 60], [100, 90], [0, 90]], 'new', 0.9)
+        body_new = ([[0, 120], [320, 120], [320, 200], [0, 200]], 'body', 0.9)
+        merged = IncrementalOCR.merge(self._regions(after, [HEADER_BOX, new_box, BODY_BOX]),
+                                      carried, [new_result, body_new])
+        self.assertEqual(merged, [header_result, new_result, body_new])
+
+    def test_results_are_matched_by_bbox(self):
+        """
+        結果は座標で領域に対応付ける（GPUの縦位置順の結果、幅0の領域、画像外にはみ出す領域）
+        """
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        degenerate_box = [400, 420, 10, 30]  # 画像の範囲に収めると幅0
+        wide_box = [-5, 330, 60, 90]          # 結果の bbox は画像の範囲に収めた座標
+        free_box = [[20, 100], [80, 100], [80, 110], [20, 110]]
+        regions = self._regions(frame, [BODY_BOX, degenerate_box, wide_box])
+        regions['free_list'] = [free_box]
+
+        incremental = IncrementalOCR()
+        to_recognize, carried = incremental.split(frame, regions)
+        self.assertEqual(to_recognize['horizontal_list'], [BODY_BOX, wide_box])
+        self.assertEqual(to_recognize['free_list'], [free_box])
+
+        # reader.recognize() のバッチ処理と同じく free → horizontal を縦位置順に並べた結果
+        wide_result = ([[0, 60], [320, 60], [320, 90], [0, 90]], 'wide', 0.9)
+        free_result = (free_box, 'free', 0.8)
+        body_result = ([[0, 120], [320, 120], [320, 200], [0, 200]], 'body', 0.9)
+        merged = IncrementalOCR.merge(regions, carried, [wide_result, free_result, body_result])
+
+        self.assertEqual(merged, [body_result, wide_result, free_result])
+
+        incremental.update(frame, regions, merged)
+        _, carried = incremental.split(frame, regions)
+        self.assertEqual(carried, [body_result, None, wide_result, free_result])
+
+    def test_missing_result_is_dropped(self):
+        """結果が返らなかった領域は統合結果に含めず、次回も引き継がない"""
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        regions = self._regions(frame, [HEADER_BOX, BODY_BOX])
+        incremental = IncrementalOCR()
+        _, carried = incremental.split(frame, regions)
+
+        header_result = ([[10, 8], [310, 8], [310, 30], [10, 30]], 'ホーム', 0.9)
+        merged = IncrementalOCR.merge(regions, carried, [header_result])
+        self.assertEqual(merged, [header_result])
+
+        incremental.update(frame, regions, merged)
+        _, carried = incremental.split(frame, regions)
+        self.assertEqual(carried, [header_result, None])
+
+    def test_different_frame_size_disables_reuse(self):
+        """フレームサイズが異なる場合は引き継がない"""
+        before = np.zeros((240, 320, 3), dtype=np.uint8)
+        after = np.zeros((480, 640, 3), dtype=np.uint8)
+        incremental = IncrementalOCR()
+        header_result = ([[10, 8], [310, 8], [310, 30], [10, 30]], 'ホーム', 0.9)
+        incremental.update(before, self._regions(before, [HEADER_BOX]), [header_result])
+
+        _, carried = incremental.split(after, self._regions(after, [HEADER_BOX]))
+        self.assertEqual(carried, [None])
+
+
+class TestExtractWithIncrementalOCR(unittest.TestCase):
+    """ScreenshotExtractor の --incremental-ocr のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "header.avi", screens=4,
+                                            seed=11, render=draw_header)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _extract(self, name: str, **kwargs):
+        extractor = ScreenshotExtractor(str(self.video_path), str(Path(self.test_dir) / name),
+                                        transition_threshold=10, min_time_interval=0.5,
+                                        target_count=3, **kwargs)
+        reader = RegionReader()
+        with patch.object(extract_screenshots, 'get_ocr_reader', return_value=reader):
+            metadata = extractor.extract_screenshots()
+        return extractor, reader, metadata
+
+    def test_matches_full_recognition_with_fewer_regions(self):
+        """全領域を文字認識した場合と同じ metadata で、認識する領域が少ない"""
+        _, full_reader, expected = self._extract("full")
+        extractor, reader, metadata = self._extract("incremental", incremental_ocr=True)
+
+        for key in ('timestamp', 'score', 'ui_elements', 'detected_texts'):
+            self.assertEqual([m[key] for m in metadata], [m[key] for m in expected])
+        self.assertLess(reader.recognized_boxes, full_reader.recognized_boxes)
+        self.assertEqual(extractor.incremental_ocr.reused_regions,
+                         full_reader.recognized_boxes - reader.recognized_boxes)
+
+    def test_cli_option(self):
+        """--incremental-ocr の解析"""
+        parser = create_argument_parser()
+        self.assertFalse(parser.parse_args(['-i', 'video.mp4']).incremental_ocr)
+        self.assertTrue(parser.parse_args(['-i', 'video.mp4', '--incremental-ocr']).incremental_ocr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+"""
+IntervalSelection のユニットテスト
+
+テスト対象:
+- 間隔制約つきの最大合計スコアの選択（全探索との一致）
+- 貪欲法より合計スコアが大きくなる例
+- 上界を使った遅延評価（全候補を評価した場合と同じ合計、評価数の削減、
+  CandidateTable は評価する行だけを dict に戻すこと）
+- ScreenshotExtractor の --selection optimal
+"""
+
+import itertools
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import extract_screenshots
+from candidate_table import CandidateTable
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import FakeReader, create_test_video
+from interval_selection import (optimal_interval_indices, select_optimal,
+                                select_optimal_lazily)
+
+
+def brute_force_best(timestamps, scores, target_count, min_interval):
+    """全組み合わせからスコアの合計の最大値を求める（比較用）"""
+    best = 0.0
+    for count in range(1, target_count + 1):
+        for combo in itertools.combinations(range(len(timestamps)), count):
+            times = sorted(timestamps[i] for i in combo)
+            if all(b - a >= min_interval for a, b in zip(times, times[1:])):
+                best = max(best, sum(scores[i] for i in combo))
+    return best
+
+
+class TestOptimalIntervalIndices(unittest.TestCase):
+    """optimal_interval_indices のテストケース"""
+
+    def test_matches_brute_force(self):
+        """ランダムな候補で全探索と同じ合計スコアになり、間隔制約を満たす"""
+        rng = random.Random(7)
+        for _ in range(150):
+            n = rng.randint(0, 9)
+            timestamps = [round(rng.uniform(0, 60), 1) for _ in range(n)]
+            scores = [float(rng.randint(0, 100)) for _ in range(n)]
+            target_count = rng.randint(1, 4)
+            interval = rng.choice([0.0, 5.0, 15.0])
+
+            indices = optimal_interval_indices(timestamps, scores, target_count, interval)
+
+            self.assertLessEqual(len(indices), target_count)
+            times = [timestamps[i] for i in indices]
+            self.assertEqual(times, sorted(times))
+            self.assertTrue(all(b - a >= interval for a, b in zip(times, times[1:])))
+            self.assertAlmostEqual(sum(scores[i] for i in indices),
+                                   brute_force_best(timestamps, scores, target_count, interval))
+
+    def test_beats_greedy(self):
+        """最高スコアの候補の両側にある2候補の方が合計は大きい"""
+        candidates = [{'timestamp': 0.0, 'score': 60.0},
+                      {'timestamp': 10.0, 'score': 100.0},
+                      {'timestamp': 20.0, 'score': 60.0}]
+        selected = select_optimal(candidates, target_count=2, min_interval=15.0)
+        self.assertEqual([c['timestamp'] for c in selected], [0.0, 20.0])
+
+    def test_empty(self):
+        """候補がない・目標枚数が0の場合は空"""
+        self.assertEqual(optimal_interval_indices([], [], 3, 15.0), [])
+        self.assertEqual(optimal_interval_indices([0.0], [1.0], 0, 15.0), [])
+
+
+class TestSelectOptimalLazily(unittest.TestCase):
+    """select_optimal_lazily のテストケース"""
+
+    def test_matches_eager_with_fewer_evaluations(self):
+        """上界による遅延評価は全候補を評価した場合と同じ合計スコアで、評価する候補が少ない"""
+        rng = random.Random(11)
+        for _ in range(50):
+            n = rng.randint(5, 40)
+            candidates = [{'timestamp': rng.uniform(0, 300), 'exact': rng.uniform(0, 100)}
+                          for _ in range(n)]
+            bounds = [c['exact'] + rng.uniform(0, 30) for c in candidates]
+            evaluated = []
+
+            def evaluate_batch(batch):
+                evaluated.extend(batch)
+                return [dict(c, score=c['exact']) for c in batch]
+
+            selected = select_optimal_lazily(candidates, bounds, evaluate_batch, 5, 15.0)
+            expected = select_optimal([dict(c, score=c['exact']) for c in candidates], 5, 15.0)
+
+            self.assertAlmostEqual(sum(c['score'] for c in selected),
+                                   sum(c['score'] for c in expected))
+            self.assertLessEqual(len(evaluated), n)
+            self.assertEqual(len(evaluated), len({id(c) for c in evaluated}))
+
+    def test_exact_bounds_need_only_the_solution(self):
+        """上界が正確なら解に含まれる候補だけを評価する"""
+        candidates = [{'timestamp': float(t), 'exact': float(t % 7)} for t in range(0, 100, 5)]
+        bounds = [c['exact'] for c in candidates]
+        evaluated = []
+
+        def evaluate_batch(batch):
+            evaluated.extend(batch)
+            return [dict(c, score=c['exact']) for c in batch]
+
+        selected = select_optimal_lazily(candidates, bounds, evaluate_batch, 3, 15.0)
+        self.assertEqual(len(evaluated), len(selected))
+
+    def test_table_converts_only_evaluated_rows(self):
+        """CandidateTable はタイムスタンプを列から読み、評価する行だけを dict に戻す"""
+        rng = random.Random(5)
+        candidates = [{'timestamp': float(t), 'stability_score': rng.uniform(0, 100),
+                       'text_regions': {'grey_png': b''}} for t in range(0, 300, 3)]
+        bounds = [c['stability_score'] + rng.uniform(0, 10) for c in candidates]
+        table = CandidateTable.from_candidates(candidates)
+
+        def evaluate_batch(batch):
+            return [dict(c, score=c['stability_score']) for c in batch]
+
+        with patch.object(CandidateTable, 'to_candidates',
+                          side_effect=AssertionError("converted every row")), \
+                patch.object(CandidateTable, 'candidate', autospec=True,
+                             side_effect=CandidateTable.candidate) as candidate:
+            selected = select_optimal_lazily(table, bounds, evaluate_batch, 5, 15.0)
+
+        expected = select_optimal_lazily(candidates, bounds, evaluate_batch, 5, 15.0)
+        self.assertEqual([c['timestamp'] for c in selected], [c['timestamp'] for c in expected])
+        self.assertLess(candidate.call_count, len(candidates))
+
+
+class TestExtractWithOptimalSelection(unittest.TestCase):
+    """ScreenshotExtractor の --selection optimal のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi", screens=6)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_optimal_total_is_at_least_greedy(self):
+        """optimal の合計スコアは greedy 以上で、間隔制約を満たす"""
+        def extract(name, selection):
+            extractor = ScreenshotExtractor(str(self.video_path), str(Path(self.test_dir) / name),
+                                            transition_threshold=10, min_time_interval=4.0,
+                                            target_count=3, selection=selection)
+            with patch.object(extract_screenshots, 'get_ocr_reader',
+                              return_value=FakeReader(rich_mean=-1)):
+                return extractor.extract_screenshots()
+
+        greedy = extract("greedy", 'greedy')
+        optimal = extract("optimal", 'optimal')
+
+        self.assertGreaterEqual(sum(m['score'] for m in optimal),
+                                sum(m['score'] for m in greedy) - 1e-9)
+        times = [m['timestamp'] for m in optimal]
+        self.assertTrue(all(b - a >= 4.0 for a, b in zip(times, times[1:])))
+
+    def test_select_top_screenshots_dispatch(self):
+        """select_top_screenshots も --selection に従う"""
+        candidates = [{'timestamp': 0.0, 'score': 60.0},
+                      {'timestamp': 10.0, 'score': 100.0},
+                      {'timestamp': 20.0, 'score': 60.0}]
+        greedy = ScreenshotExtractor('', self.test_dir, min_time_interval=15.0, target_count=2)
+        optimal = ScreenshotExtractor('', self.test_dir, min_time_interval=15.0, target_count=2,
+                                      selection='optimal')
+        self.assertEqual([c['timestamp'] for c in greedy.select_top_screenshots(candidates)],
+                         [10.0])
+        self.assertEqual([c['timestamp'] for c in optimal.select_top_screenshots(candidates)],
+                         [0.0, 20.0])
+
+    def test_cli_option(self):
+        """--selection の解析"""
+        parser = create_argument_parser()
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4']).selection, 'greedy')
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4', '--selection', 'optimal'])
+                         .selection, 'optimal')
+
+
+if __name__ == '__main__':
+    unittest.main()
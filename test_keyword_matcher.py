@@ -0,0 +1,130 @@
+"""
+KeywordMatcher のユニットテスト
+
+テスト対象:
+- Aho–Corasick オートマトンでの照合（重なり・包含するキーワード）
+- NFKC + casefold 正規化（全角・半角の違いの吸収）
+- カテゴリごとの重みと外部のキーワード辞書
+- ScreenshotExtractor の UI重要度（従来のキーワードループと同じスコア）
+"""
+
+import json
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from extract_screenshots import (IMPORTANT_UI_KEYWORDS, TITLE_KEYWORDS, UI_BUTTON_SCORE,
+                                 UI_TITLE_SCORE, ScreenshotExtractor, create_argument_parser)
+from keyword_matcher import KeywordMatcher, load_keyword_dictionary, normalize_text
+
+
+BBOX = [[0, 0], [40, 0], [40, 20], [0, 20]]
+
+
+def naive_ui_score(texts):
+    """従来のキーワードごとのループによる UI重要度（比較用）"""
+    score = 0.0
+    for text in texts:
+        if any(keyword.lower() in text.lower() for keyword in IMPORTANT_UI_KEYWORDS):
+            score += UI_BUTTON_SCORE
+        if any(keyword.lower() in text.lower() for keyword in TITLE_KEYWORDS):
+            score += UI_TITLE_SCORE
+    return score
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    """KeywordMatcher のテストケース"""
+
+    def test_overlapping_keywords(self):
+        """失敗リンクで重なり・包含するキーワードもすべて見つける"""
+        matcher = KeywordMatcher([{'a': {'he': 1}, 'b': {'she': 1}, 'c': {'hers': 1},
+                                   'd': {'his': 1}}])
+        self.assertEqual(set(matcher.match('ushers')), {'a', 'b', 'c'})
+        self.assertEqual(matcher.match('this'), {'d': ('his', 1)})
+        self.assertEqual(matcher.match('xyz'), {})
+
+    def test_normalization(self):
+        """全角英数字・半角カタカナ・大文字小文字の違いを吸収する"""
+        matcher = KeywordMatcher([{'button': {'ホーム': 15, 'Settings': 15}}])
+        self.assertIn('button', matcher.match('ﾎｰﾑ'))
+        self.assertEqual(matcher.match('ＳＥＴＴＩＮＧＳ'), {'button': ('Settings', 15)})
+        self.assertEqual(normalize_text('ＡＢＣ１２３'), 'abc123')
+
+    def test_highest_weight_wins(self):
+        """カテゴリ内で重みが最大のキーワード（同じ重みなら先のキーワード）を採用する"""
+        matcher = KeywordMatcher([{'button': {'カート': 10, 'カートに入れる': 25, '入れる': 25}}])
+        self.assertEqual(matcher.match('カートに入れる'), {'button': ('カートに入れる', 25)})
+        self.assertEqual(matcher.max_text_score(), 25.0)
+
+    def test_match_texts_keeps_texts_separate(self):
+        """複数テキストの照合はテキストをまたいでキーワードを作らない"""
+        matcher = KeywordMatcher([{'button': {'保存': 15}}])
+        self.assertEqual(matcher.match_texts(['保', '存', '保存する']),
+                         [{}, {}, {'button': ('保存', 15)}])
+
+    def test_matches_naive_scoring(self):
+        """既定のキーワードでは従来のループと同じ UI重要度になる"""
+        rng = random.Random(3)
+        vocabulary = IMPORTANT_UI_KEYWORDS + TITLE_KEYWORDS + ['abc', 'テスト', '123', ' ']
+        for _ in range(200):
+            texts = [''.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 3)))
+                     for _ in range(rng.randint(0, 4))]
+            score, _, _ = ScreenshotExtractor.score_ocr_results(
+                [(BBOX, text, 0.9) for text in texts])
+            self.assertEqual(score, naive_ui_score(texts), texts)
+
+
+class TestKeywordDictionary(unittest.TestCase):
+    """外部のキーワード辞書のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, data) -> str:
+        path = Path(self.test_dir) / "keywords.json"
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        return str(path)
+
+    def test_list_uses_default_weight(self):
+        """リスト形式はカテゴリの既定の重み、オブジェクト形式はキーワードごとの重み"""
+        path = self._write({'button': {'カートに入れる': 25}, 'title': ['商品詳細']})
+        dictionary = load_keyword_dictionary(path, {'button': 15, 'title': 20})
+        self.assertEqual(dictionary, {'button': {'カートに入れる': 25.0},
+                                      'title': {'商品詳細': 20.0}})
+
+    def test_invalid_dictionary(self):
+        """不正な形式は ValueError"""
+        with self.assertRaises(ValueError):
+            load_keyword_dictionary(self._write(['ホーム']))
+        with self.assertRaises(ValueError):
+            load_keyword_dictionary(self._write({'badge': ['NEW']}), {'button': 15})
+
+    def test_extractor_uses_dictionary(self):
+        """追加したキーワードで UI重要度・上界・キャッシュキーが変わる"""
+        path = self._write({'button': {'カートに入れる': 25}, 'badge': {'NEW': 5}})
+        default = ScreenshotExtractor('', self.test_dir)
+        extractor = ScreenshotExtractor('', self.test_dir, keyword_dicts=[path])
+
+        score, ui_elements, _ = extractor.score_ocr_results(
+            [(BBOX, 'カートに入れる', 0.9), (BBOX, 'ホーム new', 0.9)], extractor.keyword_matcher)
+        self.assertEqual(score, 25 + 15 + 5)
+        self.assertEqual([e['type'] for e in ui_elements], ['button', 'button', 'badge'])
+        self.assertEqual(extractor.keyword_matcher.max_text_score(), 25 + 20 + 5)
+        self.assertNotEqual(extractor.ocr_scoring_key(), default.ocr_scoring_key())
+
+    def test_cli_option(self):
+        """--keyword-dict は複数指定できる"""
+        parser = create_argument_parser()
+        self.assertIsNone(parser.parse_args(['-i', 'video.mp4']).keyword_dict)
+        args = parser.parse_args(['-i', 'video.mp4', '--keyword-dict', 'a.json',
+                                  '--keyword-dict', 'b.json'])
+        self.assertEqual(args.keyword_dict, ['a.json', 'b.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
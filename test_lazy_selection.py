@@ -0,0 +1,175 @@
+"""
+select_top_lazily（分枝限定法による上位選択）のユニットテスト
+
+テスト対象:
+- 全候補を評価する select_top_screenshots と同じ選択結果（同点の順序を含む）
+- 上界の大きい順に必要な候補だけを評価すること
+- 抽出処理での OCR（文字認識）呼び出し数の削減
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import extract_screenshots
+from extract_screenshots import ScreenshotExtractor
+from fixtures import FakeReader, create_test_video
+from lazy_selection import select_top_lazily
+
+
+def make_extractor(target_count: int, min_time_interval: float) -> ScreenshotExtractor:
+    """選択処理だけに使う ScreenshotExtractor を作る（動画は開かない）"""
+    extractor = ScreenshotExtractor.__new__(ScreenshotExtractor)
+    extractor.target_count = target_count
+    extractor.min_time_interval = min_time_interval
+    extractor.selection = 'greedy'
+    extractor.diversity_radius = None
+    return extractor
+
+
+class TestSelectTopLazily(unittest.TestCase):
+    """select_top_lazily のテストケース"""
+
+    def _select(self, candidates, bonuses, bonus_bounds, target_count, interval):
+        evaluated = []
+
+        def evaluate(candidate):
+            evaluated.append(candidate['id'])
+            return dict(candidate, score=candidate['base'] + bonuses[candidate['id']])
+
+        upper_bounds = [c['base'] + bound for c, bound in zip(candidates, bonus_bounds)]
+        selected = select_top_lazily(candidates, upper_bounds, evaluate,
+                                     target_count, interval)
+        return selected, evaluated
+
+    def test_matches_eager_selection(self):
+        """ランダムな候補で、全候補を評価した場合と同じ選択になる"""
+        rng = np.random.default_rng(7)
+        for _ in range(200):
+            count = int(rng.integers(0, 40))
+            candidates = [{'id': i, 'timestamp': float(rng.uniform(0, 120)),
+                           'base': float(rng.integers(0, 20))} for i in range(count)]
+            # 同点を作るため整数の加点
+            bonuses = [float(rng.integers(0, 4)) * 5 for _ in range(count)]
+            bonus_bounds = [b + float(rng.integers(0, 3)) * 5 for b in bonuses]
+            target_count = int(rng.integers(1, 12))
+            interval = float(rng.choice([0.0, 5.0, 15.0]))
+
+            extractor = make_extractor(target_count, interval)
+            expected = extractor.select_top_screenshots(
+                [dict(c, score=c['base'] + bonuses[c['id']]) for c in candidates])
+            selected, evaluated = self._select(candidates, bonuses, bonus_bounds,
+                                               target_count, interval)
+
+            self.assertEqual([c['id'] for c in selected], [c['id'] for c in expected])
+            self.assertLessEqual(len(evaluated), count)
+            self.assertEqual(len(evaluated), len(set(evaluated)))
+
+    def test_skips_candidates_that_cannot_reach_top(self):
+        """上界が選択済みのスコアに届かない候補は評価しない"""
+        candidates = [{'id': i, 'timestamp': i * 20.0, 'base': base}
+                      for i, base in enumerate([100.0, 90.0, 10.0, 5.0])]
+        bonuses = [0.0, 0.0, 0.0, 0.0]
+        selected, evaluated = self._select(candidates, bonuses, [30.0] * 4,
+                                           target_count=2, interval=15.0)
+
+        self.assertEqual([c['id'] for c in selected], [0, 1])
+        self.assertEqual(evaluated, [0, 1])
+
+    def test_skips_candidates_too_close_to_selected(self):
+        """選択済みと時間的に近すぎる候補は評価しない"""
+        candidates = [{'id': 0, 'timestamp': 10.0, 'base': 100.0},
+                      {'id': 1, 'timestamp': 12.0, 'base': 95.0},
+                      {'id': 2, 'timestamp': 40.0, 'base': 50.0}]
+        selected, evaluated = self._select(candidates, [0.0, 0.0, 0.0], [10.0, 0.0, 10.0],
+                                           target_count=3, interval=15.0)
+
+        self.assertEqual([c['id'] for c in selected], [0, 2])
+        self.assertEqual(evaluated, [0, 2])
+
+    def test_ties_keep_original_order(self):
+        """同点の候補は元の順番で選ばれる（安定ソートと同じ）"""
+        candidates = [{'id': i, 'timestamp': float(i), 'base': 10.0} for i in range(4)]
+        selected, _ = self._select(candidates, [0.0] * 4, [0.0] * 4,
+                                   target_count=2, interval=0.0)
+
+        self.assertEqual([c['id'] for c in selected], [0, 1])
+
+
+class TestExtractWithBoundedOCR(unittest.TestCase):
+    """extract_screenshots の OCR 呼び出し数のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi", screens=8)
+        self.output_dir = Path(self.test_dir) / "output"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _create_extractor(self) -> ScreenshotExtractor:
+        return ScreenshotExtractor(str(self.video_path), str(self.output_dir),
+                                   transition_threshold=10, min_time_interval=0.5,
+                                   target_count=1)
+
+    def _eager_expected(self, rich_mean: int) -> tuple:
+        """全候補で analyze_ui_importance を実行した場合の選択結果と候補数"""
+        extractor = self._create_extractor()
+        self.assertTrue(extractor.open_video())
+        self.addCleanup(extractor.close_video)
+        candidates = []
+        transitions = extractor.detect_scene_transitions()
+        reader = FakeReader(rich_mean)
+        with patch.object(extract_screenshots, 'get_ocr_reader', return_value=reader):
+            for trans, stable in extractor.iter_stable_frames(transitions):
+                ui_score, ui_elements, texts = extractor.analyze_ui_importance(stable['frame'])
+                candidates.append({
+                    'timestamp': stable['timestamp'],
+                    'score': extractor.compute_final_score(
+                        trans['magnitude'], stable['stability_score'], ui_score),
+                    'ui_elements': ui_elements,
+                    'detected_texts': texts
+                })
+        return extractor.select_top_screenshots(candidates), len(candidates)
+
+    def test_matches_eager_output_with_fewer_recognitions(self):
+        """全候補に OCR を実行した場合と同じ結果で、文字認識の回数が少ない"""
+        # 最後の画面だけテキストが多く、UI重要度で他の候補を上回る
+        rich_mean = round(float(np.mean(self._last_stable_frame())))
+        expected, candidate_count = self._eager_expected(rich_mean)
+
+        reader = FakeReader(rich_mean)
+        extractor = self._create_extractor()
+        with patch.object(extract_screenshots, 'get_ocr_reader', return_value=reader):
+            metadata = extractor.extract_screenshots()
+
+        for key in ('timestamp', 'score', 'ui_elements', 'detected_texts'):
+            self.assertEqual([m[key] for m in metadata], [c[key] for c in expected])
+        self.assertEqual(reader.detected_images, candidate_count)
+        self.assertLess(reader.recognize.call_count, candidate_count)
+        self.assertEqual(extractor.ocr_recognitions, reader.recognize.call_count)
+
+    def _last_stable_frame(self) -> np.ndarray:
+        extractor = self._create_extractor()
+        self.assertTrue(extractor.open_video())
+        self.addCleanup(extractor.close_video)
+        transitions = extractor.detect_scene_transitions()
+        return extractor.find_stable_frame(transitions[-1]['frame_idx'])['frame']
+
+    def test_ui_importance_upper_bound(self):
+        """上界は領域ごとのボタン・タイトル加点とテキスト量の加点の合計"""
+        self.assertEqual(ScreenshotExtractor.ui_importance_upper_bound(0), 0.0)
+        self.assertEqual(ScreenshotExtractor.ui_importance_upper_bound(2), 70.0)
+        self.assertEqual(ScreenshotExtractor.ui_importance_upper_bound(6), 220.0)
+
+        results = [([[0, 0], [40, 0], [40, 20], [0, 20]], 'ホーム画面', 0.9)] * 6
+        score, _, _ = ScreenshotExtractor.score_ocr_results(results)
+        self.assertEqual(score, ScreenshotExtractor.ui_importance_upper_bound(6))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+OCRCache のユニットテスト
+
+テスト対象:
+- pHash をキーにした解析結果の保存・読み込み（符号付き64ビットへの変換を含む）
+- ハミング距離 radius 以内の近傍検索
+- LRU によるエントリ数の上限
+- UI重要度の計算方法が変わった場合の破棄
+- ScreenshotExtractor での再実行時の OCR 省略とヒット・ミス数
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import extract_screenshots
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import FakeReader, create_test_video
+from ocr_cache import OCRCache
+
+
+RESULT = (35.0, [{'type': 'button', 'text': '設定', 'confidence': 0.9}], ['設定', 'ホーム'])
+
+
+class TestOCRCache(unittest.TestCase):
+    """OCRCache のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = Path(self.test_dir) / "cache" / "ocr.sqlite3"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _open(self, **kwargs) -> OCRCache:
+        cache = OCRCache(str(self.path), **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_round_trip_persists_across_instances(self):
+        """保存した結果は別のインスタンス（再実行）から読める"""
+        high_bit_hash = (1 << 63) | 0x1234
+        cache = self._open(radius=0)
+        cache.put(high_bit_hash, RESULT)
+        cache.close()
+
+        reopened = self._open(radius=0)
+        self.assertEqual(reopened.get(high_bit_hash), RESULT)
+        self.assertEqual(len(reopened), 1)
+
+    def test_near_duplicate_within_radius(self):
+        """ハミング距離 radius 以内の pHash はヒットし、それより遠いものはヒットしない"""
+        cache = self._open(radius=2)
+        cache.put(0b1111 << 20, RESULT)
+
+        self.assertEqual(cache.get((0b1111 << 20) ^ 0b11), RESULT)
+        self.assertIsNone(cache.get((0b1111 << 20) ^ 0b111))
+
+    def test_nearest_entry_is_returned(self):
+        """複数ヒットする場合は最も近い pHash の結果を返す"""
+        cache = self._open(radius=4)
+        cache.put(0, (10.0, [], ['a']))
+        cache.put(0b111, (20.0, [], ['b']))
+
+        self.assertEqual(cache.get(0b011)[2], ['b'])
+        self.assertEqual(cache.get(0b001)[2], ['a'])
+
+    def test_lru_eviction(self):
+        """上限を超えると最後に使われた時刻の古いエントリから削除する"""
+        cache = self._open(radius=0, max_entries=2)
+        cache.put(1, (1.0, [], []))
+        cache.put(2, (2.0, [], []))
+        cache.get(1)  # 1 を最近使ったことにする
+        cache.put(3, (3.0, [], []))
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(1))
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(3))
+
+    def test_scoring_key_change_clears_cache(self):
+        """UI重要度の計算方法が変わった場合はキャッシュを破棄する"""
+        cache = self._open(radius=0, scoring_key='v1')
+        cache.put(1, RESULT)
+        cache.close()
+
+        self.assertIsNotNone(self._open(radius=0, scoring_key='v1').get(1))
+        self.assertIsNone(self._open(radius=0, scoring_key='v2').get(1))
+
+
+class TestExtractorOCRCache(unittest.TestCase):
+    """ScreenshotExtractor の OCR キャッシュのテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi", screens=4)
+        self.cache_dir = Path(self.test_dir) / "cache"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _extract(self, output_name: str):
+        extractor = ScreenshotExtractor(str(self.video_path),
+                                        str(Path(self.test_dir) / output_name),
+                                        transition_threshold=10, min_time_interval=0.5,
+                                        target_count=3, ocr_cache_dir=str(self.cache_dir),
+                                        ocr_cache_radius=0)
+        reader = FakeReader(rich_mean=-1)
+        with patch.object(extract_screenshots, 'get_ocr_reader', return_value=reader):
+            metadata = extractor.extract_screenshots()
+        return extractor, reader, metadata
+
+    def test_rerun_skips_ocr(self):
+        """再実行（別の出力ディレクトリ）では OCR を実行せず、同じ結果になる"""
+        first, first_reader, first_metadata = self._extract("first")
+        self.assertGreater(first.ocr_cache_misses, 0)
+        self.assertEqual(first.ocr_cache_hits, 0)
+
+        second, second_reader, second_metadata = self._extract("second")
+        self.assertEqual(second_reader.detect.call_count, 0)
+        self.assertEqual(second_reader.recognize.call_count, 0)
+        self.assertEqual(second.ocr_cache_hits, len(second_metadata))
+        self.assertEqual(second.ocr_cache_misses, 0)
+
+        for key in ('timestamp', 'score', 'ui_elements', 'detected_texts'):
+            self.assertEqual([m[key] for m in second_metadata],
+                             [m[key] for m in first_metadata])
+
+    def test_revisited_screen_within_run(self):
+        """同じ実行内で再訪問した画面は、先に解析した結果を使う"""
+        # 画面 A → B → A → B の順に表示（各3秒）
+        self.video_path = create_test_video(Path(self.test_dir) / "revisit.avi", seed=5,
+                                            timeline=[(name, 30) for name in "ABAB"])
+        extractor, reader, metadata = self._extract("revisit")
+
+        self.assertEqual(len(metadata), 3)
+        self.assertEqual(extractor.ocr_cache_misses, 2)
+        self.assertEqual(extractor.ocr_cache_hits, 1)
+        self.assertEqual(reader.recognize.call_count, 2)
+
+    def test_cli_options(self):
+        """--ocr-cache-radius / --ocr-cache-size の解析"""
+        parser = create_argument_parser()
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertEqual(args.ocr_cache_radius, 3)
+        self.assertEqual(args.ocr_cache_size, 10000)
+
+        args = parser.parse_args(['-i', 'video.mp4', '--ocr-cache-radius', '0',
+                                  '--ocr-cache-size', '500'])
+        self.assertEqual(args.ocr_cache_radius, 0)
+        self.assertEqual(args.ocr_cache_size, 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+"""
+OCRWorkerPool のユニットテスト
+
+テスト対象:
+- 同じサイズのフレームのバッチ検出（readtext_batched と同じ4次元配列での推論）
+- ワーカープロセスでの Reader の初期化（torch のスレッド数の固定）
+- ワーカープールを使った抽出結果がメインプロセスでの OCR と一致すること
+- 未完了の検出バッチ数の上限（検出がスキャンより遅い場合のバックプレッシャー）
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+import extract_screenshots
+import ocr_pool
+from extract_screenshots import (MAX_DETECTIONS_PER_OCR_WORKER, ScreenshotExtractor,
+                                 create_argument_parser)
+from fixtures import FakeReader, create_test_video
+from ocr_pool import OCRWorkerPool, detect_with_reader, init_ocr_worker
+
+
+def create_fake_reader() -> FakeReader:
+    """ワーカープロセス用の Reader（spawn で渡すためモジュールレベルに定義）"""
+    return FakeReader(rich_mean=-1)
+
+
+class SlowStubPool:
+    """
+    OCRWorkerPool の代替（スレッドで実行し、検出に時間がかかる）
+
+    同時に未完了の検出バッチ数の最大値を記録する。
+    """
+
+    def __init__(self, workers: int, latency: float = 0.3):
+        self.workers = workers
+        self.latency = latency
+        self.reader = create_fake_reader()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.outstanding = 0
+        self.peak = 0
+        self.submitted = 0
+
+    def _detect(self, images, detect_kwargs):
+        time.sleep(self.latency)
+        results = detect_with_reader(self.reader, images, detect_kwargs)
+        with self.lock:
+            self.outstanding -= 1
+        return results
+
+    def submit_detect(self, images, detect_kwargs=None):
+        with self.lock:
+            self.outstanding += 1
+            self.submitted += 1
+            self.peak = max(self.peak, self.outstanding)
+        return self.executor.submit(self._detect, images, detect_kwargs)
+
+    def recognize_many(self, jobs):
+        return [self.reader.recognize(*job, reformat=False) for job in jobs]
+
+    def close(self):
+        self.executor.shutdown()
+
+
+class TestDetectWithReader(unittest.TestCase):
+    """detect_with_reader のテストケース"""
+
+    def test_same_size_images_are_batched(self):
+        """同じサイズの画像は1回の推論でまとめて検出する"""
+        reader = FakeReader(rich_mean=-1)
+        images = [np.full((24, 32, 3), v, dtype=np.uint8) for v in (10, 20, 30)]
+
+        results = detect_with_reader(reader, images)
+
+        self.assertEqual(reader.detect.call_count, 1)
+        self.assertEqual(reader.detect.call_args[0][0].shape, (3, 24, 32, 3))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], ([[0, 40, 0, 20]], []))
+
+    def test_mixed_sizes_fall_back_to_single_images(self):
+        """サイズが異なる場合は1枚ずつ検出する"""
+        reader = FakeReader(rich_mean=-1)
+        images = [np.zeros((24, 32, 3), dtype=np.uint8), np.zeros((48, 32, 3), dtype=np.uint8)]
+
+        results = detect_with_reader(reader, images)
+
+        self.assertEqual(reader.detect.call_count, 2)
+        self.assertEqual(len(results), 2)
+
+
+class TestInitOCRWorker(unittest.TestCase):
+    """init_ocr_worker のテストケース"""
+
+    def test_pins_torch_threads_and_creates_reader(self):
+        """torch のスレッド数を固定し、Reader を1回だけ作成する"""
+        try:
+            import torch
+        except ImportError:
+            self.skipTest("torch is not installed")
+
+        original_threads = torch.get_num_threads()
+        self.addCleanup(torch.set_num_threads, original_threads)
+        self.addCleanup(setattr, ocr_pool, '_worker_reader', None)
+
+        init_ocr_worker(create_fake_reader, 1)
+
+        self.assertEqual(torch.get_num_threads(), 1)
+        self.assertIsInstance(ocr_pool._worker_reader, FakeReader)
+
+
+class TestOCRWorkerPool(unittest.TestCase):
+    """ワーカープールでの抽出のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi", screens=5)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_default_thread_split(self):
+        """torch のスレッド数は CPUコア数 / ワーカー数（最低1）"""
+        with patch('ocr_pool.os.cpu_count', return_value=16):
+            pool = OCRWorkerPool(4, reader_factory=create_fake_reader)
+            self.addCleanup(pool.close)
+        self.assertEqual(pool.torch_threads, 4)
+
+    def test_pool_matches_in_process_ocr(self):
+        """ワーカープールで OCR した抽出結果はメインプロセスでの結果と同じ"""
+        def extract(name, **kwargs):
+            extractor = ScreenshotExtractor(str(self.video_path), str(Path(self.test_dir) / name),
+                                            transition_threshold=10, min_time_interval=0.5,
+                                            target_count=2, ocr_batch_size=3, **kwargs)
+            pool_factory = partial(OCRWorkerPool, reader_factory=create_fake_reader)
+            with patch.object(extract_screenshots, 'get_ocr_reader',
+                              return_value=create_fake_reader()), \
+                    patch.object(extract_screenshots, 'OCRWorkerPool', pool_factory):
+                return extractor, extractor.extract_screenshots()
+
+        _, expected = extract("serial")
+        extractor, metadata = extract("pool", ocr_workers=2)
+
+        self.assertIsNone(extractor.ocr_pool)
+        for key in ('timestamp', 'score', 'ui_elements', 'detected_texts'):
+            self.assertEqual([m[key] for m in metadata], [m[key] for m in expected])
+
+    def test_outstanding_detections_are_bounded(self):
+        """検出がスキャンより遅くても、未完了の検出バッチはワーカー数 × 上限を超えない"""
+        pools = []
+
+        def pool_factory(workers):
+            pools.append(SlowStubPool(workers))
+            return pools[-1]
+
+        video_path = create_test_video(Path(self.test_dir) / "long.avi", screens=12)
+        extractor = ScreenshotExtractor(str(video_path), str(Path(self.test_dir) / "out"),
+                                        transition_threshold=10, min_time_interval=0.5,
+                                        target_count=2, ocr_batch_size=1, ocr_workers=2)
+        with patch.object(extract_screenshots, 'OCRWorkerPool', pool_factory):
+            metadata = extractor.extract_screenshots()
+
+        pool = pools[0]
+        self.assertGreater(pool.submitted, 2 * MAX_DETECTIONS_PER_OCR_WORKER)
+        self.assertLessEqual(pool.peak, 2 * MAX_DETECTIONS_PER_OCR_WORKER)
+        self.assertEqual(pool.outstanding, 0)
+        self.assertEqual(len(metadata), 2)
+
+    def test_cli_options(self):
+        """--ocr-workers / --ocr-batch-size の解析"""
+        parser = create_argument_parser()
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertEqual(args.ocr_workers, 1)
+        self.assertIsNone(args.ocr_batch_size)
+
+        args = parser.parse_args(['-i', 'video.mp4', '--ocr-workers', '0',
+                                  '--ocr-batch-size', '8'])
+        self.assertEqual(args.ocr_workers, 0)
+        self.assertEqual(args.ocr_batch_size, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
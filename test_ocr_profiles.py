@@ -0,0 +1,202 @@
+"""
+OCRProfiles のユニットテスト
+
+テスト対象:
+- プロファイルの max_side によるフレームの縮小と、認識結果の座標の復元
+- ScreenshotExtractor に渡す検出のパラメータと ui_elements の bbox
+- キーワード再現率と ocr-bench のベンチマーク（引数・正解ファイルの検証）
+"""
+
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+import extract_screenshots
+from extract_screenshots import (ScreenshotExtractor, create_argument_parser,
+                                 create_ocr_bench_argument_parser, run_ocr_bench)
+from fixtures import FakeReader
+from ocr_profiles import (OCR_PROFILES, benchmark_profiles, downscale_for_ocr, get_ocr_profile,
+                          keyword_recall, matched_keywords, scale_ocr_results, to_pixel_bbox)
+
+
+class TestProfileHelpers(unittest.TestCase):
+    """縮小・座標変換・再現率のテストケース"""
+
+    def test_downscale_limits_long_side(self):
+        """長辺が max_side を超えるフレームだけを縮小する"""
+        frame = np.zeros((2556, 1179, 3), dtype=np.uint8)
+        small, scale = downscale_for_ocr(frame, 1280)
+        self.assertEqual(small.shape[:2], (1280, 590))
+        self.assertAlmostEqual(scale, 1280 / 2556)
+
+        unchanged, scale = downscale_for_ocr(small, 1280)
+        self.assertIs(unchanged, small)
+        self.assertEqual(scale, 1.0)
+        self.assertIs(downscale_for_ocr(frame, None)[0], frame)
+
+    def test_results_are_mapped_back(self):
+        """縮小率の逆数を掛けると元の座標に戻る"""
+        results = [([[10, 5], [50, 5], [50, 15], [10, 15]], 'Home', 0.9)]
+        mapped = scale_ocr_results(results, 1 / 0.5)
+        self.assertEqual(to_pixel_bbox(mapped[0][0]), [[20, 10], [100, 10], [100, 30], [20, 30]])
+        self.assertEqual(mapped[0][1:], ('Home', 0.9))
+
+    def test_pixel_bbox_is_json_serializable(self):
+        """numpy の整数も Python の int に変換する"""
+        bbox = to_pixel_bbox(np.array([[1, 2], [3, 4]], dtype=np.int32))
+        self.assertEqual(json.dumps(bbox), '[[1, 2], [3, 4]]')
+
+    def test_unknown_profile(self):
+        """未知のプロファイル名は ValueError"""
+        with self.assertRaises(ValueError):
+            get_ocr_profile('turbo')
+
+    def test_keyword_recall(self):
+        """参照のキーワードのうち見つかった割合"""
+        found = [matched_keywords(['ホーム画面', 'settings'], ['ホーム', 'Settings', '検索'])]
+        self.assertEqual(found, [{'ホーム', 'Settings'}])
+        self.assertAlmostEqual(keyword_recall([{'ホーム', '検索'}], found), 0.5)
+        self.assertEqual(keyword_recall([set()], [set()]), 1.0)
+
+
+class TestExtractorProfiles(unittest.TestCase):
+    """ScreenshotExtractor の OCRプロファイルのテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _analyze(self, profile: str, frame: np.ndarray):
+        extractor = ScreenshotExtractor('', self.test_dir, ocr_profile=profile)
+        reader = FakeReader(rich_mean=-1, text='ホーム')
+        with patch.object(extract_screenshots, 'get_ocr_reader', return_value=reader):
+            return reader, extractor.analyze_ui_importance(frame)
+
+    def test_fast_profile_downscales_and_maps_bbox(self):
+        """fast は縮小した画像で検出し、bbox は元のフレームの座標で返す"""
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        reader, (_, ui_elements, texts) = self._analyze('fast', frame)
+
+        detect_args, detect_kwargs = reader.detect.call_args
+        self.assertEqual(detect_args[0].shape, (540, 960, 3))
+        self.assertEqual(detect_kwargs['canvas_size'], OCR_PROFILES['fast']['canvas_size'])
+        self.assertNotIn('batch_size', reader.recognize.call_args[1])
+        self.assertEqual(texts, ['ホーム'])
+        # 縮小後の [0, 40, 0, 20] は元の座標で2倍
+        self.assertEqual(ui_elements[0]['bbox'], [[0, 0], [80, 0], [80, 40], [0, 40]])
+
+    def test_accurate_profile_keeps_resolution(self):
+        """accurate は元の解像度のまま検出する"""
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        reader, (_, ui_elements, _) = self._analyze('accurate', frame)
+
+        self.assertEqual(reader.detect.call_args[0][0].shape, (1080, 1920, 3))
+        self.assertEqual(ui_elements[0]['bbox'], [[0, 0], [40, 0], [40, 20], [0, 20]])
+
+    def test_profile_changes_ocr_cache_key(self):
+        """プロファイルが異なる場合は OCRキャッシュを共有しない"""
+        fast = ScreenshotExtractor('', self.test_dir, ocr_profile='fast')
+        accurate = ScreenshotExtractor('', self.test_dir, ocr_profile='accurate')
+        self.assertNotEqual(fast.ocr_scoring_key(), accurate.ocr_scoring_key())
+
+    def test_batch_size_defaults_to_profile(self):
+        """--ocr-batch-size を省略した場合はプロファイルの検出バッチサイズ"""
+        extractor = ScreenshotExtractor('', self.test_dir, ocr_profile='fast')
+        self.assertEqual(extractor.ocr_batch_size, OCR_PROFILES['fast']['detect_batch_size'])
+        extractor = ScreenshotExtractor('', self.test_dir, ocr_profile='fast', ocr_batch_size=2)
+        self.assertEqual(extractor.ocr_batch_size, 2)
+
+    def test_cli_option(self):
+        """--ocr-profile の解析"""
+        parser = create_argument_parser()
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4']).ocr_profile, 'accurate')
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4', '--ocr-profile', 'fast']).ocr_profile,
+                         'fast')
+
+
+class TestBenchmark(unittest.TestCase):
+    """benchmark_profiles / ocr-bench のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_recall_against_reference_profile(self):
+        """正解がない場合は accurate の結果を正解として再現率を計算する"""
+        outputs = {'accurate': ['ホーム', '設定'], 'fast': ['ホーム']}
+        frames = [np.zeros((4, 4, 3), dtype=np.uint8)] * 2
+
+        rows = benchmark_profiles(frames, lambda name: lambda frame: outputs[name], ['fast'],
+                                  ['ホーム', '設定', '検索'])
+
+        self.assertEqual([row['profile'] for row in rows], ['fast', 'accurate'])
+        self.assertAlmostEqual(rows[0]['keyword_recall'], 0.5)
+        self.assertAlmostEqual(rows[1]['keyword_recall'], 1.0)
+        self.assertTrue(all(row['seconds_per_frame'] >= 0 for row in rows))
+
+    def test_recall_against_labels(self):
+        """正解キーワードがある場合は参照プロファイルを追加しない"""
+        frames = [np.zeros((4, 4, 3), dtype=np.uint8)]
+        rows = benchmark_profiles(frames, lambda name: lambda frame: ['検索'], ['balanced'],
+                                  [], references=[{'検索', '完了'}])
+
+        self.assertEqual([row['profile'] for row in rows], ['balanced'])
+        self.assertAlmostEqual(rows[0]['keyword_recall'], 0.5)
+
+    def test_ocr_bench_command(self):
+        """ocr-bench は画像ディレクトリのプロファイル比較を JSON で出力する"""
+        for i in range(2):
+            cv2.imwrite(str(Path(self.test_dir) / f"screenshot_{i:02d}.png"),
+                        np.full((1600, 900, 3), 50 * i, dtype=np.uint8))
+        args = create_ocr_bench_argument_parser().parse_args(
+            ['--images', self.test_dir, '--format', 'json'])
+
+        output = io.StringIO()
+        reader = FakeReader(rich_mean=-1, text='ホーム')
+        with patch.object(extract_screenshots, 'get_ocr_reader', return_value=reader), \
+                redirect_stdout(output):
+            self.assertEqual(run_ocr_bench(args), 0)
+
+        rows = json.loads(output.getvalue())
+        self.assertEqual([row['profile'] for row in rows], list(OCR_PROFILES))
+        self.assertTrue(all(row['keyword_recall'] == 1.0 for row in rows))
+
+    def test_ocr_bench_rejects_unknown_profile(self):
+        """未知のプロファイルはエラー"""
+        args = create_ocr_bench_argument_parser().parse_args(
+            ['--images', self.test_dir, '--profiles', 'fast,turbo'])
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(run_ocr_bench(args), 1)
+
+    def test_ocr_bench_rejects_invalid_labels(self):
+        """正解キーワードのファイルがない・JSONが不正・形式が違う場合はエラー"""
+        cv2.imwrite(str(Path(self.test_dir) / "screenshot.png"),
+                    np.zeros((16, 16, 3), dtype=np.uint8))
+        broken = Path(self.test_dir) / "broken.json"
+        broken.write_text('{"screenshot.png": [', encoding='utf-8')
+        wrong_shape = Path(self.test_dir) / "list.json"
+        wrong_shape.write_text('["ホーム"]', encoding='utf-8')
+
+        for labels in (Path(self.test_dir) / "missing.json", broken, wrong_shape):
+            args = create_ocr_bench_argument_parser().parse_args(
+                ['--images', self.test_dir, '--labels', str(labels)])
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(run_ocr_bench(args), 1)
+            self.assertIn('Error:', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
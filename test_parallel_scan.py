@@ -0,0 +1,128 @@
+"""
+ParallelScan のユニットテスト
+
+テスト対象:
+- 区間計画（サンプリング間隔・キーフレームへの整列）
+- ffprobe 出力からのキーフレーム取得
+- 区間結果の連結
+- 並列スキャンと逐次スキャンの一致
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import create_test_video
+from parallel_scan import find_keyframes, plan_chunks, stitch_chunks
+
+
+class TestPlanChunks(unittest.TestCase):
+    """plan_chunks のテストケース"""
+
+    def test_chunks_cover_video_and_align_to_step(self):
+        """区間は動画全体を隙間なく覆い、開始位置はstepの倍数になる"""
+        chunks = plan_chunks(total_frames=1000, step=15, workers=4)
+
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], 1000)
+        for (_, end, _), (start, _, _) in zip(chunks[:-1], chunks[1:]):
+            self.assertEqual(end, start)
+        for start, _, _ in chunks:
+            self.assertEqual(start % 15, 0)
+
+    def test_boundaries_snap_to_keyframes(self):
+        """境界は最寄りのキーフレームに寄せられ、直近のキーフレームが添付される"""
+        keyframes = [0, 240, 480, 720]
+
+        chunks = plan_chunks(total_frames=1000, step=15, workers=4, keyframes=keyframes)
+
+        self.assertEqual([c[0] for c in chunks], [0, 240, 480, 720])
+        self.assertEqual([c[2] for c in chunks], [0, 240, 480, 720])
+
+    def test_unaligned_keyframe_rounds_up_to_step(self):
+        """stepの倍数でないキーフレームは切り上げ、シーク元としてキーフレームを保持する"""
+        chunks = plan_chunks(total_frames=100, step=15, workers=2, keyframes=[0, 50])
+
+        self.assertEqual(chunks, [(0, 60, 0), (60, 100, 50)])
+
+    def test_short_video_yields_single_chunk(self):
+        """ワーカー数より短い動画は重複した区間を作らない"""
+        chunks = plan_chunks(total_frames=10, step=15, workers=4)
+
+        self.assertEqual(chunks, [(0, 10, None)])
+
+
+class TestFindKeyframes(unittest.TestCase):
+    """find_keyframes のテストケース"""
+
+    @patch('parallel_scan.shutil.which', return_value='ffprobe')
+    @patch('parallel_scan.subprocess.run')
+    def test_parses_ffprobe_packet_flags(self, mock_run, _):
+        """ffprobeのパケットフラグからキーフレーム番号を求める"""
+        mock_run.return_value = MagicMock(
+            stdout="0.000000,K__\n0.033333,___\n2.000000,K__\nN/A,K__\n4.000000,K_\n"
+        )
+
+        self.assertEqual(find_keyframes('video.mp4', 30.0), [0, 60, 120])
+
+
+class TestStitchChunks(unittest.TestCase):
+    """stitch_chunks のテストケース"""
+
+    def test_concatenates_in_chunk_order(self):
+        """完了順に関係なく区間順に連結する"""
+        results = [
+            (1, np.array([30, 45]), np.array([3, 4], dtype=np.uint64)),
+            (0, np.array([0, 15]), np.array([1, 2], dtype=np.uint64)),
+        ]
+
+        frame_indices, hashes = stitch_chunks(results, step=15)
+
+        self.assertEqual(frame_indices.tolist(), [0, 15, 30, 45])
+        self.assertEqual(hashes.tolist(), [1, 2, 3, 4])
+
+
+class TestParallelScan(unittest.TestCase):
+    """--workers による並列スキャンのテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi")
+        self.output_dir = Path(self.test_dir) / "output"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _create_extractor(self, **kwargs) -> ScreenshotExtractor:
+        extractor = ScreenshotExtractor(str(self.video_path), str(self.output_dir), **kwargs)
+        self.assertTrue(extractor.open_video())
+        self.addCleanup(extractor.close_video)
+        return extractor
+
+    def test_parallel_matches_serial(self):
+        """並列スキャンは逐次スキャンと同一のハッシュ信号・遷移を返す"""
+        serial = self._create_extractor()
+        expected_indices, expected_hashes = serial.compute_hash_signal()
+
+        parallel = self._create_extractor(workers=2)
+        frame_indices, hashes = parallel.compute_hash_signal()
+
+        np.testing.assert_array_equal(frame_indices, expected_indices)
+        np.testing.assert_array_equal(hashes, expected_hashes)
+        self.assertEqual(parallel.transitions_from_signal(frame_indices, hashes),
+                         serial.transitions_from_signal(expected_indices, expected_hashes))
+
+    def test_workers_option(self):
+        """--workers でワーカー数を指定できる"""
+        parser = create_argument_parser()
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4']).workers, 1)
+        self.assertEqual(parser.parse_args(['-i', 'video.mp4', '--workers', '4']).workers, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
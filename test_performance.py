@@ -449,5 +449,99 @@ class TestScalabilityLongAudio(unittest.TestCase):
         print(f"1時間の音声処理時間（シミュレート）: {elapsed_time:.2f}秒")
 
 
+class TestSelectionPerformance(unittest.TestCase):
+    """上位選択（--selection greedy / optimal）の大規模な候補数での比較"""
+
+    def setUp(self):
+        """テストごとの初期化"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """テストごとのクリーンアップ"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _synthetic_candidates(self, count: int, seed: int):
+        """1秒あたり約2候補の合成候補（スコアはランダム）"""
+        import random
+        rng = random.Random(seed)
+        return [{'timestamp': rng.uniform(0, count / 2), 'score': rng.uniform(0, 300)}
+                for _ in range(count)]
+
+    def test_selection_benchmark(self):
+        """
+        1,000 / 10,000 / 50,000 候補で greedy と optimal の処理時間と合計スコアを測定
+
+        目標: optimal は50,000候補・20枚で2秒以内、合計スコアは greedy 以上
+        """
+        from extract_screenshots import ScreenshotExtractor
+
+        for count in (1000, 10000, 50000):
+            candidates = self._synthetic_candidates(count, seed=count)
+            results = {}
+            for selection in ('greedy', 'optimal'):
+                extractor = ScreenshotExtractor('', self.temp_dir, min_time_interval=15.0,
+                                                target_count=20, selection=selection)
+                start_time = time.perf_counter()
+                selected = extractor.select_top_screenshots(candidates)
+                elapsed_time = time.perf_counter() - start_time
+                results[selection] = (elapsed_time, sum(c['score'] for c in selected))
+
+            greedy_time, greedy_total = results['greedy']
+            optimal_time, optimal_total = results['optimal']
+            print(f"{count}候補: greedy {greedy_time * 1000:.1f}ms (合計 {greedy_total:.1f}), "
+                  f"optimal {optimal_time * 1000:.1f}ms (合計 {optimal_total:.1f})")
+
+            self.assertGreaterEqual(optimal_total, greedy_total - 1e-6)
+            self.assertLess(optimal_time, 2.0)
+
+
+
+class TestCandidateTablePerformance(unittest.TestCase):
+    """候補テーブル（列指向）と dict のリストのスコア計算・選択の比較"""
+
+    def test_candidate_table_benchmark(self):
+        """
+        50,000 候補で上界の計算と上位選択の処理時間を dict のリストと比較
+
+        目標: 候補テーブルの方が速く、選択結果は同じ
+        """
+        import random
+        from candidate_table import CandidateTable
+        from extract_screenshots import ScreenshotExtractor
+
+        rng = random.Random(0)
+        candidates = [{'frame_idx': i * 15, 'timestamp': i * 0.5,
+                       'transition_magnitude': rng.randint(10, 60),
+                       'stability_score': rng.uniform(0, 100),
+                       'ui_importance_bound': float(rng.choice([35, 70, 115]))}
+                      for i in range(50000)]
+
+        def score(magnitude, stability, ui_score):
+            return ScreenshotExtractor.compute_final_score(None, magnitude, stability, ui_score)
+
+        start_time = time.perf_counter()
+        bounds = [score(c['transition_magnitude'], c['stability_score'], c['ui_importance_bound'])
+                  for c in candidates]
+        ranked = sorted(range(len(candidates)), key=lambda i: bounds[i], reverse=True)
+        dict_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        table = CandidateTable.from_candidates(candidates)
+        table_bounds = table.upper_bounds(score)
+        table_ranked = table.order_by_score(table_bounds)
+        table_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        table_bounds = table.upper_bounds(score)
+        table.order_by_score(table_bounds)
+        columnar_time = time.perf_counter() - start_time
+
+        print(f"50000候補: dict {dict_time * 1000:.1f}ms, "
+              f"テーブル作成込み {table_time * 1000:.1f}ms, 列の計算のみ {columnar_time * 1000:.1f}ms")
+
+        self.assertEqual(table_ranked.tolist(), ranked)
+        self.assertLess(columnar_time, dict_time)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,146 @@
+"""
+PHashEngine のユニットテスト
+
+テスト対象:
+- imagehash.phash とのビット単位の一致（BGR / グレースケール / 各種解像度）
+- バッチ処理と uint64 へのパッキング
+- XOR + popcount によるハミング距離
+"""
+
+import unittest
+from unittest.mock import patch
+
+import cv2
+import imagehash
+import numpy as np
+from PIL import Image
+
+from phash_engine import (
+    PHashEngine,
+    consecutive_distances,
+    hamming_distances,
+    hash_to_hex,
+    popcount64,
+)
+
+
+def reference_phash(frame: np.ndarray) -> imagehash.ImageHash:
+    """既存実装（PIL + imagehash）でのpHash"""
+    if frame.ndim == 2:
+        return imagehash.phash(Image.fromarray(frame))
+    return imagehash.phash(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+
+
+class TestPHashEngine(unittest.TestCase):
+    """PHashEngine のテストケース"""
+
+    def setUp(self):
+        self.engine = PHashEngine()
+        self.rng = np.random.default_rng(42)
+
+    def _sample_frames(self, shape: tuple) -> list:
+        """ノイズ・単色・ブロック・テキストのテスト用フレームを生成"""
+        height, width = shape
+        blocks = self.rng.integers(0, 256, (9, 16, 3), dtype=np.uint8)
+        text = np.zeros((height, width, 3), dtype=np.uint8)
+        cv2.putText(text, 'Settings', (width // 10, height // 2),
+                    cv2.FONT_HERSHEY_SIMPLEX, width / 400, (255, 255, 255), 3)
+        return [
+            self.rng.integers(0, 256, (height, width, 3), dtype=np.uint8),
+            np.zeros((height, width, 3), dtype=np.uint8),
+            np.full((height, width, 3), (30, 144, 255), dtype=np.uint8),
+            cv2.resize(blocks, (width, height), interpolation=cv2.INTER_NEAREST),
+            text,
+        ]
+
+    def test_matches_imagehash_for_processing_resolution(self):
+        """720pのBGRフレームでimagehash.phashと同一のハッシュになる"""
+        frames = self._sample_frames((720, 1280))
+
+        hashes = self.engine.hash_frames(frames)
+
+        for frame, hash_value in zip(frames, hashes):
+            self.assertEqual(hash_to_hex(hash_value), str(reference_phash(frame)))
+
+    def test_matches_imagehash_for_various_resolutions(self):
+        """縮小・拡大を含む各種解像度で一致する"""
+        for shape in [(240, 320), (2556, 1179), (32, 32), (20, 40)]:
+            with self.subTest(shape=shape):
+                frames = self._sample_frames(shape)
+                hashes = self.engine.hash_frames(frames)
+                expected = [str(reference_phash(frame)) for frame in frames]
+                self.assertEqual([hash_to_hex(h) for h in hashes], expected)
+
+    def test_matches_imagehash_for_grayscale_frames(self):
+        """グレースケール入力（ffmpegバックエンド）でも一致する"""
+        frames = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in self._sample_frames((720, 1280))]
+
+        hashes = self.engine.hash_frames(frames)
+
+        for frame, hash_value in zip(frames, hashes):
+            self.assertEqual(hash_to_hex(hash_value), str(reference_phash(frame)))
+
+    def test_grayscale_matches_pillow_conversion(self):
+        """グレースケール変換がPillowのconvert('L')と一致する"""
+        frame = self.rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)
+
+        gray = self.engine.to_grayscale(frame)
+
+        expected = np.asarray(Image.fromarray(frame[..., ::-1]).convert('L'))
+        np.testing.assert_array_equal(gray, expected)
+
+    def test_hash_frames_returns_uint64_array(self):
+        """バッチの結果はuint64配列で、単一フレームの結果と一致する"""
+        frames = self._sample_frames((120, 160))
+
+        hashes = self.engine.hash_frames(frames)
+
+        self.assertEqual(hashes.dtype, np.uint64)
+        self.assertEqual(hashes.shape, (len(frames),))
+        self.assertEqual(self.engine.hash_frame(frames[0]), int(hashes[0]))
+
+    def test_empty_batch(self):
+        """空のバッチは空配列を返す"""
+        self.assertEqual(len(self.engine.hash_frames([])), 0)
+
+
+class TestHammingDistances(unittest.TestCase):
+    """ハミング距離計算のテストケース"""
+
+    def test_matches_imagehash_subtraction(self):
+        """imagehashの差分（ハミング距離）と一致する"""
+        engine = PHashEngine()
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (90, 160, 3), dtype=np.uint8) for _ in range(6)]
+        hashes = engine.hash_frames(frames)
+        references = [reference_phash(frame) for frame in frames]
+
+        distances = consecutive_distances(hashes)
+
+        expected = [references[i + 1] - references[i] for i in range(5)]
+        self.assertEqual(distances.tolist(), expected)
+
+    def test_hamming_distances_broadcasts(self):
+        """1つのハッシュと配列の距離を一括計算できる"""
+        hashes = np.array([0, 0xFF, 2 ** 64 - 1], dtype=np.uint64)
+
+        distances = hamming_distances(hashes, np.uint64(0))
+
+        self.assertEqual(distances.tolist(), [0, 8, 64])
+
+    def test_popcount_without_bitwise_count(self):
+        """np.bitwise_countがないNumPyでも同じ結果になる"""
+        values = np.array([0, 1, 0xF0F0, 2 ** 63, 2 ** 64 - 1], dtype=np.uint64)
+        expected = popcount64(values).tolist()
+
+        with patch('phash_engine.hasattr', create=True, return_value=False):
+            self.assertEqual(popcount64(values).tolist(), expected)
+        self.assertEqual(expected, [0, 1, 8, 1, 64])
+
+    def test_hash_to_hex(self):
+        """imagehashと同じ16桁の16進文字列に変換する"""
+        self.assertEqual(hash_to_hex(0xABC), '0000000000000abc')
+
+
+if __name__ == '__main__':
+    unittest.main()
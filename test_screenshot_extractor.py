@@ -0,0 +1,135 @@
+"""
+ScreenshotExtractor のユニットテスト
+
+テスト対象:
+- 画面遷移検出（フレームソースバックエンド経由、バッチpHash）
+- 1パスモード（画面遷移と安定フレームの同時検出、ウィンドウごとの逐次返却）
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, call
+
+import cv2
+import numpy as np
+
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import create_test_video
+
+
+def draw_animation(frame: np.ndarray, offset: int, previous, fps: int = 10) -> np.ndarray:
+    """画面切り替え直後の1秒間のアニメーション（移動する矩形）を描画したフレーム"""
+    if offset < fps:
+        height, width = frame.shape[:2]
+        x = offset * width // fps
+        cv2.rectangle(frame, (x, 0), (x + 40, height // (offset + 1)), (255, 255, 255), -1)
+    return frame
+
+
+class TestDetectSceneTransitions(unittest.TestCase):
+    """detect_scene_transitions のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi")
+        self.output_dir = Path(self.test_dir) / "output"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _create_extractor(self, **kwargs) -> ScreenshotExtractor:
+        extractor = ScreenshotExtractor(str(self.video_path), str(self.output_dir), **kwargs)
+        self.assertTrue(extractor.open_video())
+        self.addCleanup(extractor.close_video)
+        return extractor
+
+    def test_detects_screen_changes(self):
+        """画面が切り替わったサンプル位置で遷移を検出する"""
+        extractor = self._create_extractor()
+
+        transitions = extractor.detect_scene_transitions()
+
+        self.assertEqual([t['frame_idx'] for t in transitions], [30, 60])
+        self.assertEqual([t['timestamp'] for t in transitions], [3.0, 6.0])
+        for t in transitions:
+            self.assertIsInstance(t['magnitude'], int)
+            self.assertGreater(t['magnitude'], extractor.transition_threshold)
+
+    def test_frame_backend_option(self):
+        """--frame-backend でバックエンドを選択できる"""
+        parser = create_argument_parser()
+
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertEqual(args.frame_backend, 'opencv')
+
+        args = parser.parse_args(['-i', 'video.mp4', '--frame-backend', 'ffmpeg'])
+        self.assertEqual(args.frame_backend, 'ffmpeg')
+
+
+class TestSinglePass(unittest.TestCase):
+    """iter_transitions_single_pass のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "animated.avi", screens=4,
+                                            render=draw_animation)
+        self.output_dir = Path(self.test_dir) / "output"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _create_extractor(self, **kwargs) -> ScreenshotExtractor:
+        extractor = ScreenshotExtractor(str(self.video_path), str(self.output_dir), **kwargs)
+        self.assertTrue(extractor.open_video())
+        self.addCleanup(extractor.close_video)
+        return extractor
+
+    def test_matches_two_pass_results(self):
+        """1パスモードは2パス（遷移ごとのシーク）と同じ遷移・安定フレームを返す"""
+        two_pass = self._create_extractor()
+        expected = list(two_pass.iter_stable_frames(two_pass.detect_scene_transitions()))
+
+        single_pass = self._create_extractor(single_pass=True)
+        results = list(single_pass.iter_transitions_single_pass())
+
+        self.assertGreater(len(expected), 0)
+        self.assertEqual([t for t, _ in results], [t for t, _ in expected])
+        for (_, stable), (_, expected_stable) in zip(results, expected):
+            self.assertEqual(stable['frame_idx'], expected_stable['frame_idx'])
+            self.assertAlmostEqual(stable['stability_score'], expected_stable['stability_score'])
+            np.testing.assert_array_equal(stable['frame'], expected_stable['frame'])
+
+    def test_never_seeks_backwards(self):
+        """1パスモードは先頭以外でシークしない"""
+        extractor = self._create_extractor(single_pass=True)
+        extractor.cap = MagicMock(wraps=extractor.cap)
+
+        list(extractor.iter_transitions_single_pass())
+
+        seek_calls = [c for c in extractor.cap.set.call_args_list
+                      if c.args[0] == cv2.CAP_PROP_POS_FRAMES]
+        self.assertEqual(seek_calls, [call(cv2.CAP_PROP_POS_FRAMES, 0)])
+
+    def test_yields_each_window_before_scan_ends(self):
+        """ウィンドウを確定した時点で安定フレームを返す（全フレームを保持しない）"""
+        extractor = self._create_extractor(single_pass=True)
+        results = extractor.iter_transitions_single_pass()
+
+        _, stable = next(results)
+        position = extractor.cap.get(cv2.CAP_PROP_POS_FRAMES)
+        results.close()
+
+        self.assertIn('frame', stable)
+        self.assertLess(position, extractor.total_frames)
+
+    def test_single_pass_option(self):
+        """--single-pass オプションで有効化できる"""
+        parser = create_argument_parser()
+        self.assertFalse(parser.parse_args(['-i', 'video.mp4']).single_pass)
+        self.assertTrue(parser.parse_args(['-i', 'video.mp4', '--single-pass']).single_pass)
+
+
+if __name__ == '__main__':
+    unittest.main()
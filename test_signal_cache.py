@@ -0,0 +1,167 @@
+"""
+SignalCache のユニットテスト
+
+テスト対象:
+- 動画フィンガープリント（サイズ・更新時刻・ブロックダイジェスト）
+- ハッシュ信号の保存とメモリマップでの読み込み
+- ScreenshotExtractor のキャッシュヒット時のスキャン省略（1パスモードで保存した信号を含む）
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import create_test_video
+from signal_cache import SignalCache, video_fingerprint
+
+
+class TestVideoFingerprint(unittest.TestCase):
+    """video_fingerprint のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = Path(self.test_dir) / "video.bin"
+        self.path.write_bytes(bytes(range(256)) * 4096)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_same_file_same_fingerprint(self):
+        """同じファイルは同じフィンガープリントになる"""
+        self.assertEqual(video_fingerprint(str(self.path)), video_fingerprint(str(self.path)))
+
+    def test_content_change_changes_digest(self):
+        """サイズと更新時刻が同じでも、サンプルブロックの内容が変われば変わる"""
+        before = video_fingerprint(str(self.path))
+        stat = os.stat(self.path)
+
+        data = bytearray(self.path.read_bytes())
+        data[0] ^= 0xFF
+        self.path.write_bytes(bytes(data))
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        after = video_fingerprint(str(self.path))
+        self.assertEqual(before['size'], after['size'])
+        self.assertEqual(before['mtime_ns'], after['mtime_ns'])
+        self.assertNotEqual(before['digest'], after['digest'])
+
+
+class TestSignalCache(unittest.TestCase):
+    """SignalCache のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = Path(self.test_dir) / "video.bin"
+        self.video_path.write_bytes(b'video' * 1000)
+        self.cache = SignalCache(str(Path(self.test_dir) / "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_save_and_load_roundtrip(self):
+        """保存した信号をメモリマップで読み込める"""
+        frame_indices = np.array([0, 15, 30], dtype=np.int64)
+        hashes = np.array([1, 2 ** 64 - 1, 3], dtype=np.uint64)
+
+        self.cache.save('key', frame_indices, frame_indices / 30.0, hashes)
+        loaded_indices, timestamps, loaded_hashes = self.cache.load('key')
+
+        self.assertIsInstance(loaded_hashes, np.memmap)
+        np.testing.assert_array_equal(loaded_indices, frame_indices)
+        np.testing.assert_array_equal(timestamps, [0.0, 0.5, 1.0])
+        np.testing.assert_array_equal(loaded_hashes, hashes)
+
+    def test_missing_key_returns_none(self):
+        """キャッシュがない場合はNone"""
+        self.assertIsNone(self.cache.load('missing'))
+
+    def test_corrupt_file_returns_none(self):
+        """壊れたキャッシュファイルは無視する"""
+        self.cache.cache_dir.mkdir(parents=True)
+        self.cache.path_for('broken').write_bytes(b'not a npy file')
+
+        self.assertIsNone(self.cache.load('broken'))
+
+    def test_key_depends_on_sampling_params(self):
+        """サンプリングパラメータが変わるとキーも変わる"""
+        key_a = SignalCache.make_key(str(self.video_path), {'step': 15})
+        key_b = SignalCache.make_key(str(self.video_path), {'step': 60})
+
+        self.assertNotEqual(key_a, key_b)
+        self.assertEqual(key_a, SignalCache.make_key(str(self.video_path), {'step': 15}))
+
+
+class TestExtractorSignalCache(unittest.TestCase):
+    """ScreenshotExtractor のハッシュ信号キャッシュのテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi")
+        self.output_dir = Path(self.test_dir) / "output"
+        self.cache_dir = Path(self.test_dir) / "cache"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _create_extractor(self, **kwargs) -> ScreenshotExtractor:
+        extractor = ScreenshotExtractor(str(self.video_path), str(self.output_dir),
+                                        signal_cache_dir=str(self.cache_dir), **kwargs)
+        self.assertTrue(extractor.open_video())
+        self.addCleanup(extractor.close_video)
+        return extractor
+
+    def test_cache_hit_skips_scan(self):
+        """2回目は動画をスキャンせずに同じ遷移を返す（閾値を変えても有効）"""
+        expected = self._create_extractor().detect_scene_transitions()
+        self.assertEqual(len(list(self.cache_dir.glob('*.npy'))), 1)
+
+        extractor = self._create_extractor(transition_threshold=30)
+        with patch.object(extractor, 'scan_hash_signal') as mock_scan:
+            transitions = extractor.detect_scene_transitions()
+
+        mock_scan.assert_not_called()
+        self.assertEqual(transitions, expected)
+
+    def test_sampling_change_misses_cache(self):
+        """サンプリング間隔が変わるとキャッシュを使わない"""
+        self._create_extractor().detect_scene_transitions()
+
+        self._create_extractor(sample_interval=1.0).detect_scene_transitions()
+
+        self.assertEqual(len(list(self.cache_dir.glob('*.npy'))), 2)
+
+    def test_single_pass_saves_signal(self):
+        """1パスモードのスキャンで保存した信号を2パスモードで再利用する"""
+        list(self._create_extractor(single_pass=True).iter_transitions_single_pass())
+        uncached = ScreenshotExtractor(str(self.video_path), str(self.output_dir))
+        self.assertTrue(uncached.open_video())
+        self.addCleanup(uncached.close_video)
+
+        extractor = self._create_extractor()
+        with patch.object(extractor, 'scan_hash_signal') as mock_scan:
+            transitions = extractor.detect_scene_transitions()
+
+        mock_scan.assert_not_called()
+        self.assertEqual(transitions, uncached.detect_scene_transitions())
+
+    def test_cache_options(self):
+        """--cache-dir / --no-cache オプション"""
+        parser = create_argument_parser()
+
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertIsNone(args.cache_dir)
+        self.assertFalse(args.no_cache)
+
+        args = parser.parse_args(['-i', 'video.mp4', '--cache-dir', '/tmp/cache', '--no-cache'])
+        self.assertEqual(args.cache_dir, '/tmp/cache')
+        self.assertTrue(args.no_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
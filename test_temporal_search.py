@@ -0,0 +1,160 @@
+"""
+TemporalSearch のユニットテスト
+
+テスト対象:
+- 二分探索によるフレーム単位の遷移位置の特定
+- 1区間内の複数遷移・分散した変化（アニメーション）の扱い
+- ターゲットデコードのメモ化
+- 粗密探索モードの ScreenshotExtractor への統合
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from extract_screenshots import ScreenshotExtractor, create_argument_parser
+from fixtures import create_test_video
+from temporal_search import TargetedHasher, bisect_transitions
+
+# ハミング距離64（全ビット反転）の2つの画面
+SCREEN_A = 0
+SCREEN_B = 2 ** 64 - 1
+SCREEN_C = 0xFFFFFFFF
+
+
+def step_signal(changes: dict, length: int) -> list:
+    """changes = {frame_idx: hash} から、各フレームのハッシュ列を作る"""
+    hashes = []
+    current = changes[0]
+    for frame_idx in range(length):
+        current = changes.get(frame_idx, current)
+        hashes.append(current)
+    return hashes
+
+
+class CountingHashes:
+    """フレーム番号 → ハッシュ（呼び出し回数を記録）"""
+
+    def __init__(self, hashes: list):
+        self.hashes = hashes
+        self.calls = []
+
+    def __call__(self, frame_idx: int) -> int:
+        self.calls.append(frame_idx)
+        return self.hashes[frame_idx]
+
+
+class TestBisectTransitions(unittest.TestCase):
+    """bisect_transitions のテストケース"""
+
+    def test_finds_exact_transition_frame(self):
+        """区間内の遷移をフレーム単位で特定する"""
+        hash_at = CountingHashes(step_signal({0: SCREEN_A, 37: SCREEN_B}, 60))
+
+        result = bisect_transitions(hash_at, 0, SCREEN_A, 59, SCREEN_B, threshold=25)
+
+        self.assertEqual(result, [(37, 64)])
+        # 二分探索なので log2(59) 回程度のデコードで済む
+        self.assertLessEqual(len(hash_at.calls), 6)
+
+    def test_finds_multiple_transitions_in_one_interval(self):
+        """1つの粗い区間にある複数の遷移を検出する"""
+        hash_at = CountingHashes(step_signal({0: SCREEN_A, 12: SCREEN_B, 45: SCREEN_C}, 60))
+
+        result = bisect_transitions(hash_at, 0, SCREEN_A, 59, SCREEN_C, threshold=25)
+
+        self.assertEqual([frame_idx for frame_idx, _ in result], [12, 45])
+
+    def test_gradual_change_keeps_coarse_magnitude(self):
+        """変化が分散している場合は変化の大きい側を辿り、粗い区間の距離を保つ"""
+        # 1フレームごとに2ビットずつ変化（どの半区間も閾値を超えない）
+        hashes = [(1 << (2 * i)) - 1 for i in range(21)]
+        hash_at = CountingHashes(hashes)
+
+        result = bisect_transitions(hash_at, 0, hashes[0], 20, hashes[20],
+                                    threshold=25, magnitude=40)
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0][1], 40)
+
+    def test_decode_failure_stops_refinement(self):
+        """デコードに失敗した場合は粗い位置を返す"""
+        result = bisect_transitions(lambda idx: None, 0, SCREEN_A, 20, SCREEN_B, threshold=25)
+
+        self.assertEqual(result, [(20, 64)])
+
+
+class TestTargetedHasher(unittest.TestCase):
+    """TargetedHasher のテストケース"""
+
+    def test_memoizes_and_skips_registered_frames(self):
+        """登録済み・デコード済みのフレームは再デコードしない"""
+        source = MagicMock()
+        source.read_frame.return_value = np.zeros((32, 32), dtype=np.uint8)
+        engine = MagicMock()
+        engine.hash_frame.return_value = 7
+        hasher = TargetedHasher(source, engine)
+        hasher.register(0, 3)
+
+        self.assertEqual(hasher(0), 3)
+        self.assertEqual(hasher(5), 7)
+        self.assertEqual(hasher(5), 7)
+        self.assertEqual(hasher.decoded_frames, 1)
+        source.read_frame.assert_called_once_with(5)
+
+
+class TestCoarseToFine(unittest.TestCase):
+    """粗密探索モードのテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi")
+        self.output_dir = Path(self.test_dir) / "output"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _create_extractor(self, **kwargs) -> ScreenshotExtractor:
+        extractor = ScreenshotExtractor(str(self.video_path), str(self.output_dir), **kwargs)
+        self.assertTrue(extractor.open_video())
+        self.addCleanup(extractor.close_video)
+        return extractor
+
+    def test_refines_to_exact_transition_frames(self):
+        """2秒間隔のサンプリングでも遷移位置はフレーム単位で正確"""
+        extractor = self._create_extractor(coarse_to_fine=True)
+
+        transitions = extractor.detect_scene_transitions()
+
+        self.assertEqual(extractor.sample_step(), 20)
+        self.assertEqual([t['frame_idx'] for t in transitions], [30, 60])
+        self.assertEqual([t['timestamp'] for t in transitions], [3.0, 6.0])
+        for t in transitions:
+            self.assertIsInstance(t['magnitude'], int)
+            self.assertGreater(t['magnitude'], extractor.transition_threshold)
+
+    def test_sample_interval_defaults(self):
+        """サンプリング間隔の既定値は通常0.5秒、粗密探索時は2秒"""
+        self.assertEqual(self._create_extractor().sample_interval, 0.5)
+        self.assertEqual(self._create_extractor(coarse_to_fine=True).sample_interval, 2.0)
+        self.assertEqual(self._create_extractor(sample_interval=1.0).sample_step(), 10)
+
+    def test_options(self):
+        """--sample-interval / --coarse-to-fine オプション"""
+        parser = create_argument_parser()
+
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertIsNone(args.sample_interval)
+        self.assertFalse(args.coarse_to_fine)
+
+        args = parser.parse_args(['-i', 'video.mp4', '--coarse-to-fine', '--sample-interval', '4'])
+        self.assertEqual(args.sample_interval, 4.0)
+        self.assertTrue(args.coarse_to_fine)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+"""
+TokenBudget のユニットテスト
+
+テスト対象:
+- 画像・テキストの入力トークン数の見積もり（APIの自動縮小を考慮）
+- トークン予算の水位分配と、チャンクへの予算の分配
+- ImageBudgetOptimizer の縮小倍率と形式の決定（トークン予算・バイト予算・APIの1画像の制限）
+- AIContentGenerator の予測・実際の入力トークン数の記録、予算超過の警告（スタブのクライアント）
+"""
+
+import base64
+import io
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import cv2
+import numpy as np
+
+import extract_screenshots
+import token_budget
+from artifact_store import ImageArtifact
+from image_encoder import encode_image
+from token_budget import (MAX_IMAGE_BYTES, MAX_IMAGE_LONG_EDGE, MIN_IMAGE_LONG_EDGE,
+                          ImageBudgetOptimizer, allocate_tokens, estimate_image_tokens,
+                          estimate_text_tokens, split_budget)
+
+
+def phone_screenshot(seed: int = 0, size: tuple = (1179, 2556)) -> np.ndarray:
+    """スマートフォンの画面録画らしい画像（グラデーションとノイズ）"""
+    rng = np.random.default_rng(seed)
+    image = cv2.resize(rng.integers(0, 256, (32, 16, 3), dtype=np.uint8), size,
+                       interpolation=cv2.INTER_CUBIC)
+    noise = rng.integers(-4, 5, image.shape, dtype=np.int16)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+def decoded_size(artifact: ImageArtifact) -> tuple:
+    """画像をデコードした (幅, 高さ)"""
+    image = cv2.imdecode(np.frombuffer(artifact.data, np.uint8), cv2.IMREAD_COLOR)
+    return image.shape[1], image.shape[0]
+
+
+class TestEstimates(unittest.TestCase):
+    """トークン数の見積もりのテストケース"""
+
+    def test_image_tokens(self):
+        """幅 × 高さ / 750 で見積もり、APIが自動で縮小する分は数えない"""
+        self.assertEqual(estimate_image_tokens(1000, 1000), 1334)
+        self.assertEqual(estimate_image_tokens(200, 200), 54)
+        phone = estimate_image_tokens(1179, 2556)
+        self.assertLess(phone, 1179 * 2556 // 750)
+        self.assertLessEqual(phone, 1600)
+
+    def test_text_tokens(self):
+        """ASCII は4文字で1トークン、それ以外は1文字1トークン"""
+        self.assertEqual(estimate_text_tokens("abcdefgh"), 2)
+        self.assertEqual(estimate_text_tokens("記事abcd"), 3)
+
+    def test_allocate_tokens(self):
+        """予算内なら元のまま、超える場合は小さい画像を残して大きい画像を均等に縮小"""
+        self.assertEqual(allocate_tokens([100, 200], 500), [100, 200])
+        self.assertEqual(allocate_tokens([100, 1000, 1000], 1100), [100, 500, 500])
+        self.assertEqual(allocate_tokens([100, 100], 0), [0, 0])
+
+    def test_split_budget(self):
+        """予算を画像の枚数に比例して分配し、切り捨てた端数は先頭から配る"""
+        self.assertEqual(split_budget(3000, [4, 4, 4]), [1000, 1000, 1000])
+        self.assertEqual(split_budget(10, [14, 14, 13]), [4, 3, 3])
+        self.assertEqual(sum(split_budget(1001, [20, 20, 1])), 1001)
+        self.assertEqual(split_budget(None, [20, 1]), [None, None])
+
+
+class TestImageBudgetOptimizer(unittest.TestCase):
+    """ImageBudgetOptimizer のテストケース"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.artifacts = [ImageArtifact(encode_image(phone_screenshot(seed), 'png'), 'image/png')
+                         for seed in range(3)]
+
+    def test_token_budget(self):
+        """予測トークン数がプロンプトを含めて予算に収まるように縮小する"""
+        optimizer = ImageBudgetOptimizer(token_budget=2500)
+        optimized, plans = optimizer.optimize(self.artifacts, text_tokens=400)
+
+        self.assertLessEqual(400 + sum(p['predicted_tokens'] for p in plans), 2500)
+        for artifact, plan in zip(optimized, plans):
+            self.assertTrue(plan['optimized'])
+            self.assertEqual(decoded_size(artifact), (plan['width'], plan['height']))
+            self.assertAlmostEqual(plan['height'] / plan['width'], 2556 / 1179, places=2)
+            self.assertEqual(plan['media_type'], 'image/png')
+            self.assertEqual(plan['size'], artifact.size)
+
+    def test_small_images_are_sent_unchanged(self):
+        """予算内で縮小の必要がない画像は元のバイト列のまま送る"""
+        small = ImageArtifact(encode_image(phone_screenshot(size=(300, 600)), 'png'), 'image/png')
+        optimized, plans = ImageBudgetOptimizer(token_budget=10000).optimize([small])
+        self.assertIs(optimized[0], small)
+        self.assertEqual((plans[0]['scale'], plans[0]['optimized']), (1.0, False))
+
+    def test_api_resize_is_applied_locally(self):
+        """予算を指定した場合、APIが自動で縮小する解像度より大きくは送らない"""
+        _, plans = ImageBudgetOptimizer(token_budget=100000).optimize(self.artifacts[:1])
+        self.assertLessEqual(max(plans[0]['width'], plans[0]['height']), MAX_IMAGE_LONG_EDGE)
+        self.assertEqual(plans[0]['predicted_tokens'], estimate_image_tokens(1179, 2556))
+
+    def test_byte_budget(self):
+        """PNG で収まらない画像は高品質の WebP にし、合計をバイト予算に収める"""
+        budget = 300 * 1024
+        optimized, plans = ImageBudgetOptimizer(byte_budget=budget).optimize(self.artifacts)
+        self.assertLessEqual(sum(a.size for a in optimized), budget)
+        self.assertEqual({p['media_type'] for p in plans}, {'image/webp'})
+        for artifact, plan in zip(optimized, plans):
+            self.assertEqual(decoded_size(artifact), (plan['width'], plan['height']))
+
+    def test_limits_without_budget(self):
+        """予算がなくても、APIの1画像の制限（3.75MB）を超える画像だけは縮小する"""
+        self.assertGreater(self.artifacts[0].size, MAX_IMAGE_BYTES)
+        small = ImageArtifact(encode_image(phone_screenshot(size=(300, 600)), 'png'), 'image/png')
+        optimized, plans = ImageBudgetOptimizer().enforce_limits([self.artifacts[0], small])
+
+        self.assertLessEqual(optimized[0].size, MAX_IMAGE_BYTES)
+        self.assertTrue(plans[0]['optimized'])
+        self.assertEqual(decoded_size(optimized[0]), (plans[0]['width'], plans[0]['height']))
+        self.assertIs(optimized[1], small)
+        self.assertFalse(plans[1]['optimized'])
+
+    def test_api_byte_limit_overrides_min_long_edge(self):
+        """
+        バイト予算は最小の長辺までしか縮小しないが、APIの1画像の上限は
+        最小の長辺より小さく縮小してでも守る
+        """
+        optimizer = ImageBudgetOptimizer()
+        size = (1179, 2556)
+        tokens = estimate_image_tokens(*size)
+
+        over_budget, plan = optimizer.fit_image(self.artifacts[0], size, tokens, 1024)
+        self.assertGreater(over_budget.size, 1024)
+        self.assertEqual(max(plan['width'], plan['height']), MIN_IMAGE_LONG_EDGE)
+
+        limit = over_budget.size // 2
+        with patch.object(token_budget, 'MAX_IMAGE_BYTES', limit):
+            within_limit, plan = optimizer.fit_image(self.artifacts[0], size, tokens, limit)
+        self.assertLessEqual(within_limit.size, limit)
+        self.assertLess(max(plan['width'], plan['height']), MIN_IMAGE_LONG_EDGE)
+
+
+class TestGeneratorTokenPrediction(unittest.TestCase):
+    """AIContentGenerator の予測・実際の入力トークン数の記録のテストケース"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.paths = []
+        for i in range(2):
+            path = self.test_dir / f"{i + 1:02d}_00-0{i}_score90.png"
+            path.write_bytes(encode_image(phone_screenshot(i), 'png'))
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _generate(self, **kwargs):
+        response = Mock()
+        response.content = [Mock(text="# 記事\n\n" + "説明です。" * 200)]
+        response.usage = Mock(input_tokens=2100, output_tokens=800)
+        client = Mock()
+        client.messages.create.return_value = response
+        generator = extract_screenshots.AIContentGenerator(output_dir=str(self.test_dir),
+                                                           client=client, **kwargs)
+        synchronized = [{"screenshot": {"file_path": str(path)}, "transcript": None}
+                        for path in self.paths]
+        result = generator.generate_article(synchronized, app_name="テスト")
+        return result["metadata"], client.messages.create.call_args.kwargs
+
+    def test_budget_shrinks_request_and_records_prediction(self):
+        """予算に合わせて縮小した画像を送り、予測と実際の入力トークン数を記録する"""
+        metadata, request = self._generate(token_budget=2000)
+
+        usage = metadata["api_usage"]
+        self.assertEqual(usage["input_tokens"], 2100)
+        self.assertLessEqual(usage["predicted_input_tokens"], 2000)
+        self.assertEqual(metadata["budget"]["token_budget"], 2000)
+
+        blocks = request["messages"][0]["content"]
+        prompt_tokens = estimate_text_tokens(blocks[-1]["text"])
+        self.assertEqual(usage["predicted_input_tokens"],
+                         prompt_tokens + sum(i["predicted_tokens"] for i in metadata["images"]))
+        for block, image in zip(blocks[:-1], metadata["images"]):
+            data = base64.b64decode(block["source"]["data"])
+            self.assertEqual(decoded_size(ImageArtifact(data, 'image/png')),
+                             (image["width"], image["height"]))
+            self.assertLess(image["scale"], 1.0)
+
+    def test_without_budget_sends_original_bytes(self):
+        """予算を指定しない場合は（APIの制限内の）元のバイト列を送り、予測トークン数だけを記録する"""
+        for i, path in enumerate(self.paths):
+            path.write_bytes(encode_image(phone_screenshot(i, size=(590, 1278)), 'png'))
+        metadata, request = self._generate()
+        blocks = request["messages"][0]["content"]
+        for block, path in zip(blocks[:-1], self.paths):
+            self.assertEqual(base64.b64decode(block["source"]["data"]), path.read_bytes())
+        self.assertNotIn("budget", metadata)
+        self.assertEqual([i["optimized"] for i in metadata["images"]], [False, False])
+        self.assertGreater(metadata["api_usage"]["predicted_input_tokens"],
+                           2 * estimate_image_tokens(590, 1278))
+
+    def test_without_budget_shrinks_images_over_api_limit(self):
+        """予算を指定しない場合も、APIの制限を超える画像は縮小して警告する"""
+        self.assertGreater(self.paths[0].stat().st_size, MAX_IMAGE_BYTES)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            metadata, request = self._generate()
+
+        for block in request["messages"][0]["content"][:-1]:
+            self.assertLessEqual(len(base64.b64decode(block["source"]["data"])),
+                                 MAX_IMAGE_BYTES)
+        self.assertEqual([i["optimized"] for i in metadata["images"]], [True, True])
+        self.assertIn("APIの制限", output.getvalue())
+
+    def test_warns_when_budget_is_exceeded(self):
+        """最小の長辺まで縮小しても予算に収まらない場合は警告して送る"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            metadata, _ = self._generate(token_budget=100, byte_budget=1024)
+
+        self.assertGreater(metadata["api_usage"]["predicted_input_tokens"], 100)
+        self.assertGreater(metadata["budget"]["image_bytes"], 1024)
+        self.assertIn("トークン予算を超えています", output.getvalue())
+        self.assertIn("バイト予算を超えています", output.getvalue())
+
+    def test_cli_options(self):
+        """--ai-token-budget / --ai-byte-budget-mb の解析"""
+        parser = extract_screenshots.create_argument_parser()
+        args = parser.parse_args(['-i', 'video.mp4'])
+        self.assertEqual((args.ai_token_budget, args.ai_byte_budget_mb), (None, None))
+        args = parser.parse_args(['-i', 'video.mp4', '--ai-token-budget', '30000',
+                                  '--ai-byte-budget-mb', '5'])
+        self.assertEqual((args.ai_token_budget, args.ai_byte_budget_mb), (30000, 5.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
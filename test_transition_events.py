@@ -0,0 +1,117 @@
+"""
+TransitionEventTracker のユニットテスト
+
+テスト対象:
+- 連続する閾値超えサンプルの統合（enter / settle / exit）
+- 粗いサンプリングでの統合の抑制（max_gap）
+- ScreenshotExtractor での画面アニメーションの1イベント化（2パス・1パス）
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from extract_screenshots import ScreenshotExtractor
+from fixtures import create_test_video
+from transition_events import TransitionEventTracker, coalesce_transitions
+
+
+def draw_wipe(frame: np.ndarray, offset: int, previous, fps: int = 10) -> np.ndarray:
+    """新しい画面が1秒かけて左からワイプインするフレーム（右側に前の画面が残る）"""
+    if previous is not None and offset < fps:
+        x = frame.shape[1] * (offset + 1) // fps
+        frame[:, x:] = previous[:, x:]
+    return frame
+
+
+class TestTransitionEventTracker(unittest.TestCase):
+    """TransitionEventTracker / coalesce_transitions のテストケース"""
+
+    def test_consecutive_samples_become_one_event(self):
+        """連続するサンプルはピークの距離と落ち着き位置を持つ1つのイベントになる"""
+        events = coalesce_transitions([3, 4, 5, 9], [15, 20, 25, 45], [30, 40, 28, 50], fps=10.0)
+
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0], {
+            'frame_idx': 15, 'timestamp': 1.5, 'magnitude': 40,
+            'settle_frame_idx': 25, 'settle_timestamp': 2.5, 'sample_count': 3
+        })
+        self.assertEqual(events[1]['frame_idx'], 45)
+        self.assertEqual(events[1]['settle_frame_idx'], 45)
+        self.assertEqual(events[1]['sample_count'], 1)
+
+    def test_max_gap_keeps_sparse_samples_separate(self):
+        """サンプル間隔が max_gap を超える場合はまとめない"""
+        events = coalesce_transitions([2, 3], [40, 60], [30, 30], fps=10.0, max_gap=10)
+
+        self.assertEqual([e['frame_idx'] for e in events], [40, 60])
+
+    def test_exit_closes_event(self):
+        """exit() で進行中のイベントが確定し、次のサンプルは新しいイベントになる"""
+        tracker = TransitionEventTracker(fps=10.0)
+        tracker.enter(0, 5, 30)
+
+        event = tracker.exit()
+
+        self.assertEqual(event['frame_idx'], 5)
+        self.assertIsNone(tracker.event)
+        self.assertFalse(tracker.is_active_at(1, 10))
+
+
+class TestTransitionEventsInExtractor(unittest.TestCase):
+    """ScreenshotExtractor での遷移イベント統合のテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        # 画面は3秒ごとに切り替わり（30, 60フレーム目）、ワイプ中の複数サンプルで距離が大きくなる
+        self.video_path = create_test_video(Path(self.test_dir) / "wipe.avi",
+                                            render=draw_wipe)
+        self.output_dir = Path(self.test_dir) / "output"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _create_extractor(self, **kwargs) -> ScreenshotExtractor:
+        extractor = ScreenshotExtractor(str(self.video_path), str(self.output_dir),
+                                        transition_threshold=15, **kwargs)
+        self.assertTrue(extractor.open_video())
+        self.addCleanup(extractor.close_video)
+        return extractor
+
+    def test_animation_becomes_single_event(self):
+        """ワイプ中の複数サンプルは画面切り替えごとに1つのイベントになる"""
+        transitions = self._create_extractor().detect_scene_transitions()
+
+        self.assertEqual([t['frame_idx'] for t in transitions], [30, 65])
+        self.assertEqual([t['settle_frame_idx'] for t in transitions], [40, 70])
+        self.assertEqual([t['sample_count'] for t in transitions], [3, 2])
+        self.assertEqual(transitions[0]['magnitude'], 26)
+
+    def test_stable_frame_search_starts_at_settle_point(self):
+        """安定フレームは落ち着き位置から探索する"""
+        extractor = self._create_extractor()
+        transitions = extractor.detect_scene_transitions()
+
+        with patch.object(extractor, 'find_stable_frame', return_value=None) as mock_find:
+            list(extractor.iter_stable_frames(transitions))
+
+        self.assertEqual([c.args[0] for c in mock_find.call_args_list], [40, 70])
+
+    def test_single_pass_matches_two_pass(self):
+        """1パスモードも同じイベントと安定フレームを返す"""
+        two_pass = self._create_extractor()
+        expected = list(two_pass.iter_stable_frames(two_pass.detect_scene_transitions()))
+
+        results = list(self._create_extractor(single_pass=True).iter_transitions_single_pass())
+
+        self.assertEqual([t for t, _ in results], [t for t, _ in expected])
+        self.assertEqual([s['frame_idx'] for _, s in results],
+                         [s['frame_idx'] for _, s in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+ParameterTuner のユニットテスト
+
+テスト対象:
+- スイープ範囲の解析
+- 閾値ごとの遷移数・候補数（ベクトル化）
+- select_top_screenshots と同じ貪欲選択
+- tune サブコマンド
+"""
+
+import io
+import json
+import shutil
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+from extract_screenshots import ScreenshotExtractor, create_tune_argument_parser, run_tune
+from fixtures import create_test_video
+from tuning import ParameterTuner, format_table, parse_range
+
+
+def make_signal(distances: list) -> tuple:
+    """連続サンプル間の距離が distances になるハッシュ信号を作る（10fps・5フレーム間隔）"""
+    hashes = [0]
+    for distance in distances:
+        hashes.append(hashes[-1] ^ ((1 << distance) - 1))
+    frame_indices = np.arange(len(hashes)) * 5
+    return frame_indices, np.array(hashes, dtype=np.uint64)
+
+
+class TestParseRange(unittest.TestCase):
+    """parse_range のテストケース"""
+
+    def test_comma_separated(self):
+        """カンマ区切りの値"""
+        self.assertEqual(parse_range('5,10,15', float), [5.0, 10.0, 15.0])
+
+    def test_start_stop_step_includes_stop(self):
+        """start:stop:step は stop を含む"""
+        self.assertEqual(parse_range('10:20:5', int), [10, 15, 20])
+        self.assertEqual(parse_range('0.5:1.5:0.5', float), [0.5, 1.0, 1.5])
+
+    def test_invalid_range_raises(self):
+        """不正な範囲はValueError"""
+        with self.assertRaises(ValueError):
+            parse_range('10:20', int)
+        with self.assertRaises(ValueError):
+            parse_range('10:20:0', int)
+
+
+class TestParameterTuner(unittest.TestCase):
+    """ParameterTuner のテストケース"""
+
+    def setUp(self):
+        # 距離: 0, 30, 0, 20, 0, 40, 0, ... （10fps、5フレーム = 0.5秒間隔）
+        frame_indices, hashes = make_signal([0, 30, 0, 20, 0, 40] + [0] * 10)
+        self.tuner = ParameterTuner(frame_indices, hashes, fps=10.0,
+                                    total_frames=100, target_count=10)
+
+    def test_transition_counts_per_threshold(self):
+        """閾値ごとの遷移数"""
+        self.assertEqual(self.tuner.transition_counts([10, 25, 35, 50]).tolist(), [3, 2, 1, 0])
+
+    def test_candidates_require_stable_window(self):
+        """安定フレームの探索範囲が動画内に収まらない遷移は候補にならない"""
+        frame_indices, hashes = make_signal([0, 30])
+        tuner = ParameterTuner(frame_indices, hashes, fps=10.0, total_frames=11)
+
+        self.assertEqual(tuner.transition_counts([25]).tolist(), [1])
+        self.assertEqual(tuner.candidate_counts([25]).tolist(), [0])
+
+    def test_select_prefers_magnitude_and_respects_interval(self):
+        """大きい遷移を優先し、間隔より近いものは選ばない"""
+        # 遷移: 1.0秒(30), 2.0秒(20), 3.0秒(40)
+        self.assertEqual(self.tuner.select(10, interval=0.5), [1.0, 2.0, 3.0])
+        self.assertEqual(self.tuner.select(10, interval=1.5), [1.0, 3.0])
+        self.assertEqual(self.tuner.select(10, interval=5.0), [3.0])
+
+    def test_select_matches_extractor(self):
+        """select_top_screenshots と同じ選択になる"""
+        extractor = ScreenshotExtractor.__new__(ScreenshotExtractor)
+        extractor.target_count = 2
+        extractor.min_time_interval = 1.5
+        extractor.selection = 'greedy'
+        extractor.diversity_radius = None
+        candidates = [{'timestamp': t, 'score': d * 2.0}
+                      for t, d in [(1.0, 30), (2.0, 20), (3.0, 40)]]
+        expected = [c['timestamp'] for c in extractor.select_top_screenshots(candidates)]
+
+        self.tuner.target_count = 2
+        self.assertEqual(self.tuner.select(10, interval=1.5), expected)
+
+    def test_consecutive_samples_count_as_one_event(self):
+        """連続して閾値を超えたサンプルは1つのイベントとして数え、落ち着き位置で選択する"""
+        frame_indices, hashes = make_signal([0, 30, 40, 0, 0, 30] + [0] * 10)
+        tuner = ParameterTuner(frame_indices, hashes, fps=10.0, total_frames=100, max_gap=10)
+
+        self.assertEqual(tuner.transition_counts([25]).tolist(), [2])
+        self.assertEqual(tuner.candidate_counts([25]).tolist(), [2])
+        # ピーク40のイベント（落ち着き位置 1.5秒）が優先される
+        self.assertEqual(tuner.select(25, interval=5.0), [1.5])
+        self.assertEqual(tuner.select(25, interval=0.5), [1.5, 3.0])
+
+    def test_sweep_grid(self):
+        """閾値 × 間隔の全組み合わせを評価する"""
+        results = self.tuner.sweep([10, 25], [0.5, 5.0])
+
+        self.assertEqual([(r['threshold'], r['interval']) for r in results],
+                         [(10, 0.5), (10, 5.0), (25, 0.5), (25, 5.0)])
+        self.assertEqual(results[2]['transitions'], 2)
+        self.assertEqual(results[2]['selected_timestamps'], [1.0, 3.0])
+        self.assertIn('threshold', format_table(results))
+
+    def test_large_sweep_is_fast(self):
+        """1時間分（0.5秒間隔）の信号で100点のスイープが1秒未満"""
+        rng = np.random.default_rng(0)
+        hashes = rng.integers(0, 2 ** 63, 7200, dtype=np.uint64)
+        hashes[rng.random(7200) < 0.9] = 0
+        tuner = ParameterTuner(np.arange(7200) * 15, np.sort(hashes), fps=30.0,
+                               total_frames=7200 * 15)
+
+        start = time.time()
+        results = tuner.sweep(list(range(10, 60, 5)), [float(i) for i in range(5, 55, 5)])
+
+        self.assertEqual(len(results), 100)
+        self.assertLess(time.time() - start, 1.0)
+
+
+class TestTuneCommand(unittest.TestCase):
+    """tune サブコマンドのテストケース"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = create_test_video(Path(self.test_dir) / "test.avi")
+        self.output_dir = Path(self.test_dir) / "output"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_json_output(self):
+        """JSON出力は標準出力にJSONだけを書く"""
+        args = create_tune_argument_parser().parse_args([
+            '-i', str(self.video_path), '-o', str(self.output_dir),
+            '--thresholds', '20,40', '--intervals', '1', '--format', 'json'
+        ])
+
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            exit_code = run_tune(args)
+
+        self.assertEqual(exit_code, 0)
+        results = json.loads(stdout.getvalue())
+        self.assertEqual([r['transitions'] for r in results], [2, 0])
+        self.assertEqual(results[0]['selected_timestamps'], [3.0, 6.0])
+
+    def test_invalid_range_returns_error(self):
+        """不正な範囲指定はエラー終了"""
+        args = create_tune_argument_parser().parse_args([
+            '-i', str(self.video_path), '--thresholds', '1:2'
+        ])
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(run_tune(args), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
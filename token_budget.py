@@ -0,0 +1,306 @@
+"""
+TokenBudget - リクエスト全体のトークン・バイト予算に合わせた画像の最適化
+
+スクリーンショットを撮影時の解像度のまま送ると（1179x2556 のスマートフォンの画面など）、
+UIの説明に必要な量よりはるかに多い入力トークンとアップロードのバイト数がかかり、
+コストは生成後の total_cost_usd で初めて分かる。送信前に予算に合わせて画像を縮小し、
+入力トークン数を予測する。
+
+- 画像のトークン数は (幅 × 高さ) / 750 で見積もる（APIが自動で縮小する長辺 1568px・
+  約115万画素を超える分は数えない）
+- トークン予算はプロンプトの見積もりを引いた残りを画像に水位分配する
+  （分配量より少ない画像はそのまま、多い画像は同じ分配量まで縮小）
+- バイト予算は小さい画像から順に残りを均等に分配し、PNG（可逆）で収まらなければ
+  高品質の WebP にし、それでも収まらなければさらに縮小する
+- 縮小も再エンコードも不要な画像は元のバイト列をそのまま送る
+- 予算を指定しない場合も、APIの1画像の制限（3.75MB・8000px）を超える画像だけは縮小する。
+  最小の長辺まで縮小しても 3.75MB を超える画像は、最小の長辺より小さく縮小する
+- 予測した入力トークン数を記録し、レスポンスの usage.input_tokens と比較できるようにする
+- チャンクに分けて生成する場合は、予算を画像の枚数に比例してチャンクのリクエストに分配する
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from artifact_store import ImageArtifact
+from image_encoder import encode_image, get_image_format
+from image_processor import ImageProcessor, sniff_image
+
+
+# 画像のトークン数の見積もり（幅 × 高さ / 750）
+IMAGE_TOKEN_DIVISOR = 750
+
+# APIが自動で縮小する上限（長辺・画素数）
+MAX_IMAGE_LONG_EDGE = 1568
+MAX_IMAGE_PIXELS = 1_150_000
+
+# これより小さくは縮小しない長辺（UIの文字が読めなくなるため）
+MIN_IMAGE_LONG_EDGE = 384
+
+# PNG で予算に収まらない場合の形式と品質
+LOSSY_IMAGE_FORMAT = 'webp'
+LOSSY_IMAGE_QUALITY = 90
+
+# バイト予算に収まらない場合に1回ごとに縮小する倍率
+BYTE_BUDGET_SHRINK = 0.8
+
+# 1画像あたりのファイルサイズの上限（Claude API の制限）
+MAX_IMAGE_BYTES = int(ImageProcessor.MAX_FILE_SIZE_MB * 1024 * 1024)
+
+
+def api_image_size(width: int, height: int) -> Tuple[int, int]:
+    """APIが自動で縮小した後の寸法（長辺 1568px・約115万画素まで）"""
+    scale = min(1.0, MAX_IMAGE_LONG_EDGE / max(width, height),
+                math.sqrt(MAX_IMAGE_PIXELS / (width * height)))
+    if scale >= 1.0:
+        return width, height
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """画像の入力トークン数を見積もる"""
+    width, height = api_image_size(width, height)
+    return math.ceil(width * height / IMAGE_TOKEN_DIVISOR)
+
+
+def estimate_text_tokens(text: str) -> int:
+    """テキストの入力トークン数を見積もる（ASCII は4文字で1トークン、それ以外は1文字1トークン）"""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+
+def allocate_tokens(native_tokens: Sequence[int], budget: int) -> List[int]:
+    """
+    画像ごとのトークン数を予算内に水位分配
+
+    Args:
+        native_tokens: 縮小しない場合の画像ごとのトークン数
+        budget: 画像全体のトークン予算
+
+    Returns:
+        画像ごとに割り当てたトークン数（元のトークン数以下）
+    """
+    allocation = list(native_tokens)
+    if sum(allocation) <= budget:
+        return allocation
+    remaining = max(0, budget)
+    left = len(allocation)
+    for i in sorted(range(len(allocation)), key=lambda i: native_tokens[i]):
+        allocation[i] = min(native_tokens[i], remaining // left)
+        remaining -= allocation[i]
+        left -= 1
+    return allocation
+
+
+def split_budget(budget: Optional[int], counts: Sequence[int]) -> List[Optional[int]]:
+    """
+    予算を画像の枚数に比例してチャンクに分配
+
+    Args:
+        budget: 全体の予算（Noneの場合は制限しない）
+        counts: チャンクごとの画像の枚数
+
+    Returns:
+        チャンクごとの予算（合計は budget。budget が None の場合はすべて None）
+    """
+    if budget is None:
+        return [None] * len(counts)
+    total = max(1, sum(counts))
+    shares = [budget * count // total for count in counts]
+    # 切り捨てた端数は先頭のチャンクから1ずつ配る
+    for i in range(budget - sum(shares)):
+        shares[i % len(shares)] += 1
+    return shares
+
+
+class ImageBudgetOptimizer:
+    """リクエスト全体のトークン・バイト予算に合わせて画像の縮小倍率と形式を決める"""
+
+    def __init__(self, token_budget: Optional[int] = None,
+                 byte_budget: Optional[int] = None,
+                 min_long_edge: int = MIN_IMAGE_LONG_EDGE,
+                 lossy_format: str = LOSSY_IMAGE_FORMAT,
+                 lossy_quality: int = LOSSY_IMAGE_QUALITY) -> None:
+        """
+        Args:
+            token_budget: リクエスト全体の入力トークンの予算（Noneの場合は制限しない）
+            byte_budget: リクエスト全体の画像のバイト数の予算（Noneの場合は1画像の上限のみ）
+            min_long_edge: これより小さくは縮小しない長辺（ピクセル）
+            lossy_format: PNG で予算に収まらない場合の形式（webp, jpeg）
+            lossy_quality: lossy_format の品質
+
+        Raises:
+            ValueError: 未知の形式の場合
+        """
+        get_image_format(lossy_format)
+        self.token_budget = token_budget
+        self.byte_budget = byte_budget
+        self.min_long_edge = min_long_edge
+        self.lossy_format = lossy_format
+        self.lossy_quality = lossy_quality
+
+    def optimize(self, artifacts: Sequence[ImageArtifact], text_tokens: int = 0
+                 ) -> Tuple[List[ImageArtifact], List[Dict]]:
+        """
+        画像を予算に合わせて縮小・再エンコード
+
+        Args:
+            artifacts: 送信する画像
+            text_tokens: プロンプトなど画像以外の入力トークン数の見積もり
+
+        Returns:
+            (送信する画像,
+             画像ごとの計画 [{"width", "height", "scale", "media_type", "size",
+                              "predicted_tokens", "optimized"}])
+
+        Raises:
+            ValueError: 画像をデコードできない場合
+        """
+        sizes = [self.image_size(artifact) for artifact in artifacts]
+        native_tokens = [estimate_image_tokens(w, h) for w, h in sizes]
+        if self.token_budget is None:
+            allocation = native_tokens
+        else:
+            allocation = allocate_tokens(native_tokens, self.token_budget - text_tokens)
+
+        # 小さい画像から順に、残りのバイト予算を均等に分配
+        byte_budget = self.byte_budget
+        results: List[Optional[Tuple[ImageArtifact, Dict]]] = [None] * len(artifacts)
+        order = sorted(range(len(artifacts)), key=lambda i: artifacts[i].size)
+        for left, i in zip(range(len(order), 0, -1), order):
+            allowance = MAX_IMAGE_BYTES
+            if byte_budget is not None:
+                allowance = min(allowance, max(0, byte_budget) // left)
+            results[i] = self.fit_image(artifacts[i], sizes[i], allocation[i], allowance)
+            if byte_budget is not None:
+                byte_budget -= results[i][0].size
+
+        return [artifact for artifact, _ in results], [plan for _, plan in results]
+
+    def describe(self, artifacts: Sequence[ImageArtifact]) -> List[Dict]:
+        """画像を変更しない場合の計画（予測トークン数の記録用）"""
+        plans = []
+        for artifact in artifacts:
+            try:
+                size = self.image_size(artifact)
+            except ValueError:
+                # 寸法が分からない画像はトークン数を予測しない
+                plans.append({"media_type": artifact.media_type, "size": artifact.size,
+                              "predicted_tokens": None, "optimized": False})
+                continue
+            plans.append(self.plan(artifact, size, size, optimized=False))
+        return plans
+
+    def enforce_limits(self, artifacts: Sequence[ImageArtifact]
+                       ) -> Tuple[List[ImageArtifact], List[Dict]]:
+        """
+        予算を指定しない場合に、APIの1画像の制限（3.75MB・8000px）を超える画像だけを縮小
+
+        制限内の画像は describe() と同じく元のバイト列のまま送る。
+
+        Returns:
+            (送信する画像, 画像ごとの計画（optimize() と同じ形式）)
+
+        Raises:
+            ValueError: 制限を超える画像をデコードできない場合
+        """
+        results = []
+        plans = []
+        for artifact, plan in zip(artifacts, self.describe(artifacts)):
+            long_edge = max(plan.get("width", 0), plan.get("height", 0))
+            if artifact.size > MAX_IMAGE_BYTES or long_edge > ImageProcessor.MAX_DIMENSION_PX:
+                size = self.image_size(artifact)
+                artifact, plan = self.fit_image(artifact, size, estimate_image_tokens(*size),
+                                                MAX_IMAGE_BYTES)
+            results.append(artifact)
+            plans.append(plan)
+        return results, plans
+
+    @staticmethod
+    def image_size(artifact: ImageArtifact) -> Tuple[int, int]:
+        """画像の (幅, 高さ)（ヘッダーから判定できない場合はデコードする）"""
+        try:
+            _, width, height = sniff_image(artifact.data)
+            return width, height
+        except ValueError:
+            frame = ImageBudgetOptimizer.decode(artifact)
+            return frame.shape[1], frame.shape[0]
+
+    @staticmethod
+    def decode(artifact: ImageArtifact) -> np.ndarray:
+        """画像をデコード"""
+        frame = cv2.imdecode(np.frombuffer(artifact.data, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError(f"Cannot decode image ({artifact.media_type})")
+        return frame
+
+    def target_size(self, size: Tuple[int, int], tokens: int) -> Tuple[int, int]:
+        """割り当てたトークン数に収まる寸法（API の自動縮小後の寸法・最小の長辺を考慮）"""
+        width, height = size
+        api_width, api_height = api_image_size(width, height)
+        scale = min(1.0, math.sqrt(max(tokens, 0) * IMAGE_TOKEN_DIVISOR /
+                                   (api_width * api_height)))
+        floor = min(1.0, self.min_long_edge / max(api_width, api_height))
+        scale = max(scale, floor)
+        if scale >= 1.0 and (api_width, api_height) == (width, height):
+            return width, height
+        return max(1, int(api_width * scale)), max(1, int(api_height * scale))
+
+    def fit_image(self, artifact: ImageArtifact, size: Tuple[int, int], tokens: int,
+                  allowance: int) -> Tuple[ImageArtifact, Dict]:
+        """
+        1枚の画像をトークン数・バイト数の割り当てに合わせる
+
+        割り当ては最小の長辺までしか縮小しないため、超えることがある
+        （計画の size で確認する）。APIの1画像の上限（MAX_IMAGE_BYTES）は
+        最小の長辺より小さく縮小してでも守る。
+        """
+        width, height = size
+        target = self.target_size(size, tokens)
+        if target == size and artifact.size <= allowance:
+            # 縮小も再エンコードも不要な画像は元のバイト列のまま
+            return artifact, self.plan(artifact, size, size, optimized=False)
+
+        frame = self.decode(artifact)
+        min_width = min(width, round(width * self.min_long_edge / max(width, height)))
+        while True:
+            resized = frame
+            if target != size:
+                resized = cv2.resize(frame, target, interpolation=cv2.INTER_AREA)
+            data = encode_image(resized, 'png')
+            image_format = 'png'
+            if len(data) > allowance:
+                data = encode_image(resized, self.lossy_format, self.lossy_quality)
+                image_format = self.lossy_format
+            if len(data) <= allowance:
+                break
+            if target[0] <= min_width:
+                if len(data) <= MAX_IMAGE_BYTES or target[0] <= 1:
+                    break
+                # APIの1画像の上限は最小の長辺より優先する
+                min_width = 1
+            # バイト予算に収まるまで縮小（最小の長辺まで）
+            target_width = max(min_width, int(target[0] * BYTE_BUDGET_SHRINK))
+            target = (target_width, max(1, round(height * target_width / width)))
+
+        optimized = ImageArtifact(data, get_image_format(image_format)['media_type'],
+                                  source=artifact.source)
+        return optimized, self.plan(optimized, size, target, optimized=True)
+
+    @staticmethod
+    def plan(artifact: ImageArtifact, original: Tuple[int, int], size: Tuple[int, int],
+             optimized: bool) -> Dict:
+        """画像ごとの計画（メタデータに記録する）"""
+        width, height = size
+        return {
+            "width": width,
+            "height": height,
+            "scale": round(width / original[0], 4),
+            "media_type": artifact.media_type,
+            "size": artifact.size,
+            "predicted_tokens": estimate_image_tokens(width, height),
+            "optimized": optimized
+        }
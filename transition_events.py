@@ -0,0 +1,115 @@
+"""
+TransitionEventTracker - 連続する閾値超えサンプルを1つの画面遷移イベントにまとめる
+
+1秒程度の画面アニメーションは、0.5秒間隔のサンプルで2〜3回続けて閾値を
+超えることがある。これらを別々の遷移として扱うと、ほぼ同じフレームに対して
+安定フレーム探索と OCR が繰り返される。
+
+状態遷移:
+- idle → changing（enter）: 閾値を超えたサンプルで遷移イベントを開始
+- changing → changing: 続けて閾値を超えたサンプル（max_gap 以内）でピークと落ち着き位置を更新
+- changing → idle（exit）: 閾値以下のサンプルでイベントを確定
+
+イベントの落ち着き位置（settle）は最後に閾値を超えたサンプルで、
+以降のサンプルでは画面がほとんど変化していない。
+"""
+
+from typing import Dict, List, Optional
+
+
+class TransitionEventTracker:
+    """閾値超えサンプルの列を画面遷移イベントに変換する状態機械"""
+
+    def __init__(self, fps: float, max_gap: Optional[int] = None) -> None:
+        """
+        Args:
+            fps: 動画のフレームレート（タイムスタンプの計算に使用）
+            max_gap: 1つのイベントにまとめるサンプル間隔の上限（フレーム数、
+                Noneの場合は制限なし）。粗いサンプリングで別々の画面遷移を
+                まとめてしまわないために使う
+        """
+        self.fps = fps
+        self.max_gap = max_gap
+        self.event: Optional[Dict] = None
+        self.last_position: Optional[int] = None
+
+    def enter(self, position: int, frame_idx: int, magnitude: int) -> None:
+        """遷移イベントを開始"""
+        self.event = {
+            'frame_idx': frame_idx,
+            'timestamp': frame_idx / self.fps,
+            'magnitude': magnitude,
+            'settle_frame_idx': frame_idx,
+            'settle_timestamp': frame_idx / self.fps,
+            'sample_count': 1
+        }
+        self.last_position = position
+
+    def extend(self, position: int, frame_idx: int, magnitude: int) -> None:
+        """続けて閾値を超えたサンプルでピークと落ち着き位置を更新"""
+        self.event['magnitude'] = max(self.event['magnitude'], magnitude)
+        self.event['settle_frame_idx'] = frame_idx
+        self.event['settle_timestamp'] = frame_idx / self.fps
+        self.event['sample_count'] += 1
+        self.last_position = position
+
+    def exit(self) -> Optional[Dict]:
+        """進行中のイベントを確定して返す（イベントがない場合は None）"""
+        event, self.event = self.event, None
+        self.last_position = None
+        return event
+
+    def update(self, position: int, frame_idx: int, magnitude: int) -> Optional[Dict]:
+        """
+        閾値を超えたサンプルを1つ受け取る
+
+        Args:
+            position: サンプルの通し番号（連続判定に使用）
+            frame_idx: サンプルのフレーム番号
+            magnitude: 前サンプルとのハミング距離
+
+        Returns:
+            直前のイベントが確定した場合はそのイベント、それ以外は None
+        """
+        if self.is_active_at(position, frame_idx):
+            self.extend(position, frame_idx, magnitude)
+            return None
+
+        finished = self.exit()
+        self.enter(position, frame_idx, magnitude)
+        return finished
+
+    def is_active_at(self, position: int, frame_idx: int) -> bool:
+        """サンプルが進行中のイベントの続きになるか"""
+        if self.event is None or position != self.last_position + 1:
+            return False
+        return self.max_gap is None or frame_idx - self.event['settle_frame_idx'] <= self.max_gap
+
+
+def coalesce_transitions(positions: List[int], frame_indices: List[int],
+                         magnitudes: List[int], fps: float,
+                         max_gap: Optional[int] = None) -> List[Dict]:
+    """
+    閾値を超えたサンプルの列を画面遷移イベントのリストに変換
+
+    Args:
+        positions: 閾値を超えたサンプルの通し番号（昇順）
+        frame_indices: 各サンプルのフレーム番号
+        magnitudes: 各サンプルの前サンプルとのハミング距離
+        fps: 動画のフレームレート
+        max_gap: 1つのイベントにまとめるサンプル間隔の上限（フレーム数）
+
+    Returns:
+        [{'frame_idx', 'timestamp', 'magnitude', 'settle_frame_idx',
+          'settle_timestamp', 'sample_count'}, ...]
+    """
+    tracker = TransitionEventTracker(fps, max_gap)
+    events = []
+    for position, frame_idx, magnitude in zip(positions, frame_indices, magnitudes):
+        finished = tracker.update(position, frame_idx, magnitude)
+        if finished is not None:
+            events.append(finished)
+    finished = tracker.exit()
+    if finished is not None:
+        events.append(finished)
+    return events
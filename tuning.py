@@ -0,0 +1,235 @@
+"""
+ParameterTuner - ハッシュ信号からの閾値・間隔スイープ
+
+ハッシュ信号（サンプルフレームのpHash列）から連続サンプル間の距離信号を
+1回だけ計算し、--threshold と --interval の組み合わせごとに
+遷移数・候補数・選択されるタイムスタンプを評価する。
+
+動画の再デコードや OCR は行わないため、候補のスコアには信号から計算できる
+遷移の大きさの項（magnitude * 2.0）だけを使う。選択結果は本番の選択
+（安定度・UI重要度を含むスコア）の目安となる。
+
+本番と同じく、連続して閾値を超えたサンプルは1つの遷移イベント
+（ピークの距離、落ち着き位置のタイムスタンプ）として数える。
+"""
+
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from phash_engine import consecutive_distances
+
+
+# スコアのうち遷移の大きさの重み（ScreenshotExtractor.compute_final_score と同じ）
+MAGNITUDE_WEIGHT = 2.0
+
+
+def parse_range(spec: str, cast=float) -> List:
+    """
+    スイープ範囲の指定を値のリストに変換
+
+    "10,20,30" のようなカンマ区切り、または "start:stop:step"（stopを含む）形式。
+
+    Args:
+        spec: 範囲指定文字列
+        cast: 値の型（int / float）
+
+    Returns:
+        値のリスト
+
+    Raises:
+        ValueError: 形式が不正な場合
+    """
+    if ':' in spec:
+        parts = spec.split(':')
+        if len(parts) != 3:
+            raise ValueError(f"Invalid range (expected start:stop:step): {spec}")
+        start, stop, step = (float(p) for p in parts)
+        if step <= 0:
+            raise ValueError(f"Range step must be positive: {spec}")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return [cast(round(start + i * step, 6)) for i in range(max(0, count))]
+    return [cast(value) for value in spec.split(',') if value.strip()]
+
+
+class ParameterTuner:
+    """距離信号に対して閾値・間隔のグリッドを評価する"""
+
+    def __init__(self, frame_indices: np.ndarray, hashes: np.ndarray, fps: float,
+                 total_frames: int, target_count: int = 10,
+                 max_gap: Optional[int] = None) -> None:
+        """
+        Args:
+            frame_indices: サンプルしたフレーム番号の配列
+            hashes: 対応するpHashの配列
+            fps: 動画のフレームレート
+            total_frames: 動画の総フレーム数
+            target_count: 抽出する目標枚数
+            max_gap: 1つの遷移イベントにまとめるサンプル間隔の上限（フレーム数）
+        """
+        self.fps = fps
+        self.total_frames = total_frames
+        self.target_count = target_count
+
+        frame_indices = np.asarray(frame_indices, dtype=np.int64)
+        # 遷移位置は距離の右側のサンプル
+        self.distances = consecutive_distances(hashes)
+        self.frame_indices = frame_indices[1:]
+        self.timestamps = self.frame_indices / fps
+
+        # 安定フレームの探索範囲（遷移の0.5秒後から1.5秒後）に2フレーム以上ある遷移だけが候補になる
+        search_start = self.frame_indices + int(fps * 0.5)
+        search_end = np.minimum(self.frame_indices + int(fps * 1.5), total_frames)
+        self.has_stable_window = (search_end - search_start) >= 2
+
+        # 隣接する距離サンプルを同じイベントにまとめられるか（長さ len(distances) - 1）
+        gaps = np.diff(self.frame_indices)
+        self.joinable = gaps <= max_gap if max_gap is not None else np.ones(len(gaps), dtype=bool)
+
+    def event_bounds(self, over: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        閾値超えマスクから遷移イベントの開始・落ち着き位置のマスクを求める
+
+        Args:
+            over: (..., len(distances)) の閾値超えマスク
+
+        Returns:
+            (starts, settles): 同じ形状のブールマスク
+        """
+        joined_prev = np.zeros_like(over)
+        joined_prev[..., 1:] = over[..., :-1] & self.joinable
+        joined_next = np.zeros_like(over)
+        joined_next[..., :-1] = over[..., 1:] & self.joinable
+        return over & ~joined_prev, over & ~joined_next
+
+    def transition_counts(self, thresholds: Sequence[int]) -> np.ndarray:
+        """閾値ごとの遷移イベント数（閾値 × サンプルのブロードキャスト比較）"""
+        over = self.distances[None, :] > np.asarray(thresholds)[:, None]
+        starts, _ = self.event_bounds(over)
+        return np.count_nonzero(starts, axis=1)
+
+    def candidate_counts(self, thresholds: Sequence[int]) -> np.ndarray:
+        """閾値ごとの候補数（落ち着き位置から安定フレームを探索できるイベントの数）"""
+        over = self.distances[None, :] > np.asarray(thresholds)[:, None]
+        _, settles = self.event_bounds(over)
+        return np.count_nonzero(settles & self.has_stable_window[None, :], axis=1)
+
+    def select(self, threshold: int, interval: float) -> List[float]:
+        """
+        1つの組み合わせで選択されるタイムスタンプ
+
+        select_top_screenshots と同じ貪欲法（スコア降順に、選択済みと
+        interval 秒以上離れたものを target_count 枚まで選ぶ）。
+
+        Returns:
+            選択された遷移のタイムスタンプ（昇順）
+        """
+        over = self.distances > threshold
+        starts, settles = self.event_bounds(over)
+        start_positions = np.flatnonzero(starts)
+        if len(start_positions) == 0:
+            return []
+
+        # イベントのピーク距離（開始位置ごとの区間最大、イベント外は0）
+        peaks = np.maximum.reduceat(np.where(over, self.distances, 0), start_positions)
+        settle_positions = np.flatnonzero(settles)
+        keep = self.has_stable_window[settle_positions]
+        timestamps = self.timestamps[settle_positions][keep]
+        scores = peaks[keep] * MAGNITUDE_WEIGHT
+        # 同点は時系列順（sorted の安定ソートと同じ）
+        order = np.argsort(-scores, kind='stable')
+
+        selected = []
+        for timestamp in timestamps[order].tolist():
+            if len(selected) >= self.target_count:
+                break
+            if not any(abs(timestamp - sel) < interval for sel in selected):
+                selected.append(timestamp)
+        return sorted(selected)
+
+    def sweep(self, thresholds: Sequence[int], intervals: Sequence[float]) -> List[Dict]:
+        """
+        閾値 × 間隔のグリッドを評価
+
+        Returns:
+            [{'threshold', 'interval', 'transitions', 'candidates',
+              'selected_count', 'selected_timestamps'}, ...]
+        """
+        transition_counts = self.transition_counts(thresholds)
+        candidate_counts = self.candidate_counts(thresholds)
+
+        results = []
+        for threshold, transitions, candidates in zip(thresholds, transition_counts,
+                                                      candidate_counts):
+            for interval in intervals:
+                selected = self.select(threshold, interval)
+                results.append({
+                    'threshold': int(threshold),
+                    'interval': float(interval),
+                    'transitions': int(transitions),
+                    'candidates': int(candidates),
+                    'selected_count': len(selected),
+                    'selected_timestamps': [round(t, 3) for t in selected]
+                })
+        return results
+
+
+def format_table(results: List[Dict]) -> str:
+    """スイープ結果をテキストの表に整形"""
+    lines = [
+        f"{'threshold':>9}  {'interval':>8}  {'transitions':>11}  {'candidates':>10}  "
+        f"{'selected':>8}  timestamps"
+    ]
+    for row in results:
+        timestamps = ', '.join(f"{t:.1f}" for t in row['selected_timestamps'])
+        lines.append(
+            f"{row['threshold']:>9}  {row['interval']:>8.1f}  {row['transitions']:>11}  "
+            f"{row['candidates']:>10}  {row['selected_count']:>8}  {timestamps}"
+        )
+    return '\n'.join(lines)
+
+
+def format_json(results: List[Dict]) -> str:
+    """スイープ結果をJSONに整形"""
+    return json.dumps(results, indent=2, ensure_ascii=False)
+
+
+def plot_distance_signal(tuner: ParameterTuner, thresholds: Sequence[int],
+                         output_path: str) -> Optional[str]:
+    """
+    距離信号と閾値をPNGに描画
+
+    Args:
+        tuner: 距離信号を持つ ParameterTuner
+        thresholds: 描画する閾値（多い場合は最小・最大のみ）
+        output_path: 出力PNGファイルパス
+
+    Returns:
+        保存したファイルパス、matplotlib がない場合は None
+    """
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("Error: matplotlib is required for --plot")
+        print("  Install: pip install matplotlib")
+        return None
+
+    lines = sorted(set(int(t) for t in thresholds))
+    if len(lines) > 10:
+        lines = [lines[0], lines[-1]]
+
+    fig, ax = plt.subplots(figsize=(12, 4))
+    ax.plot(tuner.timestamps, tuner.distances, linewidth=0.8, label='Hamming distance')
+    for threshold in lines:
+        ax.axhline(threshold, linestyle='--', linewidth=0.6, color='tab:red')
+    ax.set_xlabel('Time (s)')
+    ax.set_ylabel('Hamming distance')
+    ax.set_ylim(0, 64)
+    ax.set_title(f"Distance signal (thresholds: {', '.join(str(t) for t in lines)})")
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=100)
+    plt.close(fig)
+    return output_path